@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_bjobs_uf_parser.py
+# Description : Compare the regex-per-line "bjobs -UF" parser (get_lsf_bjobs_uf_info) with the streaming,
+#               line-dispatched parser (iter_bjobs_uf_info) on a synthetic "bjobs -u all -d -UF" dump.
+################################
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import tempfile
+from multiprocessing import Process, Queue
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+from common import common
+from common import common_lsf
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--job_num',
+                        type=int,
+                        default=500000,
+                        help='Specify job number of the synthetic bjobs -UF dump, default is 500000.')
+    parser.add_argument('-d', '--dump_file',
+                        default='',
+                        help='Use specified bjobs -UF dump file instead of generating a synthetic one.')
+    parser.add_argument('-c', '--check',
+                        action='store_true',
+                        default=False,
+                        help='Check both parsers return the same job information.')
+
+    args = parser.parse_args()
+
+    return args.job_num, args.dump_file, args.check
+
+
+def gen_bjobs_uf_dump(dump_file, job_num):
+    """
+    Generate a synthetic "bjobs -u all -d -UF" dump with job_num finished jobs.
+    """
+    random.seed(0)
+    user_list = ['user' + str(i) for i in range(500)]
+    queue_list = ['normal', 'short', 'long', 'gpu', 'regress']
+
+    with open(dump_file, 'w') as DF:
+        for i in range(job_num):
+            job = 100000 + i
+            user = random.choice(user_list)
+            queue = random.choice(queue_list)
+            minute = i % 60
+            rusage = 100 + (i % 9000)
+
+            DF.write(f'Job <{job}>, Job Name <regress_{i % 2000}>, User <{user}>, Project <proj{i % 17}>, Status <{"EXIT" if i % 5 == 0 else "DONE"}>, Queue <{queue}>, Command <run_sim -case case_{i} -seed {i % 97} > sim.log>, Share group charged </{user}>\n')
+            DF.write(f'Mon Oct 12 10:{minute:02d}:07: Submitted from host <login{i % 8}>, CWD <$HOME/proj/run_{i % 300}>, {1 + i % 8} Task(s), Requested Resources <span[hosts=1] rusage[mem={rusage}]>;\n')
+            DF.write(f'Mon Oct 12 10:{minute:02d}:09: Started {1 + i % 8} Task(s) on Host(s) <{1 + i % 8}*cmp{i % 4000:04d}>, Allocated {1 + i % 8} Slot(s) on Host(s) <{1 + i % 8}*cmp{i % 4000:04d}>, Execution Home </home/{user}>, Execution CWD </home/{user}/proj/run_{i % 300}>;\n')
+
+            if i % 5 == 0:
+                DF.write(f'Mon Oct 12 11:{minute:02d}:10: Exited with exit code {1 + i % 254}. The CPU time used is {i % 3600}.0 seconds.\n')
+                DF.write(f'Mon Oct 12 11:{minute:02d}:10: Completed <exit>; TERM_RUNLIMIT: job killed after reaching LSF run time limit.\n')
+            else:
+                DF.write(f'Mon Oct 12 11:{minute:02d}:10: Done successfully. The CPU time used is {i % 3600}.0 seconds.\n')
+
+            DF.write(f'Mon Oct 12 10:{minute:02d}:40: Resource usage collected. The CPU time used is {i % 3600} seconds. IDLE_FACTOR(cputime/runtime):   0.{i % 100:02d}; MEM: {i % 8000} Mbytes; SWAP: {i % 4} Gbytes; NTHREAD: 4; PGID: {i}; PIDs: {i} {i + 1} {i + 2};\n')
+            DF.write('\n RUNLIMIT                \n 600.0 min\n\n')
+            DF.write(f' MEMORY USAGE:\n MAX MEM: {i % 9000} Mbytes;  AVG MEM: {i % 5000} Mbytes\n\n')
+            DF.write(' SCHEDULING PARAMETERS:\n           r15s   r1m  r15m   ut      pg    io   ls    it    tmp    swp    mem\n load_sched   -     -     -     -       -     -    -     -     -      -      -\n load_stop    -     -     -     -       -     -    -     -     -      -      -\n\n')
+            DF.write(f' RESOURCE REQUIREMENT DETAILS:\n Combined: select[type == local] order[r15s:pg] rusage[mem={rusage}.00] span[hosts=1]\n Effective: select[type == local] order[r15s:pg] rusage[mem={rusage}.00] span[hosts=1]\n')
+            DF.write('------------------------------------------------------------------------------\n\n')
+
+
+def run_current_parser(dump_file):
+    bjobs_dic = common_lsf.get_lsf_bjobs_uf_info('cat ' + str(dump_file), lsf_unit_for_limits='MB')
+    return len(bjobs_dic)
+
+
+def run_streaming_parser_dict(dump_file):
+    bjobs_dic = common_lsf.get_bjobs_uf_info('cat ' + str(dump_file), tool='LSF', lsf_unit_for_limits='MB')
+    return len(bjobs_dic)
+
+
+def run_streaming_parser(dump_file):
+    job_num = 0
+
+    for (job, job_dic) in common_lsf.iter_bjobs_uf_info('cat ' + str(dump_file), tool='LSF', lsf_unit_for_limits='MB'):
+        job_num += 1
+
+    return job_num
+
+
+def measure(function, dump_file, result_queue):
+    """
+    Run parser function on a child process, report job number/elapsed time/peak RSS.
+    """
+    start_second = time.time()
+    job_num = function(dump_file)
+    elapsed = time.time() - start_second
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result_queue.put((job_num, elapsed, max_rss))
+
+
+def check_parsers(dump_file):
+    """
+    Make sure the streaming parser returns the same job information with the current parser.
+    """
+    current_dic = common_lsf.get_lsf_bjobs_uf_info('cat ' + str(dump_file), lsf_unit_for_limits='MB')
+    streaming_dic = common_lsf.get_bjobs_uf_info('cat ' + str(dump_file), tool='LSF', lsf_unit_for_limits='MB')
+
+    if list(current_dic.keys()) != list(streaming_dic.keys()):
+        common.bprint('Job list is different between current parser and streaming parser.', level='Error')
+        return False
+
+    for job in current_dic.keys():
+        if current_dic[job] != streaming_dic[job]:
+            for key in current_dic[job].keys():
+                if current_dic[job][key] != streaming_dic[job].get(key):
+                    common.bprint(f'Job {job} "{key}" is different: {current_dic[job][key]!r} vs {streaming_dic[job].get(key)!r}', level='Error')
+
+            return False
+
+    common.bprint(f'Check passed, both parsers return the same information for {len(current_dic)} jobs.')
+    return True
+
+
+################
+# Main Process #
+################
+def main():
+    (job_num, dump_file, check) = read_args()
+    tmp_dir = ''
+
+    if not dump_file:
+        tmp_dir = tempfile.mkdtemp(prefix='bench_bjobs_uf_')
+        dump_file = os.path.join(tmp_dir, 'bjobs_uf.txt')
+        common.bprint(f'Generating synthetic bjobs -UF dump with {job_num} jobs ...')
+        gen_bjobs_uf_dump(dump_file, job_num)
+
+    common.bprint(f'Dump file: {dump_file} ({os.path.getsize(dump_file) / 1024 / 1024:.1f} MB)')
+
+    if check and (not check_parsers(dump_file)):
+        sys.exit(1)
+
+    common.bprint(f'{"parser":<40} {"jobs":>10} {"elapsed":>10} {"peak RSS":>12}')
+
+    for (parser_name, function) in [('get_lsf_bjobs_uf_info (current)', run_current_parser),
+                                    ('get_bjobs_uf_info (streaming, dict)', run_streaming_parser_dict),
+                                    ('iter_bjobs_uf_info (streaming)', run_streaming_parser)]:
+        result_queue = Queue()
+        p = Process(target=measure, args=(function, dump_file, result_queue))
+        p.start()
+        (parsed_job_num, elapsed, max_rss) = result_queue.get()
+        p.join()
+        common.bprint(f'{parser_name:<40} {parsed_job_num:>10} {elapsed:>9.1f}s {max_rss / 1024:>10.0f}MB')
+
+    if tmp_dir:
+        os.remove(dump_file)
+        os.rmdir(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
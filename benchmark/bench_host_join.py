@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_host_join.py
+# Description : Compare the list-scan join (host -> bhosts/lshosts row with enumerate/index) with the hash-indexed
+#               CommandTable join used by "bsample -U/-q", on synthetic bhosts/lshosts/lsload/bqueues output.
+################################
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+from common import common
+from common import common_lsf
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--host_num',
+                        type=int,
+                        default=10000,
+                        help='Specify host number, default is 10000.')
+    parser.add_argument('-q', '--queue_num',
+                        type=int,
+                        default=300,
+                        help='Specify queue number, default is 300.')
+    parser.add_argument('-s', '--skip_linear',
+                        action='store_true',
+                        default=False,
+                        help='Skip the list-scan join, it is O(n^2) and slow on big host number.')
+
+    args = parser.parse_args()
+
+    return args.host_num, args.queue_num, args.skip_linear
+
+
+def gen_command_dic(host_num, queue_num):
+    """
+    Generate synthetic get_command_dict() results of bhosts/lshosts/lsload/bqueues and queue-host mapping.
+    """
+    random.seed(0)
+    host_list = ['cmp' + str(i).zfill(5) for i in range(host_num)]
+    bhosts_dic = {'HOST_NAME': [], 'STATUS': [], 'MAX': [], 'NJOBS': [], 'RUN': [], 'SSUSP': [], 'USUSP': []}
+    lshosts_dic = {'HOST_NAME': [], 'ncpus': [], 'maxmem': []}
+    lsload_dic = {'HOST_NAME': [], 'ut': [], 'mem': []}
+
+    for (i, host) in enumerate(host_list):
+        host_max = random.choice(['32', '64', '128', '-'])
+        njobs = str(random.randint(0, 64))
+        bhosts_dic['HOST_NAME'].append(host)
+        bhosts_dic['STATUS'].append(random.choice(['ok', 'closed_Full', 'unavail']))
+        bhosts_dic['MAX'].append(host_max)
+        bhosts_dic['NJOBS'].append(njobs)
+        bhosts_dic['RUN'].append(njobs)
+        bhosts_dic['SSUSP'].append('0')
+        bhosts_dic['USUSP'].append('0')
+        lshosts_dic['HOST_NAME'].append(host)
+        lshosts_dic['ncpus'].append(host_max if host_max != '-' else '32')
+        lshosts_dic['maxmem'].append(random.choice(['256G', '512G', '1T', '-']))
+
+    # lsload lists hosts in a different order.
+    for host in random.sample(host_list, len(host_list)):
+        lsload_dic['HOST_NAME'].append(host)
+        lsload_dic['ut'].append(str(random.randint(0, 100)) + '%')
+        lsload_dic['mem'].append(str(random.randint(1, 900)) + 'G')
+
+    queue_list = ['queue' + str(i) for i in range(queue_num)]
+    bqueues_dic = {'QUEUE_NAME': queue_list, 'NJOBS': [], 'PEND': [], 'RUN': [], 'SUSP': []}
+    queue_host_dic = {}
+
+    for queue in queue_list:
+        for key in ['NJOBS', 'PEND', 'RUN', 'SUSP']:
+            bqueues_dic[key].append(str(random.randint(0, 1000)))
+
+        queue_host_dic[queue] = random.sample(host_list, min(len(host_list), random.randint(50, 2000)))
+
+    return bhosts_dic, lshosts_dic, lsload_dic, bqueues_dic, queue_host_dic
+
+
+def linear_join(bhosts_dic, lshosts_dic, lsload_dic, queue_host_dic):
+    """
+    The list-scan join (old sample_utilization_info/sample_queue_info logic).
+    """
+    utilization_list = []
+
+    for (i, host) in enumerate(lsload_dic['HOST_NAME']):
+        slot_utilization = 0
+
+        for (j, host_name) in enumerate(bhosts_dic['HOST_NAME']):
+            if (host_name == host) and re.match(r'^\d+$', bhosts_dic['NJOBS'][j]) and re.match(r'^\d+$', bhosts_dic['MAX'][j]) and (int(bhosts_dic['MAX'][j]) != 0):
+                slot_utilization = round(int(bhosts_dic['NJOBS'][j])/int(bhosts_dic['MAX'][j])*100, 1)
+                break
+
+        mem_utilization = 0
+
+        for (k, host_name) in enumerate(lshosts_dic['HOST_NAME']):
+            if (host_name == host) and re.match(r'^(\d+(\.\d+)?)([MGT])$', lshosts_dic['maxmem'][k]) and re.match(r'^(\d+(\.\d+)?)([MGT])$', lsload_dic['mem'][i]):
+                maxmem = common_lsf.switch_command_number(lshosts_dic['maxmem'][k], 'mem')
+                mem = common_lsf.switch_command_number(lsload_dic['mem'][i], 'mem')
+                mem_utilization = round((maxmem-mem)*100/maxmem, 1) if maxmem > 0 else 0.0
+                break
+
+        utilization_list.append((host, slot_utilization, mem_utilization))
+
+    queue_slot_dic = {}
+
+    for (queue, queue_host_list) in queue_host_dic.items():
+        total_slots = 0
+
+        for queue_host in queue_host_list:
+            if queue_host in bhosts_dic['HOST_NAME']:
+                host_max = bhosts_dic['MAX'][bhosts_dic['HOST_NAME'].index(queue_host)]
+
+                if re.match(r'^\d+$', host_max):
+                    total_slots += int(host_max)
+
+        queue_slot_dic[queue] = total_slots
+
+    return utilization_list, queue_slot_dic
+
+
+def indexed_join(bhosts_dic, lshosts_dic, lsload_dic, queue_host_dic):
+    """
+    The hash-indexed join (current sample_utilization_info/sample_queue_info logic).
+    """
+    utilization_list = []
+
+    for (i, host) in enumerate(lsload_dic['HOST_NAME']):
+        slot_utilization = 0
+        host_max = bhosts_dic.get_number(host, 'MAX')
+        host_njobs = bhosts_dic.get_number(host, 'NJOBS')
+
+        if host_max and (host_njobs is not None):
+            slot_utilization = round(host_njobs/host_max*100, 1)
+
+        mem_utilization = 0
+        maxmem = lshosts_dic.get_number(host, 'maxmem')
+        mem = lsload_dic.number_dic['mem'][i]
+
+        if (maxmem is not None) and (mem is not None):
+            mem_utilization = round((maxmem-mem)*100/maxmem, 1) if maxmem > 0 else 0.0
+
+        utilization_list.append((host, slot_utilization, mem_utilization))
+
+    queue_slot_dic = {}
+
+    for (queue, queue_host_list) in queue_host_dic.items():
+        total_slots = 0
+
+        for queue_host in queue_host_list:
+            total_slots += bhosts_dic.get_number(queue_host, 'MAX', 0)
+
+        queue_slot_dic[queue] = total_slots
+
+    return utilization_list, queue_slot_dic
+
+
+################
+# Main Process #
+################
+def main():
+    (host_num, queue_num, skip_linear) = read_args()
+
+    common.bprint(f'>>> Generating synthetic command output ({host_num} hosts, {queue_num} queues) ...')
+    (bhosts_dic, lshosts_dic, lsload_dic, bqueues_dic, queue_host_dic) = gen_command_dic(host_num, queue_num)
+    common.bprint(f'Queue-host pairs: {sum([len(host_list) for host_list in queue_host_dic.values()])}', indent=4)
+
+    # Build CommandTable like get_bhosts_info/get_lshosts_info/get_lsload_info/get_bqueues_info.
+    start_second = time.time()
+    bhosts_table = common_lsf.CommandTable(bhosts_dic, 'HOST_NAME', {'MAX': 'int', 'NJOBS': 'int', 'RUN': 'int', 'SSUSP': 'int', 'USUSP': 'int'})
+    lshosts_table = common_lsf.CommandTable(lshosts_dic, 'HOST_NAME', {'ncpus': 'int', 'maxmem': 'mem'})
+    lsload_table = common_lsf.CommandTable(lsload_dic, 'HOST_NAME', {'ut': 'percent', 'mem': 'mem'})
+    common_lsf.CommandTable(bqueues_dic, 'QUEUE_NAME', {'NJOBS': 'int', 'PEND': 'int', 'RUN': 'int', 'SUSP': 'int'})
+    build_seconds = time.time() - start_second
+
+    start_second = time.time()
+    indexed_result = indexed_join(bhosts_table, lshosts_table, lsload_table, queue_host_dic)
+    indexed_seconds = time.time() - start_second
+
+    common.bprint('')
+    common.bprint(f'{"join":<20} {"seconds":>10}')
+    common.bprint(f'{"index build":<20} {build_seconds:>10.3f}')
+    common.bprint(f'{"indexed join":<20} {indexed_seconds:>10.3f}')
+
+    if not skip_linear:
+        start_second = time.time()
+        linear_result = linear_join(bhosts_dic, lshosts_dic, lsload_dic, queue_host_dic)
+        linear_seconds = time.time() - start_second
+        common.bprint(f'{"list-scan join":<20} {linear_seconds:>10.3f}')
+
+        if linear_result == indexed_result:
+            common.bprint('')
+            common.bprint('Check passed, both joins return the same utilization and queue slots.')
+        else:
+            common.bprint('')
+            common.bprint('Check failed, joins return different results.', level='Error')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_job_query.py
+# Description : Compare typical job history filters on a synthetic job/<date>.db before and after
+#               common_job_history.upgrade_job_db() (indexes on user/queue/status/project/finished_time and the
+#               numeric job_summary table).
+################################
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+from common import common
+from common import common_sqlite3
+from common import common_snapshot
+from common import common_job_history
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+DATE = '20260512'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-n', '--job_num',
+                        type=int,
+                        default=200000,
+                        help='Specify job number of the synthetic job/<date>.db, default is 200000.')
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=5,
+                        help='Specify repeat times of every filter, default is 5.')
+
+    args = parser.parse_args()
+
+    return args.job_num, args.repeat
+
+
+def gen_job_db(db_file, job_num):
+    """
+    Generate a job/<date>.db with the sampler's schema (table job, 32 TEXT columns) and synthetic jobs.
+    """
+    random.seed(0)
+    key_list = common_snapshot.BJOBS_UF_KEY_LIST
+    key_string = common_sqlite3.gen_sql_table_key_string(key_list, ['PRIMARY KEY', ] + ['TEXT' for key in key_list[1:]])
+    user_list = ['user' + str(i) for i in range(2000)]
+    queue_list = ['queue' + str(i) for i in range(50)]
+    project_list = ['project' + str(i) for i in range(200)]
+    row_list = []
+
+    for i in range(job_num):
+        row_dic = {key: '' for key in key_list}
+        started_second = random.randint(0, 80000)
+        finished_second = started_second + random.randint(10, 6000)
+        row_dic.update({'job': str(1000000 + i),
+                        'job_name': 'job_' + str(i),
+                        'user': random.choice(user_list),
+                        'project': random.choice(project_list),
+                        'status': 'EXIT' if random.random() < 0.1 else 'DONE',
+                        'queue': random.choice(queue_list),
+                        'command': '/tools/run_sim -case case_' + str(i) + ' -seed ' + str(random.randint(0, 1 << 30)),
+                        'cwd': '/project/work/' + random.choice(user_list) + '/run_' + str(i % 1000),
+                        'requested_resources': 'select[type==any] rusage[mem=' + str(random.randint(1, 64) * 1024) + ']',
+                        'rusage_mem': str(float(random.randint(1, 64) * 1024)),
+                        'started_time': time.strftime('%a %b %d %H:%M:%S', time.localtime(time.mktime(time.strptime(DATE, '%Y%m%d')) + started_second)),
+                        'finished_time': time.strftime('%a %b %d %H:%M:%S', time.localtime(time.mktime(time.strptime(DATE, '%Y%m%d')) + min(finished_second, 86399))),
+                        'exit_code': '1' if random.random() < 0.1 else '',
+                        'cpu_time': str(round(random.uniform(1, 50000), 1)),
+                        'max_mem': str(round(random.uniform(1, 200000), 1)),
+                        'avg_mem': str(round(random.uniform(1, 100000), 1))})
+        row_list.append(tuple(row_dic[key] for key in key_list))
+
+    conn = sqlite3.connect(db_file)
+    common_sqlite3.create_sql_table(db_file, conn, 'job', key_string, commit=False)
+    conn.executemany("INSERT INTO 'job' VALUES (" + ', '.join(['?'] * len(key_list)) + ')', row_list)
+    conn.commit()
+    conn.close()
+
+    return row_list
+
+
+def gen_filter_list(row_list):
+    """
+    Typical filters of JOB tab/AI job history/seedb lookups, with values of existing jobs.
+    """
+    row = row_list[len(row_list) // 2]
+    key_index_dic = {key: i for (i, key) in enumerate(common_snapshot.BJOBS_UF_KEY_LIST)}
+
+    return [
+        ('user', {'user': row[key_index_dic['user']]}),
+        ('queue', {'queue': row[key_index_dic['queue']]}),
+        ('user+status', {'user': row[key_index_dic['user']], 'status': 'EXIT'}),
+        ('project', {'project': row[key_index_dic['project']]}),
+        ('status', {'status': 'EXIT'}),
+        ('max_mem >= 190G', {'min_max_mem': 190000}),
+        ('queue+max_mem', {'queue': row[key_index_dic['queue']], 'min_max_mem': 100000}),
+    ]
+
+
+def time_filter(db_file, filter_dic, repeat):
+    """
+    Run the filter with query_job_db (like iter_job_history on one date), return (best seconds, sorted job list).
+    """
+    best_seconds = None
+    job_list = []
+
+    for i in range(repeat):
+        start_second = time.time()
+        job_list = [row[0] for row in common_job_history.query_job_db(db_file, ['job', 'user', 'status', 'max_mem'], filter_dic)]
+        seconds = time.time() - start_second
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    return best_seconds, sorted(job_list)
+
+
+################
+# Main Process #
+################
+def main():
+    (job_num, repeat) = read_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_file = str(tmp_dir) + '/' + str(DATE) + '.db'
+
+        common.bprint(f'>>> Generating synthetic job database ({job_num} jobs) ...')
+        row_list = gen_job_db(db_file, job_num)
+        filter_list = gen_filter_list(row_list)
+        result_dic = {}
+
+        for (filter_name, filter_dic) in filter_list:
+            result_dic[filter_name] = time_filter(db_file, filter_dic, repeat)
+
+        common.bprint('>>> Upgrading job database (indexes and job_summary) ...')
+        start_second = time.time()
+        common_job_history.upgrade_job_db(db_file, '', DATE)
+        upgrade_seconds = time.time() - start_second
+
+        common.bprint('')
+        common.bprint(f'{"filter":<20} {"rows":>8} {"before(s)":>10} {"after(s)":>10} {"speedup":>8}')
+        check_passed = True
+
+        for (filter_name, filter_dic) in filter_list:
+            (before_seconds, before_job_list) = result_dic[filter_name]
+            (after_seconds, after_job_list) = time_filter(db_file, filter_dic, repeat)
+            common.bprint(f'{filter_name:<20} {len(after_job_list):>8} {before_seconds:>10.4f} {after_seconds:>10.4f} {before_seconds/max(after_seconds, 1e-6):>7.1f}x')
+
+            if before_job_list != after_job_list:
+                check_passed = False
+
+        common.bprint(f'{"upgrade (one time)":<20} {"":>8} {"":>10} {upgrade_seconds:>10.4f}')
+        common.bprint('')
+
+        if check_passed:
+            common.bprint('Check passed, filters return the same jobs before and after upgrade.')
+        else:
+            common.bprint('Check failed, filters return different jobs after upgrade.', level='Error')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_license_filter.py
+# Description : Compare the nested-dict license filter (common_license.FilterLicenseDic) with the indexed license
+#               snapshot (common_license.LicenseSnapshot) on a synthetic license_dic, typical LICENSE tab filters
+#               must return the same license_dic.
+################################
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+os.environ.setdefault('LSFMONITOR_INSTALL_PATH', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import common
+from common import common_license
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-s', '--server_num',
+                        type=int,
+                        default=40,
+                        help='Specify license server number of the synthetic license_dic, default is 40.')
+    parser.add_argument('-f', '--feature_num',
+                        type=int,
+                        default=100,
+                        help='Specify feature number of every vendor daemon, default is 100.')
+    parser.add_argument('-c', '--checkout_num',
+                        type=int,
+                        default=20000,
+                        help='Specify total checkout (in_use_info) number, default is 20000.')
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=5,
+                        help='Specify repeat times of every filter, default is 5.')
+
+    args = parser.parse_args()
+
+    return args.server_num, args.feature_num, args.checkout_num, args.repeat
+
+
+def gen_license_dic(server_num, feature_num, checkout_num):
+    """
+    Generate a license_dic with the GetLicenseInfo.get_license_info() format, 2 vendor daemons per license server
+    (plus a DOWN one on every 10th server), features are shared between servers.
+    """
+    random.seed(0)
+    user_list = ['user' + str(i) for i in range(1000)]
+    host_list = ['host' + str(i) for i in range(2000)]
+    expires_list = ['permanent(no expiration date)', '1-jan-2020', '31-dec-2099', time.strftime('%d-%b-%Y', time.localtime(time.time() + 7*86400))]
+    license_dic = {}
+    feature_key_list = []
+
+    for i in range(server_num):
+        license_server = str(27000 + i) + '@licsrv' + str(i)
+        license_dic[license_server] = {'license_files': '/eda/license/' + str(i) + '.dat',
+                                       'license_server_status': 'UP',
+                                       'license_server_version': 'v11.16.2',
+                                       'vendor_daemon': {}}
+
+        for vendor_daemon in ['snpslmd', 'cdslmd'] + (['mgcld'] if i % 10 == 0 else []):
+            vendor_dic = {'vendor_daemon_status': 'UP' if vendor_daemon != 'mgcld' else 'DOWN',
+                          'vendor_daemon_version': 'v11.16.2',
+                          'feature': {},
+                          'expires': {}}
+            license_dic[license_server]['vendor_daemon'][vendor_daemon] = vendor_dic
+
+            if vendor_dic['vendor_daemon_status'] == 'DOWN':
+                continue
+
+            for j in random.sample(range(feature_num * 4), feature_num):
+                feature = vendor_daemon[:4].upper() + '_Feature_' + str(j)
+                vendor_dic['feature'][feature] = {'issued': 'Uncounted' if j % 17 == 0 else str(random.randint(1, 200)),
+                                                  'in_use': '0',
+                                                  'in_use_info_string': [],
+                                                  'in_use_info': []}
+                vendor_dic['expires'][feature] = [{'version': '2026.03', 'license': '10', 'vendor': vendor_daemon, 'expires': random.choice(expires_list)}]
+                feature_key_list.append((license_server, vendor_daemon, feature))
+
+    for i in range(checkout_num):
+        (license_server, vendor_daemon, feature) = random.choice(feature_key_list)
+        feature_dic = license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'][feature]
+        usage_dic = {'user': random.choice(user_list),
+                     'execute_host': random.choice(host_list),
+                     'submit_host': random.choice(host_list),
+                     'version': 'v2026.03',
+                     'license_server': license_server,
+                     'start_time': 'Thu 5/14 9:00',
+                     'license_num': '1'}
+        feature_dic['in_use_info_string'].append(str(usage_dic))
+        feature_dic['in_use_info'].append(usage_dic)
+        feature_dic['in_use'] = str(len(feature_dic['in_use_info']))
+
+    return license_dic
+
+
+def gen_filter_list(license_dic):
+    """
+    Typical LICENSE tab/AI license query filters, with names of existing servers/features/users.
+    """
+    license_server = list(license_dic.keys())[1]
+
+    return [
+        ('no filter', {}),
+        ('server', {'server_list': [license_server]}),
+        ('vendor', {'vendor_list': ['cdslmd']}),
+        ('feature exact', {'feature_list': ['SNPS_Feature_7']}),
+        ('feature fuzzy', {'feature_list': ['feature_1']}),
+        ('user exact', {'user_list': ['user17']}),
+        ('user fuzzy', {'user_list': ['USER9']}),
+        ('execute_host', {'execute_host_list': ['host123']}),
+        ('feature+user', {'feature_list': ['feature_2'], 'user_list': ['user4']}),
+        ('server+vendor+user', {'server_list': ['ALL'], 'vendor_list': ['snpslmd'], 'user_list': ['user1']}),
+        ('in_use', {'show_mode': 'IN_USE'}),
+        ('not_used', {'show_mode': 'NOT_USED'}),
+        ('user+in_use', {'user_list': ['user5'], 'show_mode': 'IN_USE'}),
+        ('feature+expired', {'feature_list': ['cdsl'], 'show_mode': 'Expired'}),
+        ('nearly_expired', {'show_mode': 'Nearly_Expired'}),
+        ('no match', {'feature_list': ['NOT_A_FEATURE']}),
+    ]
+
+
+def time_function(function, repeat):
+    """
+    Run function <repeat> times, return (best seconds, result).
+    """
+    best_seconds = None
+    result = None
+
+    for i in range(repeat):
+        start_second = time.time()
+        result = function()
+        seconds = time.time() - start_second
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    return best_seconds, result
+
+
+################
+# Main Process #
+################
+def main():
+    (server_num, feature_num, checkout_num, repeat) = read_args()
+
+    common.bprint(f'>>> Generating synthetic license_dic ({server_num} servers, {feature_num} features per vendor daemon, {checkout_num} checkouts) ...')
+    license_dic = gen_license_dic(server_num, feature_num, checkout_num)
+    (build_seconds, license_snapshot) = time_function(lambda: common_license.LicenseSnapshot(license_dic), repeat)
+
+    common.bprint('')
+    common.bprint(f'{"filter":<22} {"features":>8} {"before(s)":>10} {"after(s)":>10} {"speedup":>8}')
+    check_passed = True
+
+    for (filter_name, filter_dic) in gen_filter_list(license_dic):
+        (before_seconds, before_license_dic) = time_function(lambda: common_license.FilterLicenseDic().run(license_dic, **filter_dic), repeat)
+        (after_seconds, after_license_dic) = time_function(lambda: license_snapshot.run(**filter_dic), repeat)
+        feature_num = sum([len(vendor_dic['feature']) for server_dic in after_license_dic.values() for vendor_dic in server_dic['vendor_daemon'].values()])
+        common.bprint(f'{filter_name:<22} {feature_num:>8} {before_seconds:>10.4f} {after_seconds:>10.4f} {before_seconds/max(after_seconds, 1e-6):>7.1f}x')
+
+        if before_license_dic != after_license_dic:
+            common.bprint(f'Filter "{filter_name}" returns different license_dic.', level='Error')
+            check_passed = False
+
+    common.bprint(f'{"snapshot (one time)":<22} {"":>8} {"":>10} {build_seconds:>10.4f}')
+    common.bprint('')
+
+    if check_passed:
+        common.bprint('Check passed, filters return the same license_dic with FilterLicenseDic and LicenseSnapshot.')
+    else:
+        common.bprint('Check failed, filters return different license_dic.', level='Error')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_license_job.py
+# Description : Compare the per-checkout bjobs scan (old show_license_feature_usage) with common_license.LicenseJobIndex
+#               on a synthetic bjobs snapshot and license checkouts, the owning jobs must be the same.
+################################
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+os.environ.setdefault('LSFMONITOR_INSTALL_PATH', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import common
+from common import common_license
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-j', '--job_num',
+                        type=int,
+                        default=20000,
+                        help='Specify job number of the synthetic bjobs snapshot, default is 20000.')
+    parser.add_argument('-c', '--checkout_num',
+                        type=int,
+                        default=2000,
+                        help='Specify license checkout number, default is 2000.')
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=3,
+                        help='Specify repeat times, default is 3.')
+
+    args = parser.parse_args()
+
+    return args.job_num, args.checkout_num, args.repeat
+
+
+def gen_data(job_num, checkout_num):
+    """
+    Generate a job_dic with the common_lsf.get_bjobs_info() format and a usage_dic list with the in_use_info format.
+    Half of the checkouts belong to a job, host names have the same width so they are never a substring of each other.
+    """
+    random.seed(0)
+    current_second = int(time.time())
+    user_list = ['user' + str(i).zfill(3) for i in range(300)]
+    host_list = ['host' + str(i).zfill(4) for i in range(2000)]
+    job_dic = {'JOBID': [], 'USER': [], 'STAT': [], 'QUEUE': [], 'FROM_HOST': [], 'EXEC_HOST': [], 'JOB_NAME': [], 'SUBMIT_TIME': []}
+    usage_dic_list = []
+
+    for i in range(job_num):
+        execute_host_list = random.sample(host_list, random.choice([1, 1, 1, 2]))
+        job_dic['JOBID'].append(str(1000000 + i))
+        job_dic['USER'].append(random.choice(user_list))
+        job_dic['STAT'].append('RUN')
+        job_dic['QUEUE'].append('normal')
+        job_dic['FROM_HOST'].append(random.choice(['login01', 'login02']))
+        job_dic['EXEC_HOST'].append(':'.join([random.choice(['', '2*', '4*']) + execute_host for execute_host in execute_host_list]))
+        job_dic['JOB_NAME'].append('job' + str(i))
+        job_dic['SUBMIT_TIME'].append(time.strftime('%b %d %H:%M', time.localtime(current_second - random.randint(60, 30*86400))))
+
+    for i in range(checkout_num):
+        if i % 2 == 0:
+            j = random.randrange(job_num)
+            user = job_dic['USER'][j]
+            execute_host = re.sub(r'^\d+\*', '', job_dic['EXEC_HOST'][j].split(':')[0])
+        else:
+            user = random.choice(user_list)
+            execute_host = random.choice(host_list)
+
+        usage_dic_list.append({'user': user,
+                               'execute_host': execute_host,
+                               'submit_host': random.choice(['N/A', 'N/A', 'login01']),
+                               'version': 'v2026.03',
+                               'license_server': '27000@licsrv',
+                               'start_time': time.strftime('%a %m/%d %H:%M', time.localtime(current_second - random.randint(0, 30*86400))),
+                               'license_num': '1'})
+
+    return job_dic, usage_dic_list
+
+
+def switch_bjobs_submit_time(submit_time):
+    """
+    Same as the old ShowLicenseFreatureUsage.switch_bjobs_submit_time, switch bjobs SUBMIT_TIME into seconds.
+    """
+    current_year = time.localtime().tm_year
+    start_second = time.mktime(time.strptime(str(current_year) + ' ' + re.sub('  ', ' ', submit_time), '%Y %b %d %H:%M'))
+
+    if int(start_second) > int(time.time()):
+        start_second = time.mktime(time.strptime(str(current_year - 1) + ' ' + re.sub('  ', ' ', submit_time), '%Y %b %d %H:%M'))
+
+    return start_second
+
+
+def scan_job(job_dic, usage_dic):
+    """
+    Same as the old ShowLicenseFreatureUsage.get_job_info, scan all jobs for a checkout.
+    """
+    jobid_list = []
+
+    for (i, jobid) in enumerate(job_dic['JOBID']):
+        if (usage_dic['user'] == job_dic['USER'][i]) and ((usage_dic['submit_host'] == job_dic['FROM_HOST'][i]) or (usage_dic['submit_host'] == 'N/A')) and re.search(usage_dic['execute_host'], job_dic['EXEC_HOST'][i]):
+            license_start_time = common_license.switch_start_time(usage_dic['start_time'])
+            job_submit_time = switch_bjobs_submit_time(job_dic['SUBMIT_TIME'][i])
+
+            if int(license_start_time) >= int(job_submit_time):
+                jobid_list.append(jobid)
+
+    if len(jobid_list) == 0:
+        return ''
+    elif len(jobid_list) == 1:
+        return jobid_list[0]
+    else:
+        return '*'
+
+
+def time_function(function, repeat):
+    """
+    Run function <repeat> times, return (best seconds, result).
+    """
+    best_seconds = None
+    result = None
+
+    for i in range(repeat):
+        start_second = time.time()
+        result = function()
+        seconds = time.time() - start_second
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    return best_seconds, result
+
+
+################
+# Main Process #
+################
+def main():
+    (job_num, checkout_num, repeat) = read_args()
+
+    common.bprint(f'>>> Generating synthetic bjobs snapshot ({job_num} jobs) and {checkout_num} license checkouts ...')
+    (job_dic, usage_dic_list) = gen_data(job_num, checkout_num)
+
+    (before_seconds, before_job_list) = time_function(lambda: [scan_job(job_dic, usage_dic) for usage_dic in usage_dic_list], 1)
+    (build_seconds, license_job_index) = time_function(lambda: common_license.LicenseJobIndex(job_dic), repeat)
+    (after_seconds, after_job_list) = time_function(lambda: [license_job_index.get_job(usage_dic) for usage_dic in usage_dic_list], repeat)
+
+    common.bprint('')
+    common.bprint(f'{"step":<22} {"seconds":>10}')
+    common.bprint(f'{"scan (before)":<22} {before_seconds:>10.4f}')
+    common.bprint(f'{"index build":<22} {build_seconds:>10.4f}')
+    common.bprint(f'{"index lookup":<22} {after_seconds:>10.4f}')
+    common.bprint(f'{"speedup":<22} {before_seconds/max(build_seconds + after_seconds, 1e-6):>9.1f}x')
+    common.bprint(f'{"owned checkouts":<22} {len([jobid for jobid in after_job_list if jobid]):>10}')
+    common.bprint('')
+
+    if before_job_list == after_job_list:
+        common.bprint('Check passed, the scan and LicenseJobIndex find the same owning jobs.')
+    else:
+        for (usage_dic, before_jobid, after_jobid) in zip(usage_dic_list, before_job_list, after_job_list):
+            if before_jobid != after_jobid:
+                common.bprint(f'{usage_dic["user"]}@{usage_dic["execute_host"]} {usage_dic["start_time"]}: scan "{before_jobid}", index "{after_jobid}"', level='Error')
+
+        common.bprint('Check failed, the scan and LicenseJobIndex find different owning jobs.', level='Error')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
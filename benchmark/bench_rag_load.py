@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : bench_rag_load.py
+# Description : Compare loading the RAG database from json files (rag_chunks.json + rag_metadata.json) with the
+#               memory-mapped chunk store (rag_chunks.pack) on a synthetic corpus, keyword search results must be
+#               the same.
+################################
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitor'))
+os.environ.setdefault('LSFMONITOR_INSTALL_PATH', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import common
+from common import common_ai
+from common import common_rag
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-c', '--chunk_num',
+                        type=int,
+                        default=50000,
+                        help='Specify chunk number of the synthetic corpus, default is 50000.')
+    parser.add_argument('-s', '--chunk_size',
+                        type=int,
+                        default=700,
+                        help='Specify chunk size (characters), default is 700.')
+    parser.add_argument('-r', '--repeat',
+                        type=int,
+                        default=3,
+                        help='Specify repeat times, default is 3.')
+
+    args = parser.parse_args()
+
+    return args.chunk_num, args.chunk_size, args.repeat
+
+
+def gen_corpus(docs_dir, chunk_num, chunk_size):
+    """
+    Write rag_chunks.json/rag_metadata.json and rag_chunks.pack of a synthetic corpus into docs_dir.
+    """
+    random.seed(0)
+    word_list = ['bsub', 'bjobs', 'queue', 'pending', 'license', 'memory', 'slot', 'host', 'limit', 'fairshare', 'preempt', 'rusage', 'lsb.queues', 'mbatchd', '作业', '队列']
+    chunk_list = []
+    metadata_list = []
+
+    for i in range(chunk_num):
+        chunk = ''
+
+        while len(chunk) < chunk_size:
+            chunk += random.choice(word_list) + ' '
+
+        chunk_list.append(chunk[:chunk_size])
+        metadata_list.append({'source': '/docs/manual_' + str(i // 500) + '.pdf', 'page': i % 500 + 1})
+
+    with open(os.path.join(docs_dir, 'rag_chunks.json'), 'w') as f:
+        json.dump(chunk_list, f, ensure_ascii=False, indent=2)
+
+    with open(os.path.join(docs_dir, 'rag_metadata.json'), 'w') as f:
+        json.dump(metadata_list, f, ensure_ascii=False, indent=2)
+
+    common_rag.write_rag_pack(os.path.join(docs_dir, 'rag_chunks.pack'), chunk_list, metadata_list)
+
+
+def time_load(docs_dir, repeat):
+    """
+    Load docs_dir <repeat> times, return (best seconds, peak python memory (MB) of one load, doc_data).
+    """
+    best_seconds = None
+    doc_data = None
+
+    for i in range(repeat):
+        doc_data = None
+        start_second = time.time()
+        doc_data = common_ai.load_ai_documents(docs_dir)
+        seconds = time.time() - start_second
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    doc_data = None
+    tracemalloc.start()
+    doc_data = common_ai.load_ai_documents(docs_dir)
+    peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+
+    return best_seconds, peak_mb, doc_data
+
+
+################
+# Main Process #
+################
+def main():
+    (chunk_num, chunk_size, repeat) = read_args()
+    docs_dir = tempfile.mkdtemp(prefix='bench_rag_load_')
+
+    try:
+        common.bprint(f'>>> Generating synthetic RAG corpus ({chunk_num} chunks, {chunk_size} characters per chunk) ...')
+        gen_corpus(docs_dir, chunk_num, chunk_size)
+        pack_file = os.path.join(docs_dir, 'rag_chunks.pack')
+
+        # json files only (the pack is hidden), then the pack.
+        os.rename(pack_file, pack_file + '.bak')
+        (json_seconds, json_peak_mb, json_doc_data) = time_load(docs_dir, repeat)
+        os.rename(pack_file + '.bak', pack_file)
+        (pack_seconds, pack_peak_mb, pack_doc_data) = time_load(docs_dir, repeat)
+
+        common.bprint('')
+        common.bprint(f'{"load":<10} {"seconds":>10} {"peak(MB)":>10}')
+        common.bprint(f'{"json":<10} {json_seconds:>10.4f} {json_peak_mb:>10.1f}')
+        common.bprint(f'{"pack":<10} {pack_seconds:>10.4f} {pack_peak_mb:>10.1f}')
+        common.bprint(f'{"file size":<10} json {(os.path.getsize(os.path.join(docs_dir, "rag_chunks.json")) + os.path.getsize(os.path.join(docs_dir, "rag_metadata.json"))) / 1024 / 1024:.1f}MB, pack {os.path.getsize(pack_file) / 1024 / 1024:.1f}MB')
+        common.bprint('')
+
+        check_passed = isinstance(pack_doc_data['chunks'], common_rag.RagPackSequence) and (len(json_doc_data['chunks']) == len(pack_doc_data['chunks']))
+
+        for query in ['bsub queue', 'license memory limit', '作业 队列', 'no_such_word']:
+            json_result = common_ai.execute_documentation_search(json_doc_data, query, metadata=json_doc_data['metadata'])
+            pack_result = common_ai.execute_documentation_search(pack_doc_data, query, metadata=pack_doc_data['metadata'])
+
+            if json_result != pack_result:
+                common.bprint(f'Search "{query}" returns different results.', level='Error')
+                check_passed = False
+
+        if check_passed:
+            common.bprint('Check passed, json files and the chunk store give the same search results.')
+        else:
+            common.bprint('Check failed, json files and the chunk store give different results.', level='Error')
+            sys.exit(1)
+    finally:
+        shutil.rmtree(docs_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
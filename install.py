@@ -52,6 +52,8 @@ class Installation():
             'monitor/bin/bsample',
             'monitor/tools/akill',
             'monitor/tools/check_issue_reason',
+            'monitor/tools/lsf_cache',
+            'monitor/tools/migrate_db',
             'monitor/tools/patch',
             'monitor/tools/process_tracer',
             'monitor/tools/rag_builder',
@@ -171,7 +173,41 @@ python3 $LSFMONITOR_INSTALL_PATH/{tool_name}.py "$@"
 db_path = "{db_path}"
 
 # Data retention days for cleanup (bsample --cleanup).
-cleanup_expire_days = {{'job': 90, 'job_data': 90, 'user': 365, 'queue': 365, 'queue_host_mapping': 365, 'host': 365, 'load': 365, 'utilization': 365, 'utilization_day': 365}}
+cleanup_expire_days = {{'job': 90, 'job_data': 90, 'user': 365, 'queue': 365, 'queue_host_mapping': 365, 'host': 365, 'load': 365, 'utilization': 365, 'utilization_day': 365, 'license': 365}}
+
+# Days before job/, user/ and job_data/ data are packed into compressed archives (bsample --cleanup), 0 means disabled.
+# Archived data is still shown on bmonitor/seedb, zstd is used if python module "zstandard" is installed, otherwise zlib.
+archive_days = {{'job': 0, 'user': 0, 'job_data': 0}}
+
+# SQLite journal mode for bsample bulk writes, "WAL" writes faster but needs the database on local disk.
+# Default "" keeps the rollback journal, which is safe on NFS.
+# With "WAL" there is no <db>-journal file, so the busy check (skip a database which is written by another connection) is off,
+# concurrent writers are serialized by SQLite locking instead.
+db_journal_mode = ""
+
+# LSF accounting file (such as "<LSB_SHAREDIR>/<cluster>/logdir/lsb.acct"), bsample -j/-u read its new records instead of running "bjobs -d" if it is specified.
+lsb_acct_file = ""
+
+# Max parallel LSF commands (bhosts/bqueues/lsload ...) of one bsample sampling cycle, keep it small to protect mbatchd.
+sample_command_max_workers = 4
+
+# Sampler intervals (seconds) of "bsample --daemon".
+daemon_sampler_interval = {{'cleanup': 86400, 'job': 300, 'job_mem': 300, 'queue': 300, 'queue_host_mapping': 1800, 'host': 300, 'load': 60, 'user': 300, 'utilization': 300, 'utilization_day': 3600, 'license': 300, 'analysis': 86400}}
+
+# bmonitor reuses LSF information (bhosts/bqueues/lsload ...) fetched in the last N seconds.
+lsf_info_fresh_seconds = 30
+
+# bmonitor reads LSF command output from the shared cache "<db_path>/<cluster>/lsf_cache" if it is updated in N seconds, 0 to disable.
+lsf_cache_ttl = 60
+
+# Refresh interval (seconds) of tool "lsf_cache", which keeps the shared LSF command output cache current.
+lsf_cache_interval = 30
+
+# Memory limit (MB) of the UTILIZATION tab time series cache.
+utilization_cache_size = 256
+
+# Share the UTILIZATION tab time series cache on "<tmp>/lsfMonitor_<user>/utilization_cache_<cluster>" between bmonitor sessions of the user.
+utilization_disk_cache = True
 
 # Specify EDA license administrators.
 license_administrators = "all"
@@ -182,6 +218,12 @@ lmstat_path = "{lmstat_path}"
 # Specify lmstat bsub command, example "bsub -q normal -Is".
 lmstat_bsub_command = ""
 
+# Timeout (seconds) of lmstat on every license server (bsub pending time included), the license server is shown as "TIMEOUT".
+lmstat_timeout = 60
+
+# bmonitor, show_license_feature_usage and the AI tools reuse lmstat output fetched in the last N seconds, 0 to disable.
+license_cache_ttl = 120
+
 # Excluded license servers, format is "27020@lic_server 5280@lic_server".
 excluded_license_servers = ""
 
@@ -31,7 +31,7 @@ from sklearn.ensemble import RandomForestRegressor
 sys.path.append(str(os.environ['MEM_PREDICTION_INSTALL_PATH']))
 
 from config import config
-from common import common, common_model
+from common import common, common_model, common_archive
 
 USER = getpass.getuser()
 LOG_PATH = '/tmp/memPrediction.' + str(USER) + '.train.log'
@@ -234,14 +234,35 @@ class TrainingModel:
                         df.rename(columns={'index': 'job_id'}, inplace=True)
                         df.reset_index(inplace=True)
                 elif hasattr(config, 'job_format') and config.job_format.lower() == 'sqlite':
-                    file_date = datetime.strptime(file.replace('.db', ''), '%Y%m%d')
+                    # Skip job_index.db and other non-date files, aged dates are compressed job/<date>.archive files.
+                    if not re.match(r'^\d{8}\.(db|archive)$', file):
+                        continue
+
+                    file_date = datetime.strptime(file[:8], '%Y%m%d')
 
                     if self.start_date_utc <= file_date <= self.end_date_utc:
                         logger.info("reading %s data ..." % file_date)
                         file_path = os.path.join(self.data_path, file)
-                        conn = sqlite3.connect(file_path)
-                        query = 'SELECT * FROM job LIMIT 1000'
-                        df = pd.read_sql_query(query, conn)
+
+                        if file.endswith(common_archive.ARCHIVE_SUFFIX):
+                            archive = common_archive.ArchiveFile(file_path)
+                            status_index = archive.column_list.index('status')
+                            row_list = []
+
+                            for row in archive.iter_rows():
+                                if row[status_index] == 'DONE':
+                                    row_list.append(row)
+
+                                    if len(row_list) >= 1000:
+                                        break
+
+                            df = pd.DataFrame(row_list, columns=archive.column_list)
+                        else:
+                            conn = sqlite3.connect(file_path)
+                            # status is indexed on job/<date>.db, only read DONE jobs (the training data).
+                            query = "SELECT * FROM job WHERE status = 'DONE' LIMIT 1000"
+                            df = pd.read_sql_query(query, conn)
+
                         df.rename(columns={'job': 'job_id'}, inplace=True)
                         df.reset_index(inplace=True)
                 else:
@@ -16,18 +16,24 @@ import numpy as np
 
 # Third-party imports
 import qdarkstyle
-from PyQt5.QtCore import QDate, Qt, QThread, QTimer, QUrl, pyqtSignal
+from PyQt5.QtCore import QAbstractProxyModel, QAbstractTableModel, QDate, QEventLoop, QModelIndex, Qt, QThread, QTimer, QUrl, pyqtSignal
 from PyQt5.QtGui import QBrush, QColor, QFont, QIcon, QPainter, QPainterPath, QPen, QPixmap, QTextBlockFormat, QTextCharFormat, QTextImageFormat, QTextLength, QTextTableFormat
-from PyQt5.QtWidgets import QAction, QApplication, QComboBox, QDateEdit, QFileDialog, QFrame, QGridLayout, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QMainWindow, QMenu, QMessageBox, QPushButton, QTabWidget, QTableWidget, QTableWidgetItem, QTextEdit, QVBoxLayout, QWidget, qApp, QInputDialog
+from PyQt5.QtWidgets import QAction, QApplication, QComboBox, QDateEdit, QFileDialog, QFrame, QGridLayout, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QMainWindow, QMenu, QMessageBox, QPushButton, QTabWidget, QTableView, QTableWidget, QTableWidgetItem, QTextEdit, QVBoxLayout, QWidget, qApp, QInputDialog
 
 # Local imports
 LSFMONITOR_INSTALL_PATH = Path(os.environ['LSFMONITOR_INSTALL_PATH'])
 sys.path.append(str(LSFMONITOR_INSTALL_PATH / 'monitor'))
 from common import common
 from common import common_lsf
+from common import common_cache
 from common import common_license
 from common import common_pyqt5
 from common import common_sqlite3
+from common import common_archive
+from common import common_job_data
+from common import common_history
+from common import common_job_history
+from common import common_utilization
 from common import common_ai
 from common import common_ai_log
 
@@ -42,6 +48,13 @@ VERSION_DATE = '2026.07.28'
 USER = getpass.getuser()
 DEFAULT_RUNTIME_DIR = Path('/tmp') / f'runtime-{USER}'
 
+# LICENSE tab history periods, {label: (rollup granularity, days)}.
+LICENSE_HISTORY_PERIOD_DIC = {
+    'Hour (last 7 days)': ('hour', 7),
+    'Day (last 90 days)': ('day', 90),
+    'Week (last 365 days)': ('week', 365),
+}
+
 # Environment configuration
 os.environ.update({
     'LSB_NTRIES': '3',
@@ -105,6 +118,8 @@ class MainWindow(QMainWindow):
     """
     Main window of lsfMonitor.
     """
+    lsf_info_saved = pyqtSignal(str)
+
     def __init__(self, specified_job, specified_user, specified_feature, specified_tab, disable_license, dark_mode):
         super().__init__()
 
@@ -128,6 +143,12 @@ class MainWindow(QMainWindow):
         common.create_dir(config.db_path, 0o1777)
         common.create_dir(self.cluster_db_path, 0o1777)
 
+        # Read LSF command output from the shared cache (kept current by tools/lsf_cache) if it is fresh and trusted.
+        common_lsf.set_command_cache(str(self.cluster_db_path) + '/lsf_cache', getattr(config, 'lsf_cache_ttl', 60), db_path=config.db_path)
+
+        # Share lmstat output with show_license_feature_usage and the AI tools.
+        common_license.set_license_cache(common_license.get_license_cache_dir(), getattr(config, 'license_cache_ttl', 120))
+
         # Save start action.
         log_dir = str(config.db_path) + '/log'
         self.my_save_log = common.SaveLog(log_dir, self.cluster)
@@ -150,9 +171,9 @@ class MainWindow(QMainWindow):
         self.enable_queue_detail = False
         self.enable_utilization_detail = False
 
-        # Utilization query cache (60 minutes cache timeout)
-        self.utilization_cache = {}
-        self.utilization_cache_timeout = 3600
+        # Utilization time series cache (60 minutes cache timeout), it is shared on disk by the sessions of the user.
+        utilization_cache_dir = os.path.join(common.get_user_tmp_dir(), 'utilization_cache_' + os.path.basename(self.cluster_db_path)) if getattr(config, 'utilization_disk_cache', True) else ''
+        self.utilization_cache = common_cache.TimeSeriesCache(ttl=3600, max_size=int(getattr(config, 'utilization_cache_size', 256))*1024*1024, cache_dir=utilization_cache_dir)
 
         # Init LSF information related variables.
         self.bhosts_dic = {}
@@ -164,15 +185,21 @@ class MainWindow(QMainWindow):
         self.host_queue_dic = {}
         self.bhosts_load_dic = {}
 
-        # Set self.lsf_info_dic for how to get LSF information.
-        self.lsf_info_dic = {'bhosts': {'exec_cmd': 'self.bhosts_dic = common_lsf.get_bhosts_info()', 'update_second': 0},
-                             'lsload': {'exec_cmd': 'self.lsload_dic = common_lsf.get_lsload_info()', 'update_second': 0},
-                             'bqueues': {'exec_cmd': 'self.bqueues_dic = common_lsf.get_bqueues_info()', 'update_second': 0},
-                             'busers': {'exec_cmd': 'self.busers_dic = common_lsf.get_busers_info()', 'update_second': 0},
-                             'lshosts': {'exec_cmd': 'self.lshosts_dic = common_lsf.get_lshosts_info()', 'update_second': 0},
-                             'queue_host': {'exec_cmd': 'self.queue_host_dic = common_lsf.get_queue_host_info()', 'update_second': 0},
-                             'host_queue': {'exec_cmd': 'self.host_queue_dic = common_lsf.get_host_queue_info()', 'update_second': 0},
-                             'bhosts_load': {'exec_cmd': 'self.bhosts_load_dic = common_lsf.get_bhosts_load_info()', 'update_second': 0}}
+        # Set self.lsf_info_dic for how to get LSF information, the getters run on LsfInfoFetcher threads.
+        self.lsf_info_dic = {'bhosts': {'attr': 'bhosts_dic', 'function': common_lsf.get_bhosts_info, 'update_second': 0},
+                             'lsload': {'attr': 'lsload_dic', 'function': common_lsf.get_lsload_info, 'update_second': 0},
+                             'bqueues': {'attr': 'bqueues_dic', 'function': common_lsf.get_bqueues_info, 'update_second': 0},
+                             'busers': {'attr': 'busers_dic', 'function': common_lsf.get_busers_info, 'update_second': 0},
+                             'lshosts': {'attr': 'lshosts_dic', 'function': common_lsf.get_lshosts_info, 'update_second': 0},
+                             'queue_host': {'attr': 'queue_host_dic', 'function': common_lsf.get_queue_host_info, 'update_second': 0},
+                             'host_queue': {'attr': 'host_queue_dic', 'function': common_lsf.get_host_queue_info, 'update_second': 0},
+                             'bhosts_load': {'attr': 'bhosts_load_dic', 'function': common_lsf.get_bhosts_load_info, 'update_second': 0}}
+
+        # Running LsfInfoFetcher threads and the results which are not saved on self.lsf_info_dic (like bjobs).
+        self.lsf_info_fresh_seconds = getattr(config, 'lsf_info_fresh_seconds', 30)
+        self.lsf_info_fetcher_dic = {}
+        self.lsf_info_result_dic = {}
+        self.jobs_tab_fetch_key = ''
 
         # Just update specified_job info if specified_job argument is specified.
         if self.specified_job:
@@ -184,6 +211,7 @@ class MainWindow(QMainWindow):
 
         # Init license information.
         self.license_dic = {}
+        self.license_snapshot = common_license.LicenseSnapshot(self.license_dic)
         self.license_dic_second = 0
 
         # USERS/UTILIZATION/LICENSE页面懒加载标记
@@ -223,24 +251,75 @@ class MainWindow(QMainWindow):
 
         return tool, cluster
 
-    def fresh_lsf_info(self, lsf_info):
+    def fresh_lsf_info(self, *lsf_info_list):
         """
         Get LSF information with functions on common_lsf.
-        If the information is updated in 30 seconds, will not update it again.
+        If the information is updated in self.lsf_info_fresh_seconds (30 seconds by default), will not update it again.
+        The getters run on LsfInfoFetcher threads in parallel, a getter which is already running is shared instead of
+        started again, and the GUI events are still handled while waiting.
         """
+        current_second = int(time.time())
+        wait_list = []
+
+        for lsf_info in lsf_info_list:
+            if lsf_info in self.lsf_info_dic:
+                if (lsf_info in self.lsf_info_fetcher_dic) or (current_second - self.lsf_info_dic[lsf_info]['update_second'] > self.lsf_info_fresh_seconds):
+                    self.fetch_lsf_info(lsf_info, self.lsf_info_dic[lsf_info]['function'])
+                    wait_list.append(lsf_info)
+
+        self.wait_lsf_info(wait_list)
+
+    def fetch_lsf_info(self, lsf_info, function, args=()):
+        """
+        Start a LsfInfoFetcher thread to run function(*args) for lsf_info.
+        If the same lsf_info is being fetched, the running thread is reused.
+        """
+        if lsf_info not in self.lsf_info_fetcher_dic:
+            common.bprint(f'Loading LSF {lsf_info} information ...', date_format='%Y-%m-%d %H:%M:%S')
+
+            lsf_info_fetcher = LsfInfoFetcher(lsf_info, function, args)
+            lsf_info_fetcher.info_ready.connect(self.save_lsf_info)
+            self.lsf_info_fetcher_dic[lsf_info] = lsf_info_fetcher
+            lsf_info_fetcher.start()
+
+    def save_lsf_info(self, lsf_info, result, update_second):
+        """
+        Save the result of LsfInfoFetcher (on the GUI thread).
+        On failure (result is None), the old information is kept.
+        """
+        lsf_info_fetcher = self.lsf_info_fetcher_dic.pop(lsf_info, None)
+
+        if lsf_info_fetcher:
+            lsf_info_fetcher.wait()
+
         if lsf_info in self.lsf_info_dic:
-            current_second = int(time.time())
+            if result is not None:
+                setattr(self, self.lsf_info_dic[lsf_info]['attr'], result)
+                self.lsf_info_dic[lsf_info]['update_second'] = update_second
+        else:
+            self.lsf_info_result_dic[lsf_info] = result
 
-            if current_second - self.lsf_info_dic[lsf_info]['update_second'] > 30:
-                common.bprint(f'Loading LSF {lsf_info} information ...', date_format='%Y-%m-%d %H:%M:%S')
-                my_show_message = ShowMessage('Info', f'Loading LSF {lsf_info} information ...')
-                my_show_message.start()
+        self.lsf_info_saved.emit(lsf_info)
+
+    def wait_lsf_info(self, lsf_info_list):
+        """
+        Wait until all the LsfInfoFetcher threads of lsf_info_list finish, with a local event loop, so the window is
+        still repainted and responsive.
+        """
+        if not any([lsf_info in self.lsf_info_fetcher_dic for lsf_info in lsf_info_list]):
+            return
 
-                exec(self.lsf_info_dic[lsf_info]['exec_cmd'])
-                self.lsf_info_dic[lsf_info]['update_second'] = current_second
+        event_loop = QEventLoop()
+        self.lsf_info_saved.connect(event_loop.quit)
+        QApplication.setOverrideCursor(Qt.BusyCursor)
 
-                time.sleep(0.01)
-                my_show_message.terminate()
+        while any([lsf_info in self.lsf_info_fetcher_dic for lsf_info in lsf_info_list]):
+            # Not 0 means the application is quitting.
+            if event_loop.exec_() != 0:
+                break
+
+        QApplication.restoreOverrideCursor()
+        self.lsf_info_saved.disconnect(event_loop.quit)
 
     def _parse_queue_full_name(self, full_name):
         """
@@ -299,11 +378,12 @@ class MainWindow(QMainWindow):
                 excluded_license_server_list = config.excluded_license_servers.split()
 
             if config.lmstat_path:
-                my_get_license_info = common_license.GetLicenseInfo(excluded_servers=excluded_license_server_list, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command)
+                my_get_license_info = common_license.GetLicenseInfo(excluded_servers=excluded_license_server_list, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command, timeout=getattr(config, 'lmstat_timeout', 60))
             else:
-                my_get_license_info = common_license.GetLicenseInfo(excluded_servers=excluded_license_server_list, bsub_command=config.lmstat_bsub_command)
+                my_get_license_info = common_license.GetLicenseInfo(excluded_servers=excluded_license_server_list, bsub_command=config.lmstat_bsub_command, timeout=getattr(config, 'lmstat_timeout', 60))
 
             self.license_dic = my_get_license_info.get_license_info()
+            self.license_snapshot = common_license.LicenseSnapshot(self.license_dic)
 
         time.sleep(0.01)
         my_show_message.terminate()
@@ -913,37 +993,12 @@ Please contact with liyanqing1987@163.com with any question."""
         self.job_tab_current_job_dic = common_lsf.get_bjobs_uf_info(command='bjobs -UF ' + str(current_job))
 
         if not self.job_tab_current_job_dic:
-            job_db_path = str(self.cluster_db_path) + '/job'
+            # Search finished job on job/<date>.db with job index, the latest one is used for recycled job id.
+            common.bprint(f'Searching for "{current_job}" on job history database ...', indent=4, date_format='%Y-%m-%d %H:%M:%S')
+            key_list = ['job', 'job_name', 'job_description', 'user', 'project', 'status', 'interactive_mode', 'queue', 'command', 'submitted_from', 'submitted_time', 'cwd', 'processors_requested', 'requested_resources', 'span_hosts', 'rusage_mem', 'specified_hosts', 'started_on', 'started_time', 'finished_time', 'exit_code', 'term_signal', 'cpu_time', 'idle_factor', 'mem', 'swap', 'run_limit', 'pids', 'max_mem', 'avg_mem', 'pending_reasons', 'job_info']
 
-            if os.path.exists(job_db_path):
-                select_condition = 'WHERE job="' + str(current_job) + '"'
-                job_finished_date_db_list = list(os.listdir(job_db_path))
-
-                for job_finished_date_db in job_finished_date_db_list[::-1]:
-                    job_finished_date_db = str(job_db_path) + '/' + str(job_finished_date_db)
-
-                    if os.path.exists(job_finished_date_db):
-                        common.bprint(f'Searching for "{job_finished_date_db}" ...', indent=4, date_format='%Y-%m-%d %H:%M:%S')
-                        (job_finished_date_db_connect_result, job_finished_date_db_conn) = common_sqlite3.connect_db_file(job_finished_date_db)
-
-                        if job_finished_date_db_connect_result == 'failed':
-                            common.bprint(f'Failed on connecting job database file "{job_finished_date_db}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
-                        else:
-                            finished_job_list = common_sqlite3.get_sql_table_key_list(job_finished_date_db, job_finished_date_db_conn, 'job', 'job')
-
-                            if current_job in finished_job_list:
-                                job_tab_current_job_dic = common_sqlite3.get_sql_table_data(job_finished_date_db, job_finished_date_db_conn, 'job', ['job', 'job_name', 'job_description', 'user', 'project', 'status', 'interactive_mode', 'queue', 'command', 'submitted_from', 'submitted_time', 'cwd', 'processors_requested', 'requested_resources', 'span_hosts', 'rusage_mem', 'specified_hosts', 'started_on', 'started_time', 'finished_time', 'exit_code', 'term_signal', 'cpu_time', 'idle_factor', 'mem', 'swap', 'run_limit', 'pids', 'max_mem', 'avg_mem', 'pending_reasons', 'job_info'], select_condition)
-
-                                if job_tab_current_job_dic:
-                                    self.job_tab_current_job_dic[current_job] = {}
-
-                                    for key in job_tab_current_job_dic:
-                                        self.job_tab_current_job_dic[current_job][key] = job_tab_current_job_dic[key][0]
-
-                                job_finished_date_db_conn.close()
-                                break
-
-                            job_finished_date_db_conn.close()
+            for (finished_date, row) in common_job_history.iter_job_history(str(self.cluster_db_path) + '/job', key_list, limit=1, job=current_job):
+                self.job_tab_current_job_dic[current_job] = dict(zip(key_list, row))
 
         if not self.job_tab_current_job_dic:
             warning_message = 'Not find job information for job "' + str(current_job) + '" on JOB tab.'
@@ -1069,47 +1124,47 @@ Please contact with liyanqing1987@163.com with any question."""
             self.job_tab_job_info_text.insertPlainText(self.job_tab_current_job_dic[self.job_tab_current_job]['job_info'])
             common_pyqt5.text_edit_visible_position(self.job_tab_job_info_text, 'Start')
 
-    def get_job_mem_list(self):
+    def get_job_data_series(self):
         """
-        Get job sample-time mem list for self.job_tab_current_job.
-        Try new job_data/ format first, fall back to old job_mem/ format.
+        Get (sample_second, mem, idle_factor) numpy arrays of self.job_tab_current_job from job_data/<range>.db, sorted
+        by sample second.
+        Aged jobs are read from the compressed job_data/<range>.archive if they are not on the db file.
         """
-        runtime_list = []
-        real_mem_list = []
-
-        # Try new format (job_data/ single-table schema, 1M range) first.
+        job_series = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32))
         job_range_dic = common.get_job_range_dic([self.job_tab_current_job, ], range_size=1000000)
         job_range = list(job_range_dic.keys())[0]
         job_data_db_file = str(self.cluster_db_path) + '/job_data/' + str(job_range) + '.db'
+        job_data_archive_file = common_archive.get_archive_file(job_data_db_file)
 
         if os.path.exists(job_data_db_file):
             (connect_result, db_conn) = common_sqlite3.connect_db_file(job_data_db_file)
 
             if connect_result == 'passed':
                 try:
-                    curs = db_conn.cursor()
-                    curs.execute("SELECT sample_time, mem FROM job_data WHERE job_id=? ORDER BY sample_second", (str(self.job_tab_current_job),))
-                    rows = curs.fetchall()
-                    curs.close()
+                    job_series = common_job_data.get_job_series(db_conn, self.job_tab_current_job)
+                except Exception:
+                    pass
+                finally:
                     db_conn.close()
 
-                    if rows:
-                        first_sample_time = datetime.datetime.strptime(str(rows[0][0]), '%Y%m%d_%H%M%S').timestamp()
+        if (not len(job_series[0])) and os.path.exists(job_data_archive_file):
+            job_series = common_job_data.get_job_archive_series(job_data_archive_file, self.job_tab_current_job)
 
-                        for (sample_time, mem) in rows:
-                            current_time = datetime.datetime.strptime(str(sample_time), '%Y%m%d_%H%M%S').timestamp()
-                            runtime = int((current_time - first_sample_time) / 60)
-                            runtime_list.append(runtime)
+        return job_series
 
-                            if mem == '' or mem is None:
-                                mem = '0'
+    def get_job_mem_list(self):
+        """
+        Get job sample-time mem list for self.job_tab_current_job.
+        Try new job_data/ format first (numpy arrays), fall back to old job_mem/ format.
+        """
+        runtime_list = []
+        real_mem_list = []
 
-                            real_mem = round(float(mem) / 1024, 1)
-                            real_mem_list.append(real_mem)
+        # Try new format (job_data/ job series, 1M range, or its archive) first, return numpy arrays.
+        (sample_second, mem, idle_factor) = self.get_job_data_series()
 
-                        return runtime_list, real_mem_list
-                except Exception:
-                    db_conn.close()
+        if len(sample_second):
+            return (sample_second - sample_second[0]) // 60, np.round(np.nan_to_num(mem, nan=0.0) / 1024, 1)
 
         # Fall back to old format (job_mem/ per-job tables, 100K range).
         job_range_dic_old = common.get_job_range_dic([self.job_tab_current_job, ])
@@ -1154,42 +1209,17 @@ Please contact with liyanqing1987@163.com with any question."""
     def get_job_idle_factor_list(self):
         """
         Get job sample-time idle_factor list for self.job_tab_current_job.
-        Try new job_data/ format first, fall back to old job_idle_factor/ format.
+        Try new job_data/ format first (numpy arrays), fall back to old job_idle_factor/ format.
         """
         runtime_list = []
         idle_factor_list = []
 
-        # Try new format (job_data/ single-table schema, 1M range) first.
-        job_range_dic = common.get_job_range_dic([self.job_tab_current_job, ], range_size=1000000)
-        job_range = list(job_range_dic.keys())[0]
-        job_data_db_file = str(self.cluster_db_path) + '/job_data/' + str(job_range) + '.db'
-
-        if os.path.exists(job_data_db_file):
-            (connect_result, db_conn) = common_sqlite3.connect_db_file(job_data_db_file)
-
-            if connect_result == 'passed':
-                try:
-                    curs = db_conn.cursor()
-                    curs.execute("SELECT sample_time, idle_factor FROM job_data WHERE job_id=? ORDER BY sample_second", (str(self.job_tab_current_job),))
-                    rows = curs.fetchall()
-                    curs.close()
-                    db_conn.close()
-
-                    if rows:
-                        first_sample_time = datetime.datetime.strptime(str(rows[0][0]), '%Y%m%d_%H%M%S').timestamp()
+        # Try new format (job_data/ job series, 1M range, or its archive) first, return numpy arrays.
+        (sample_second, mem, idle_factor) = self.get_job_data_series()
 
-                        for (sample_time, idle_factor) in rows:
-                            if idle_factor == '' or idle_factor is None:
-                                continue
-
-                            current_time = datetime.datetime.strptime(str(sample_time), '%Y%m%d_%H%M%S').timestamp()
-                            runtime = int((current_time - first_sample_time) / 60)
-                            runtime_list.append(runtime)
-                            idle_factor_list.append(round(float(idle_factor), 2))
-
-                        return runtime_list, idle_factor_list
-                except Exception:
-                    db_conn.close()
+        if len(sample_second):
+            valid_mask = ~np.isnan(idle_factor)
+            return (sample_second[valid_mask] - sample_second[0]) // 60, np.round(idle_factor[valid_mask], 2)
 
         # Fall back to old format (job_idle_factor/ per-job tables, 100K range).
         job_range_dic_old = common.get_job_range_dic([self.job_tab_current_job, ])
@@ -1242,12 +1272,12 @@ Please contact with liyanqing1987@163.com with any question."""
             if self.job_tab_current_job_dic[self.job_tab_current_job]['status'] != 'PEND':
                 (runtime_list, mem_list) = self.get_job_mem_list()
 
-                if runtime_list and mem_list:
+                if len(runtime_list) and len(mem_list):
                     self.draw_job_tab_mem_curve(mem_fig, runtime_list, mem_list)
 
                 (idle_runtime_list, idle_factor_list) = self.get_job_idle_factor_list()
 
-                if idle_runtime_list and idle_factor_list:
+                if len(idle_runtime_list) and len(idle_factor_list):
                     self.draw_job_tab_idle_factor_curve(idle_factor_fig, idle_runtime_list, idle_factor_list)
 
     def draw_job_tab_mem_curve(self, fig, runtime_list, mem_list):
@@ -1317,8 +1347,14 @@ Please contact with liyanqing1987@163.com with any question."""
         self.jobs_tab_frame0.setFrameShadow(QFrame.Raised)
         self.jobs_tab_frame0.setFrameShape(QFrame.Box)
 
-        self.jobs_tab_table = QTableWidget(self.jobs_tab)
-        self.jobs_tab_table.itemClicked.connect(self.jobs_tab_check_click)
+        # Jobs are saved on JobsTableModel (columnar store), sorted/filtered by JobsTableProxyModel.
+        self.jobs_tab_model = JobsTableModel(self)
+        self.jobs_tab_proxy_model = JobsTableProxyModel(self)
+        self.jobs_tab_proxy_model.setSourceModel(self.jobs_tab_model)
+
+        self.jobs_tab_table = QTableView(self.jobs_tab)
+        self.jobs_tab_table.setModel(self.jobs_tab_proxy_model)
+        self.jobs_tab_table.clicked.connect(self.jobs_tab_check_click)
         self.jobs_tab_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.jobs_tab_table.customContextMenuRequested.connect(self.gen_jobs_tab_menu)
 
@@ -1418,10 +1454,7 @@ Please contact with liyanqing1987@163.com with any question."""
         # self.jobs_tab_table
         self.jobs_tab_table.setShowGrid(True)
         self.jobs_tab_table.setSortingEnabled(False)
-        self.jobs_tab_table.setColumnCount(0)
-        self.jobs_tab_table.setColumnCount(13)
-        self.jobs_tab_table_title_list = ['Job', 'User', 'Status', 'Queue', 'Host', 'Started', 'Project', 'Slot', 'IDLE', 'Rusage (G)', 'Mem (G)', 'MaxMem (G)', 'Command']
-        self.jobs_tab_table.setHorizontalHeaderLabels(self.jobs_tab_table_title_list)
+        self.jobs_tab_table_title_list = JobsTableModel.title_list
 
         self.jobs_tab_table.setColumnWidth(0, 80)
         self.jobs_tab_table.setColumnWidth(1, 120)
@@ -1476,180 +1509,45 @@ Please contact with liyanqing1987@163.com with any question."""
         if (len(specified_host_list) == 1) and (specified_host_list[0] != 'ALL'):
             command = str(command) + ' -m ' + str(specified_host_list[0])
 
-        # Run command to get expected jobs information.
-        common.bprint('Loading LSF jobs information ...', date_format='%Y-%m-%d %H:%M:%S')
-
-        my_show_message = ShowMessage('Info', 'Loading LSF jobs information ...')
-        my_show_message.start()
+        # Run and parse bjobs on a LsfInfoFetcher thread, only the displayed columns are kept on the columnar store.
+        # The same bjobs command is shared if it is running, and a newer query supersedes the older one.
+        fetch_key = 'bjobs (' + str(command) + ')'
+        self.jobs_tab_fetch_key = fetch_key
+        self.fetch_lsf_info(fetch_key, self.get_jobs_tab_column_dic, (command,))
+        self.wait_lsf_info([fetch_key])
+        column_dic = self.lsf_info_result_dic.pop(fetch_key, None)
 
-        job_dic = common_lsf.get_bjobs_uf_info(command)
-
-        time.sleep(0.01)
-        my_show_message.terminate()
-
-        # Filter job_dic.
-        job_list = list(job_dic.keys())
-
-        for job in job_list:
-            if ('ALL' not in specified_status_list) and (job_dic[job]['status'] not in specified_status_list):
-                del job_dic[job]
-                continue
-
-            if ('ALL' not in specified_queue_list) and (len(specified_queue_list) > 1) and (job_dic[job]['queue'] not in specified_queue_list):
-                del job_dic[job]
-                continue
-
-            if ('ALL' not in specified_host_list) and (len(specified_host_list) > 1):
-                find_host = False
-                started_on_list = job_dic[job]['started_on'].strip().split()
-
-                for specified_host in specified_host_list:
-                    if specified_host in started_on_list:
-                        find_host = True
-                        break
-
-                if not find_host:
-                    del job_dic[job]
-                    continue
-
-        # Fill self.jobs_tab_table items.
-        self.jobs_tab_table.setRowCount(0)
-        self.jobs_tab_table.setRowCount(len(job_dic.keys()))
-
-        # Don't remove below setting!!!
-        job_list = list(job_dic.keys())
-
-        for i in range(len(job_list)):
-            # Fill "Job" item.
-            job = job_list[i]
-            j = 0
-            item = QTableWidgetItem(job)
-            item.setFont(QFont('song', 9, QFont.Bold))
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "User" item.
-            j = j + 1
-            item = QTableWidgetItem(job_dic[job]['user'])
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Status" item.
-            j = j + 1
-            item = QTableWidgetItem(job_dic[job]['status'])
-            item.setFont(QFont('song', 9, QFont.Bold))
-
-            if (job_dic[job]['status'] == 'RUN'):
-                item.setForeground(QBrush(Qt.darkGreen))
-            elif (job_dic[job]['status'] in ['PEND', 'PSUSP', 'USUSP', 'SSUSP', 'WAIT', 'PROV']):
-                item.setForeground(QBrush(Qt.blue))
-            elif (job_dic[job]['status'] == 'DONE'):
-                item.setForeground(QBrush(Qt.gray))
-            elif (job_dic[job]['status'] in ['EXIT', 'UNKWN', 'ZOMBI']):
-                item.setForeground(QBrush(Qt.red))
-
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Queue" item.
-            j = j + 1
-            item = QTableWidgetItem(job_dic[job]['queue'])
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Host" item.
-            j = j + 1
-            item = QTableWidgetItem(job_dic[job]['started_on'])
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Started" item.
-            j = j + 1
-            start_time = common_lsf.switch_bjobs_uf_time(job_dic[job]['started_time'], '%Y-%m-%d %H:%M:%S')
-            item = QTableWidgetItem(start_time)
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Project" item.
-            j = j + 1
-
-            if str(job_dic[job]['project']) != '':
-                item = QTableWidgetItem()
-                item.setData(Qt.DisplayRole, job_dic[job]['project'])
-                self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Slot" item.
-            j = j + 1
-
-            if str(job_dic[job]['processors_requested']) != '':
-                item = QTableWidgetItem()
-                item.setData(Qt.DisplayRole, int(job_dic[job]['processors_requested']))
-                self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "IDLE" item.
-            j = j + 1
-            idle_value = ''
-
-            if str(job_dic[job]['idle_factor']) != '':
-                idle_value = round(float(job_dic[job]['idle_factor']), 2)
-
-            item = QTableWidgetItem()
-            item.setData(Qt.DisplayRole, idle_value)
-            self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Rusage" item.
-            j = j + 1
-            rusage_mem_value = 0
-
-            if str(job_dic[job]['rusage_mem']) != '':
-                item = QTableWidgetItem()
-                rusage_mem_value = round(float(job_dic[job]['rusage_mem']) / 1024, 1)
-                item.setData(Qt.DisplayRole, rusage_mem_value)
-                self.jobs_tab_table.setItem(i, j, item)
-
-            # Fill "Mem" item.
-            j = j + 1
-            mem_value = ''
-
-            if (job_dic[job]['status'] != 'DONE') and (job_dic[job]['status'] != 'EXIT'):
-                if str(job_dic[job]['mem']) != '':
-                    mem_value = round(float(job_dic[job]['mem']) / 1024, 1)
-
-            item = QTableWidgetItem()
-            item.setData(Qt.DisplayRole, mem_value)
-            self.jobs_tab_table.setItem(i, j, item)
-
-            if mem_value and (((not job_dic[job]['rusage_mem']) and (mem_value > 0)) or (job_dic[job]['rusage_mem'] and (mem_value > rusage_mem_value))):
-                item.setBackground(QBrush(Qt.red))
-
-            # Fill "MaxMem" item.
-            j = j + 1
-            max_mem_value = ''
-
-            if str(job_dic[job]['max_mem']) != '':
-                max_mem_value = round(float(job_dic[job]['max_mem']) / 1024, 1)
-
-            item = QTableWidgetItem()
-            item.setData(Qt.DisplayRole, max_mem_value)
-            self.jobs_tab_table.setItem(i, j, item)
+        if fetch_key != self.jobs_tab_fetch_key:
+            return
 
-            # Fill "Command" item.
-            j = j + 1
-            item = QTableWidgetItem(job_dic[job]['command'])
-            self.jobs_tab_table.setItem(i, j, item)
+        if column_dic is not None:
+            self.jobs_tab_model.set_column_dic(column_dic)
 
+        # Filter (and sort) jobs on the proxy model.
+        self.jobs_tab_proxy_model.set_filter(specified_status_list, specified_queue_list, specified_host_list)
         self.jobs_tab_table.setSortingEnabled(True)
 
-    def jobs_tab_check_click(self, item=None):
+    def get_jobs_tab_column_dic(self, command):
+        """
+        Run bjobs command and switch the jobs into the JobsTableModel columnar store (on LsfInfoFetcher thread).
+        """
+        return JobsTableModel.gen_column_dic(common_lsf.iter_bjobs_uf_info(command))
+
+    def jobs_tab_check_click(self, index=None):
         """
         If click the Job id, jump to the JOB tab and show the job information.
         If click the "PEND" Status, show the job pend reasons on a QMessageBox.information().
         """
-        if item is not None:
-            current_row = self.jobs_tab_table.currentRow()
-            job = self.jobs_tab_table.item(current_row, 0).text().strip()
+        if (index is not None) and index.isValid():
+            job = self.jobs_tab_proxy_model.get_value(index.row(), 'job')
 
-            if item.column() == 0:
+            if index.column() == 0:
                 if job != '':
                     self.job_tab_job_line.setText(job)
                     self.check_job_on_job_tab()
                     self.main_tab.setCurrentWidget(self.job_tab)
-            elif item.column() == 2:
-                job_status = self.jobs_tab_table.item(current_row, 2).text().strip()
+            elif index.column() == 2:
+                job_status = self.jobs_tab_proxy_model.get_value(index.row(), 'status')
 
                 if job_status == 'PEND':
                     self.check_pend_reason(job=job)
@@ -1662,12 +1560,11 @@ Please contact with liyanqing1987@163.com with any question."""
         """
         Generate right click menu on self.jobs_tab_table.
         """
-        item = self.jobs_tab_table.itemAt(pos)
+        index = self.jobs_tab_table.indexAt(pos)
 
-        if item and (item.column() == 9):  # Rusage (G) column
-            current_row = self.jobs_tab_table.currentRow()
-            job = self.jobs_tab_table.item(current_row, 0).text().strip()
-            job_user = self.jobs_tab_table.item(current_row, 1).text().strip()
+        if index.isValid() and (index.column() == 9):  # Rusage (G) column
+            job = self.jobs_tab_proxy_model.get_value(index.row(), 'job')
+            job_user = self.jobs_tab_proxy_model.get_value(index.row(), 'user')
 
             # Only show menu for current user's jobs
             if job_user == USER:
@@ -1684,26 +1581,19 @@ Please contact with liyanqing1987@163.com with any question."""
         Open dialog to modify job's rusage memory.
         """
         # Get current Rusage value from table
-        current_row = -1
-
-        for row in range(self.jobs_tab_table.rowCount()):
-            if self.jobs_tab_table.item(row, 0).text().strip() == job:
-                current_row = row
-                break
+        current_row = self.jobs_tab_model.get_job_row(job)
 
         if current_row == -1:
             return
 
-        rusage_item = self.jobs_tab_table.item(current_row, 9)
-        current_rusage_gb = rusage_item.text().strip() if rusage_item else ''
+        current_rusage_gb = str(self.jobs_tab_model.get_value(current_row, 'rusage_mem'))
         current_rusage_mb = 0
 
         if current_rusage_gb and re.match(r'^\d+\.?\d*$', current_rusage_gb):
             current_rusage_mb = int(float(current_rusage_gb) * 1024)
 
         # Get host information to determine max rusage limit
-        host_item = self.jobs_tab_table.item(current_row, 4)
-        host = host_item.text().strip() if host_item else ''
+        host = self.jobs_tab_model.get_value(current_row, 'started_on').strip()
 
         # Default max value (int max value = 2^31 - 1 = 2147483647 MB ≈ 2048 TB)
         max_rusage_mb = 2147483647
@@ -1804,14 +1694,7 @@ Please contact with liyanqing1987@163.com with any question."""
             self.gen_jobs_tab_table()
 
             # Also try to update the specific cell directly for immediate feedback
-            # Find the job row and update the Rusage value
-            for row in range(self.jobs_tab_table.rowCount()):
-                if self.jobs_tab_table.item(row, 0).text().strip() == job:
-                    rusage_gb = round(new_rusage_mb / 1024, 1)
-                    item = QTableWidgetItem()
-                    item.setData(Qt.DisplayRole, rusage_gb)
-                    self.jobs_tab_table.setItem(row, 9, item)
-                    break
+            self.jobs_tab_model.set_value(job, 'rusage_mem', round(new_rusage_mb / 1024, 1))
         else:
             error_msg = stderr.decode('utf-8').strip()
             common.bprint(f'Failed to modify rusage: {error_msg}', date_format='%Y-%m-%d %H:%M:%S', level='Error')
@@ -2020,11 +1903,7 @@ Please contact with liyanqing1987@163.com with any question."""
         self.hosts_tab_table.setRowCount(len(hosts_tab_specified_host_list))
 
         # Fresh LSF bhosts/lsload/lshosts/host_queue/bhosts_load information.
-        self.fresh_lsf_info('bhosts')
-        self.fresh_lsf_info('lsload')
-        self.fresh_lsf_info('lshosts')
-        self.fresh_lsf_info('host_queue')
-        self.fresh_lsf_info('bhosts_load')
+        self.fresh_lsf_info('bhosts', 'lsload', 'lshosts', 'host_queue', 'bhosts_load')
 
         for (i, host) in enumerate(hosts_tab_specified_host_list):
             fatal_error = False
@@ -2324,9 +2203,7 @@ Please contact with liyanqing1987@163.com with any question."""
         hosts_tab_specified_host_list = []
 
         # Fresh LSF bhosts/lshosts/host_queue information.
-        self.fresh_lsf_info('bhosts')
-        self.fresh_lsf_info('lshosts')
-        self.fresh_lsf_info('host_queue')
+        self.fresh_lsf_info('bhosts', 'lshosts', 'host_queue')
 
         if 'HOST_NAME' in self.bhosts_dic:
             for host in self.bhosts_dic['HOST_NAME']:
@@ -2510,8 +2387,7 @@ Please contact with liyanqing1987@163.com with any question."""
         Set (initialize) self.hosts_tab_maxmem_combo.
         """
         self.hosts_tab_maxmem_combo.clear()
-        self.fresh_lsf_info('bhosts')
-        self.fresh_lsf_info('lshosts')
+        self.fresh_lsf_info('bhosts', 'lshosts')
 
         maxmem_list = []
 
@@ -2722,15 +2598,14 @@ Please contact with liyanqing1987@163.com with any question."""
                 common.bprint(f'Failed on connecting load database file "{load_db_file}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             else:
                 if specified_host:
-                    table_name = 'load_' + str(specified_host)
                     begin_date = self.load_tab_begin_date_edit.date().toString(Qt.ISODate)
                     begin_time = str(begin_date) + ' 00:00:00'
                     begin_second = time.mktime(time.strptime(begin_time, '%Y-%m-%d %H:%M:%S'))
                     end_date = self.load_tab_end_date_edit.date().toString(Qt.ISODate)
                     end_time = str(end_date) + ' 23:59:59'
                     end_second = time.mktime(time.strptime(end_time, '%Y-%m-%d %H:%M:%S'))
-                    select_condition = "WHERE sample_second BETWEEN '" + str(begin_second) + "' AND '" + str(end_second) + "'"
-                    data_dic = common_sqlite3.get_sql_table_data(load_db_file, load_db_conn, table_name, ['sample_time', 'ut', 'mem'], select_condition)
+                    load_history_dic = common_history.get_history_data(load_db_file, load_db_conn, 'load', [specified_host], begin_second, end_second, ['ut', 'mem'])
+                    data_dic = load_history_dic.get(specified_host, {})
 
                     if not data_dic:
                         common.bprint(f'Load information is empty for "{specified_host}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
@@ -2740,19 +2615,11 @@ Please contact with liyanqing1987@163.com with any question."""
                             sample_time = datetime.datetime.strptime(data_dic['sample_time'][i], '%Y%m%d_%H%M%S')
                             sample_time_list.append(sample_time)
 
-                            # For ut
-                            ut = data_dic['ut'][i]
+                            # For ut (percent number)
+                            ut_list.append(int(data_dic['ut'][i] or 0))
 
-                            if ut:
-                                ut = int(re.sub(r'%', '', ut))
-                            else:
-                                ut = 0
-
-                            ut_list.append(ut)
-
-                            # For mem
-                            mem = round(self.mem_unit_switch(data_dic['mem'][i]), 1)
-                            mem_list.append(mem)
+                            # For mem (MB -> GB)
+                            mem_list.append(round((data_dic['mem'][i] or 0)/1024, 1))
 
                     load_db_conn.close()
 
@@ -3144,10 +3011,40 @@ Please contact with liyanqing1987@163.com with any question."""
                 else:
                     select_condition = 'WHERE project IN ' + str(tuple(specified_project_list))
 
+        # Sum the rolled up dates with one GROUP BY on user_rollup.db.
+        date_list = []
+
         while current_date <= end_date:
-            # Get all user/date history data.
-            current_date_string = current_date.toString('yyyyMMdd')
+            date_list.append(current_date.toString('yyyyMMdd'))
             current_date = current_date.addDays(1)
+
+        user_rollup_db_file = common_history.get_user_rollup_db_file(str(self.cluster_db_path) + '/user')
+        rollup_date_list = []
+
+        if os.path.exists(user_rollup_db_file):
+            rollup_date_set = set(common_history.get_user_rollup_date_list(user_rollup_db_file, ''))
+            rollup_date_list = [date for date in date_list if date in rollup_date_set]
+
+            if specified_status_list and ('ALL' not in specified_status_list):
+                rollup_status_list = specified_status_list
+            else:
+                rollup_status_list = None
+
+            rollup_user_dic = common_history.get_user_rollup(user_rollup_db_file, '', rollup_date_list, rollup_status_list, specified_queue_list, specified_project_list, specified_user_list)
+
+            for (user, rollup_dic) in rollup_user_dic.items():
+                user_dic.setdefault(user, {'job_num': 0, 'done_num': 0, 'exit_num': 0, 'rusage_mem': 0, 'max_mem': 0})
+
+                for (key, value) in rollup_dic.items():
+                    user_dic[user][key] += value
+                    user_dic['ALL'][key] += value
+
+        # Read raw user tables of the dates which are not rolled up yet.
+        for current_date_string in date_list:
+            if current_date_string in rollup_date_list:
+                continue
+
+            # Get all user/date history data.
             user_db_file = str(self.cluster_db_path) + '/user/' + str(current_date_string) + '.db'
 
             if os.path.exists(user_db_file):
@@ -3262,9 +3159,7 @@ Please contact with liyanqing1987@163.com with any question."""
         self.queues_tab_table.setColumnWidth(3, 80)
 
         # Fresh LSF bhosts/queues/queue_host information.
-        self.fresh_lsf_info('bhosts')
-        self.fresh_lsf_info('bqueues')
-        self.fresh_lsf_info('queue_host')
+        self.fresh_lsf_info('bhosts', 'bqueues', 'queue_host')
 
         # Fill self.queues_tab_table items.
         self.queues_tab_table.setRowCount(0)
@@ -3596,39 +3491,32 @@ Please contact with liyanqing1987@163.com with any question."""
             if queue_db_file_connect_result == 'failed':
                 common.bprint(f'Failed on connecting queue database file "{queue_db_file}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             else:
-                for queue in queue_list:
-                    table_name = 'queue_' + str(queue)
-                    begin_date = self.queues_tab_begin_date_edit.date().toString(Qt.ISODate)
-                    begin_time = str(begin_date) + ' 00:00:00'
-                    begin_second = time.mktime(time.strptime(begin_time, '%Y-%m-%d %H:%M:%S'))
-                    end_date = self.queues_tab_end_date_edit.date().toString(Qt.ISODate)
-                    end_time = str(end_date) + ' 23:59:59'
-                    end_second = time.mktime(time.strptime(end_time, '%Y-%m-%d %H:%M:%S'))
-                    select_condition = 'WHERE sample_second>=' + str(begin_second) + ' AND sample_second<=' + str(end_second)
-                    data_dic = common_sqlite3.get_sql_table_data(queue_db_file, queue_db_conn, table_name, ['sample_time', 'TOTAL', 'PEND', 'RUN'], select_condition)
+                begin_date = self.queues_tab_begin_date_edit.date().toString(Qt.ISODate)
+                begin_time = str(begin_date) + ' 00:00:00'
+                begin_second = time.mktime(time.strptime(begin_time, '%Y-%m-%d %H:%M:%S'))
+                end_date = self.queues_tab_end_date_edit.date().toString(Qt.ISODate)
+                end_time = str(end_date) + ' 23:59:59'
+                end_second = time.mktime(time.strptime(end_time, '%Y-%m-%d %H:%M:%S'))
+                key_list = ['TOTAL', 'PEND', 'RUN']
+
+                if self.enable_queue_detail:
+                    # Every sample is a point on detail mode.
+                    queue_history_dic = common_history.get_history_data(queue_db_file, queue_db_conn, 'queue', list(queue_list), begin_second, end_second, key_list)
+                    queue_average_dic = {}
+
+                    for (queue, data_dic) in queue_history_dic.items():
+                        queue_average_dic[queue] = {sample_time: {key: data_dic[key][i] for key in key_list} for (i, sample_time) in enumerate(data_dic['sample_time'])}
+                else:
+                    # Day average is counted by sqlite.
+                    queue_average_dic = common_history.get_history_average(queue_db_file, queue_db_conn, 'queue', list(queue_list), begin_second, end_second, key_list, group_by='day')
 
-                    if not data_dic:
+                for queue in queue_list:
+                    if not queue_average_dic.get(queue):
                         common.bprint(f'Queue pend/run job number information is empty for "{queue}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
                     else:
-                        tmp_date_dic = {}
-
-                        for i, sample_time in enumerate(data_dic['sample_time']):
-                            if self.enable_queue_detail:
-                                date = sample_time
-                            else:
-                                date = re.sub(r'_.*', '', sample_time)
-
-                            tmp_date_dic.setdefault(date, {'total': [], 'pend': [], 'run': []})
-                            tmp_date_dic[date]['total'].append(int(data_dic['TOTAL'][i]))
-                            tmp_date_dic[date]['pend'].append(int(data_dic['PEND'][i]))
-                            tmp_date_dic[date]['run'].append(int(data_dic['RUN'][i]))
-
-                        for date in tmp_date_dic.keys():
+                        for (date, value_dic) in queue_average_dic[queue].items():
                             queue_date_dic.setdefault(date, {})
-                            queue_date_dic[date].setdefault(queue, {'total': [], 'pend': [], 'run': []})
-                            queue_date_dic[date][queue]['total'] = int(sum(tmp_date_dic[date]['total']) / len(tmp_date_dic[date]['total']))
-                            queue_date_dic[date][queue]['pend'] = int(sum(tmp_date_dic[date]['pend']) / len(tmp_date_dic[date]['pend']))
-                            queue_date_dic[date][queue]['run'] = int(sum(tmp_date_dic[date]['run']) / len(tmp_date_dic[date]['run']))
+                            queue_date_dic[date][queue] = {'total': int(value_dic['TOTAL'] or 0), 'pend': int(value_dic['PEND'] or 0), 'run': int(value_dic['RUN'] or 0)}
 
                 queue_db_conn.close()
 
@@ -4113,22 +4001,16 @@ Please contact with liyanqing1987@163.com with any question."""
     def get_queue_utilization_info(self):
         """
         Get queue utilization info from sqlite database using historical queue-host mapping, support multi-cluster.
+        Time series are cached on self.utilization_cache (common_cache.TimeSeriesCache), only the time ranges which are
+        not cached yet are calculated with calculate_queue_utilization().
         """
-        import pandas as pd
-
         common.bprint('Loading queue utilization info ...', date_format='%Y-%m-%d %H:%M:%S')
 
-        my_show_message = ShowMessage('Info', 'Loading queue utilization info ...')
-        my_show_message.start()
-
         # Get time range
         begin_date = self.utilization_tab_begin_date_edit.date().toString(Qt.ISODate)
-        original_begin_second = int(time.mktime(time.strptime(f"{begin_date} 00:00:00", '%Y-%m-%d %H:%M:%S')))
+        begin_second = int(time.mktime(time.strptime(f"{begin_date} 00:00:00", '%Y-%m-%d %H:%M:%S')))
         end_date = self.utilization_tab_end_date_edit.date().toString(Qt.ISODate)
-        original_end_second = int(time.mktime(time.strptime(f"{end_date} 23:59:59", '%Y-%m-%d %H:%M:%S')))
-        # 缓存查询用的时间范围
-        begin_second = original_begin_second
-        end_second = original_end_second
+        end_second = int(time.mktime(time.strptime(f"{end_date} 23:59:59", '%Y-%m-%d %H:%M:%S')))
 
         # 获取选中的集群
         db_root_path = Path(config.db_path)
@@ -4148,77 +4030,62 @@ Please contact with liyanqing1987@163.com with any question."""
         selected_queues = list(selected_queue_dic.values()) if selected_queue_dic else []
 
         # Generate cache key (增量查询优化：key包含集群和队列，同条件下复用缓存)
-        cache_base_key = (tuple(selected_clusters), tuple(selected_queues), self.enable_utilization_detail)
-
-        # Check cache
-        current_time = time.time()
-        cached_full_util = None
-        cached_begin = 0
-        cached_end = 0
-
-        if cache_base_key in self.utilization_cache:
-            cached_full_util, cache_time, cached_begin, cached_end = self.utilization_cache[cache_base_key]
-
-            if current_time - cache_time < self.utilization_cache_timeout:
-                # 检查新查询的时间范围是否完全在缓存范围内
-                if begin_second >= cached_begin and end_second <= cached_end:
-                    common.bprint('Using cached utilization data (full hit).', date_format='%Y-%m-%d %H:%M:%S')
-                    # 从缓存中截取需要的时间段
-                    queue_utilization_dic = {}
-
-                    for queue in cached_full_util:
-                        queue_utilization_dic[queue] = {'is_deleted': cached_full_util[queue]['is_deleted']}
-
-                        for res in ['slot', 'cpu', 'mem']:
-                            vals = []
-
-                            for ts_key, val in cached_full_util[queue][res].items():
-                                if self.enable_utilization_detail:
-                                    ts = int(time.mktime(time.strptime(ts_key, '%Y%m%d_%H%M%S')))
-                                else:
-                                    ts = int(time.mktime(time.strptime(f"{ts_key[:4]}-{ts_key[4:6]}-{ts_key[6:8]} 12:00:00", '%Y-%m-%d %H:%M:%S')))
-
-                                if begin_second <= ts <= end_second:
-                                    vals.append(val)
-                            if vals:
-                                queue_utilization_dic[queue][res] = round(sum(vals) / len(vals), 1)
-                            else:
-                                queue_utilization_dic[queue][res] = 0.0
+        cache_key = (tuple(selected_clusters), tuple(selected_queues), self.enable_utilization_detail)
+        missing_range_list = self.utilization_cache.get_missing_range_list(cache_key, begin_second, end_second)
 
-                    time.sleep(0.01)
-                    my_show_message.terminate()
-                    # 缓存命中时也返回完整数据
-                    return queue_utilization_dic, cached_full_util, original_begin_second, original_end_second
-                else:
-                    common.bprint('Using cached utilization data (partial hit), only querying new time range.', date_format='%Y-%m-%d %H:%M:%S')
-                    # 部分命中，扩展时间范围查询
-                    new_begin = min(begin_second, cached_begin)
-                    new_end = max(end_second, cached_end)
-
-                    if new_begin == begin_second and new_end == end_second:
-                        # 完全不重叠，重新查询
-                        cached_full_util = None
-                    else:
-                        # 调整查询范围为新增部分
-                        if begin_second < cached_begin:
-                            query_begin = begin_second
-                            query_end = cached_begin
-                        else:
-                            query_begin = cached_end
-                            query_end = end_second
+        if not missing_range_list:
+            common.bprint('Using cached utilization data (full hit).', date_format='%Y-%m-%d %H:%M:%S')
+        elif missing_range_list != [(begin_second, end_second)]:
+            common.bprint(f'Using cached utilization data (partial hit), only querying {len(missing_range_list)} missing time ranges.', date_format='%Y-%m-%d %H:%M:%S')
+
+        for (missing_begin_second, missing_end_second) in missing_range_list:
+            time_util_dic = self.calculate_queue_utilization(selected_clusters, selected_queues, missing_begin_second, missing_end_second)
+            series_dic = {}
+            meta_dic = {}
+
+            for (queue, queue_dic) in time_util_dic.items():
+                meta_dic[queue] = {'is_deleted': queue_dic['is_deleted']}
+
+                for res in common_utilization.UTILIZATION_KEY_LIST:
+                    series_dic[str(queue) + '\t' + str(res)] = queue_dic[res]
 
-                        begin_second, end_second = query_begin, query_end
+            # Time after now is not marked as cached, so it is queried again next time.
+            self.utilization_cache.update(cache_key, missing_begin_second, min(missing_end_second, int(time.time())), series_dic, meta_dic)
+
+        # Get {queue: {'is_deleted': ..., res: {bucket_second: value}}} and the average of every queue from cache.
+        (series_dic, meta_dic) = self.utilization_cache.get(cache_key, begin_second, end_second)
+        full_time_util = {}
+        queue_utilization_dic = {}
+
+        for (series_name, (second_list, value_list)) in series_dic.items():
+            (queue, res) = series_name.split('\t')
+
+            if queue not in full_time_util:
+                is_deleted = meta_dic.get(queue, {}).get('is_deleted', False)
+                full_time_util[queue] = {'is_deleted': is_deleted, 'slot': {}, 'cpu': {}, 'mem': {}}
+                queue_utilization_dic[queue] = {'is_deleted': is_deleted, 'slot': 0.0, 'cpu': 0.0, 'mem': 0.0}
+
+            full_time_util[queue][res] = dict(zip(second_list, value_list))
+            queue_utilization_dic[queue][res] = round(sum(value_list) / len(value_list), 1)
+
+        if not queue_utilization_dic:
+            common.bprint('No utilization data found for selected clusters and queues.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            return None
 
-        # Clean up expired cache
-        keys_to_delete = [k for k, (_, t, _, _) in self.utilization_cache.items() if current_time - t > self.utilization_cache_timeout]
+        return queue_utilization_dic, full_time_util, begin_second, end_second
 
-        for k in keys_to_delete:
-            del self.utilization_cache[k]
+    def calculate_queue_utilization(self, selected_clusters, selected_queues, begin_second, end_second):
+        """
+        Calculate queue utilization between begin_second and end_second, return {queue: {'is_deleted': ..., res: {bucket_second: value}}}.
+        The samples of a cluster are read with one bulk query into common_utilization.UtilizationArray, and all queues of
+        a mapping slice are averaged together with numpy.
+        """
+        db_root_path = Path(config.db_path)
+        begin_date = time.strftime('%Y-%m-%d', time.localtime(begin_second))
+        end_date = time.strftime('%Y-%m-%d', time.localtime(end_second))
 
-        # Limit cache size to 20 entries
-        if len(self.utilization_cache) > 20:
-            oldest_key = sorted(self.utilization_cache.keys(), key=lambda k: self.utilization_cache[k][1])[0]
-            del self.utilization_cache[oldest_key]
+        my_show_message = ShowMessage('Info', 'Loading queue utilization info ...')
+        my_show_message.start()
 
         # Update message: loading historical mapping
         # 解析队列和集群的映射
@@ -4258,7 +4125,7 @@ Please contact with liyanqing1987@163.com with any question."""
             QApplication.processEvents()
 
             # Get historical mapping for current cluster
-            historical_queue_list, mapping_matrix, current_queue_list = self.get_historical_queue_host_mapping(str(cluster_db_path), original_begin_second, original_end_second)
+            historical_queue_list, mapping_matrix, current_queue_list = self.get_historical_queue_host_mapping(str(cluster_db_path), begin_second, end_second)
 
             # 确定当前集群要处理的队列
             if only_all_selected or 'ALL' in selected_queues:
@@ -4293,59 +4160,29 @@ Please contact with liyanqing1987@163.com with any question."""
             my_show_message.start()
             QApplication.processEvents()
 
-            # Get utilization data for current cluster
-            df_cluster = pd.DataFrame()
-
+            # Get utilization data for current cluster into flat numpy arrays (one bulk read).
             if self.enable_utilization_detail:
+                host_data_dic = {}
                 db_file = str(cluster_db_path) + '/utilization.db'
-            else:
-                db_file = str(cluster_db_path) + '/utilization_day.db'
-
-            if os.path.exists(db_file):
-                (result, conn) = common_sqlite3.connect_db_file(db_file)
-
-                if result == 'passed':
-                    host_dfs = []
-
-                    for host in all_hosts:
-                        table_name = f'utilization_{host}'
-
-                        if table_name not in common_sqlite3.get_sql_table_list(db_file, conn):
-                            continue
-
-                        if self.enable_utilization_detail:
-                            key_list = ['sample_second', 'slot', 'cpu', 'mem']
-                            select_condition = f"WHERE sample_second BETWEEN {original_begin_second} AND {original_end_second}"
-                        else:
-                            key_list = ['sample_date', 'slot', 'cpu', 'mem']
-                            begin_date_str = re.sub('-', '', begin_date)
-                            end_date_str = re.sub('-', '', end_date)
-                            select_condition = f"WHERE sample_date BETWEEN '{begin_date_str}' AND '{end_date_str}'"
-
-                        data = common_sqlite3.get_sql_table_data(db_file, conn, table_name, key_list, select_condition)
-
-                        if data:
-                            df_host = pd.DataFrame(data)
-                            df_host['host'] = host
-
-                            if self.enable_utilization_detail:
-                                df_host['sample_second'] = df_host['sample_second'].astype(np.int64)
 
-                            host_dfs.append(df_host)
+                if os.path.exists(db_file):
+                    (result, conn) = common_sqlite3.connect_db_file(db_file)
 
-                    if host_dfs:
-                        df_cluster = pd.concat(host_dfs, ignore_index=True)
+                    if result == 'passed':
+                        # Get all hosts with one indexed range scan on the long-format table.
+                        host_data_dic = common_history.get_history_data(db_file, conn, 'utilization', all_hosts, begin_second, end_second, ['slot', 'cpu', 'mem'])
+                        conn.close()
 
-                    conn.close()
-
-            # 转换数值类型
-            for res in ['slot', 'cpu', 'mem']:
-                if res in df_cluster.columns:
-                    df_cluster[res] = pd.to_numeric(df_cluster[res], errors='coerce').fillna(0).clip(upper=100)
+                utilization_array = common_utilization.UtilizationArray(host_data_dic, 'sample_second')
+            else:
+                host_data_dic = self.get_utilization_day_data_dic(str(cluster_db_path), all_hosts, begin_date, end_date)
+                utilization_array = common_utilization.UtilizationArray(host_data_dic, 'sample_date')
 
-            if df_cluster.empty:
+            if not utilization_array.has_sample():
                 continue
 
+            bucket_second_list = utilization_array.bucket_second.tolist()
+
             # Update message: calculating utilization for cluster
             time.sleep(0.01)
             my_show_message.terminate()
@@ -4353,136 +4190,124 @@ Please contact with liyanqing1987@163.com with any question."""
             my_show_message.start()
             QApplication.processEvents()
 
-            # 生成时间key
-            if self.enable_utilization_detail:
-                df_cluster['time_key'] = df_cluster['sample_second'].apply(lambda x: time.strftime('%Y%m%d_%H%M%S', time.localtime(x)))
-                df_cluster['ts'] = df_cluster['sample_second']
-            else:
-                df_cluster['ts'] = pd.to_datetime(df_cluster['sample_date'], format='%Y%m%d').astype(np.int64) // 10**9 + 12 * 3600
-                df_cluster['time_key'] = df_cluster['sample_date']
-
             # 处理当前集群的每个时间切片
-            for slice_idx, (slice_start, slice_end, mapping) in enumerate(mapping_matrix):
-                if slice_end - slice_start <= 0:
+            for (slice_start, slice_end, mapping) in mapping_matrix:
+                if (slice_end - slice_start <= 0) or (not utilization_array.has_sample(slice_start, slice_end)):
                     continue
 
-                mask = (df_cluster['ts'] >= slice_start) & (df_cluster['ts'] <= slice_end)
-                df_slice = df_cluster[mask].copy()
+                # Average all queues of the slice together, the last host group is the ALL queue of the slice.
+                slice_queue_list = [queue for queue in cluster_process_queues if queue in mapping]
+                all_slice_hosts = set()
 
-                if df_slice.empty:
-                    continue
+                for queue in slice_queue_list:
+                    all_slice_hosts.update(mapping[queue])
 
-                # 处理单个队列
-                for queue in cluster_process_queues:
-                    if queue not in mapping:
-                        continue
+                (average, count) = utilization_array.get_group_average([mapping[queue] for queue in slice_queue_list] + [all_slice_hosts], slice_start, slice_end)
+                average = np.round(average, 1)
 
+                # 处理单个队列
+                for (i, queue) in enumerate(slice_queue_list):
                     full_queue_name = queue_full_name_map.get((cluster, queue), f"{cluster}-{queue}")
 
                     if full_queue_name not in all_time_based_util:
                         all_time_based_util[full_queue_name] = {'slot': {}, 'cpu': {}, 'mem': {}}
                         all_queue_avg[full_queue_name] = {'is_deleted': queue not in current_queue_list}
 
-                    queue_hosts = mapping[queue]
-                    df_queue = df_slice[df_slice['host'].isin(queue_hosts)]
-
-                    if df_queue.empty:
-                        continue
-
-                    for res in ['slot', 'cpu', 'mem']:
-                        grouped = df_queue.groupby('time_key')[res].mean().round(1)
+                    for bucket in np.flatnonzero(count[i]).tolist():
+                        bucket_second = bucket_second_list[bucket]
 
-                        for time_key, avg_val in grouped.items():
+                        for (res, avg_val) in zip(common_utilization.UTILIZATION_KEY_LIST, average[i, bucket].tolist()):
                             if not self.enable_utilization_detail:
-                                all_time_based_util[full_queue_name][res][time_key] = avg_val
+                                all_time_based_util[full_queue_name][res][bucket_second] = avg_val
                             else:
-                                if time_key not in all_time_based_util[full_queue_name][res]:
-                                    all_time_based_util[full_queue_name][res][time_key] = []
-
-                                all_time_based_util[full_queue_name][res][time_key].append(avg_val)
+                                all_time_based_util[full_queue_name][res].setdefault(bucket_second, []).append(avg_val)
 
                 # 处理当前集群的ALL队列数据，汇总到全局ALL
                 if 'ALL' not in all_time_based_util:
                     all_time_based_util['ALL'] = {'slot': {}, 'cpu': {}, 'mem': {}}
                     all_queue_avg['ALL'] = {'is_deleted': False}
 
-                all_slice_hosts = set()
-
-                for queue in cluster_process_queues:
-                    if queue in mapping:
-                        all_slice_hosts.update(mapping[queue])
+                for bucket in np.flatnonzero(count[-1]).tolist():
+                    bucket_second = bucket_second_list[bucket]
 
-                df_all_queue = df_slice[df_slice['host'].isin(all_slice_hosts)]
+                    for (res, avg_val) in zip(common_utilization.UTILIZATION_KEY_LIST, average[-1, bucket].tolist()):
+                        all_time_based_util['ALL'][res].setdefault(bucket_second, []).append(avg_val)
 
-                if not df_all_queue.empty:
-                    for res in ['slot', 'cpu', 'mem']:
-                        grouped = df_all_queue.groupby('time_key')[res].mean().round(1)
-
-                        for time_key, avg_val in grouped.items():
-                            if time_key not in all_time_based_util['ALL'][res]:
-                                all_time_based_util['ALL'][res][time_key] = []
-
-                            all_time_based_util['ALL'][res][time_key].append(avg_val)
-
-        # 合并所有集群的数据，计算平均值
-        queue_utilization_dic = copy.deepcopy(all_queue_avg)
+        # 合并所有集群的数据，detail模式下的多值取平均
         full_time_util = {}
 
-        # 处理detail模式下的多值平均
         for queue in all_time_based_util:
-            full_time_util[queue] = {'is_deleted': queue_utilization_dic[queue]['is_deleted']}
+            full_time_util[queue] = {'is_deleted': all_queue_avg[queue]['is_deleted']}
 
             for res in ['slot', 'cpu', 'mem']:
-                res_data = all_time_based_util[queue][res]
-                avg_vals = {}
-                all_vals = []
+                full_time_util[queue][res] = {}
 
-                for time_key, vals in res_data.items():
+                for (bucket_second, vals) in all_time_based_util[queue][res].items():
                     if isinstance(vals, list):
-                        avg_val = round(sum(vals) / len(vals), 1)
+                        full_time_util[queue][res][bucket_second] = round(sum(vals) / len(vals), 1)
                     else:
-                        avg_val = vals
+                        full_time_util[queue][res][bucket_second] = vals
 
-                    avg_vals[time_key] = avg_val
-                    all_vals.append(avg_val)
+        time.sleep(0.01)
+        my_show_message.terminate()
 
-                full_time_util[queue][res] = avg_vals
+        return full_time_util
 
-                if all_vals:
-                    queue_utilization_dic[queue][res] = round(sum(all_vals) / len(all_vals), 1)
-                else:
-                    queue_utilization_dic[queue][res] = 0.0
+    def get_utilization_day_data_dic(self, cluster_db_path, host_list, begin_date, end_date):
+        """
+        Get day average utilization {host: {'sample_date': [...], 'slot': [...], 'cpu': [...], 'mem': [...]}, ...} for specified hosts.
+        The day rollup on utilization.db is read with one query, utilization_day.db is only read for the dates before rollup.
+        """
+        host_data_dic = {}
+        begin_date_str = re.sub('-', '', begin_date)
+        end_date_str = re.sub('-', '', end_date)
+        host_rollup_begin_date_dic = {}
 
-        # 合并缓存数据（如果有部分命中）
-        if cached_full_util is not None:
-            # 合并新旧时间序列数据
-            for queue in full_time_util:
-                if queue not in cached_full_util:
-                    cached_full_util[queue] = {'is_deleted': full_time_util[queue]['is_deleted']}
+        # Get day rollup (with period start second) from utilization.db.
+        utilization_db_file = str(cluster_db_path) + '/utilization.db'
 
-                    for res in ['slot', 'cpu', 'mem']:
-                        cached_full_util[queue][res] = {}
+        if os.path.exists(utilization_db_file):
+            begin_second = int(time.mktime(time.strptime(f'{begin_date} 00:00:00', '%Y-%m-%d %H:%M:%S')))
+            end_second = int(time.mktime(time.strptime(f'{end_date} 00:00:00', '%Y-%m-%d %H:%M:%S')))
+            utilization_rollup_dic = common_history.get_history_rollup(utilization_db_file, '', 'utilization', 'day', host_list, begin_second, end_second, ['slot', 'cpu', 'mem'])
 
-                # 合并每个时间点的数据
-                for res in ['slot', 'cpu', 'mem']:
-                    cached_full_util[queue][res].update(full_time_util[queue][res])
+            for (host, data) in utilization_rollup_dic.items():
+                host_data_dic[host] = {'sample_date': data['period'], 'slot': data['slot'], 'cpu': data['cpu'], 'mem': data['mem']}
+                host_rollup_begin_date_dic[host] = data['period'][0]
 
-            # 使用合并后的完整数据
-            full_time_util = cached_full_util
+        # Get the dates before rollup from utilization_day.db.
+        utilization_day_db_file = str(cluster_db_path) + '/utilization_day.db'
+        legacy_host_list = [host for host in host_list if host_rollup_begin_date_dic.get(host, '99999999') > begin_date_str]
 
-        # 保存到缓存
-        cache_begin = min(original_begin_second, cached_begin) if cached_full_util is not None else original_begin_second
-        cache_end = max(original_end_second, cached_end) if cached_full_util is not None else original_end_second
-        self.utilization_cache[cache_base_key] = (full_time_util, current_time, cache_begin, cache_end)
+        if legacy_host_list and os.path.exists(utilization_day_db_file):
+            (result, conn) = common_sqlite3.connect_db_file(utilization_day_db_file)
 
-        time.sleep(0.01)
-        my_show_message.terminate()
+            if result == 'passed':
+                table_list = common_sqlite3.get_sql_table_list(utilization_day_db_file, conn)
 
-        if not queue_utilization_dic:
-            common.bprint('No utilization data found for selected clusters and queues.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
-            return None
+                for host in legacy_host_list:
+                    table_name = f'utilization_{host}'
+
+                    if table_name not in table_list:
+                        continue
+
+                    legacy_end_date_str = end_date_str
+
+                    if host in host_rollup_begin_date_dic:
+                        legacy_end_date_str = min(end_date_str, str(int(host_rollup_begin_date_dic[host]) - 1))
+
+                    select_condition = f"WHERE sample_date BETWEEN '{begin_date_str}' AND '{legacy_end_date_str}'"
+                    data = common_sqlite3.get_sql_table_data(utilization_day_db_file, conn, table_name, ['sample_date', 'slot', 'cpu', 'mem'], select_condition)
+
+                    if data and data.get('sample_date'):
+                        host_data_dic.setdefault(host, {'sample_date': [], 'slot': [], 'cpu': [], 'mem': []})
+
+                        for key in ['sample_date', 'slot', 'cpu', 'mem']:
+                            host_data_dic[host][key] = list(data[key]) + list(host_data_dic[host][key])
+
+                conn.close()
 
-        return queue_utilization_dic, full_time_util, original_begin_second, original_end_second
+        return host_data_dic
 
     def gen_utilization_tab_table(self, queue_utilization_dic={}):
         """
@@ -4504,8 +4329,7 @@ Please contact with liyanqing1987@163.com with any question."""
         self.utilization_tab_table.setColumnWidth(4, 60)
 
         # Fresh LSF bhosts/queues/queue_host information.
-        self.fresh_lsf_info('bhosts')
-        self.fresh_lsf_info('queue_host')
+        self.fresh_lsf_info('bhosts', 'queue_host')
 
         # Fill self.utilization_tab_table items.
         if queue_utilization_dic:
@@ -4729,17 +4553,8 @@ Please contact with liyanqing1987@163.com with any question."""
 
             # 计算队列的总平均，和左侧表格一致
             for res in selected_resource_list:
-                res_vals = []
-
-                for ts_key, val in queue_data[res].items():
-                    # 只统计当前时间范围内的数据
-                    if self.enable_utilization_detail:
-                        ts = int(time.mktime(time.strptime(ts_key, '%Y%m%d_%H%M%S')))
-                    else:
-                        ts = int(time.mktime(time.strptime(f"{ts_key[:4]}-{ts_key[4:6]}-{ts_key[6:8]} 12:00:00", '%Y-%m-%d %H:%M:%S')))
-
-                    if begin_second <= ts <= end_second:
-                        res_vals.append(val)
+                # 只统计当前时间范围内的数据（key为时间桶秒数）
+                res_vals = [val for (ts, val) in queue_data[res].items() if begin_second <= ts <= end_second]
 
                 if res_vals:
                     avg_val = round(sum(res_vals) / len(res_vals), 1)
@@ -4748,15 +4563,13 @@ Please contact with liyanqing1987@163.com with any question."""
                     # 整理时间序列数据
                     time_series = []
 
-                    for ts_key, val in queue_data[res].items():
-                        if self.enable_utilization_detail:
-                            ts = int(time.mktime(time.strptime(ts_key, '%Y%m%d_%H%M%S')))
-                            dt = datetime.datetime.strptime(ts_key, '%Y%m%d_%H%M%S')
-                        else:
-                            ts = int(time.mktime(time.strptime(f"{ts_key[:4]}-{ts_key[4:6]}-{ts_key[6:8]} 12:00:00", '%Y-%m-%d %H:%M:%S')))
-                            dt = datetime.datetime.strptime(ts_key, '%Y%m%d')
-
+                    for ts, val in queue_data[res].items():
                         if begin_second <= ts <= end_second:
+                            dt = datetime.datetime.fromtimestamp(ts)
+
+                            if not self.enable_utilization_detail:
+                                dt = dt.replace(hour=0, minute=0, second=0)
+
                             time_series.append((dt, val))
 
                     # 按时间排序
@@ -4866,6 +4679,13 @@ Please contact with liyanqing1987@163.com with any question."""
         self.license_tab_feature_table.itemClicked.connect(self.license_tab_check_click)
         self.license_tab_expires_table = QTableWidget(self.license_tab)
 
+        self.license_tab_frame1 = QFrame(self.license_tab)
+        self.license_tab_frame1.setFrameShadow(QFrame.Raised)
+        self.license_tab_frame1.setFrameShape(QFrame.Box)
+
+        # Feature whose usage history is shown on self.license_tab_frame1.
+        self.license_tab_history_feature = ''
+
         # self.license_tab - Grid
         license_tab_grid = QGridLayout()
 
@@ -4874,15 +4694,18 @@ Please contact with liyanqing1987@163.com with any question."""
         license_tab_grid.addWidget(self.license_tab_expires_label, 1, 1)
         license_tab_grid.addWidget(self.license_tab_feature_table, 2, 0)
         license_tab_grid.addWidget(self.license_tab_expires_table, 2, 1)
+        license_tab_grid.addWidget(self.license_tab_frame1, 3, 0, 1, 2)
 
         license_tab_grid.setRowStretch(0, 2)
         license_tab_grid.setRowStretch(1, 1)
-        license_tab_grid.setRowStretch(2, 20)
+        license_tab_grid.setRowStretch(2, 12)
+        license_tab_grid.setRowStretch(3, 10)
 
         self.license_tab.setLayout(license_tab_grid)
 
         # Generate sub-frame
         self.gen_license_tab_frame0()
+        self.gen_license_tab_frame1()
         self.gen_license_tab_feature_table(self.license_dic)
         self.gen_license_tab_expires_table(self.license_dic)
 
@@ -4979,6 +4802,38 @@ Please contact with liyanqing1987@163.com with any question."""
 
         self.license_tab_frame0.setLayout(license_tab_frame0_grid)
 
+    def gen_license_tab_frame1(self):
+        # self.license_tab_frame1
+        # "History" item.
+        license_tab_history_label = QLabel('History', self.license_tab_frame1)
+        license_tab_history_label.setStyleSheet("font-weight: bold;")
+        license_tab_history_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+        self.license_tab_history_combo = QComboBox(self.license_tab_frame1)
+        self.license_tab_history_combo.addItems(list(LICENSE_HISTORY_PERIOD_DIC.keys()))
+        self.license_tab_history_combo.currentIndexChanged.connect(lambda: self.update_license_tab_frame1())
+
+        self.license_tab_history_canvas = common_pyqt5.FigureCanvasQTAgg()
+        self.license_tab_history_toolbar = common_pyqt5.NavigationToolbar2QT(self.license_tab_history_canvas, self)
+
+        if self.dark_mode:
+            fig = self.license_tab_history_canvas.figure
+            fig.set_facecolor('#19232d')
+
+        # self.license_tab_frame1 - Grid
+        license_tab_frame1_grid = QGridLayout()
+
+        license_tab_frame1_grid.addWidget(license_tab_history_label, 0, 0)
+        license_tab_frame1_grid.addWidget(self.license_tab_history_combo, 0, 1)
+        license_tab_frame1_grid.addWidget(self.license_tab_history_toolbar, 0, 2)
+        license_tab_frame1_grid.addWidget(self.license_tab_history_canvas, 1, 0, 1, 3)
+
+        license_tab_frame1_grid.setColumnStretch(0, 1)
+        license_tab_frame1_grid.setColumnStretch(1, 2)
+        license_tab_frame1_grid.setColumnStretch(2, 17)
+
+        self.license_tab_frame1.setLayout(license_tab_frame1_grid)
+
     def get_license_feature_list(self):
         """
         Get all features from self.license_dic.
@@ -5073,8 +4928,7 @@ Please contact with liyanqing1987@163.com with any question."""
         else:
             show_mode = 'ALL'
 
-        filter_license_dic_item = common_license.FilterLicenseDic()
-        filtered_license_dic = filter_license_dic_item.run(license_dic=self.license_dic, server_list=selected_license_server_list, vendor_list=selected_vendor_daemon_list, feature_list=specified_license_feature_list, user_list=specified_license_user_list, show_mode=show_mode)
+        filtered_license_dic = self.license_snapshot.run(server_list=selected_license_server_list, vendor_list=selected_vendor_daemon_list, feature_list=specified_license_feature_list, user_list=specified_license_user_list, show_mode=show_mode)
 
         # Update self.license_tab_feature_table and self.license_tab_expires_table.
         self.gen_license_tab_feature_table(filtered_license_dic)
@@ -5151,11 +5005,15 @@ Please contact with liyanqing1987@163.com with any question."""
 
     def license_tab_check_click(self, item=None):
         """
-        If click the Job id, jump to the JOB tab and show the job information.
-        If click the "PEND" Status, show the job pend reasons on a QMessageBox.information().
+        If click the Feature, draw the feature usage history on self.license_tab_frame1.
+        If click the In_Use number, show the feature usage (users) information.
         """
         if item is not None:
-            if item.column() == 4:
+            if item.column() == 2:
+                current_row = self.license_tab_feature_table.currentRow()
+                self.license_tab_history_feature = self.license_tab_feature_table.item(current_row, 2).text().strip()
+                self.update_license_tab_frame1()
+            elif item.column() == 4:
                 current_row = self.license_tab_feature_table.currentRow()
                 in_use_num = int(self.license_tab_feature_table.item(current_row, 4).text().strip())
 
@@ -5169,6 +5027,86 @@ Please contact with liyanqing1987@163.com with any question."""
                     self.my_show_license_feature_usage = ShowLicenseFeatureUsage(server=license_server, vendor=vendor_daemon, feature=license_feature)
                     self.my_show_license_feature_usage.start()
 
+    def update_license_tab_frame1(self):
+        """
+        Draw usage history curve of self.license_tab_history_feature on self.license_tab_frame1.
+        """
+        fig = self.license_tab_history_canvas.figure
+        fig.clear()
+        self.license_tab_history_canvas.draw()
+
+        if self.license_tab_history_feature:
+            (granularity, days) = LICENSE_HISTORY_PERIOD_DIC[self.license_tab_history_combo.currentText()]
+            (sample_time_list, issued_list, in_use_list, in_use_max_list) = self.get_license_history_info(self.license_tab_history_feature, granularity, days)
+
+            if sample_time_list:
+                self.draw_license_tab_history_curve(fig, self.license_tab_history_feature, granularity, sample_time_list, issued_list, in_use_list, in_use_max_list)
+
+    def get_license_history_info(self, feature, granularity, days):
+        """
+        Get period start time/issued/average in_use/max in_use list of the feature in last <days> days from the
+        license rollup (saved by "bsample -L"), so no lmstat runs here.
+        """
+        sample_time_list = []
+        issued_list = []
+        in_use_list = []
+        in_use_max_list = []
+
+        license_db_file = common_history.get_history_db_file(self.cluster_db_path, 'license')
+
+        if not os.path.exists(license_db_file):
+            common.bprint(f'License database "{license_db_file}" is missing, please sample license usage with "bsample -L".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            return sample_time_list, issued_list, in_use_list, in_use_max_list
+
+        begin_second = int(time.time()) - days*86400
+        license_rollup_dic = common_history.get_history_rollup(license_db_file, '', 'license', granularity, entity_list=[feature], begin_second=begin_second, key_list=['issued_max', 'in_use', 'in_use_max'])
+        data_dic = license_rollup_dic.get(feature, {})
+
+        if not data_dic:
+            common.bprint(f'License history is empty for feature "{feature}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+        else:
+            for (i, sample_second) in enumerate(data_dic['sample_second']):
+                sample_time_list.append(datetime.datetime.fromtimestamp(sample_second))
+                issued_list.append(data_dic['issued_max'][i])
+                in_use_list.append(round(data_dic['in_use'][i] or 0, 1))
+                in_use_max_list.append(data_dic['in_use_max'][i] or 0)
+
+        return sample_time_list, issued_list, in_use_list, in_use_max_list
+
+    def draw_license_tab_history_curve(self, fig, feature, granularity, sample_time_list, issued_list, in_use_list, in_use_max_list):
+        """
+        Draw issued/average in_use/max in_use curve of the feature (summed on all license servers).
+        """
+        fig.subplots_adjust(bottom=0.25)
+        axes = fig.add_subplot(111)
+
+        if self.dark_mode:
+            axes.set_facecolor('#19232d')
+
+            for spine in axes.spines.values():
+                spine.set_color('white')
+
+            axes.tick_params(axis='both', colors='white')
+            axes.set_title(f'{granularity} usage curve for license feature "{feature}"', color='white')
+            axes.set_xlabel('Sample Time', color='white')
+            axes.set_ylabel('License Num', color='white')
+        else:
+            axes.set_title(f'{granularity} usage curve for license feature "{feature}"')
+            axes.set_xlabel('Sample Time')
+            axes.set_ylabel('License Num')
+
+        # "Uncounted" features have no issued number.
+        if any([issued is not None for issued in issued_list]):
+            axes.step(sample_time_list, [np.nan if issued is None else issued for issued in issued_list], 'k--', where='post', label='ISSUED', linewidth=1)
+
+        axes.plot(sample_time_list, in_use_max_list, 'ro-', label='IN_USE (max)', linewidth=1, markersize=2)
+        axes.plot(sample_time_list, in_use_list, 'bo-', label='IN_USE (avg)', linewidth=1, markersize=2)
+        axes.fill_between(sample_time_list, in_use_list, color='blue', alpha=0.3)
+        axes.legend(loc='upper right')
+        axes.tick_params(axis='x', rotation=15)
+        axes.grid()
+        self.license_tab_history_canvas.draw()
+
     def gen_license_tab_expires_table(self, license_dic):
         self.license_tab_expires_table.setShowGrid(True)
         self.license_tab_expires_table.setSortingEnabled(False)
@@ -5267,19 +5205,35 @@ Please contact with liyanqing1987@163.com with any question."""
         if output_file:
             # Get table content.
             content_dic = {}
-            row_num = table_item.rowCount()
-            column_num = table_item.columnCount()
 
-            for column in range(column_num):
-                column_list = []
+            if isinstance(table_item, QTableWidget):
+                row_num = table_item.rowCount()
+                column_num = table_item.columnCount()
 
-                for row in range(row_num):
-                    if table_item.item(row, column):
-                        column_list.append(table_item.item(row, column).text())
-                    else:
-                        column_list.append('')
+                for column in range(column_num):
+                    column_list = []
 
-                content_dic.setdefault(title_list[column], column_list)
+                    for row in range(row_num):
+                        if table_item.item(row, column):
+                            column_list.append(table_item.item(row, column).text())
+                        else:
+                            column_list.append('')
+
+                    content_dic.setdefault(title_list[column], column_list)
+            else:
+                # Model based table (QTableView), get cell text from the model.
+                table_model = table_item.model()
+                row_num = table_model.rowCount()
+                column_num = table_model.columnCount()
+
+                for column in range(column_num):
+                    column_list = []
+
+                    for row in range(row_num):
+                        value = table_model.index(row, column).data()
+                        column_list.append('' if (value is None) else str(value))
+
+                    content_dic.setdefault(title_list[column], column_list)
 
             # Write csv
             common.bprint(f'Writing {table_type} table into "{output_file}" ...', date_format='%Y-%m-%d %H:%M:%S')
@@ -6195,6 +6149,10 @@ Please contact with liyanqing1987@163.com with any question."""
         """
         When window close, post-process.
         """
+        # Wait for the running LsfInfoFetcher threads.
+        for lsf_info_fetcher in list(self.lsf_info_fetcher_dic.values()):
+            lsf_info_fetcher.wait(3000)
+
         # Stop AI thread if running.
         if self.ai_thread and self.ai_thread.isRunning():
             self.ai_thread.stop()
@@ -6412,6 +6370,378 @@ class AiRecordSearchWindow(QWidget):
             self.result_table.setItem(row, 3, QTableWidgetItem('unsolved'))
 
 
+class JobsTableModel(QAbstractTableModel):
+    """
+    Table model of JOBS tab.
+    Jobs are saved on a compact columnar store (one list per column, only the displayed columns are kept), and the
+    cells are rendered only when the view asks for them. Fonts and brushes are created once and shared by all cells.
+    """
+    title_list = ['Job', 'User', 'Status', 'Queue', 'Host', 'Started', 'Project', 'Slot', 'IDLE', 'Rusage (G)', 'Mem (G)', 'MaxMem (G)', 'Command']
+    key_list = ['job', 'user', 'status', 'queue', 'started_on', 'started_time', 'project', 'processors_requested', 'idle_factor', 'rusage_mem', 'mem', 'max_mem', 'command']
+    number_key_list = ['processors_requested', 'idle_factor', 'rusage_mem', 'mem', 'max_mem']
+
+    def __init__(self, parent=None):
+        super(JobsTableModel, self).__init__(parent)
+        self.column_dic = {key: [] for key in self.key_list}
+        self.job_row_dic = None
+        self.sort_key_dic = {}
+
+        # "Started" time is switched (with time.strptime) once for every distinct bjobs time string.
+        self.started_time_dic = {}
+
+        self.bold_font = QFont('song', 9, QFont.Bold)
+        self.status_brush_dic = {'RUN': QBrush(Qt.darkGreen), 'DONE': QBrush(Qt.gray)}
+        self.mem_over_brush = QBrush(Qt.red)
+
+        for status in ['PEND', 'PSUSP', 'USUSP', 'SSUSP', 'WAIT', 'PROV']:
+            self.status_brush_dic[status] = QBrush(Qt.blue)
+
+        for status in ['EXIT', 'UNKWN', 'ZOMBI']:
+            self.status_brush_dic[status] = QBrush(Qt.red)
+
+    def load_jobs(self, job_iter):
+        """
+        Load (job, job_dic) items (from common_lsf.iter_bjobs_uf_info) into the columnar store.
+        """
+        self.set_column_dic(self.gen_column_dic(job_iter))
+
+    @classmethod
+    def gen_column_dic(cls, job_iter):
+        """
+        Switch (job, job_dic) items into the columnar store, mem values are switched from MB into GB.
+        It does not touch the model, so it can run on a LsfInfoFetcher thread.
+        """
+        column_dic = {key: [] for key in cls.key_list}
+
+        for (job, job_dic) in job_iter:
+            column_dic['job'].append(job)
+
+            for key in ['user', 'status', 'queue', 'started_on', 'started_time', 'project', 'command']:
+                column_dic[key].append(job_dic[key])
+
+            column_dic['processors_requested'].append(int(job_dic['processors_requested']) if str(job_dic['processors_requested']) != '' else '')
+            column_dic['idle_factor'].append(round(float(job_dic['idle_factor']), 2) if str(job_dic['idle_factor']) != '' else '')
+            column_dic['rusage_mem'].append(round(float(job_dic['rusage_mem']) / 1024, 1) if str(job_dic['rusage_mem']) != '' else '')
+            column_dic['max_mem'].append(round(float(job_dic['max_mem']) / 1024, 1) if str(job_dic['max_mem']) != '' else '')
+
+            if (job_dic['status'] not in ['DONE', 'EXIT']) and (str(job_dic['mem']) != ''):
+                column_dic['mem'].append(round(float(job_dic['mem']) / 1024, 1))
+            else:
+                column_dic['mem'].append('')
+
+        return column_dic
+
+    def set_column_dic(self, column_dic):
+        """
+        Replace the columnar store with column_dic (from gen_column_dic).
+        """
+        self.beginResetModel()
+        self.column_dic = column_dic
+        self.job_row_dic = None
+        self.sort_key_dic = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.column_dic['job'])
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.key_list)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+
+        if orientation == Qt.Horizontal:
+            return self.title_list[section]
+
+        return section + 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == 5:
+                return self.get_started_time(row)
+
+            return self.column_dic[self.key_list[column]][row]
+        elif role == Qt.FontRole:
+            if column in [0, 2]:
+                return self.bold_font
+        elif role == Qt.ForegroundRole:
+            if column == 2:
+                return self.status_brush_dic.get(self.column_dic['status'][row], None)
+        elif role == Qt.BackgroundRole:
+            if (column == 10) and self.is_mem_over(row):
+                return self.mem_over_brush
+
+        return None
+
+    def get_started_time(self, row):
+        """
+        Get "Started" time with format "%Y-%m-%d %H:%M:%S".
+        """
+        started_time = self.column_dic['started_time'][row]
+
+        if started_time not in self.started_time_dic:
+            self.started_time_dic[started_time] = common_lsf.switch_bjobs_uf_time(started_time, '%Y-%m-%d %H:%M:%S')
+
+        return self.started_time_dic[started_time]
+
+    def is_mem_over(self, row):
+        """
+        Job mem is over its rusage mem (or it has mem but no rusage mem).
+        """
+        mem = self.column_dic['mem'][row]
+        rusage_mem = self.column_dic['rusage_mem'][row]
+
+        if not mem:
+            return False
+
+        return ((rusage_mem == '') and (mem > 0)) or ((rusage_mem != '') and (mem > rusage_mem))
+
+    def get_value(self, row, key):
+        """
+        Get the value of specified row (source row) and key.
+        """
+        if key == 'started_time':
+            return self.get_started_time(row)
+
+        return self.column_dic[key][row]
+
+    def get_job_row(self, job):
+        """
+        Get the row of specified job, return -1 if the job is not found.
+        """
+        if self.job_row_dic is None:
+            self.job_row_dic = {job: row for (row, job) in enumerate(self.column_dic['job'])}
+
+        return self.job_row_dic.get(job, -1)
+
+    def set_value(self, job, key, value):
+        """
+        Update the value of specified job and key.
+        """
+        row = self.get_job_row(job)
+
+        if row != -1:
+            column = self.key_list.index(key)
+            self.column_dic[key][row] = value
+            self.sort_key_dic.pop(column, None)
+            self.dataChanged.emit(self.index(row, column), self.index(row, column))
+
+    def get_sort_key_list(self, column):
+        """
+        Get the sort key of every row for specified column, empty numbers are sorted as the smallest.
+        """
+        key = self.key_list[column]
+
+        if column not in self.sort_key_dic:
+            if key == 'job':
+                self.sort_key_dic[column] = [self.get_job_sort_key(job) for job in self.column_dic['job']]
+            elif key == 'started_time':
+                self.sort_key_dic[column] = [self.get_started_time(row) for row in range(self.rowCount())]
+            elif key in self.number_key_list:
+                self.sort_key_dic[column] = [-1 if value == '' else value for value in self.column_dic[key]]
+            else:
+                self.sort_key_dic[column] = self.column_dic[key]
+
+        return self.sort_key_dic[column]
+
+    @staticmethod
+    def get_job_sort_key(job):
+        """
+        Sort job id with number, array job "<id>[<index>]" is after job "<id>".
+        """
+        my_match = re.match(r'^(\d+)(\[(\d+)\])?$', job)
+
+        if my_match:
+            return (int(my_match.group(1)), int(my_match.group(3) or 0))
+
+        return (-1, 0)
+
+
+class JobsTableProxyModel(QAbstractProxyModel):
+    """
+    Sort/filter proxy of JobsTableModel.
+    Filtering scans the columnar store and sorting runs one python sort on the column values, instead of calling
+    filterAcceptsRow()/lessThan() for every row (or row pair) like QSortFilterProxyModel.
+    """
+    def __init__(self, parent=None):
+        super(JobsTableProxyModel, self).__init__(parent)
+        self.row_list = []
+        self.source_row_dic = None
+        self.sort_column = -1
+        self.sort_order = Qt.AscendingOrder
+        self.status_list = ['ALL', ]
+        self.queue_list = ['ALL', ]
+        self.host_list = ['ALL', ]
+
+    def setSourceModel(self, source_model):
+        self.beginResetModel()
+        super(JobsTableProxyModel, self).setSourceModel(source_model)
+        source_model.modelAboutToBeReset.connect(self.beginResetModel)
+        source_model.modelReset.connect(self.source_model_reset)
+        source_model.dataChanged.connect(self.source_data_changed)
+        self.update_row_list()
+        self.endResetModel()
+
+    def source_model_reset(self):
+        self.update_row_list()
+        self.endResetModel()
+
+    def source_data_changed(self, top_left, bottom_right, role_list=None):
+        if role_list is None:
+            role_list = []
+
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            proxy_top_left = self.mapFromSource(self.sourceModel().index(row, top_left.column()))
+            proxy_bottom_right = self.mapFromSource(self.sourceModel().index(row, bottom_right.column()))
+
+            if proxy_top_left.isValid():
+                self.dataChanged.emit(proxy_top_left, proxy_bottom_right, role_list)
+
+    def set_filter(self, status_list, queue_list, host_list):
+        """
+        Only show the jobs with specified status/queue/host.
+        """
+        self.beginResetModel()
+        self.status_list = status_list
+        self.queue_list = queue_list
+        self.host_list = host_list
+        self.update_row_list()
+        self.endResetModel()
+
+    def update_row_list(self):
+        """
+        Get the (filtered and sorted) source rows.
+        """
+        source_model = self.sourceModel()
+        column_dic = source_model.column_dic
+        row_list = range(source_model.rowCount())
+
+        if 'ALL' not in self.status_list:
+            status_set = set(self.status_list)
+            row_list = [row for row in row_list if column_dic['status'][row] in status_set]
+
+        if ('ALL' not in self.queue_list) and (len(self.queue_list) > 1):
+            queue_set = set(self.queue_list)
+            row_list = [row for row in row_list if column_dic['queue'][row] in queue_set]
+
+        if ('ALL' not in self.host_list) and (len(self.host_list) > 1):
+            host_set = set(self.host_list)
+            row_list = [row for row in row_list if not host_set.isdisjoint(column_dic['started_on'][row].split())]
+
+        self.row_list = list(row_list)
+
+        if self.sort_column >= 0:
+            sort_key_list = source_model.get_sort_key_list(self.sort_column)
+            self.row_list.sort(key=sort_key_list.__getitem__, reverse=(self.sort_order == Qt.DescendingOrder))
+
+        self.source_row_dic = None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.beginResetModel()
+        self.sort_column = column
+        self.sort_order = order
+        self.update_row_list()
+        self.endResetModel()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or (row < 0) or (row >= len(self.row_list)) or (column < 0) or (column >= self.columnCount()):
+            return QModelIndex()
+
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.row_list)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or (self.sourceModel() is None):
+            return 0
+
+        return self.sourceModel().columnCount()
+
+    def mapToSource(self, proxy_index):
+        if (not proxy_index.isValid()) or (proxy_index.row() >= len(self.row_list)):
+            return QModelIndex()
+
+        return self.sourceModel().index(self.row_list[proxy_index.row()], proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+
+        if self.source_row_dic is None:
+            self.source_row_dic = {source_row: row for (row, source_row) in enumerate(self.row_list)}
+
+        if source_index.row() not in self.source_row_dic:
+            return QModelIndex()
+
+        return self.index(self.source_row_dic[source_index.row()], source_index.column())
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        return self.sourceModel().data(self.mapToSource(index), role)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            return self.sourceModel().headerData(section, orientation, role)
+
+        if role == Qt.DisplayRole:
+            return section + 1
+
+        return None
+
+    def get_value(self, row, key):
+        """
+        Get the value of specified (proxy) row and key.
+        """
+        return self.sourceModel().get_value(self.row_list[row], key)
+
+
+class LsfInfoFetcher(QThread):
+    """
+    Run a common_lsf getter (LSF command and parser) off the GUI thread.
+    info_ready sends (lsf_info, result, update_second), result is None if the getter fails.
+    """
+    info_ready = pyqtSignal(str, object, int)
+
+    def __init__(self, lsf_info, function, args=()):
+        super(LsfInfoFetcher, self).__init__()
+        self.lsf_info = lsf_info
+        self.function = function
+        self.args = args
+
+    def run(self):
+        update_second = int(time.time())
+
+        try:
+            result = self.function(*self.args)
+        except Exception as error:
+            common.bprint(f'Failed on loading LSF {self.lsf_info} information, {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            result = None
+
+        self.info_ready.emit(self.lsf_info, result, update_second)
+
+
 class CheckIssueReason(QThread):
     """
     Start tool check_issue_reason to debug issue job.
@@ -3,15 +3,25 @@
 import os
 import re
 import sys
+import copy
 import time
+import signal
 import datetime
 import argparse
-from multiprocessing import Process
+import threading
+from multiprocessing import Process, Queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
 from common import common_lsf
+from common import common_license
 from common import common_sqlite3
+from common import common_archive
+from common import common_job_data
+from common import common_snapshot
+from common import common_history
+from common import common_job_history
 
 from common import common_config
 
@@ -20,6 +30,31 @@ config = common_config.load_config()
 os.environ['LSB_NTRIES'] = '3'
 os.environ["PYTHONUNBUFFERED"] = '1'
 
+# LSF information (command results, "lmstat" for license) each sampler needs, every information is collected once per sampling cycle.
+SAMPLER_LSF_INFO_DIC = {
+    'job': ['finished_job'],
+    'job_mem': ['running_job'],
+    'queue': ['bhosts', 'bqueues', 'queue_host'],
+    'queue_host_mapping': ['queue_host'],
+    'host': ['bhosts'],
+    'load': ['lsload'],
+    'user': ['finished_job'],
+    'utilization': ['bhosts', 'lshosts', 'lsload'],
+    'license': ['lmstat'],
+}
+
+# LSF information which must be collected before the specified one.
+LSF_INFO_DEPENDENCY_DIC = {
+    'finished_job': ['lsf_unit_for_limits'],
+    'running_job': ['lsf_unit_for_limits'],
+    'queue_host': ['bmgroup'],
+}
+
+# Samplers which must finish before the specified one (if they are on the same sampling).
+SAMPLER_DEPENDENCY_DIC = {
+    'utilization_day': ['utilization'],
+}
+
 
 def read_args():
     """
@@ -67,18 +102,26 @@ def read_args():
                         action="store_true",
                         default=False,
                         help='Count and save utilization-day info with utilization data.')
+    parser.add_argument("-L", "--license",
+                        action="store_true",
+                        default=False,
+                        help='Sample EDA license usage (feature issued/in_use and user checkouts) with command "lmstat -a -i".')
     parser.add_argument("-A", "--analysis",
                         action="store_true",
                         default=False,
                         help='Generate an AI cluster analysis HTML report (requires AI config).')
+    parser.add_argument("--daemon",
+                        action="store_true",
+                        default=False,
+                        help='Stay resident and run the specified samplers on their own intervals (config "daemon_sampler_interval").')
 
     args = parser.parse_args()
 
-    if not any([args.cleanup, args.job, args.job_mem, args.queue, args.queue_host_mapping, args.host, args.load, args.user, args.utilization, args.utilization_day, args.analysis]):
-        common.bprint('At least one argument of "cleanup/job/job_mem/queue/queue_host_mapping/host/load/user/utilization/utilization_day/analysis" must be selected.', level='Error')
+    if not any([args.cleanup, args.job, args.job_mem, args.queue, args.queue_host_mapping, args.host, args.load, args.user, args.utilization, args.utilization_day, args.license, args.analysis]):
+        common.bprint('At least one argument of "cleanup/job/job_mem/queue/queue_host_mapping/host/load/user/utilization/utilization_day/license/analysis" must be selected.', level='Error')
         sys.exit(1)
 
-    return args.cleanup, args.job, args.job_mem, args.queue, args.queue_host_mapping, args.host, args.load, args.user, args.utilization, args.utilization_day, args.analysis
+    return args.cleanup, args.job, args.job_mem, args.queue, args.queue_host_mapping, args.host, args.load, args.user, args.utilization, args.utilization_day, args.license, args.analysis, args.daemon
 
 
 class Sampling:
@@ -86,7 +129,7 @@ class Sampling:
     Sample LSF basic information with LSF bjobs/bqueues/bhosts/lshosts/lsload/busers commands.
     Save the infomation into sqlite3 DB.
     """
-    def __init__(self, cleanup, job_sampling, job_mem_sampling, queue_sampling, queue_host_mapping_sampling, host_sampling, load_sampling, user_sampling, utilization_sampling, utilization_day_sampling, analysis_sampling):
+    def __init__(self, cleanup, job_sampling, job_mem_sampling, queue_sampling, queue_host_mapping_sampling, host_sampling, load_sampling, user_sampling, utilization_sampling, utilization_day_sampling, license_sampling, analysis_sampling):
         self.cleanup = cleanup
         self.job_sampling = job_sampling
         self.job_mem_sampling = job_mem_sampling
@@ -97,13 +140,11 @@ class Sampling:
         self.user_sampling = user_sampling
         self.utilization_sampling = utilization_sampling
         self.utilization_day_sampling = utilization_day_sampling
+        self.license_sampling = license_sampling
         self.analysis_sampling = analysis_sampling
 
-        # Get sample time (use single datetime to avoid midnight race).
-        now = datetime.datetime.now()
-        self.sample_second = int(now.timestamp())
-        self.sample_date = now.strftime('%Y%m%d')
-        self.sample_time = now.strftime('%Y%m%d_%H%M%S')
+        # Get sample time.
+        self.update_sample_time()
 
         # Update self.db_path with cluster information.
         self.db_path = str(config.db_path) + '/monitor'
@@ -126,6 +167,7 @@ class Sampling:
             'load': 365,
             'utilization': 365,
             'utilization_day': 365,
+            'license': 365,
         }
 
         if hasattr(config, 'cleanup_expire_days') and isinstance(config.cleanup_expire_days, dict):
@@ -133,6 +175,12 @@ class Sampling:
 
         self.cleanup_expire_days = default_cleanup_expire_days
 
+        # Days before job/, user/ and job_data/ data are packed into compressed archives on cleanup, 0 means disabled.
+        self.archive_days = {'job': 0, 'user': 0, 'job_data': 0}
+
+        if hasattr(config, 'archive_days') and isinstance(config.archive_days, dict):
+            self.archive_days.update(config.archive_days)
+
         # Create db path.
         self.job_db_path = str(self.db_path) + '/job'
         self.job_data_db_path = str(self.db_path) + '/job_data'
@@ -143,6 +191,36 @@ class Sampling:
         common.create_dir(self.job_data_db_path, 0o1777)
         common.create_dir(self.user_db_path, 0o1777)
 
+        # Shared "bjobs -u all -d -UF" snapshot for job/user samplers, it is collected once per sampling cycle.
+        self.lsf_unit_for_limits = ''
+        self.finished_job_snapshot = None
+
+        # Sampler timing information (sampler_name, elapsed_seconds), reported by sampler processes.
+        self.sampler_timing_queue = Queue()
+
+        # Collected LSF information {info_name: result} and command elapsed time {info_name: seconds} of current sampling cycle.
+        self.lsf_info_dic = {}
+        self.lsf_info_seconds_dic = {}
+
+        # Kept write connections {db_file: db_conn} on daemon mode, it is None (connect/close per sampling) on one-shot mode.
+        self.db_conn_dic = None
+        self.daemon_stop_event = threading.Event()
+
+        # Daemon sampler intervals {sampler_name: seconds} and {sampler_name: start second of the last finished cycle},
+        # see wait_daemon_dependency().
+        self.daemon_sampler_interval_dic = {}
+        self.daemon_sampler_finish_dic = {}
+        self.daemon_sampler_condition = threading.Condition()
+
+    def update_sample_time(self):
+        """
+        Update sample_second/sample_date/sample_time with current time (use single datetime to avoid midnight race).
+        """
+        now = datetime.datetime.now()
+        self.sample_second = int(now.timestamp())
+        self.sample_date = now.strftime('%Y%m%d')
+        self.sample_time = now.strftime('%Y%m%d_%H%M%S')
+
     def check_cluster_info(self):
         """
         Make sure LSF or Openlava environment exists.
@@ -155,10 +233,221 @@ class Sampling:
 
         return tool, cluster
 
+    def get_lsf_unit_for_limits(self):
+        """
+        Get (and cache) LSF_UNIT_FOR_LIMITS, so "badmin showconf mbd all" only runs once per sampling.
+        """
+        if not self.lsf_unit_for_limits:
+            self.lsf_unit_for_limits = common_lsf.get_lsf_unit_for_limits()
+
+        return self.lsf_unit_for_limits
+
+    def tune_db_conn(self, db_conn):
+        """
+        Tune sampler write connection, journal mode can be set with config "db_journal_mode" (such as "WAL").
+        """
+        common_sqlite3.tune_sql_connection(db_conn, journal_mode=getattr(config, 'db_journal_mode', ''))
+
+    def connect_db_file(self, db_file):
+        """
+        Connect db_file with write mode.
+        On daemon mode the connection is kept on self.db_conn_dic and reused by the following sampling cycles.
+        """
+        if self.db_conn_dic is None:
+            return common_sqlite3.connect_db_file(db_file, mode='write')
+
+        if db_file not in self.db_conn_dic:
+            (result, db_conn) = common_sqlite3.connect_db_file(db_file, mode='write')
+
+            if result != 'passed':
+                return result, db_conn
+
+            self.db_conn_dic[db_file] = db_conn
+
+        return 'passed', self.db_conn_dic[db_file]
+
+    def close_db_conn(self, db_conn):
+        """
+        Close db_conn on one-shot mode, only roll back the unfinished transaction (if sampler failed) on daemon mode.
+        """
+        if self.db_conn_dic is None:
+            db_conn.close()
+        elif db_conn.in_transaction:
+            db_conn.rollback()
+
+    def close_all_db_conn(self):
+        """
+        Close all kept connections of daemon mode.
+        """
+        for db_conn in (self.db_conn_dic or {}).values():
+            try:
+                db_conn.close()
+            except Exception:
+                pass
+
+        self.db_conn_dic = {}
+
+    def get_lsf_info_function(self, info_name):
+        """
+        Get the function to collect specified LSF information.
+        """
+        if info_name == 'lsf_unit_for_limits':
+            return self.get_lsf_unit_for_limits
+        elif info_name == 'finished_job':
+            return self.get_finished_job_snapshot
+        elif info_name == 'running_job':
+            return self.get_bjobs_mem_idle_factor_info
+        elif info_name == 'bhosts':
+            return common_lsf.get_bhosts_info
+        elif info_name == 'bqueues':
+            return common_lsf.get_bqueues_info
+        elif info_name == 'bmgroup':
+            return common_lsf.get_bmgroup_info
+        elif info_name == 'lshosts':
+            return common_lsf.get_lshosts_info
+        elif info_name == 'lsload':
+            if self.tool == 'openlava':
+                return lambda: common_lsf.get_lsload_info(command='lsload -l')
+            else:
+                return common_lsf.get_lsload_info
+        elif info_name == 'queue_host':
+            # Reuse "bmgroup -w -r" and "bhosts -w" results if they are collected on current cycle.
+            host_list = self.lsf_info_dic['bhosts']['HOST_NAME'] if ('bhosts' in self.lsf_info_dic) else None
+            return lambda: common_lsf.get_queue_host_info(bmgroup_dic=self.get_lsf_info('bmgroup'), host_list=host_list)
+        elif info_name == 'lmstat':
+            return self.get_license_info
+
+    def get_lsf_info(self, info_name):
+        """
+        Get LSF information of current sampling cycle, collect it if not collected yet.
+        """
+        if info_name not in self.lsf_info_dic:
+            start_second = time.time()
+            self.lsf_info_dic[info_name] = self.get_lsf_info_function(info_name)()
+            self.lsf_info_seconds_dic[info_name] = time.time() - start_second
+
+        return self.lsf_info_dic[info_name]
+
+    def collect_lsf_info(self, sampler_name_list):
+        """
+        Collect LSF information of specified samplers before running them.
+        Each distinct information (command) is collected only once, independent commands run in parallel with at most
+        config "sample_command_max_workers" workers, so mbatchd is not hammered.
+        Return the wall time of the collection.
+        """
+        info_name_list = []
+
+        for sampler_name in sampler_name_list:
+            for info_name in SAMPLER_LSF_INFO_DIC.get(sampler_name, []):
+                for item in LSF_INFO_DEPENDENCY_DIC.get(info_name, []) + [info_name]:
+                    if item not in info_name_list:
+                        info_name_list.append(item)
+
+        if not info_name_list:
+            return 0.0
+
+        dependency_dic = {info_name: list(LSF_INFO_DEPENDENCY_DIC.get(info_name, [])) for info_name in info_name_list}
+
+        # "queue_host" reuses "bhosts -w" result (for the queues with "HOSTS: all") if it is on the plan.
+        if ('queue_host' in dependency_dic) and ('bhosts' in dependency_dic):
+            dependency_dic['queue_host'].append('bhosts')
+
+        max_workers = max(int(getattr(config, 'sample_command_max_workers', 4)), 1)
+        common.bprint(f'>>> Collecting LSF information ({", ".join(info_name_list)}) with {max_workers} workers ...', date_format='%Y-%m-%d %H:%M:%S')
+
+        start_second = time.time()
+        pending_info_name_list = list(info_name_list)
+        finished_info_name_list = []
+        future_dic = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending_info_name_list or future_dic:
+                for info_name in list(pending_info_name_list):
+                    if all([dependency in finished_info_name_list for dependency in dependency_dic[info_name]]):
+                        future_dic[executor.submit(self.get_lsf_info, info_name)] = info_name
+                        pending_info_name_list.remove(info_name)
+
+                (done_future_set, not_done_future_set) = wait(future_dic, return_when=FIRST_COMPLETED)
+
+                for future in done_future_set:
+                    info_name = future_dic.pop(future)
+                    finished_info_name_list.append(info_name)
+
+                    # The failed information is not saved, the sampler will retry and report it.
+                    try:
+                        future.result()
+                    except Exception as error:
+                        common.bprint(f'Failed on collecting LSF information "{info_name}": {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+
+        return time.time() - start_second
+
+    def get_license_info(self):
+        """
+        Get EDA license usage of the license servers on LM_LICENSE_FILE with "lmstat -a -i" (same settings as bmonitor).
+        """
+        excluded_license_server_list = str(getattr(config, 'excluded_license_servers', '') or '').split()
+        lmstat_path = getattr(config, 'lmstat_path', '') or 'lmstat'
+        lmstat_bsub_command = getattr(config, 'lmstat_bsub_command', '')
+        my_get_license_info = common_license.GetLicenseInfo(excluded_servers=excluded_license_server_list, lmstat_path=lmstat_path, bsub_command=lmstat_bsub_command, timeout=getattr(config, 'lmstat_timeout', 60))
+
+        return my_get_license_info.get_license_info()
+
+    def get_finished_job_mark(self, sampler_name):
+        """
+        Get the finished job high-water mark of job/user sampler, it is saved as <db_path>/<job|user>/finished_job_mark.json.
+        """
+        if sampler_name == 'job':
+            return common_snapshot.FinishedJobMark(str(self.job_db_path) + '/finished_job_mark.json')
+        else:
+            return common_snapshot.FinishedJobMark(str(self.user_db_path) + '/finished_job_mark.json')
+
+    def get_finished_job_snapshot(self):
+        """
+        Get the shared finished job snapshot, collect it if not collected yet.
+        Only the jobs finished after the high-water marks of job/user samplers (and in job retention days) are collected.
+        With config "lsb_acct_file", the new records of lsb.acct are read instead of running "bjobs -d".
+        """
+        if self.finished_job_snapshot is None:
+            finished_job_mark_list = [self.get_finished_job_mark(sampler_name) for (enabled, sampler_name) in [(self.job_sampling, 'job'), (self.user_sampling, 'user')] if enabled]
+            begin_second = int(time.time()) - self.cleanup_expire_days.get('job', 90)*86400
+
+            if finished_job_mark_list:
+                begin_second = max(begin_second, min([finished_job_mark.get_begin_second() for finished_job_mark in finished_job_mark_list]))
+
+            lsb_acct_file = getattr(config, 'lsb_acct_file', '')
+
+            if lsb_acct_file:
+                # Read from the smallest offset of job/user marks, read the whole file if they are on different files.
+                (lsb_acct_inode, lsb_acct_offset) = (None, 0)
+                lsb_acct_inode_list = list(set([finished_job_mark.lsb_acct_inode for finished_job_mark in finished_job_mark_list]))
+
+                if len(lsb_acct_inode_list) == 1:
+                    lsb_acct_inode = lsb_acct_inode_list[0]
+                    lsb_acct_offset = min([finished_job_mark.lsb_acct_offset for finished_job_mark in finished_job_mark_list])
+
+                common.bprint(f'* Getting finished job information from "{lsb_acct_file}" (offset {lsb_acct_offset}) ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+                self.finished_job_snapshot = common_snapshot.LsbAcctSnapshot(lsb_acct_file, lsf_unit_for_limits=self.get_lsf_unit_for_limits(), begin_second=begin_second, lsb_acct_inode=lsb_acct_inode, lsb_acct_offset=lsb_acct_offset)
+            else:
+                common.bprint('* Getting finished job information with command "bjobs -u all -d -UF" ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+                self.finished_job_snapshot = common_snapshot.BjobsUfSnapshot('bjobs -u all -d -UF', tool=self.tool, lsf_unit_for_limits=self.get_lsf_unit_for_limits(), begin_second=begin_second)
+
+            self.finished_job_snapshot.collect()
+            common.bprint(f'Collected {len(self.finished_job_snapshot)} finished jobs, skipped {self.finished_job_snapshot.skipped_job_num} jobs before the high-water mark ({self.finished_job_snapshot.collect_seconds:.1f}s).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+
+        return self.finished_job_snapshot
+
     def cleanup_db(self):
         """
         Clean up sqlite3 databases based on time-based expiration (self.cleanup_expire_days).
         """
+        # Do not fork from the multi-thread daemon, clean up on the sampler thread one by one.
+        if self.db_conn_dic is not None:
+            self._cleanup_single_db_files()
+            self._cleanup_date_dir(self.user_db_path, 'user')
+            self._cleanup_job_data_db()
+            self._cleanup_date_dir(self.job_db_path, 'job')
+            return
+
         process_list = []
 
         p = Process(target=self._cleanup_single_db_files)
@@ -188,7 +477,8 @@ class Sampling:
     def _cleanup_date_dir(self, dir_path, item_name):
         """
         Clean up date-based db directory (job/ or user/).
-        Remove YYYYMMDD.db files older than expire_days.
+        Remove YYYYMMDD.db (and YYYYMMDD.archive) files older than expire_days, then archive the aged db files (see
+        self.archive_days).
         """
         if not os.path.exists(dir_path):
             return
@@ -200,10 +490,10 @@ class Sampling:
         removed_count = 0
 
         for db_file_name in os.listdir(dir_path):
-            if not db_file_name.endswith('.db'):
+            if not (db_file_name.endswith('.db') or db_file_name.endswith(common_archive.ARCHIVE_SUFFIX)):
                 continue
 
-            date_str = db_file_name.replace('.db', '')
+            date_str = os.path.splitext(db_file_name)[0]
 
             try:
                 file_date = datetime.datetime.strptime(date_str, '%Y%m%d')
@@ -222,10 +512,58 @@ class Sampling:
         if removed_count > 0:
             common.bprint(f'Removed {removed_count} expired db files.', date_format='%Y-%m-%d %H:%M:%S', indent=4)
 
+        # User rollup and job index follow the expired user/<date>.db and job/<date>.db files.
+        expire_date = (today - datetime.timedelta(days=expire_days)).strftime('%Y%m%d')
+        user_rollup_db_file = common_history.get_user_rollup_db_file(dir_path)
+        job_index_db_file = common_job_history.get_job_index_db_file(dir_path)
+
+        if (item_name == 'user') and os.path.exists(user_rollup_db_file):
+            common_history.delete_user_rollup(user_rollup_db_file, '', expire_date)
+        elif (item_name == 'job') and os.path.exists(job_index_db_file):
+            common_job_history.delete_job_index(job_index_db_file, '', expire_date)
+
+        self._archive_date_dir(dir_path, item_name)
+
+    def _archive_date_dir(self, dir_path, item_name):
+        """
+        Pack YYYYMMDD.db files (job/ or user/) older than archive_days into compressed YYYYMMDD.archive files.
+        """
+        archive_days = self.archive_days.get(item_name, 0)
+
+        if (not archive_days) or (not os.path.exists(dir_path)):
+            return
+
+        archive_date = (datetime.datetime.today() - datetime.timedelta(days=archive_days)).strftime('%Y%m%d')
+        common.bprint(f'>>> Archive "{dir_path}" (pack data older than {archive_days} days) ...', date_format='%Y-%m-%d %H:%M:%S')
+        (archived_count, db_size, archive_size) = (0, 0, 0)
+
+        for db_file_name in sorted(os.listdir(dir_path)):
+            if not re.match(r'^\d{8}\.db$', db_file_name):
+                continue
+
+            date_str = db_file_name[:8]
+
+            if date_str >= archive_date:
+                continue
+
+            if item_name == 'job':
+                (file_db_size, file_archive_size) = common_job_history.archive_job_db(dir_path, date_str)
+            else:
+                (file_db_size, file_archive_size) = common_history.archive_user_db(dir_path, date_str)
+
+            if file_archive_size:
+                archived_count += 1
+                db_size += file_db_size
+                archive_size += file_archive_size
+
+        if archived_count > 0:
+            common.bprint(f'Archived {archived_count} db files ({db_size/1024/1024:.1f}MB -> {archive_size/1024/1024:.1f}MB).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+
     def _cleanup_job_data_db(self):
         """
         Clean up job_data/ db files by deleting rows with sample_second older than expire_days.
-        Remove empty db files after cleanup.
+        Remove empty db files (and archive files whose samples are all expired) after cleanup, then archive the aged
+        jobs (see self.archive_days).
         """
         if not os.path.exists(self.job_data_db_path):
             return
@@ -235,6 +573,18 @@ class Sampling:
         common.bprint(f'>>> Clean up "{self.job_data_db_path}" (remove data older than {expire_days} days) ...', date_format='%Y-%m-%d %H:%M:%S')
 
         for db_file_name in os.listdir(self.job_data_db_path):
+            if db_file_name.endswith(common_archive.ARCHIVE_SUFFIX):
+                archive_file = os.path.join(self.job_data_db_path, db_file_name)
+
+                try:
+                    if not common_archive.ArchiveFile(archive_file).is_overlapped(begin_second=expire_second):
+                        os.remove(archive_file)
+                        common.bprint(f'Removed expired file "{db_file_name}".', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+                except Exception as error:
+                    common.bprint(f'Failed on cleaning up "{db_file_name}": {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+
+                continue
+
             if not db_file_name.endswith('.db'):
                 continue
 
@@ -243,21 +593,13 @@ class Sampling:
 
             if result == 'passed':
                 try:
-                    curs = db_conn.cursor()
-                    curs.execute("DELETE FROM job_data WHERE sample_second < ?", (expire_second,))
-                    deleted = curs.rowcount
-                    curs.close()
+                    (deleted, remaining) = common_job_data.delete_expired_job_data(db_conn, expire_second)
                     db_conn.commit()
 
                     if deleted > 0:
                         common.bprint(f'Deleted {deleted} expired rows from "{db_file_name}".', date_format='%Y-%m-%d %H:%M:%S', indent=4)
 
                     # Remove empty db file or VACUUM non-empty ones.
-                    curs = db_conn.cursor()
-                    curs.execute("SELECT COUNT(*) FROM job_data")
-                    remaining = curs.fetchone()[0]
-                    curs.close()
-
                     if remaining == 0:
                         db_conn.close()
 
@@ -275,13 +617,73 @@ class Sampling:
 
                 db_conn.close()
 
+        self._archive_job_data_db()
+
+    def _archive_job_data_db(self):
+        """
+        Move samples of the jobs whose last sample is older than archive_days from job_data/<range>.db into compressed
+        job_data/<range>.archive (merged with the archived jobs of the range), remove the db file if it is empty.
+        """
+        archive_days = self.archive_days.get('job_data', 0)
+
+        if (not archive_days) or (not os.path.exists(self.job_data_db_path)):
+            return
+
+        archive_second = int(time.time()) - archive_days * 86400
+        column_list = common_job_data.JOB_DATA_ARCHIVE_COLUMN_LIST
+        common.bprint(f'>>> Archive "{self.job_data_db_path}" (pack jobs older than {archive_days} days) ...', date_format='%Y-%m-%d %H:%M:%S')
+
+        for db_file_name in sorted(os.listdir(self.job_data_db_path)):
+            if not db_file_name.endswith('.db'):
+                continue
+
+            db_file = os.path.join(self.job_data_db_path, db_file_name)
+            archive_file = common_archive.get_archive_file(db_file)
+            (result, db_conn) = common_sqlite3.connect_db_file(db_file, mode='write')
+
+            if result != 'passed':
+                continue
+
+            try:
+                (job_list, row_list) = common_job_data.get_aged_job_data_row_list(db_conn, archive_second)
+
+                if not job_list:
+                    db_conn.close()
+                    continue
+
+                # Jobs on the db file (recycled job ids) replace the archived samples of the same job id.
+                job_set = set(job_list)
+
+                if os.path.exists(archive_file):
+                    row_list.extend([row for row in common_archive.ArchiveFile(archive_file).iter_rows(column_list) if row[0] not in job_set])
+
+                common_archive.write_archive(archive_file, column_list, row_list, key_column='job_id', time_column='sample_second', meta_dic={'source': db_file_name})
+                common_job_data.delete_job_data(db_conn, job_list)
+                remaining = common_job_data.count_job_data(db_conn)
+                db_conn.commit()
+                db_conn.close()
+
+                if remaining == 0:
+                    os.remove(db_file)
+                else:
+                    (result, db_conn) = common_sqlite3.connect_db_file(db_file, mode='write')
+
+                    if result == 'passed':
+                        db_conn.execute('VACUUM')
+                        db_conn.close()
+
+                common.bprint(f'Archived {len(job_set)} jobs of "{db_file_name}" into "{os.path.basename(archive_file)}".', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+            except Exception as error:
+                db_conn.close()
+                common.bprint(f'Failed on archiving "{db_file_name}": {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+
     def _cleanup_single_db_files(self):
         """
-        Clean up single-file databases (queue.db, host.db, load.db, utilization.db, utilization_day.db)
+        Clean up single-file databases (queue.db, host.db, load.db, utilization.db, utilization_day.db, license.db)
         by deleting rows older than expire_days.
         Uses sample_second (INTEGER PK) for most dbs, sample_date (TEXT PK) for utilization_day.
         """
-        item_list = ['queue', 'queue_host_mapping', 'host', 'load', 'utilization', 'utilization_day']
+        item_list = ['queue', 'queue_host_mapping', 'host', 'load', 'utilization', 'utilization_day', 'license']
 
         for item in item_list:
             item_db_file = str(self.db_path) + '/' + str(item) + '.db'
@@ -331,48 +733,65 @@ class Sampling:
         Sample (finished) job information.
         """
         common.bprint('>>> Sampling job info ...', date_format='%Y-%m-%d %H:%M:%S', )
-        common.bprint('* Getting finished job information with command "bjobs -u all -d -UF" ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
-        bjobs_dic = common_lsf.get_bjobs_uf_info('bjobs -u all -d -UF')
-
-        # Re-organize jobs_dic with finished_date.
-        date_bjobs_dic = {}
+        finished_job_snapshot = self.get_finished_job_snapshot()
+        finished_job_mark = self.get_finished_job_mark('job')
 
-        for job in bjobs_dic.keys():
-            finished_date = common_lsf.switch_bjobs_uf_time(bjobs_dic[job]['finished_time'], '%Y%m%d')
-
-            if finished_date not in date_bjobs_dic:
-                date_bjobs_dic[finished_date] = {}
-
-            date_bjobs_dic[finished_date][job] = bjobs_dic[job]
+        # Re-organize new job records (after the high-water mark) with finished_date.
+        date_row_dic = finished_job_snapshot.get_date_row_dic(finished_job_mark)
+        saved = True
 
         # Write db_file with finished_date.
         common.bprint('* Saving finished job information ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
-        key_list = ['job', 'job_name', 'job_description', 'user', 'project', 'status', 'interactive_mode', 'queue', 'command', 'submitted_from', 'submitted_time', 'cwd', 'processors_requested', 'requested_resources', 'span_hosts', 'rusage_mem', 'specified_hosts', 'started_on', 'started_time', 'finished_time', 'exit_code', 'term_signal', 'cpu_time', 'idle_factor', 'mem', 'swap', 'run_limit', 'pids', 'max_mem', 'avg_mem', 'pending_reasons', 'job_info']
-        key_type_list = ['PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
+        key_list = finished_job_snapshot.key_list
+        key_type_list = ['PRIMARY KEY', ] + ['TEXT' for key in key_list[1:]]
         key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+        job_index_db_file = common_job_history.get_job_index_db_file(self.job_db_path)
+        job_index_date_list = common_job_history.get_job_index_date_list(job_index_db_file, '') if os.path.exists(job_index_db_file) else []
 
-        for finished_date in date_bjobs_dic.keys():
+        for finished_date in date_row_dic.keys():
             finished_date_db_file = str(self.job_db_path) + '/' + str(finished_date) + '.db'
             common.bprint(f'Writing {finished_date_db_file} ...', date_format='%Y-%m-%d %H:%M:%S', indent=6)
             (result, finished_date_db_conn) = common_sqlite3.connect_db_file(finished_date_db_file, mode='write')
 
-            if result == 'passed':
+            if result != 'passed':
+                saved = False
+            else:
                 try:
+                    self.tune_db_conn(finished_date_db_conn)
                     common_sqlite3.create_sql_table(finished_date_db_file, finished_date_db_conn, 'job', key_string, commit=False)
+                    common_job_history.upgrade_job_db(finished_date_db_file, finished_date_db_conn, finished_date, commit=False)
 
-                    for job in date_bjobs_dic[finished_date].keys():
-                        # Insert sql table value if not exists.
-                        value_list = [job, date_bjobs_dic[finished_date][job]['job_name'], date_bjobs_dic[finished_date][job]['job_description'], date_bjobs_dic[finished_date][job]['user'], date_bjobs_dic[finished_date][job]['project'], date_bjobs_dic[finished_date][job]['status'], date_bjobs_dic[finished_date][job]['interactive_mode'], date_bjobs_dic[finished_date][job]['queue'], date_bjobs_dic[finished_date][job]['command'], date_bjobs_dic[finished_date][job]['submitted_from'], date_bjobs_dic[finished_date][job]['submitted_time'], date_bjobs_dic[finished_date][job]['cwd'], date_bjobs_dic[finished_date][job]['processors_requested'], date_bjobs_dic[finished_date][job]['requested_resources'], date_bjobs_dic[finished_date][job]['span_hosts'], date_bjobs_dic[finished_date][job]['rusage_mem'], date_bjobs_dic[finished_date][job]['specified_hosts'], date_bjobs_dic[finished_date][job]['started_on'], date_bjobs_dic[finished_date][job]['started_time'], date_bjobs_dic[finished_date][job]['finished_time'], date_bjobs_dic[finished_date][job]['exit_code'], date_bjobs_dic[finished_date][job]['term_signal'], date_bjobs_dic[finished_date][job]['cpu_time'], date_bjobs_dic[finished_date][job]['idle_factor'], date_bjobs_dic[finished_date][job]['mem'], date_bjobs_dic[finished_date][job]['swap'], ' '.join(date_bjobs_dic[finished_date][job]['run_limit']), ' '.join(date_bjobs_dic[finished_date][job]['pids']), date_bjobs_dic[finished_date][job]['max_mem'], date_bjobs_dic[finished_date][job]['avg_mem'], ' '.join(date_bjobs_dic[finished_date][job]['pending_reasons']), date_bjobs_dic[finished_date][job]['job_info']]
-                        value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                        common_sqlite3.insert_into_sql_table(finished_date_db_file, finished_date_db_conn, 'job', value_string, commit=False)
+                    # Insert all job rows and their numeric summary (if not exists) on one transaction.
+                    common_sqlite3.insert_many_into_sql_table(finished_date_db_file, finished_date_db_conn, 'job', date_row_dic[finished_date], commit=False)
+                    summary_key_index_list = [key_list.index(key) for key in common_job_history.JOB_SUMMARY_SOURCE_KEY_LIST]
+                    common_job_history.insert_job_summary_rows(finished_date_db_conn, finished_date, [[row[i] for i in summary_key_index_list] for row in date_row_dic[finished_date]])
+                    common_job_history.analyze_job_db(finished_date_db_conn)
 
                     finished_date_db_conn.commit()
+
+                    # Update job index with the new jobs, or index the whole date if it is not indexed yet.
+                    if finished_date in job_index_date_list:
+                        # If the new jobs cannot be indexed, the date is not complete any more (indexed again as a whole
+                        # next time), or the jobs are sampled again if even that fails.
+                        if common_job_history.update_job_index(job_index_db_file, '', finished_date, finished_date_db_file, finished_date_db_conn, job_list=[row[0] for row in date_row_dic[finished_date]]) < 0:
+                            if common_job_history.reset_job_index_date(job_index_db_file, '', finished_date):
+                                job_index_date_list.remove(finished_date)
+                            else:
+                                saved = False
+                    else:
+                        common_job_history.update_job_index(job_index_db_file, '', finished_date, finished_date_db_file, finished_date_db_conn)
                 except Exception as error:
+                    saved = False
                     common.bprint(f'Failed on sampling job info for {finished_date}: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
                 finally:
                     finished_date_db_conn.close()
 
-        common.bprint(f'Done ({len(bjobs_dic.keys())} jobs).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+        # Only move the high-water mark if all new jobs are saved, or they are retried next time.
+        if saved:
+            finished_job_mark.update(finished_job_snapshot)
+            finished_job_mark.save()
+
+        common.bprint(f'Done ({sum([len(row_list) for row_list in date_row_dic.values()])} new jobs).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
 
     def get_bjobs_mem_idle_factor_info(self):
         """
@@ -380,7 +799,7 @@ class Sampling:
         Returns dict: {jobid: {'mem': <MB>, 'idle_factor': <float>}, ...}
         The mem field from get_bjobs_uf_info() is already converted to MB.
         """
-        bjobs_dic = common_lsf.get_bjobs_uf_info('bjobs -u all -r -UF')
+        bjobs_dic = common_lsf.get_bjobs_uf_info('bjobs -u all -r -UF', tool=self.tool, lsf_unit_for_limits=self.get_lsf_unit_for_limits())
 
         if not bjobs_dic:
             return {}
@@ -406,12 +825,11 @@ class Sampling:
 
     def _write_job_data_db(self, job_range_dic, bjobs_dic):
         """
-        Write job mem and idle_factor data to job_data DB files using single-table schema.
+        Append job mem and idle_factor samples to job_data DB files (job_series, one row per job per hour).
         Detects recycled job IDs by checking time gap and removes stale data.
         """
         # If a job_id has no sample in the last 24 hours, treat it as a recycled ID.
         stale_gap = 24 * 3600
-        batch_size = 500
 
         for job_range in job_range_dic.keys():
             db_file = str(self.job_data_db_path) + '/' + str(job_range) + '.db'
@@ -420,30 +838,18 @@ class Sampling:
 
             if result == 'passed':
                 try:
-                    db_conn.execute('PRAGMA synchronous=NORMAL')
-                    curs = db_conn.cursor()
-                    curs.execute("CREATE TABLE IF NOT EXISTS job_data (job_id TEXT, sample_second INTEGER, sample_time TEXT, mem TEXT, idle_factor TEXT, PRIMARY KEY (job_id, sample_second))")
+                    self.tune_db_conn(db_conn)
+                    common_job_data.create_job_series_table(db_conn)
 
-                    # Detect and remove stale data from recycled job IDs (batched to avoid SQLite variable limit).
+                    # Detect and remove stale data from recycled job IDs (on job_series and legacy job_data).
                     job_list = job_range_dic[job_range]
-                    stale_jobs = []
-
-                    for i in range(0, len(job_list), batch_size):
-                        batch = job_list[i:i + batch_size]
-                        placeholders = ','.join(['?'] * len(batch))
-                        curs.execute(f"SELECT job_id, MAX(sample_second) FROM job_data WHERE job_id IN ({placeholders}) GROUP BY job_id", batch)
-                        stale_jobs.extend([row[0] for row in curs.fetchall() if self.sample_second - row[1] > stale_gap])
+                    last_second_dic = common_job_data.get_job_last_second_dic(db_conn, job_list)
+                    stale_jobs = [job for (job, last_second) in last_second_dic.items() if self.sample_second - last_second > stale_gap]
 
                     if stale_jobs:
-                        for i in range(0, len(stale_jobs), batch_size):
-                            batch = stale_jobs[i:i + batch_size]
-                            placeholders = ','.join(['?'] * len(batch))
-                            curs.execute(f"DELETE FROM job_data WHERE job_id IN ({placeholders})", batch)
-
-                    rows = [(job, self.sample_second, self.sample_time, str(bjobs_dic[job]['mem']), str(bjobs_dic[job]['idle_factor'])) for job in job_list]
-                    curs.executemany("INSERT OR IGNORE INTO job_data VALUES (?, ?, ?, ?, ?)", rows)
+                        common_job_data.delete_job_data(db_conn, stale_jobs)
 
-                    curs.close()
+                    common_job_data.append_job_series(db_conn, self.sample_second, {job: (bjobs_dic[job]['mem'], bjobs_dic[job]['idle_factor']) for job in job_list})
                     db_conn.commit()
                 except Exception as error:
                     common.bprint(f'Failed on writing job data to "{db_file}": {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
@@ -452,12 +858,12 @@ class Sampling:
 
     def sample_job_mem_info(self):
         """
-        Sample (running) job mem and idle_factor, save to job_data/ with single-table schema.
+        Sample (running) job mem and idle_factor, save to job_data/ as hourly job series.
         """
         common.bprint('>>> Sampling job mem/idle_factor info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         t0 = time.time()
-        bjobs_dic = self.get_bjobs_mem_idle_factor_info()
+        bjobs_dic = self.get_lsf_info('running_job')
         t1 = time.time()
         job_list = list(bjobs_dic.keys())
         job_range_dic = common.get_job_range_dic(job_list, range_size=1000000)
@@ -473,58 +879,41 @@ class Sampling:
         common.bprint('>>> Sampling queue info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         queue_db_file = str(self.db_path) + '/queue.db'
-        (result, queue_db_conn) = common_sqlite3.connect_db_file(queue_db_file, mode='write')
+        (result, queue_db_conn) = self.connect_db_file(queue_db_file)
 
         if result == 'passed':
             try:
-                queue_table_list = common_sqlite3.get_sql_table_list(queue_db_file, queue_db_conn)
-                bhosts_dic = common_lsf.get_bhosts_info()
-                queue_host_dic = common_lsf.get_queue_host_info()
-                bqueues_dic = common_lsf.get_bqueues_info()
+                bhosts_dic = self.get_lsf_info('bhosts')
+                queue_host_dic = self.get_lsf_info('queue_host')
+                bqueues_dic = self.get_lsf_info('bqueues')
                 queue_list = bqueues_dic['QUEUE_NAME'] + ['ALL']
 
-                key_list = ['sample_second', 'sample_time', 'TOTAL', 'NJOBS', 'PEND', 'RUN', 'SUSP']
-                key_type_list = ['INTEGER PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
-                key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+                row_list = []
 
                 for i in range(len(queue_list)):
                     queue = queue_list[i]
-                    queue_table_name = 'queue_' + str(queue)
-
-                    # Generate sql table if not exitst.
-                    if queue_table_name not in queue_table_list:
-                        common_sqlite3.create_sql_table(queue_db_file, queue_db_conn, queue_table_name, key_string, commit=False)
-
-                    # Insert sql table value.
                     total_slots = 0
 
                     if queue == 'ALL':
-                        for host_max in bhosts_dic['MAX']:
-                            if re.match(r'^\d+$', host_max):
-                                total_slots += int(host_max)
-
-                        value_list = [self.sample_second, self.sample_time, total_slots, sum([int(i) for i in bqueues_dic['NJOBS'] if re.match(r'^\d+$', str(i))]), sum([int(i) for i in bqueues_dic['PEND'] if re.match(r'^\d+$', str(i))]), sum([int(i) for i in bqueues_dic['RUN'] if re.match(r'^\d+$', str(i))]), sum([int(i) for i in bqueues_dic['SUSP'] if re.match(r'^\d+$', str(i))])]
+                        total_slots = bhosts_dic.get_number_sum('MAX')
+                        value_list = [self.sample_second, self.sample_time, total_slots, bqueues_dic.get_number_sum('NJOBS'), bqueues_dic.get_number_sum('PEND'), bqueues_dic.get_number_sum('RUN'), bqueues_dic.get_number_sum('SUSP')]
                     elif queue == 'lost_and_found':
                         value_list = [self.sample_second, self.sample_time, 'N/A', bqueues_dic['NJOBS'][i], bqueues_dic['PEND'][i], bqueues_dic['RUN'][i], bqueues_dic['SUSP'][i]]
                     else:
                         for queue_host in queue_host_dic.get(queue, []):
-                            if queue_host in bhosts_dic['HOST_NAME']:
-                                host_index = bhosts_dic['HOST_NAME'].index(queue_host)
-                                host_max = bhosts_dic['MAX'][host_index]
-
-                                if re.match(r'^\d+$', host_max):
-                                    total_slots += int(host_max)
+                            total_slots += bhosts_dic.get_number(queue_host, 'MAX', 0)
 
                         value_list = [self.sample_second, self.sample_time, total_slots, bqueues_dic['NJOBS'][i], bqueues_dic['PEND'][i], bqueues_dic['RUN'][i], bqueues_dic['SUSP'][i]]
 
-                    value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                    common_sqlite3.insert_into_sql_table(queue_db_file, queue_db_conn, queue_table_name, value_string, commit=False)
+                    row_list.append(tuple([queue] + value_list))
 
+                # Insert all queue rows into the long-format table.
+                common_history.insert_history_rows(queue_db_file, queue_db_conn, 'queue', row_list, commit=False)
                 queue_db_conn.commit()
             except Exception as error:
                 common.bprint(f'Failed on sampling queue info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                queue_db_conn.close()
+                self.close_db_conn(queue_db_conn)
 
     def sample_host_info(self):
         """
@@ -533,36 +922,24 @@ class Sampling:
         common.bprint('>>> Sampling host info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         host_db_file = str(self.db_path) + '/host.db'
-        (result, host_db_conn) = common_sqlite3.connect_db_file(host_db_file, mode='write')
+        (result, host_db_conn) = self.connect_db_file(host_db_file)
 
         if result == 'passed':
             try:
-                host_table_list = common_sqlite3.get_sql_table_list(host_db_file, host_db_conn)
-                bhosts_dic = common_lsf.get_bhosts_info()
+                bhosts_dic = self.get_lsf_info('bhosts')
                 host_list = bhosts_dic['HOST_NAME']
-
-                key_list = ['sample_second', 'sample_time', 'NJOBS', 'RUN', 'SSUSP', 'USUSP']
-                key_type_list = ['INTEGER PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
-                key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+                row_list = []
 
                 for i in range(len(host_list)):
-                    host = host_list[i]
-                    host_table_name = 'host_' + str(host)
-
-                    # Generate sql table if not exists.
-                    if host_table_name not in host_table_list:
-                        common_sqlite3.create_sql_table(host_db_file, host_db_conn, host_table_name, key_string, commit=False)
-
-                    # Insert sql table value.
-                    value_list = [self.sample_second, self.sample_time, bhosts_dic['NJOBS'][i], bhosts_dic['RUN'][i], bhosts_dic['SSUSP'][i], bhosts_dic['USUSP'][i]]
-                    value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                    common_sqlite3.insert_into_sql_table(host_db_file, host_db_conn, host_table_name, value_string, commit=False)
+                    row_list.append((host_list[i], self.sample_second, self.sample_time, bhosts_dic['NJOBS'][i], bhosts_dic['RUN'][i], bhosts_dic['SSUSP'][i], bhosts_dic['USUSP'][i]))
 
+                # Insert all host rows into the long-format table.
+                common_history.insert_history_rows(host_db_file, host_db_conn, 'host', row_list, commit=False)
                 host_db_conn.commit()
             except Exception as error:
                 common.bprint(f'Failed on sampling host info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                host_db_conn.close()
+                self.close_db_conn(host_db_conn)
 
     def sample_load_info(self):
         """
@@ -571,111 +948,106 @@ class Sampling:
         common.bprint('>>> Sampling host load info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         load_db_file = str(self.db_path) + '/load.db'
-        (result, load_db_conn) = common_sqlite3.connect_db_file(load_db_file, mode='write')
+        (result, load_db_conn) = self.connect_db_file(load_db_file)
 
         if result == 'passed':
             try:
-                load_table_list = common_sqlite3.get_sql_table_list(load_db_file, load_db_conn)
-
-                if self.tool == 'openlava':
-                    lsload_dic = common_lsf.get_lsload_info(command='lsload -l')
-                else:
-                    lsload_dic = common_lsf.get_lsload_info()
-
+                lsload_dic = self.get_lsf_info('lsload')
                 host_list = lsload_dic['HOST_NAME']
-
-                key_list = ['sample_second', 'sample_time', 'ut', 'tmp', 'swp', 'mem']
-                key_type_list = ['INTEGER PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
-                key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+                row_list = []
 
                 for i in range(len(host_list)):
                     host = host_list[i]
-                    load_table_name = 'load_' + str(host)
-
-                    # Generate sql table if not exists.
-                    if load_table_name not in load_table_list:
-                        common_sqlite3.create_sql_table(load_db_file, load_db_conn, load_table_name, key_string, commit=False)
-
-                    # Update "ut" value.
-                    if not lsload_dic['ut'][i]:
-                        lsload_dic['ut'][i] = '0%'
-                    else:
-                        ut = re.sub(r'%', '', lsload_dic['ut'][i])
-
-                        if re.match(r'^\d+\.\d+$', ut):
-                            ut = str(int(float(ut)))
 
-                        if not re.match(r'^\d+$', str(ut)):
-                            ut = '0'
-                        elif int(ut) > 100:
-                            ut = '100'
+                    # Get "ut" value (percent number in range 0-100).
+                    ut = common_history.normalize_history_value('percent', lsload_dic['ut'][i])
 
-                        lsload_dic['ut'][i] = str(ut) + '%'
+                    if ut is None:
+                        ut = 0.0
+                    elif ut > 100:
+                        ut = 100.0
 
-                    # Insert sql table value.
-                    value_list = [self.sample_second, self.sample_time, lsload_dic['ut'][i], lsload_dic['tmp'][i], lsload_dic['swp'][i], lsload_dic['mem'][i]]
-                    value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                    common_sqlite3.insert_into_sql_table(load_db_file, load_db_conn, load_table_name, value_string, commit=False)
+                    row_list.append((host, self.sample_second, self.sample_time, ut, lsload_dic['tmp'][i], lsload_dic['swp'][i], lsload_dic['mem'][i]))
 
+                # Insert all host load rows into the long-format table, tmp/swp/mem are saved with MB.
+                common_history.insert_history_rows(load_db_file, load_db_conn, 'load', row_list, commit=False)
                 load_db_conn.commit()
             except Exception as error:
                 common.bprint(f'Failed on sampling host load info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                load_db_conn.close()
+                self.close_db_conn(load_db_conn)
 
     def sample_user_info(self):
         """
         Sample user info.
         """
-        common.bprint('>>> Sampling job info ...', date_format='%Y-%m-%d %H:%M:%S')
-        common.bprint('* Getting finished job information with command "bjobs -u all -d -UF" ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
-        bjobs_dic = common_lsf.get_bjobs_uf_info('bjobs -u all -d -UF')
+        common.bprint('>>> Sampling user info ...', date_format='%Y-%m-%d %H:%M:%S')
+        finished_job_snapshot = self.get_finished_job_snapshot()
+        finished_job_mark = self.get_finished_job_mark('user')
+        new_job_num = 0
+        saved = True
+
+        # Re-organize new job records (after the high-water mark) with finished_date and user.
+        date_user_row_dic = {}
 
-        # Re-organize jobs_dic with finished_date.
-        date_bjobs_dic = {}
+        for (finished_date, row_list) in finished_job_snapshot.get_date_row_dic(finished_job_mark).items():
+            new_job_num += len(row_list)
+            date_user_row_dic.setdefault(finished_date, {})
 
-        for job in bjobs_dic.keys():
-            finished_date = common_lsf.switch_bjobs_uf_time(bjobs_dic[job]['finished_time'], '%Y%m%d')
-            date_bjobs_dic.setdefault(finished_date, {})
-            user = bjobs_dic[job]['user']
-            date_bjobs_dic[finished_date].setdefault(user, {})
-            date_bjobs_dic[finished_date][user][job] = {'status': bjobs_dic[job]['status'], 'queue': bjobs_dic[job]['queue'], 'project': bjobs_dic[job]['project'], 'rusage_mem': bjobs_dic[job]['rusage_mem'], 'max_mem': bjobs_dic[job]['max_mem']}
+            for row in row_list:
+                user = finished_job_snapshot.get_value(row, 'user')
+                user_row = tuple(finished_job_snapshot.get_value(row, key) for key in ['job', 'status', 'queue', 'project', 'rusage_mem', 'max_mem'])
+                date_user_row_dic[finished_date].setdefault(user, []).append(user_row)
 
         # Write db_file with finished_date.
         common.bprint('* Saving user job information ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
         key_list = ['job', 'status', 'queue', 'project', 'rusage_mem', 'max_mem']
         key_type_list = ['PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
         key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+        user_rollup_db_file = common_history.get_user_rollup_db_file(self.user_db_path)
+        user_rollup_date_list = common_history.get_user_rollup_date_list(user_rollup_db_file, '') if os.path.exists(user_rollup_db_file) else []
 
-        for finished_date in date_bjobs_dic.keys():
+        for finished_date in date_user_row_dic.keys():
             finished_date_db_file = str(self.user_db_path) + '/' + str(finished_date) + '.db'
             common.bprint(f'Writing {finished_date_db_file} ...', date_format='%Y-%m-%d %H:%M:%S', indent=6)
             (result, finished_date_db_conn) = common_sqlite3.connect_db_file(finished_date_db_file, mode='write')
 
-            if result == 'passed':
+            if result != 'passed':
+                saved = False
+            else:
                 try:
+                    self.tune_db_conn(finished_date_db_conn)
                     user_table_list = common_sqlite3.get_sql_table_list(finished_date_db_file, finished_date_db_conn)
 
-                    for user in date_bjobs_dic[finished_date]:
+                    for user in date_user_row_dic[finished_date]:
                         user_table_name = 'user_' + str(user)
 
                         # Generate sql table (user) if not exitst.
                         if user_table_name not in user_table_list:
                             common_sqlite3.create_sql_table(finished_date_db_file, finished_date_db_conn, user_table_name, key_string, commit=False)
 
-                        for job in date_bjobs_dic[finished_date][user]:
-                            # Insert sql table value if not exists.
-                            value_list = [job, bjobs_dic[job]['status'], bjobs_dic[job]['queue'], bjobs_dic[job]['project'], bjobs_dic[job]['rusage_mem'], bjobs_dic[job]['max_mem']]
-                            value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                            common_sqlite3.insert_into_sql_table(finished_date_db_file, finished_date_db_conn, user_table_name, value_string, commit=False)
+                        # Insert user job rows (if not exists).
+                        common_sqlite3.insert_many_into_sql_table(finished_date_db_file, finished_date_db_conn, user_table_name, date_user_row_dic[finished_date][user], commit=False)
 
                     finished_date_db_conn.commit()
+
+                    # Update rollup of the new jobs, or build the whole date if it is not rolled up yet.
+                    if finished_date in user_rollup_date_list:
+                        common_history.update_user_rollup(user_rollup_db_file, '', finished_date, finished_date_db_file, finished_date_db_conn, user_list=list(date_user_row_dic[finished_date].keys()))
+                    else:
+                        common_history.update_user_rollup(user_rollup_db_file, '', finished_date, finished_date_db_file, finished_date_db_conn)
                 except Exception as error:
+                    saved = False
                     common.bprint(f'Failed on sampling user info for {finished_date}: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
                 finally:
                     finished_date_db_conn.close()
 
-        common.bprint(f'Done ({len(bjobs_dic.keys())} jobs).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+        # Only move the high-water mark if all new jobs are saved, or they are retried next time.
+        if saved:
+            finished_job_mark.update(finished_job_snapshot)
+            finished_job_mark.save()
+
+        common.bprint(f'Done ({new_job_num} new jobs).', date_format='%Y-%m-%d %H:%M:%S', indent=4)
 
     def sample_queue_host_mapping_info(self):
         """
@@ -686,10 +1058,10 @@ class Sampling:
         common.bprint('>>> Sampling queue-host mapping info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         # Get current queue-host mapping info.
-        current_queue_host_dic = common_lsf.get_queue_host_info()
+        current_queue_host_dic = self.get_lsf_info('queue_host')
 
         queue_host_mapping_db_file = str(self.db_path) + '/queue_host_mapping.db'
-        (result, queue_host_mapping_db_conn) = common_sqlite3.connect_db_file(queue_host_mapping_db_file, mode='write')
+        (result, queue_host_mapping_db_conn) = self.connect_db_file(queue_host_mapping_db_file)
 
         if result == 'passed':
             try:
@@ -742,7 +1114,7 @@ class Sampling:
             except Exception as error:
                 common.bprint(f'Failed on sampling queue-host mapping info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                queue_host_mapping_db_conn.close()
+                self.close_db_conn(queue_host_mapping_db_conn)
 
     def sample_utilization_info(self):
         """
@@ -751,49 +1123,35 @@ class Sampling:
         common.bprint('>>> Sampling utilization info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         utilization_db_file = str(self.db_path) + '/utilization.db'
-        (result, utilization_db_conn) = common_sqlite3.connect_db_file(utilization_db_file, mode='write')
+        (result, utilization_db_conn) = self.connect_db_file(utilization_db_file)
 
         if result == 'passed':
             try:
-                utilization_table_list = common_sqlite3.get_sql_table_list(utilization_db_file, utilization_db_conn)
-                bhosts_dic = common_lsf.get_bhosts_info()
-                lshosts_dic = common_lsf.get_lshosts_info()
-
-                if self.tool == 'openlava':
-                    lsload_dic = common_lsf.get_lsload_info(command='lsload -l')
-                else:
-                    lsload_dic = common_lsf.get_lsload_info()
+                bhosts_dic = self.get_lsf_info('bhosts')
+                lshosts_dic = self.get_lsf_info('lshosts')
+                lsload_dic = self.get_lsf_info('lsload')
 
                 host_list = lsload_dic['HOST_NAME']
-
-                key_list = ['sample_second', 'sample_time', 'slot', 'cpu', 'mem']
-                key_type_list = ['INTEGER PRIMARY KEY', 'TEXT', 'TEXT', 'TEXT', 'TEXT']
-                key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
+                row_list = []
 
                 for i in range(len(host_list)):
                     host = host_list[i]
-                    utilization_table_name = 'utilization_' + str(host)
-
-                    # Generate sql table if not exists.
-                    if utilization_table_name not in utilization_table_list:
-                        common_sqlite3.create_sql_table(utilization_db_file, utilization_db_conn, utilization_table_name, key_string, commit=False)
 
-                    # Get slot_utilization.
+                    # Get slot_utilization (bhosts row is found with hash index).
                     slot_utilization = 0
+                    host_max = bhosts_dic.get_number(host, 'MAX')
+                    host_njobs = bhosts_dic.get_number(host, 'NJOBS')
 
-                    for (j, host_name) in enumerate(bhosts_dic['HOST_NAME']):
-                        if (host_name == host) and re.match(r'^\d+$', bhosts_dic['NJOBS'][j]) and re.match(r'^\d+$', bhosts_dic['MAX'][j]) and (int(bhosts_dic['MAX'][j]) != 0):
-                            slot_utilization = round(int(bhosts_dic['NJOBS'][j])/int(bhosts_dic['MAX'][j])*100, 1)
+                    if host_max and (host_njobs is not None):
+                        slot_utilization = round(host_njobs/host_max*100, 1)
 
-                            if slot_utilization > 100:
-                                common.bprint(f'For host "{host}", invalid slot utilization "{slot_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+                        if slot_utilization > 100:
+                            common.bprint(f'For host "{host}", invalid slot utilization "{slot_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
 
-                                if bhosts_dic['STATUS'][j] == 'unavail':
-                                    slot_utilization = 0.0
-                                else:
-                                    slot_utilization = 100.0
-
-                            break
+                            if bhosts_dic.get_value(host, 'STATUS') == 'unavail':
+                                slot_utilization = 0.0
+                            else:
+                                slot_utilization = 100.0
 
                     # Get cpu_utilization.
                     cpu_utilization = 0
@@ -801,49 +1159,86 @@ class Sampling:
                     if re.match(r'^\d+%$', lsload_dic['ut'][i]):
                         cpu_utilization = re.sub('%', '', lsload_dic['ut'][i])
 
-                    # Get mem_utilization.
+                    # Get mem_utilization (maxmem/mem are pre-parsed with MB).
                     mem_utilization = 0
+                    maxmem = lshosts_dic.get_number(host, 'maxmem')
+                    mem = lsload_dic.number_dic['mem'][i] if ('mem' in lsload_dic.number_dic) else None
+
+                    if (maxmem is not None) and (mem is not None):
+                        mem_utilization = round((maxmem-mem)*100/maxmem, 1) if maxmem > 0 else 0.0
 
-                    for (k, host_name) in enumerate(lshosts_dic['HOST_NAME']):
-                        if (host_name == host) and re.match(r'^(\d+(\.\d+)?)([MGT])$', lshosts_dic['maxmem'][k]) and re.match(r'^(\d+(\.\d+)?)([MGT])$', lsload_dic['mem'][i]):
-                            # Get maxmem with MB.
-                            maxmem_match = re.match(r'^(\d+(\.\d+)?)([MGT])$', lshosts_dic['maxmem'][k])
-                            maxmem = float(maxmem_match.group(1))
-                            maxmem_unit = maxmem_match.group(3)
+                        if mem_utilization > 100:
+                            common.bprint(f'For host "{host}", invalid mem utilization "{mem_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+                            mem_utilization = 100.0
 
-                            if maxmem_unit == 'G':
-                                maxmem = maxmem*1024
-                            elif maxmem_unit == 'T':
-                                maxmem = maxmem*1024*1024
+                    row_list.append((host, self.sample_second, self.sample_time, slot_utilization, cpu_utilization, mem_utilization))
 
-                            # Get mem with MB.
-                            mem_match = re.match(r'^(\d+(\.\d+)?)([MGT])$', lsload_dic['mem'][i])
-                            mem = float(mem_match.group(1))
-                            mem_unit = mem_match.group(3)
+                # Insert all host utilization rows into the long-format table, then add them into the hour/day/week rollups.
+                common_history.create_history_rollup_table(utilization_db_file, utilization_db_conn, 'utilization', commit=False)
+                # The rollup is not added again if the sample is saved already.
+                if common_history.insert_history_rows(utilization_db_file, utilization_db_conn, 'utilization', row_list, commit=False) > 0:
+                    common_history.update_history_rollup(utilization_db_file, utilization_db_conn, 'utilization', self.sample_second, self.sample_second, commit=False)
 
-                            if mem_unit == 'G':
-                                mem = mem*1024
-                            elif mem_unit == 'T':
-                                mem = mem*1024*1024
+                utilization_db_conn.commit()
+            except Exception as error:
+                common.bprint(f'Failed on sampling utilization info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            finally:
+                self.close_db_conn(utilization_db_conn)
 
-                            mem_utilization = round((maxmem-mem)*100/maxmem, 1) if maxmem > 0 else 0.0
+    def sample_license_info(self):
+        """
+        Sample EDA license usage and save it into license.db.
+        Feature issued/in_use numbers (summed on all license servers/vendor daemons) go to the "license" history
+        family (with hour/day/week rollups), license checkouts per (feature, user) go to the license user table.
+        """
+        common.bprint('>>> Sampling license info ...', date_format='%Y-%m-%d %H:%M:%S')
 
-                            if mem_utilization > 100:
-                                common.bprint(f'For host "{host}", invalid mem utilization "{mem_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
-                                mem_utilization = 100.0
+        license_dic = self.get_lsf_info('lmstat')
 
-                            break
+        if not license_dic:
+            common.bprint('Not find any valid license information.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            return
 
-                    # Insert sql table value.
-                    value_list = [self.sample_second, self.sample_time, slot_utilization, cpu_utilization, mem_utilization]
-                    value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                    common_sqlite3.insert_into_sql_table(utilization_db_file, utilization_db_conn, utilization_table_name, value_string, commit=False)
+        # {feature: [issued, in_use]}, "Uncounted" issued number is None.
+        feature_value_dic = {}
+        # {(feature, user): license_num}, reservations are not checkouts, so they are not counted.
+        user_license_dic = {}
 
-                utilization_db_conn.commit()
+        for license_server in license_dic.keys():
+            for vendor_daemon in license_dic[license_server]['vendor_daemon'].keys():
+                for (feature, feature_dic) in license_dic[license_server]['vendor_daemon'][vendor_daemon]['feature'].items():
+                    value_list = feature_value_dic.setdefault(feature, [None, None])
+
+                    for (i, key) in enumerate(['issued', 'in_use']):
+                        value = common_history.normalize_history_value('count', feature_dic[key])
+
+                        if value is not None:
+                            value_list[i] = (value_list[i] or 0) + value
+
+                    for usage_dic in feature_dic['in_use_info']:
+                        if usage_dic['start_time'] != 'RESERVATION':
+                            license_num = common_history.normalize_history_value('count', usage_dic['license_num']) or 0
+                            user_license_dic[(feature, usage_dic['user'])] = user_license_dic.get((feature, usage_dic['user']), 0) + license_num
+
+        license_db_file = common_history.get_history_db_file(self.db_path, 'license')
+        (result, license_db_conn) = self.connect_db_file(license_db_file)
+
+        if result == 'passed':
+            try:
+                row_list = [(feature, self.sample_second, self.sample_time, issued, in_use) for (feature, (issued, in_use)) in feature_value_dic.items()]
+                user_row_list = [(feature, self.sample_second, user, license_num) for ((feature, user), license_num) in user_license_dic.items()]
+
+                common_history.create_history_rollup_table(license_db_file, license_db_conn, 'license', commit=False)
+                # The rollup is not added again if the sample is saved already.
+                if common_history.insert_history_rows(license_db_file, license_db_conn, 'license', row_list, commit=False) > 0:
+                    common_history.update_history_rollup(license_db_file, license_db_conn, 'license', self.sample_second, self.sample_second, commit=False)
+
+                common_history.insert_license_user_rows(license_db_file, license_db_conn, user_row_list, commit=False)
+                license_db_conn.commit()
             except Exception as error:
-                common.bprint(f'Failed on sampling utilization info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+                common.bprint(f'Failed on sampling license info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                utilization_db_conn.close()
+                self.close_db_conn(license_db_conn)
 
     def get_utilization_day_info(self):
         """
@@ -855,52 +1250,37 @@ class Sampling:
         begin_second = time.mktime(time.strptime(begin_time, '%Y%m%d %H:%M:%S'))
         end_time = f'{self.sample_date} 23:59:59'
         end_second = time.mktime(time.strptime(end_time, '%Y%m%d %H:%M:%S'))
-        select_condition = f"WHERE sample_second BETWEEN {int(begin_second)} AND {int(end_second)}"
 
         utilization_db_file = str(self.db_path) + '/utilization.db'
-        (result, utilization_db_conn) = common_sqlite3.connect_db_file(utilization_db_file, mode='write')
+        (result, utilization_db_conn) = self.connect_db_file(utilization_db_file)
 
         if result == 'passed':
             try:
-                utilization_table_list = common_sqlite3.get_sql_table_list(utilization_db_file, utilization_db_conn)
-
-                for utilization_table_name in utilization_table_list:
-                    # Get current day issued/in_use/utilization from sqlite3 database.
-                    utilization_db_data_dic = common_sqlite3.get_sql_table_data(utilization_db_file, utilization_db_conn, utilization_table_name, ['slot', 'cpu', 'mem'], select_condition)
-
-                    if utilization_db_data_dic:
-                        # Get slot_sum/cpu_sum/mem_sum info.
-                        slot_utilization_sum = 0
-                        cpu_utilization_sum = 0
-                        mem_utilization_sum = 0
+                # Get current day slot/cpu/mem average utilization of all hosts from the day rollup (running sums/counts).
+                utilization_rollup_dic = common_history.get_history_rollup(utilization_db_file, utilization_db_conn, 'utilization', 'day', begin_second=begin_second, end_second=begin_second, key_list=['slot', 'cpu', 'mem'])
+                utilization_average_dic = {host: {key: rollup_dic[key][0] for key in ['slot', 'cpu', 'mem']} for (host, rollup_dic) in utilization_rollup_dic.items()}
 
-                        for (i, slot) in enumerate(utilization_db_data_dic['slot']):
-                            slot_utilization_sum += float(utilization_db_data_dic['slot'][i])
-                            cpu_utilization_sum += float(utilization_db_data_dic['cpu'][i])
-                            mem_utilization_sum += float(utilization_db_data_dic['mem'][i])
+                # Count average from samples if the rollup is not available (like legacy utilization.db).
+                if not utilization_average_dic:
+                    utilization_history_average_dic = common_history.get_history_average(utilization_db_file, utilization_db_conn, 'utilization', begin_second=begin_second, end_second=end_second, key_list=['slot', 'cpu', 'mem'], group_by='all')
+                    utilization_average_dic = {host: group_dic.get('', {}) for (host, group_dic) in utilization_history_average_dic.items()}
 
-                        # Get slot_avg/cpu_avg/mem_avg utilizaiton info.
-                        slot_avg_utilization = round(slot_utilization_sum/len(utilization_db_data_dic['slot']), 1)
-                        cpu_avg_utilization = round(cpu_utilization_sum/len(utilization_db_data_dic['slot']), 1)
-                        mem_avg_utilization = round(mem_utilization_sum/len(utilization_db_data_dic['slot']), 1)
-
-                        if int(slot_avg_utilization) > 100:
-                            common.bprint(f'For db table "{utilization_table_name}", invalid slot average utilization "{slot_avg_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
-                            slot_avg_utilization = 100.0
+                for (host, average_dic) in utilization_average_dic.items():
+                    utilization_table_name = 'utilization_' + str(host)
+                    utilization_day_dic[utilization_table_name] = {}
 
-                        if int(cpu_avg_utilization) > 100:
-                            common.bprint(f'For db table "{utilization_table_name}", invalid cpu average utilization "{cpu_avg_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
-                            cpu_avg_utilization = 100.0
+                    for (resource, avg_utilization) in average_dic.items():
+                        avg_utilization = round(avg_utilization or 0.0, 1)
 
-                        if int(mem_avg_utilization) > 100:
-                            common.bprint(f'For db table "{utilization_table_name}", invalid mem average utilization "{mem_avg_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
-                            mem_avg_utilization = 100.0
+                        if avg_utilization > 100:
+                            common.bprint(f'For host "{host}", invalid {resource} average utilization "{avg_utilization}".', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+                            avg_utilization = 100.0
 
-                        utilization_day_dic[utilization_table_name] = {'slot': slot_avg_utilization, 'cpu': cpu_avg_utilization, 'mem': mem_avg_utilization}
+                        utilization_day_dic[utilization_table_name][resource] = avg_utilization
             except Exception as error:
                 common.bprint(f'Failed on getting utilization day info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                utilization_db_conn.close()
+                self.close_db_conn(utilization_db_conn)
 
         return utilization_day_dic
 
@@ -911,7 +1291,7 @@ class Sampling:
         common.bprint('>>> Counting utilization (day average) info ...', date_format='%Y-%m-%d %H:%M:%S')
 
         utilization_day_db_file = str(self.db_path) + '/utilization_day.db'
-        (result, utilization_day_db_conn) = common_sqlite3.connect_db_file(utilization_day_db_file, mode='write')
+        (result, utilization_day_db_conn) = self.connect_db_file(utilization_day_db_file)
 
         if result == 'passed':
             try:
@@ -923,37 +1303,20 @@ class Sampling:
                 key_string = common_sqlite3.gen_sql_table_key_string(key_list, key_type_list)
 
                 for (utilization_day_table_name, utilization_day_table_dic) in utilization_day_dic.items():
-                    host = re.sub('utilization_', '', utilization_day_table_name)
-                    common.bprint(f'Counting utilization (day average) info for host "{host}" ...', date_format='%Y-%m-%d %H:%M:%S', indent=4)
-
                     # Generate sql table.
                     if utilization_day_table_name not in utilization_day_table_list:
                         common_sqlite3.create_sql_table(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, key_string, commit=False)
 
-                        # Insert sql table value.
-                        value_list = [self.sample_date, utilization_day_table_dic['slot'], utilization_day_table_dic['cpu'], utilization_day_table_dic['mem']]
-                        value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                        common_sqlite3.insert_into_sql_table(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, value_string, commit=False)
-                    else:
-                        select_condition = "WHERE sample_date='" + str(self.sample_date) + "'"
-                        utilization_day_db_data_dic = common_sqlite3.get_sql_table_data(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, ['slot', 'cpu', 'mem'], select_condition)
-
-                        if utilization_day_db_data_dic:
-                            # Replace sql table value.
-                            set_condition = "SET slot='" + str(utilization_day_table_dic['slot']) + "', cpu='" + str(utilization_day_table_dic['cpu']) + "', mem='" + str(utilization_day_table_dic['mem']) + "'"
-                            where_condition = "WHERE sample_date='" + str(self.sample_date) + "'"
-                            common_sqlite3.update_sql_table_data(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, set_condition, where_condition, commit=False)
-                        else:
-                            # Insert sql table value.
-                            value_list = [self.sample_date, utilization_day_table_dic['slot'], utilization_day_table_dic['cpu'], utilization_day_table_dic['mem']]
-                            value_string = common_sqlite3.gen_sql_table_value_string(value_list)
-                            common_sqlite3.insert_into_sql_table(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, value_string, commit=False)
+                    # Insert or replace current day value.
+                    row_list = [(self.sample_date, utilization_day_table_dic['slot'], utilization_day_table_dic['cpu'], utilization_day_table_dic['mem'])]
+                    common_sqlite3.insert_many_into_sql_table(utilization_day_db_file, utilization_day_db_conn, utilization_day_table_name, row_list, commit=False, replace=True)
 
+                common.bprint(f'Counted utilization (day average) info for {len(utilization_day_dic)} hosts.', date_format='%Y-%m-%d %H:%M:%S', indent=4)
                 utilization_day_db_conn.commit()
             except Exception as error:
                 common.bprint(f'Failed on counting utilization day info: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
             finally:
-                utilization_day_db_conn.close()
+                self.close_db_conn(utilization_day_db_conn)
 
     def sample_cluster_analysis(self):
         """
@@ -1008,6 +1371,243 @@ class Sampling:
         except Exception as error:
             common.bprint(f'Failed on generating cluster analysis report: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
 
+    def run_sampler(self, sampler_name, sampler_function):
+        """
+        Run specified sampler function (on sampler process), report its elapsed time to sampler_timing_queue.
+        """
+        start_second = time.time()
+
+        try:
+            sampler_function()
+        finally:
+            self.sampler_timing_queue.put((sampler_name, time.time() - start_second))
+
+    def report_sampler_timing(self, sampler_name_list, command_seconds=None, sampler_seconds=None):
+        """
+        Show LSF command (collection) time and per-sampler (parsing and db write) elapsed time of current sampling cycle.
+        """
+        sampler_timing_dic = {}
+
+        while len(sampler_timing_dic) < len(sampler_name_list):
+            try:
+                (sampler_name, elapsed) = self.sampler_timing_queue.get(timeout=1)
+                sampler_timing_dic[sampler_name] = elapsed
+            except Exception:
+                break
+
+        common.bprint('Sampler timing summary:', date_format='%Y-%m-%d %H:%M:%S')
+
+        if command_seconds is not None:
+            common.bprint(f'{"LSF commands (wall)":<30} {command_seconds:.1f}s', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+
+            for (info_name, elapsed) in self.lsf_info_seconds_dic.items():
+                common.bprint(f'{info_name:<28} {elapsed:.1f}s', date_format='%Y-%m-%d %H:%M:%S', indent=6)
+
+        if sampler_seconds is not None:
+            common.bprint(f'{"Samplers/db writes (wall)":<30} {sampler_seconds:.1f}s', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+
+        for sampler_name in sampler_name_list:
+            if sampler_name in sampler_timing_dic:
+                common.bprint(f'{sampler_name:<28} {sampler_timing_dic[sampler_name]:.1f}s', date_format='%Y-%m-%d %H:%M:%S', indent=6)
+            else:
+                common.bprint(f'{sampler_name:<28} N/A (timed out or failed)', date_format='%Y-%m-%d %H:%M:%S', indent=6)
+
+    def get_sampler_list(self):
+        """
+        Get sampler list, item format is (enabled, sampler_name, sampler_function).
+        """
+        sampler_list = [(self.job_sampling, 'job', self.sample_job_info),
+                        (self.job_mem_sampling, 'job_mem', self.sample_job_mem_info),
+                        (self.queue_sampling, 'queue', self.sample_queue_info),
+                        (self.queue_host_mapping_sampling, 'queue_host_mapping', self.sample_queue_host_mapping_info),
+                        (self.host_sampling, 'host', self.sample_host_info),
+                        (self.load_sampling, 'load', self.sample_load_info),
+                        (self.user_sampling, 'user', self.sample_user_info),
+                        (self.utilization_sampling, 'utilization', self.sample_utilization_info),
+                        (self.utilization_day_sampling, 'utilization_day', self.count_utilization_day_info),
+                        (self.license_sampling, 'license', self.sample_license_info)]
+
+        return sampler_list
+
+    def get_daemon_sampler_interval_dic(self):
+        """
+        Get daemon sampler intervals (seconds), can be updated with config "daemon_sampler_interval".
+        """
+        daemon_sampler_interval_dic = {
+            'cleanup': 86400,
+            'job': 300,
+            'job_mem': 300,
+            'queue': 300,
+            'queue_host_mapping': 1800,
+            'host': 300,
+            'load': 60,
+            'user': 300,
+            'utilization': 300,
+            'utilization_day': 3600,
+            'license': 300,
+            'analysis': 86400,
+        }
+
+        if hasattr(config, 'daemon_sampler_interval') and isinstance(config.daemon_sampler_interval, dict):
+            daemon_sampler_interval_dic.update(config.daemon_sampler_interval)
+
+        return daemon_sampler_interval_dic
+
+    def wait_daemon_dependency(self, sampler_name, cycle_second):
+        """
+        Wait until the samplers which sampler_name depends on (SAMPLER_DEPENDENCY_DIC, if they are on the daemon too)
+        finish a cycle started at or after cycle_second, so the sampler works on their latest samples.
+        Return False if they are not finished in two of their intervals (or the daemon is stopped).
+        """
+        dependency_list = [dependency for name in sampler_name.split('/') for dependency in SAMPLER_DEPENDENCY_DIC.get(name, []) if dependency in self.daemon_sampler_interval_dic]
+
+        if not dependency_list:
+            return True
+
+        deadline_second = time.time() + 2*max([self.daemon_sampler_interval_dic[dependency] for dependency in dependency_list])
+
+        with self.daemon_sampler_condition:
+            while not all([self.daemon_sampler_finish_dic.get(dependency, 0) >= cycle_second for dependency in dependency_list]):
+                if self.daemon_stop_event.is_set() or (time.time() >= deadline_second):
+                    return False
+
+                # Wait with timeout, so the stopped daemon is noticed.
+                self.daemon_sampler_condition.wait(min(1, max(deadline_second - time.time(), 0)))
+
+        return True
+
+    def finish_daemon_sampler(self, sampler_name, cycle_second):
+        """
+        Record the finished cycle of sampler_name, and wake up the samplers which wait for it.
+        """
+        with self.daemon_sampler_condition:
+            for name in sampler_name.split('/'):
+                self.daemon_sampler_finish_dic[name] = cycle_second
+
+            self.daemon_sampler_condition.notify_all()
+
+    def run_daemon_sampler(self, sampler_name, sampler_function_name_list, interval):
+        """
+        Run sampler functions every <interval> seconds on the daemon sampler thread until the daemon is stopped.
+        The thread works on its own Sampling copy (sample time, finished job snapshot and kept db connections),
+        the cycles missed while the previous cycle is still running are skipped.
+        A sampler which depends on other samplers (SAMPLER_DEPENDENCY_DIC) waits for their next cycle first.
+        """
+        sampler = copy.copy(self)
+        sampler.db_conn_dic = {}
+        next_second = time.time()
+
+        while not self.daemon_stop_event.is_set():
+            cycle_second = time.time()
+
+            if not sampler.wait_daemon_dependency(sampler_name, cycle_second):
+                if self.daemon_stop_event.is_set():
+                    break
+
+                common.bprint(f'Sampler "{sampler_name}" does not get the samplers it depends on finished, run it anyway.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
+            sampler.update_sample_time()
+            sampler.lsf_info_dic = {}
+            sampler.lsf_info_seconds_dic = {}
+            start_second = cycle_second
+            command_seconds = 0.0
+
+            try:
+                command_seconds = sampler.collect_lsf_info(sampler_name.split('/'))
+            except Exception as error:
+                common.bprint(f'Sampler "{sampler_name}" failed on collecting LSF information: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
+            for sampler_function_name in sampler_function_name_list:
+                try:
+                    getattr(sampler, sampler_function_name)()
+                except Exception as error:
+                    common.bprint(f'Sampler "{sampler_name}" failed on {sampler_function_name}: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
+            sampler.finish_daemon_sampler(sampler_name, cycle_second)
+
+            # Release the finished job snapshot and LSF information, next cycle collects new ones.
+            sampler.finished_job_snapshot = None
+            sampler.lsf_info_dic = {}
+
+            current_second = time.time()
+            elapsed = current_second - start_second
+            next_second += interval
+
+            if next_second <= current_second:
+                skipped_cycle_num = int((current_second - next_second)//interval) + 1
+                next_second += skipped_cycle_num*interval
+                common.bprint(f'Sampler "{sampler_name}" took {elapsed:.1f}s (interval {interval}s), skip {skipped_cycle_num} cycle(s).', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            else:
+                common.bprint(f'Sampler "{sampler_name}" done ({elapsed:.1f}s, LSF commands {command_seconds:.1f}s), next cycle at {datetime.datetime.fromtimestamp(next_second).strftime("%Y-%m-%d %H:%M:%S")}.', date_format='%Y-%m-%d %H:%M:%S')
+
+            self.daemon_stop_event.wait(max(next_second - time.time(), 0))
+
+        sampler.close_all_db_conn()
+
+    def stop_daemon(self, signum=None, frame=None):
+        """
+        Stop daemon sampler threads after their current cycle.
+        """
+        if not self.daemon_stop_event.is_set():
+            common.bprint(f'Received signal {signum}, stopping bsample daemon ...', date_format='%Y-%m-%d %H:%M:%S')
+            self.daemon_stop_event.set()
+
+    def daemon(self):
+        """
+        Stay resident and run each specified sampler on its own thread and interval.
+        Cluster info (lsid), LSF_UNIT_FOR_LIMITS (badmin showconf) and db connections are reused by all cycles.
+        """
+        daemon_sampler_interval_dic = self.get_daemon_sampler_interval_dic()
+        daemon_sampler_list = []
+
+        if self.cleanup:
+            daemon_sampler_list.append(('cleanup', ['cleanup_db'], daemon_sampler_interval_dic['cleanup']))
+
+        for (enabled, sampler_name, sampler_function) in self.get_sampler_list():
+            if (not enabled) or ((sampler_name == 'user') and self.job_sampling):
+                continue
+
+            if (sampler_name == 'job') and self.user_sampling:
+                # job/user samplers run on the same thread, so they share one "bjobs -UF" snapshot per cycle.
+                daemon_sampler_list.append(('job/user', [sampler_function.__name__, self.sample_user_info.__name__], daemon_sampler_interval_dic['job']))
+            else:
+                daemon_sampler_list.append((sampler_name, [sampler_function.__name__], daemon_sampler_interval_dic[sampler_name]))
+
+        if self.analysis_sampling:
+            daemon_sampler_list.append(('analysis', ['sample_cluster_analysis'], daemon_sampler_interval_dic['analysis']))
+
+        # Samplers on the daemon, the sampler which depends on other samplers waits for them (wait_daemon_dependency).
+        self.daemon_sampler_interval_dic = {name: max(int(interval), 1) for (sampler_name, sampler_function_name_list, interval) in daemon_sampler_list for name in sampler_name.split('/')}
+
+        # Cache LSF_UNIT_FOR_LIMITS before starting sampler threads, they get it with their Sampling copy.
+        if self.job_sampling or self.job_mem_sampling or self.user_sampling:
+            self.get_lsf_unit_for_limits()
+
+        signal.signal(signal.SIGTERM, self.stop_daemon)
+        signal.signal(signal.SIGINT, self.stop_daemon)
+
+        common.bprint(f'>>> Starting bsample daemon (pid {os.getpid()}, db_path "{self.db_path}") ...', date_format='%Y-%m-%d %H:%M:%S')
+        thread_list = []
+
+        for (sampler_name, sampler_function_name_list, interval) in daemon_sampler_list:
+            interval = max(int(interval), 1)
+            common.bprint(f'{sampler_name:<30} every {interval}s', date_format='%Y-%m-%d %H:%M:%S', indent=4)
+            thread = threading.Thread(target=self.run_daemon_sampler, args=(sampler_name, sampler_function_name_list, interval), name=sampler_name, daemon=True)
+            thread.start()
+            thread_list.append(thread)
+
+        # Wait with timeout, so the signal handler can run on the main thread.
+        while not self.daemon_stop_event.is_set():
+            self.daemon_stop_event.wait(1)
+
+        for thread in thread_list:
+            thread.join(timeout=600)
+
+            if thread.is_alive():
+                common.bprint(f'Sampler thread {thread.name} is still running, exit anyway.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
+        common.bprint('bsample daemon stopped.', date_format='%Y-%m-%d %H:%M:%S')
+
     def sampling(self):
         start_time = time.time()
 
@@ -1015,62 +1615,48 @@ class Sampling:
         if self.cleanup:
             self.cleanup_db()
 
-        # Sample.
+        # Collect LSF information (command results) before forking, so every command runs (and is parsed) only once.
+        sampler_name_list = [sampler_name for (enabled, sampler_name, sampler_function) in self.get_sampler_list() if enabled]
+        command_seconds = self.collect_lsf_info(sampler_name_list)
+
+        # Sample, the sampler which depends on other samplers starts after them.
+        sampler_start_second = time.time()
         process_list = []
+        deferred_sampler_list = []
 
-        if self.job_sampling:
-            p = Process(target=self.sample_job_info)
-            p.start()
-            process_list.append(p)
-
-        if self.job_mem_sampling:
-            p = Process(target=self.sample_job_mem_info)
-            p.start()
-            process_list.append(p)
-
-        if self.queue_sampling:
-            p = Process(target=self.sample_queue_info)
-            p.start()
-            process_list.append(p)
-
-        if self.queue_host_mapping_sampling:
-            p = Process(target=self.sample_queue_host_mapping_info)
-            p.start()
-            process_list.append(p)
-
-        if self.host_sampling:
-            p = Process(target=self.sample_host_info)
-            p.start()
-            process_list.append(p)
-
-        if self.load_sampling:
-            p = Process(target=self.sample_load_info)
-            p.start()
-            process_list.append(p)
-
-        if self.user_sampling:
-            p = Process(target=self.sample_user_info)
-            p.start()
-            process_list.append(p)
-
-        if self.utilization_sampling:
-            p = Process(target=self.sample_utilization_info)
-            p.start()
-            process_list.append(p)
-
-        if self.utilization_day_sampling:
-            p = Process(target=self.count_utilization_day_info)
-            p.start()
-            process_list.append(p)
+        for (enabled, sampler_name, sampler_function) in self.get_sampler_list():
+            if enabled:
+                if any([dependency in sampler_name_list for dependency in SAMPLER_DEPENDENCY_DIC.get(sampler_name, [])]):
+                    deferred_sampler_list.append((sampler_name, sampler_function))
+                    continue
 
-        for p in process_list:
+                p = Process(target=self.run_sampler, args=(sampler_name, sampler_function), name=sampler_name)
+                p.start()
+                process_list.append(p)
+
+        i = 0
+
+        while i < len(process_list):
+            p = process_list[i]
             p.join(timeout=600)
+            i += 1
 
             if p.is_alive():
                 common.bprint(f'Sampling process {p.name} timed out, terminating ...', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
                 p.terminate()
                 p.join(timeout=10)
 
+            finished_sampler_name_list = [p.name for p in process_list[:i]]
+
+            for (sampler_name, sampler_function) in list(deferred_sampler_list):
+                if all([(dependency not in sampler_name_list) or (dependency in finished_sampler_name_list) for dependency in SAMPLER_DEPENDENCY_DIC[sampler_name]]):
+                    p = Process(target=self.run_sampler, args=(sampler_name, sampler_function), name=sampler_name)
+                    p.start()
+                    process_list.append(p)
+                    deferred_sampler_list.remove((sampler_name, sampler_function))
+
+        sampler_seconds = time.time() - sampler_start_second
+
         # AI cluster analysis is a single (slow) LLM call; run it inline after the
         # parallel samplers so its output and errors are visible.
         if self.analysis_sampling:
@@ -1079,6 +1665,9 @@ class Sampling:
         elapsed = time.time() - start_time
         common.bprint('', date_format='%Y-%m-%d %H:%M:%S')
 
+        if sampler_name_list:
+            self.report_sampler_timing(sampler_name_list, command_seconds, sampler_seconds)
+
         if elapsed >= 60:
             common.bprint(f'Total elapsed time: {elapsed / 60:.1f}m.', date_format='%Y-%m-%d %H:%M:%S')
         else:
@@ -1089,9 +1678,13 @@ class Sampling:
 # Main Function #
 #################
 def main():
-    (cleanup, job, job_mem, queue, queue_host_mapping, host, load, user, utilization, utilization_day, analysis) = read_args()
-    my_sampling = Sampling(cleanup, job, job_mem, queue, queue_host_mapping, host, load, user, utilization, utilization_day, analysis)
-    my_sampling.sampling()
+    (cleanup, job, job_mem, queue, queue_host_mapping, host, load, user, utilization, utilization_day, license_usage, analysis, daemon) = read_args()
+    my_sampling = Sampling(cleanup, job, job_mem, queue, queue_host_mapping, host, load, user, utilization, utilization_day, license_usage, analysis)
+
+    if daemon:
+        my_sampling.daemon()
+    else:
+        my_sampling.sampling()
 
 
 if __name__ == '__main__':
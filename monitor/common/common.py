@@ -2,10 +2,12 @@ import os
 import re
 import sys
 import json
+import stat
 import uuid
 import socket
 import getpass
 import datetime
+import tempfile
 import subprocess
 
 
@@ -316,6 +318,21 @@ def run_command(command, mystdin=subprocess.PIPE, mystdout=subprocess.PIPE, myst
     return SP.returncode, stdout, stderr
 
 
+def run_command_for_lines(command, mystdin=subprocess.DEVNULL, mystderr=subprocess.DEVNULL):
+    """
+    Run system command with subprocess.Popen, yield stdout lines (bytes) while the command is still running.
+    It is used for huge command output, so the whole stdout never needs to be held in memory.
+    """
+    SP = subprocess.Popen(command, shell=True, stdin=mystdin, stdout=subprocess.PIPE, stderr=mystderr)
+
+    try:
+        for line in SP.stdout:
+            yield line
+    finally:
+        SP.stdout.close()
+        SP.wait()
+
+
 def get_job_range_dic(job_list, range_size=100000):
     """
     Get job range string "***_***" based the jobid.
@@ -382,6 +399,34 @@ def create_dir(dir_path, permission=0o1777):
             sys.exit(1)
 
 
+
+def get_user_tmp_dir():
+    """
+    Get the per-user private directory on tmp, like /tmp/lsfMonitor_<user>.
+    """
+    return os.path.join(tempfile.gettempdir(), 'lsfMonitor_' + getpass.getuser())
+
+
+def create_private_dir(dir_path):
+    """
+    Create dir_path with mode 0o700 if it is missing.
+    Return True if it is a real directory (not a symlink) owned by current user, its mode is restricted to 0o700.
+    """
+    try:
+        os.mkdir(dir_path, 0o700)
+    except FileExistsError:
+        pass
+
+    dir_stat = os.lstat(dir_path)
+
+    if (not stat.S_ISDIR(dir_stat.st_mode)) or (dir_stat.st_uid != os.getuid()):
+        return False
+
+    if stat.S_IMODE(dir_stat.st_mode) != 0o700:
+        os.chmod(dir_path, 0o700)
+
+    return True
+
 class SaveLog():
     """
     Save lsfMonitor event information into event log and user log.
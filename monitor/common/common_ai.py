@@ -19,6 +19,9 @@ except ImportError:
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
 from common import common_license
+from common import common_lsf
+from common import common_rag
+from common import common_job_history
 from common import common_sqlite3
 
 # openai and anthropic are lazy-imported inside their respective methods
@@ -128,7 +131,8 @@ TOOLS_OPENAI = [
                 "properties": {
                     "feature": {"type": "string", "description": "License feature name to filter (optional)"},
                     "user": {"type": "string", "description": "User name to filter (optional)"},
-                    "server": {"type": "string", "description": "License server to filter (optional)"}
+                    "server": {"type": "string", "description": "License server to filter (optional)"},
+                    "show_job": {"type": "boolean", "description": "Also show the LSF job which owns every license checkout, it runs bjobs (optional)"}
                 },
                 "required": []
             }
@@ -138,7 +142,7 @@ TOOLS_OPENAI = [
         "type": "function",
         "function": {
             "name": "query_job_history",
-            "description": "Query historical finished job records from the local SQLite database. Jobs are stored in per-date DB files.",
+            "description": "Query historical finished job records from the local SQLite database. Jobs are stored in per-date DB files, a date range is searched in one query and job_id is found on any date.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -146,7 +150,12 @@ TOOLS_OPENAI = [
                     "user": {"type": "string", "description": "Filter by user name (optional)"},
                     "queue": {"type": "string", "description": "Filter by queue name (optional)"},
                     "status": {"type": "string", "description": "Filter by job status: DONE, EXIT (optional)"},
-                    "date": {"type": "string", "description": "Date to query in YYYYMMDD format (optional, default=today)"},
+                    "exit_code": {"type": "string", "description": "Filter by exit code (optional)"},
+                    "min_max_mem": {"type": "number", "description": "Only jobs whose max memory is at least this value in MB (optional)"},
+                    "max_max_mem": {"type": "number", "description": "Only jobs whose max memory is at most this value in MB (optional)"},
+                    "date": {"type": "string", "description": "Single finished date to query in YYYYMMDD format (optional, default=today, or all dates for job_id)"},
+                    "begin_date": {"type": "string", "description": "First finished date of a date range in YYYYMMDD format (optional)"},
+                    "end_date": {"type": "string", "description": "Last finished date of a date range in YYYYMMDD format (optional)"},
                     "limit": {"type": "integer", "description": "Max number of results (default=20)"}
                 },
                 "required": []
@@ -260,8 +269,8 @@ def execute_command(command, dangerous_list, confirm_callback):
         return f"Error executing command: {e}"
 
 
-def execute_license_query(license_dic, lmstat_path='lmstat', bsub_command='', feature='', user='', server=''):
-    """Query EDA license info."""
+def execute_license_query(license_dic, lmstat_path='lmstat', bsub_command='', feature='', user='', server='', show_job=False):
+    """Query EDA license info, show_job also shows the owning LSF job of every checkout."""
     try:
         if not license_dic:
             my_get_license_info = common_license.GetLicenseInfo(lmstat_path=lmstat_path, bsub_command=bsub_command)
@@ -270,13 +279,13 @@ def execute_license_query(license_dic, lmstat_path='lmstat', bsub_command='', fe
         if not license_dic:
             return "No license information available. Check LM_LICENSE_FILE and lmstat configuration."
 
-        filtered_dic = common_license.FilterLicenseDic().run(
-            license_dic,
+        filtered_dic = common_license.LicenseSnapshot(license_dic).run(
             server_list=[server] if server else [],
             feature_list=[feature] if feature else [],
             user_list=[user] if user else []
         )
 
+        license_job_index = common_license.LicenseJobIndex(common_lsf.get_bjobs_info()) if show_job else None
         lines = []
 
         for lic_server, server_info in filtered_dic.items():
@@ -295,7 +304,13 @@ def execute_license_query(license_dic, lmstat_path='lmstat', bsub_command='', fe
                         host = use_info.get('execute_host', '')
                         start = use_info.get('start_time', '')
                         num = use_info.get('license_num', '1')
-                        lines.append(f"      {u}@{host} ({num} license, since {start})")
+                        job = ''
+
+                        if license_job_index:
+                            jobid_list = license_job_index.get_job_list(use_info)
+                            job = f", job {jobid_list[0]}" if len(jobid_list) == 1 else (f", candidate jobs {' '.join(jobid_list)}" if jobid_list else ', no LSF job')
+
+                        lines.append(f"      {u}@{host} ({num} license, since {start}{job})")
 
         output = '\n'.join(lines) if lines else "No matching license information found."
 
@@ -307,86 +322,103 @@ def execute_license_query(license_dic, lmstat_path='lmstat', bsub_command='', fe
         return f"Error querying license info: {e}"
 
 
-def execute_job_history_query(db_path, job_id='', user='', queue='', status='', date='', limit=20):
-    """Query historical job records from SQLite database."""
+def execute_job_history_query(db_path, job_id='', user='', queue='', status='', date='', limit=20, begin_date='', end_date='', exit_code='', min_max_mem=None, max_max_mem=None):
+    """Query historical job records from the per-date SQLite databases (a single date or a date range)."""
     try:
         job_db_path = str(db_path) + '/job'
 
         if not os.path.isdir(job_db_path):
             return f"Job database directory not found: {job_db_path}"
 
-        if not date:
-            date = datetime.datetime.now().strftime('%Y%m%d')
-
-        db_file = str(job_db_path) + '/' + str(date) + '.db'
+        if date:
+            begin_date = end_date = date
+        elif (not begin_date) and (not end_date) and (not job_id):
+            # Job id is searched on all dates with job index, other queries default to today.
+            begin_date = end_date = datetime.datetime.now().strftime('%Y%m%d')
 
-        if not os.path.exists(db_file):
-            available = sorted([f.replace('.db', '') for f in os.listdir(job_db_path) if f.endswith('.db')])
-            return f"No job database for date {date}. Available dates: {', '.join(available[-10:]) if available else 'none'}"
+        if begin_date and (begin_date == end_date):
+            date_range = str(begin_date)
+        elif begin_date or end_date:
+            date_range = f"{begin_date or 'first'} - {end_date or 'last'}"
+        else:
+            date_range = 'all'
 
-        conditions = []
-        params = []
+        if not common_job_history.get_job_db_date_list(job_db_path, begin_date, end_date):
+            available = sorted(common_job_history.get_job_db_date_list(job_db_path))
+            return f"No job database for date {date_range}. Available dates: {', '.join(available[-10:]) if available else 'none'}"
 
-        if job_id:
-            conditions.append("job=?")
-            params.append(str(job_id))
+        key_list = ['job', 'job_name', 'user', 'status', 'queue', 'started_time', 'finished_time', 'max_mem', 'avg_mem', 'rusage_mem', 'exit_code', 'command']
+        lines = []
 
-        if user:
-            conditions.append("user=?")
-            params.append(str(user))
+        for (finished_date, row) in common_job_history.iter_job_history(job_db_path, key_list, begin_date, end_date, limit=int(limit or 0), job=job_id, user=user, queue=queue, status=status, exit_code=exit_code, min_max_mem=min_max_mem, max_max_mem=max_max_mem):
+            lines.append('  '.join([f"date={finished_date}"] + [f"{key}={value}" for (key, value) in zip(key_list, row)]))
 
-        if queue:
-            conditions.append("queue=?")
-            params.append(str(queue))
+        if not lines:
+            return f"No matching jobs found for date {date_range}."
 
-        if status:
-            conditions.append("status=?")
-            params.append(str(status))
+        output = '\n'.join([f"Found {len(lines)} job(s) for date {date_range}:\n"] + lines)
 
-        select_condition = ''
+        if len(output) > MAX_OUTPUT_LENGTH:
+            output = output[:MAX_OUTPUT_LENGTH] + "\n... (truncated)"
 
-        if conditions:
-            select_condition = 'WHERE ' + ' AND '.join(conditions)
+        return output
+    except Exception as e:
+        return f"Error querying job history: {e}"
 
-        if limit:
-            select_condition += f" LIMIT {int(limit)}"
 
-        key_list = ['job', 'job_name', 'user', 'status', 'queue', 'started_time', 'finished_time', 'max_mem', 'avg_mem', 'rusage_mem', 'exit_code', 'command']
-        data_dic = common_sqlite3.get_sql_table_data(db_file, '', 'job', key_list=key_list, select_condition=select_condition, select_params=params)
+# ============================================================
+# Documentation loading and search (RAG vector + keyword fallback).
+# ============================================================
 
-        if not data_dic:
-            return f"No matching jobs found for date {date}."
+def load_rag_chunks(chunks_file, metadata_file):
+    """
+    Load (chunks, metadata) of RAG database.
+    Prefers the memory-mapped chunk store (rag_chunks.pack) unless rag_chunks.json is newer, chunks/metadata are
+    fetched lazily from it. Metadata is [] if its length does not match chunks.
+    """
+    pack_file = common_rag.get_rag_pack_file(chunks_file)
 
-        num_rows = len(data_dic.get('job', []))
-        lines = [f"Found {num_rows} job(s) for date {date}:\n"]
+    if os.path.exists(pack_file) and ((not os.path.exists(chunks_file)) or (os.path.getmtime(pack_file) >= os.path.getmtime(chunks_file))):
+        try:
+            rag_chunk_store = common_rag.RagChunkStore(pack_file)
+            return rag_chunk_store.chunks, (rag_chunk_store.metadata if len(rag_chunk_store.metadata) else [])
+        except Exception:
+            pass
 
-        for i in range(num_rows):
-            row_parts = []
+    with open(chunks_file, 'r', errors='replace') as f:
+        chunks = json.load(f)
 
-            for key in key_list:
-                val = data_dic.get(key, [''])[i] if i < len(data_dic.get(key, [])) else ''
-                row_parts.append(f"{key}={val}")
+    metadata = []
 
-            lines.append('  '.join(row_parts))
+    # Load metadata if available and length matches chunks.
+    if os.path.exists(metadata_file):
+        try:
+            with open(metadata_file, 'r', errors='replace') as f:
+                meta = json.load(f)
 
-        output = '\n'.join(lines)
+            if len(meta) == len(chunks):
+                metadata = meta
+        except Exception:
+            pass
 
-        if len(output) > MAX_OUTPUT_LENGTH:
-            output = output[:MAX_OUTPUT_LENGTH] + "\n... (truncated)"
+    return chunks, metadata
 
-        return output
-    except Exception as e:
-        return f"Error querying job history: {e}"
 
+def read_faiss_index(faiss_file):
+    """
+    Open FAISS index memory-mapped (IO_FLAG_MMAP, and IO_FLAG_MMAP_IFC for flat codes on newer faiss), so its pages are
+    shared between processes, fall back to reading it into memory.
+    """
+    try:
+        return faiss.read_index(faiss_file, faiss.IO_FLAG_MMAP | getattr(faiss, 'IO_FLAG_MMAP_IFC', 0))
+    except Exception:
+        return faiss.read_index(faiss_file)
 
-# ============================================================
-# Documentation loading and search (RAG vector + keyword fallback).
-# ============================================================
 
 def load_ai_documents(docs_dir):
     """
     Load documents from db/ai/ directory.
-    Prefers FAISS index (rag_faiss.index + rag_chunks.json).
+    Prefers FAISS index (rag_faiss.index + rag_chunks.pack/rag_chunks.json).
     Falls back to keyword search if FAISS files are absent.
     Returns a dict: {"chunks": [...], "faiss_index": faiss.Index or None}
     """
@@ -398,46 +430,21 @@ def load_ai_documents(docs_dir):
     chunks_file = os.path.join(docs_dir, 'rag_chunks.json')
     faiss_file = os.path.join(docs_dir, 'rag_faiss.index')
     metadata_file = os.path.join(docs_dir, 'rag_metadata.json')
+    chunks_exist = os.path.exists(chunks_file) or os.path.exists(common_rag.get_rag_pack_file(chunks_file))
 
     # Try loading FAISS index.
-    if os.path.exists(chunks_file) and os.path.exists(faiss_file) and FAISS_AVAILABLE:
+    if chunks_exist and os.path.exists(faiss_file) and FAISS_AVAILABLE:
         try:
-            with open(chunks_file, 'r', errors='replace') as f:
-                result["chunks"] = json.load(f)
-
-            result["faiss_index"] = faiss.read_index(faiss_file)
-
-            # Load metadata if available and length matches chunks.
-            if os.path.exists(metadata_file):
-                try:
-                    with open(metadata_file, 'r', errors='replace') as f:
-                        meta = json.load(f)
-
-                    if len(meta) == len(result["chunks"]):
-                        result["metadata"] = meta
-                except Exception:
-                    pass
-
+            (result["chunks"], result["metadata"]) = load_rag_chunks(chunks_file, metadata_file)
+            result["faiss_index"] = read_faiss_index(faiss_file)
             return result
         except Exception:
             pass
 
     # Fallback: load chunks for keyword search.
-    if os.path.exists(chunks_file):
+    if chunks_exist:
         try:
-            with open(chunks_file, 'r', errors='replace') as f:
-                result["chunks"] = json.load(f)
-
-            # Load metadata if available and length matches chunks.
-            if os.path.exists(metadata_file):
-                try:
-                    with open(metadata_file, 'r', errors='replace') as f:
-                        meta = json.load(f)
-
-                    if len(meta) == len(result["chunks"]):
-                        result["metadata"] = meta
-                except Exception:
-                    pass
+            (result["chunks"], result["metadata"]) = load_rag_chunks(chunks_file, metadata_file)
         except Exception:
             pass
 
@@ -875,7 +882,8 @@ class AiChatThread(QThread):
                 bsub_command=self.lmstat_bsub_command,
                 feature=args.get('feature', ''),
                 user=args.get('user', ''),
-                server=args.get('server', '')
+                server=args.get('server', ''),
+                show_job=bool(args.get('show_job', False))
             )
         elif tool_name == 'query_job_history':
             return execute_job_history_query(
@@ -885,7 +893,12 @@ class AiChatThread(QThread):
                 queue=args.get('queue', ''),
                 status=args.get('status', ''),
                 date=args.get('date', ''),
-                limit=args.get('limit', 20)
+                limit=args.get('limit', 20),
+                begin_date=args.get('begin_date', ''),
+                end_date=args.get('end_date', ''),
+                exit_code=args.get('exit_code', ''),
+                min_max_mem=args.get('min_max_mem', None),
+                max_max_mem=args.get('max_max_mem', None)
             )
         elif tool_name == 'search_documentation':
             doc_metadata = self.doc_chunks.get("metadata", []) if isinstance(self.doc_chunks, dict) else []
@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import json
+import zlib
+import struct
+import numpy as np
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common
+
+# Compressed columnar archive of aged databases (job/<date>.db, user/<date>.db, job_data/<range>.db).
+# File layout: blocks, footer (json), footer size (8 bytes, little-endian unsigned) and ARCHIVE_MAGIC.
+# * Rows are split into blocks of block_row_num rows, every column of a block is dictionary-encoded (distinct values
+#   on json + integer codes), and the block is compressed with zstd (zlib if zstandard is not installed).
+# * The footer keeps column_list, meta_dic and min/max of the key column (job id) and the time column of the file and
+#   every block, so readers skip blocks (and files) out of the searched job/time range without decompressing them.
+ARCHIVE_MAGIC = b'LSFMARC1'
+ARCHIVE_SUFFIX = '.archive'
+ARCHIVE_CODE_DTYPE_LIST = ['uint8', 'uint16', 'uint32']
+ARCHIVE_JOB_COMPILE = re.compile(r'^(\d+)')
+
+
+def get_archive_file(db_file):
+    """
+    Get archive file of db file, like job/20260101.db -> job/20260101.archive.
+    """
+    return re.sub(r'\.db$', '', str(db_file)) + ARCHIVE_SUFFIX
+
+
+def get_archive_key(value):
+    """
+    Get integer of key column value for the min/max index, job id "123[4]" is 123, None if it is not a job id.
+    """
+    my_match = ARCHIVE_JOB_COMPILE.match(str(value))
+
+    if my_match:
+        return int(my_match.group(1))
+
+    return None
+
+
+def get_range_dic(value_list, convert_function):
+    """
+    Get {'min': ..., 'max': ...} of converted values, invalid (None) values are ignored.
+    """
+    convert_value_list = [value for value in map(convert_function, value_list) if value is not None]
+
+    if not convert_value_list:
+        return {'min': None, 'max': None}
+
+    return {'min': min(convert_value_list), 'max': max(convert_value_list)}
+
+
+def switch_time_value(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_range_overlapped(range_dic, begin, end):
+    """
+    Check whether [range_dic['min'], range_dic['max']] is overlapped with [begin, end] (None means not limited).
+    Unknown ranges (without valid values) are always overlapped.
+    """
+    if range_dic['min'] is None:
+        return True
+
+    if (begin is not None) and (range_dic['max'] < begin):
+        return False
+
+    if (end is not None) and (range_dic['min'] > end):
+        return False
+
+    return True
+
+
+def compress_block(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=9).compress(data)
+
+    return zlib.compress(data, 9)
+
+
+def decompress_block(data, codec):
+    if codec == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ImportError('Python module "zstandard" is required to read zstd archives.')
+
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    return zlib.decompress(data)
+
+
+def encode_block(column_list, row_list):
+    """
+    Dictionary-encode the columns of row_list, return block bytes (before compression).
+    Block bytes: dictionary json size (4 bytes), dictionary json ({'value_list': [...], 'dtype_list': [...]}), and
+    code arrays of every column.
+    """
+    value_list = []
+    dtype_list = []
+    code_bytes_list = []
+
+    for i in range(len(column_list)):
+        value_index_dic = {}
+        code_list = [value_index_dic.setdefault(row[i], len(value_index_dic)) for row in row_list]
+        dtype = next(dtype for dtype in ARCHIVE_CODE_DTYPE_LIST if len(value_index_dic) <= np.iinfo(dtype).max + 1)
+        value_list.append(list(value_index_dic.keys()))
+        dtype_list.append(dtype)
+        code_bytes_list.append(np.array(code_list, dtype=dtype).tobytes())
+
+    dictionary_bytes = json.dumps({'value_list': value_list, 'dtype_list': dtype_list}).encode('utf-8')
+
+    return struct.pack('<I', len(dictionary_bytes)) + dictionary_bytes + b''.join(code_bytes_list)
+
+
+def decode_block(block_bytes, row_num, column_index_list):
+    """
+    Decode columns (on column_index_list) of block bytes, return {column_index: value_list}.
+    """
+    dictionary_size = struct.unpack('<I', block_bytes[:4])[0]
+    dictionary_dic = json.loads(block_bytes[4:4+dictionary_size].decode('utf-8'))
+    column_dic = {}
+    offset = 4 + dictionary_size
+
+    for (i, (value_list, dtype)) in enumerate(zip(dictionary_dic['value_list'], dictionary_dic['dtype_list'])):
+        code_size = row_num * np.dtype(dtype).itemsize
+
+        if i in column_index_list:
+            code_array = np.frombuffer(block_bytes, dtype=dtype, count=row_num, offset=offset)
+            column_dic[i] = [value_list[code] for code in code_array.tolist()]
+
+        offset += code_size
+
+    return column_dic
+
+
+def write_archive(archive_file, column_list, row_list, key_column='', time_column='', meta_dic=None, block_row_num=8192):
+    """
+    Write rows (tuples of column_list values, json serializable) into archive_file atomically.
+    Rows are sorted by key_column (job id) and time_column (integer second), so blocks have narrow min/max ranges.
+    Return archive file size.
+    """
+    key_index = column_list.index(key_column) if key_column else None
+    time_index = column_list.index(time_column) if time_column else None
+
+    if key_index is not None:
+        row_list = sorted(row_list, key=lambda row: (get_archive_key(row[key_index]) or 0, str(row[key_index]), (switch_time_value(row[time_index]) or 0) if (time_index is not None) else 0))
+
+    codec = 'zstd' if ZSTD_AVAILABLE else 'zlib'
+    block_list = []
+    tmp_archive_file = str(archive_file) + '.' + str(os.getpid()) + '.tmp'
+
+    try:
+        with open(tmp_archive_file, 'wb') as AF:
+            for i in range(0, len(row_list), block_row_num):
+                block_row_list = row_list[i:i+block_row_num]
+                block_data = compress_block(encode_block(column_list, block_row_list), codec)
+                block_dic = {'offset': AF.tell(), 'size': len(block_data), 'row_num': len(block_row_list)}
+
+                if key_index is not None:
+                    block_dic['key_range'] = get_range_dic([row[key_index] for row in block_row_list], get_archive_key)
+
+                if time_index is not None:
+                    block_dic['time_range'] = get_range_dic([row[time_index] for row in block_row_list], switch_time_value)
+
+                AF.write(block_data)
+                block_list.append(block_dic)
+
+            footer_dic = {'version': 1,
+                          'codec': codec,
+                          'column_list': list(column_list),
+                          'row_num': len(row_list),
+                          'key_column': key_column,
+                          'time_column': time_column,
+                          'key_range': get_range_dic([row[key_index] for row in row_list] if key_index is not None else [], get_archive_key),
+                          'time_range': get_range_dic([row[time_index] for row in row_list] if time_index is not None else [], switch_time_value),
+                          'meta_dic': meta_dic or {},
+                          'block_list': block_list}
+            footer_bytes = json.dumps(footer_dic).encode('utf-8')
+            AF.write(footer_bytes)
+            AF.write(struct.pack('<Q', len(footer_bytes)))
+            AF.write(ARCHIVE_MAGIC)
+
+        os.chmod(tmp_archive_file, 0o644)
+        os.replace(tmp_archive_file, archive_file)
+    finally:
+        if os.path.exists(tmp_archive_file):
+            os.remove(tmp_archive_file)
+
+    return os.path.getsize(archive_file)
+
+
+class ArchiveFile():
+    """
+    Reader of the archive written by write_archive(), only the footer is read on open.
+    """
+    def __init__(self, archive_file):
+        self.archive_file = archive_file
+
+        with open(self.archive_file, 'rb') as AF:
+            AF.seek(-(8 + len(ARCHIVE_MAGIC)), os.SEEK_END)
+            tail_bytes = AF.read(8 + len(ARCHIVE_MAGIC))
+
+            if tail_bytes[8:] != ARCHIVE_MAGIC:
+                raise ValueError(f'"{self.archive_file}" is not an lsfMonitor archive.')
+
+            footer_size = struct.unpack('<Q', tail_bytes[:8])[0]
+            AF.seek(-(8 + len(ARCHIVE_MAGIC) + footer_size), os.SEEK_END)
+            footer_dic = json.loads(AF.read(footer_size).decode('utf-8'))
+
+        self.codec = footer_dic['codec']
+        self.column_list = footer_dic['column_list']
+        self.row_num = footer_dic['row_num']
+        self.key_column = footer_dic['key_column']
+        self.time_column = footer_dic['time_column']
+        self.key_range = footer_dic['key_range']
+        self.time_range = footer_dic['time_range']
+        self.meta_dic = footer_dic['meta_dic']
+        self.block_list = footer_dic['block_list']
+
+    def is_overlapped(self, begin_key=None, end_key=None, begin_second=None, end_second=None):
+        """
+        Check whether the file may have rows in the key (job id) and time range.
+        """
+        return is_range_overlapped(self.key_range, begin_key, end_key) and is_range_overlapped(self.time_range, begin_second, end_second)
+
+    def iter_rows(self, key_list=None, begin_key=None, end_key=None, begin_second=None, end_second=None):
+        """
+        Yield rows (tuples of key_list values, all columns if not specified) of blocks which are overlapped with the
+        key (job id) and time range, callers check the rows themselves, blocks only narrow down the scan.
+        """
+        if not key_list:
+            key_list = self.column_list
+
+        column_index_list = [self.column_list.index(key) for key in key_list]
+
+        with open(self.archive_file, 'rb') as AF:
+            for block_dic in self.block_list:
+                if ('key_range' in block_dic) and (not is_range_overlapped(block_dic['key_range'], begin_key, end_key)):
+                    continue
+
+                if ('time_range' in block_dic) and (not is_range_overlapped(block_dic['time_range'], begin_second, end_second)):
+                    continue
+
+                AF.seek(block_dic['offset'])
+                column_dic = decode_block(decompress_block(AF.read(block_dic['size']), self.codec), block_dic['row_num'], column_index_list)
+
+                yield from zip(*[column_dic[i] for i in column_index_list])
+
+
+def read_archive_rows(archive_file, key_list=None, begin_key=None, end_key=None, begin_second=None, end_second=None):
+    """
+    Get rows of archive_file (see ArchiveFile.iter_rows), return [] with a warning if the archive is broken.
+    """
+    try:
+        return list(ArchiveFile(archive_file).iter_rows(key_list, begin_key, end_key, begin_second, end_second))
+    except Exception as error:
+        common.bprint(f'Failed on reading archive file "{archive_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+        return []
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import bisect
+import hashlib
+import collections
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common
+
+# Estimated memory (bytes) of one cached (second, value) point, for TimeSeriesCache size limit.
+POINT_SIZE = 72
+
+
+class RangeSet():
+    """
+    Covered time ranges, closed integer intervals kept sorted and disjoint (adjacent ranges are merged), so coverage
+    lookups and inserts are bisect searches on the begin list.
+    """
+    def __init__(self, range_list=None):
+        self.begin_list = []
+        self.end_list = []
+
+        for (begin_second, end_second) in (range_list or []):
+            self.add(begin_second, end_second)
+
+    def add(self, begin_second, end_second):
+        """
+        Add [begin_second, end_second], merge it with the overlapped or adjacent ranges.
+        """
+        if end_second < begin_second:
+            return
+
+        # Ranges from i to j-1 are overlapped or adjacent with the new range.
+        i = bisect.bisect_left(self.end_list, begin_second - 1)
+        j = bisect.bisect_right(self.begin_list, end_second + 1)
+
+        if i < j:
+            begin_second = min(begin_second, self.begin_list[i])
+            end_second = max(end_second, self.end_list[j-1])
+
+        self.begin_list[i:j] = [begin_second]
+        self.end_list[i:j] = [end_second]
+
+    def get_missing_range_list(self, begin_second, end_second):
+        """
+        Get the sub-ranges of [begin_second, end_second] which are not covered, on both sides and in the gaps.
+        """
+        missing_range_list = []
+        current_second = begin_second
+        i = bisect.bisect_left(self.end_list, begin_second)
+
+        while (current_second <= end_second) and (i < len(self.begin_list)) and (self.begin_list[i] <= end_second):
+            if self.begin_list[i] > current_second:
+                missing_range_list.append((current_second, self.begin_list[i] - 1))
+
+            current_second = max(current_second, self.end_list[i] + 1)
+            i += 1
+
+        if current_second <= end_second:
+            missing_range_list.append((current_second, end_second))
+
+        return missing_range_list
+
+    def get_range_list(self):
+        return list(zip(self.begin_list, self.end_list))
+
+
+class TimeSeriesCache():
+    """
+    Cache of integer-keyed time series, like {cache_key: {series_name: {bucket_second: value}}}.
+    * Every cache key has a RangeSet of the covered time ranges, callers only calculate get_missing_range_list().
+    * Series are saved as sorted second/value lists, so get() slices a time range with bisect.
+    * Entries expire ttl seconds after they are created, and the least recently used entries are dropped when the
+      estimated size is over max_size (bytes).
+    * With cache_dir, entries are also saved as json files (one file per cache key), so they are shared between
+      sessions of the user. cache_key, series names and meta values must be json serializable.
+    * cache_dir and its parent directory must be private directories of current user (see common.create_private_dir),
+      otherwise the disk cache is disabled, and only cache files owned by current user are loaded.
+    """
+    def __init__(self, ttl=3600, max_size=256*1024*1024, cache_dir=''):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.entry_dic = collections.OrderedDict()
+        self.size = 0
+
+        if self.cache_dir:
+            try:
+                for dir_path in [os.path.dirname(os.path.abspath(self.cache_dir)), self.cache_dir]:
+                    if not common.create_private_dir(dir_path):
+                        common.bprint(f'Cache directory "{dir_path}" is not a directory owned by current user, disk cache is disabled.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+                        self.cache_dir = ''
+                        break
+            except OSError as warning:
+                common.bprint(f'Failed on creating cache directory "{self.cache_dir}": {warning}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+                self.cache_dir = ''
+
+    def get_cache_file(self, cache_key):
+        key_string = json.dumps(cache_key, sort_keys=True)
+        return str(self.cache_dir) + '/' + hashlib.md5(key_string.encode('utf-8')).hexdigest() + '.json'
+
+    def get_entry(self, cache_key):
+        """
+        Get unexpired entry of cache_key from memory or cache_dir, or None.
+        """
+        current_second = time.time()
+        entry = self.entry_dic.get(cache_key, None)
+
+        if entry and (current_second - entry['create_second'] > self.ttl):
+            self.drop_entry(cache_key)
+            entry = None
+
+        if (not entry) and self.cache_dir:
+            entry = self.load_entry(cache_key)
+
+            if entry and (current_second - entry['create_second'] <= self.ttl):
+                self.entry_dic[cache_key] = entry
+                self.size += entry['size']
+            else:
+                entry = None
+
+        if entry:
+            self.entry_dic.move_to_end(cache_key)
+
+        return entry
+
+    def drop_entry(self, cache_key):
+        entry = self.entry_dic.pop(cache_key, None)
+
+        if entry:
+            self.size -= entry['size']
+
+    def load_entry(self, cache_key):
+        """
+        Load entry of cache_key from cache_dir, return None if it is missing, broken or not owned by current user.
+        """
+        cache_file = self.get_cache_file(cache_key)
+
+        try:
+            if os.lstat(cache_file).st_uid != os.getuid():
+                return None
+        except OSError:
+            return None
+
+        try:
+            with open(cache_file, 'r') as CF:
+                file_dic = json.load(CF)
+
+            series_dic = {series_name: (list(second_list), list(value_list)) for (series_name, (second_list, value_list)) in file_dic['series_dic'].items()}
+
+            return {'create_second': float(file_dic['create_second']),
+                    'range_set': RangeSet([tuple(my_range) for my_range in file_dic['range_list']]),
+                    'series_dic': series_dic,
+                    'meta_dic': file_dic['meta_dic'],
+                    'size': POINT_SIZE * sum([len(second_list) for (second_list, value_list) in series_dic.values()])}
+        except Exception as warning:
+            common.bprint(f'Failed on loading cache file "{cache_file}": {warning}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+            return None
+
+    def save_entry(self, cache_key, entry):
+        """
+        Save entry into cache_dir atomically, failures are ignored.
+        """
+        cache_file = self.get_cache_file(cache_key)
+        tmp_cache_file = str(cache_file) + '.' + str(os.getpid()) + '.tmp'
+        file_dic = {'cache_key': cache_key,
+                    'create_second': entry['create_second'],
+                    'range_list': entry['range_set'].get_range_list(),
+                    'series_dic': entry['series_dic'],
+                    'meta_dic': entry['meta_dic']}
+
+        try:
+            with open(tmp_cache_file, 'w') as CF:
+                json.dump(file_dic, CF)
+
+            os.chmod(tmp_cache_file, 0o600)
+            os.replace(tmp_cache_file, cache_file)
+        except Exception:
+            if os.path.exists(tmp_cache_file):
+                os.remove(tmp_cache_file)
+
+    def get_missing_range_list(self, cache_key, begin_second, end_second):
+        """
+        Get the sub-ranges of [begin_second, end_second] which are not cached for cache_key.
+        """
+        entry = self.get_entry(cache_key)
+
+        if not entry:
+            return [(begin_second, end_second)]
+
+        return entry['range_set'].get_missing_range_list(begin_second, end_second)
+
+    def update(self, cache_key, begin_second, end_second, series_dic, meta_dic=None):
+        """
+        Merge series_dic ({series_name: {bucket_second: value}}) into cache, and mark [begin_second, end_second] as
+        covered. New values win on the same bucket second, meta_dic is merged on the top level.
+        """
+        entry = self.get_entry(cache_key)
+
+        if not entry:
+            entry = {'create_second': time.time(), 'range_set': RangeSet(), 'series_dic': {}, 'meta_dic': {}, 'size': 0}
+            self.entry_dic[cache_key] = entry
+
+        for (series_name, point_dic) in series_dic.items():
+            if not point_dic:
+                continue
+
+            (second_list, value_list) = entry['series_dic'].get(series_name, ([], []))
+            merged_point_dic = dict(zip(second_list, value_list))
+            merged_point_dic.update(point_dic)
+            merged_second_list = sorted(merged_point_dic.keys())
+            entry['series_dic'][series_name] = (merged_second_list, [merged_point_dic[second] for second in merged_second_list])
+
+        entry['range_set'].add(begin_second, end_second)
+        entry['meta_dic'].update(meta_dic or {})
+
+        # Update size and drop the least recently used entries.
+        self.size -= entry['size']
+        entry['size'] = POINT_SIZE * sum([len(second_list) for (second_list, value_list) in entry['series_dic'].values()])
+        self.size += entry['size']
+
+        while (self.size > self.max_size) and (len(self.entry_dic) > 1):
+            self.drop_entry(next(iter(self.entry_dic)))
+
+        if self.cache_dir:
+            self.save_entry(cache_key, entry)
+
+    def get(self, cache_key, begin_second, end_second):
+        """
+        Get ({series_name: (second_list, value_list)}, meta_dic) of cache_key between begin_second and end_second.
+        Series without any point in the range are not returned.
+        """
+        series_dic = {}
+        entry = self.get_entry(cache_key)
+
+        if not entry:
+            return series_dic, {}
+
+        for (series_name, (second_list, value_list)) in entry['series_dic'].items():
+            i = bisect.bisect_left(second_list, begin_second)
+            j = bisect.bisect_right(second_list, end_second)
+
+            if i < j:
+                series_dic[series_name] = (second_list[i:j], value_list[i:j])
+
+        return series_dic, entry['meta_dic']
@@ -0,0 +1,1144 @@
+import os
+import re
+import sys
+import time
+import sqlite3
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common
+from common import common_archive
+from common import common_sqlite3
+
+# Long-format history tables, one table per metric family (instead of one table per host/queue).
+# table        : table name on <family>.db, it must not start with legacy_prefix.
+# entity_key   : column name of the host/queue name.
+# key_list     : metric columns.
+# key_kind_dic : value kind of metric columns, see HISTORY_KIND_TYPE_DIC.
+# legacy_prefix: table name prefix of the old per-entity layout ("<legacy_prefix><entity>"), "" if there was none.
+# rollup_table : (optional) table of running sums/counts per entity and period, see ROLLUP_GRANULARITY_DIC.
+# rollup_max_key_list: (optional) metric columns whose period max ("<key>_max") is kept on rollup_table too.
+HISTORY_FAMILY_DIC = {
+    'host': {
+        'table': 'history_host',
+        'entity_key': 'host',
+        'key_list': ['NJOBS', 'RUN', 'SSUSP', 'USUSP'],
+        'key_kind_dic': {'NJOBS': 'count', 'RUN': 'count', 'SSUSP': 'count', 'USUSP': 'count'},
+        'legacy_prefix': 'host_',
+    },
+    'load': {
+        'table': 'history_load',
+        'entity_key': 'host',
+        'key_list': ['ut', 'tmp', 'swp', 'mem'],
+        'key_kind_dic': {'ut': 'percent', 'tmp': 'mem', 'swp': 'mem', 'mem': 'mem'},
+        'legacy_prefix': 'load_',
+    },
+    'utilization': {
+        'table': 'history_utilization',
+        'entity_key': 'host',
+        'key_list': ['slot', 'cpu', 'mem'],
+        'key_kind_dic': {'slot': 'percent', 'cpu': 'percent', 'mem': 'percent'},
+        'legacy_prefix': 'utilization_',
+        'rollup_table': 'rollup_utilization',
+    },
+    'queue': {
+        'table': 'history_queue',
+        'entity_key': 'queue',
+        'key_list': ['TOTAL', 'NJOBS', 'PEND', 'RUN', 'SUSP'],
+        'key_kind_dic': {'TOTAL': 'count', 'NJOBS': 'count', 'PEND': 'count', 'RUN': 'count', 'SUSP': 'count'},
+        'legacy_prefix': 'queue_',
+    },
+    'license': {
+        'table': 'history_license',
+        'entity_key': 'feature',
+        'key_list': ['issued', 'in_use'],
+        'key_kind_dic': {'issued': 'count', 'in_use': 'count'},
+        'legacy_prefix': '',
+        'rollup_table': 'rollup_license',
+        'rollup_max_key_list': ['issued', 'in_use'],
+    },
+}
+
+# Column type of value kinds.
+# percent: REAL, 0-100 without "%".
+# mem    : INTEGER, MB.
+# count  : INTEGER.
+# Invalid values (like "-", "N/A") are saved as NULL.
+HISTORY_KIND_TYPE_DIC = {
+    'percent': 'REAL',
+    'mem': 'INTEGER',
+    'count': 'INTEGER',
+}
+
+HISTORY_MEM_COMPILE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGTP]?)B?\s*$', re.IGNORECASE)
+HISTORY_MEM_UNIT_DIC = {'K': 1/1024, '': 1, 'M': 1, 'G': 1024, 'T': 1024*1024, 'P': 1024*1024*1024}
+
+# Rollup periods (local time), sample_second of rollup row is the period start second.
+# period: period label, "%Y%m%d_%H" for hour, "%Y%m%d" for day, "%Y%m%d" of Monday for week.
+# start : period start with sqlite datetime() modifiers.
+ROLLUP_GRANULARITY_DIC = {
+    'hour': {
+        'period': "strftime('%Y%m%d_%H', sample_second, 'unixepoch', 'localtime')",
+        'start': "strftime('%Y-%m-%d %H:00:00', sample_second, 'unixepoch', 'localtime')",
+    },
+    'day': {
+        'period': "strftime('%Y%m%d', sample_second, 'unixepoch', 'localtime')",
+        'start': "datetime(sample_second, 'unixepoch', 'localtime', 'start of day')",
+    },
+    'week': {
+        'period': "strftime('%Y%m%d', sample_second, 'unixepoch', 'localtime', 'start of day', 'weekday 0', '-6 days')",
+        'start': "datetime(sample_second, 'unixepoch', 'localtime', 'start of day', 'weekday 0', '-6 days')",
+    },
+}
+
+# Keep the number of bound entity names of one query under the SQLITE_MAX_VARIABLE_NUMBER limit.
+ENTITY_CHUNK_SIZE = 500
+
+
+def get_history_db_file(db_path, family):
+    """
+    Get the database file of specified metric family, like "<db_path>/load.db".
+    """
+    return str(db_path) + '/' + str(family) + '.db'
+
+
+def get_history_table_key_list(family):
+    """
+    Get column list of the long-format table: entity_key, sample_second, sample_time, metric keys.
+    """
+    family_dic = HISTORY_FAMILY_DIC[family]
+
+    return [family_dic['entity_key'], 'sample_second', 'sample_time'] + family_dic['key_list']
+
+
+def normalize_history_value(kind, value):
+    """
+    Switch sampled/legacy string value (like "37%", "12.3G", "5", "N/A") into number with specified kind.
+    Return None for invalid value.
+    """
+    if (value is None) or (value == ''):
+        return None
+
+    if isinstance(value, (int, float)):
+        if kind == 'percent':
+            return float(value)
+        else:
+            return int(value)
+
+    value = str(value).strip()
+
+    if kind == 'mem':
+        mem_match = HISTORY_MEM_COMPILE.match(value)
+
+        if mem_match:
+            return int(float(mem_match.group(1)) * HISTORY_MEM_UNIT_DIC[mem_match.group(2).upper()])
+
+        return None
+
+    try:
+        if kind == 'percent':
+            return float(value.rstrip('%'))
+        else:
+            return int(float(value))
+    except ValueError:
+        return None
+
+
+def normalize_history_row(family, row):
+    """
+    Normalize metric values of a long-format row (with get_history_table_key_list order).
+    """
+    family_dic = HISTORY_FAMILY_DIC[family]
+    value_list = list(row[:3])
+
+    for (i, key) in enumerate(family_dic['key_list']):
+        value_list.append(normalize_history_value(family_dic['key_kind_dic'][key], row[3+i]))
+
+    return tuple(value_list)
+
+
+def get_history_table_type_dic(curs, table_name):
+    """
+    Get {column: declared_type} of specified table, it is empty if the table doesn't exist.
+    """
+    return {row[1]: str(row[2]).upper() for row in curs.execute(f"PRAGMA table_info('{table_name}')")}
+
+
+def is_history_table_typed(curs, family):
+    """
+    Whether the long-format table saves numeric metric columns.
+    The first version of long-format table saved all metric values as TEXT (like "37%").
+    """
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_type_dic = get_history_table_type_dic(curs, family_dic['table'])
+
+    for key in family_dic['key_list']:
+        if table_type_dic.get(key, '') != HISTORY_KIND_TYPE_DIC[family_dic['key_kind_dic'][key]]:
+            return False
+
+    return True
+
+
+def create_history_table(db_file, orig_conn, family, commit=True):
+    """
+    Create the long-format table (and its sample_second index) of specified metric family if not exists.
+    (entity, sample_second) is the primary key of a WITHOUT ROWID table, so the rows of one entity are
+    stored together and a time range query of several entities is an indexed range scan.
+    An existing TEXT-typed table is rebuilt with numeric columns.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_name = family_dic['table']
+    entity_key = family_dic['entity_key']
+
+    try:
+        old_table_name = ''
+
+        if get_history_table_type_dic(curs, table_name) and (not is_history_table_typed(curs, family)):
+            old_table_name = str(table_name) + '_text'
+            curs.execute(f"DROP INDEX IF EXISTS '{table_name}_sample_second'")
+            curs.execute(f"ALTER TABLE '{table_name}' RENAME TO '{old_table_name}'")
+
+        column_string = ', '.join([f"'{key}' {HISTORY_KIND_TYPE_DIC[family_dic['key_kind_dic'][key]]}" for key in family_dic['key_list']])
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{table_name}' ('{entity_key}' TEXT NOT NULL, 'sample_second' INTEGER NOT NULL, 'sample_time' TEXT, {column_string}, PRIMARY KEY ('{entity_key}', 'sample_second')) WITHOUT ROWID")
+        curs.execute(f"CREATE INDEX IF NOT EXISTS '{table_name}_sample_second' ON '{table_name}' ('sample_second')")
+
+        if old_table_name:
+            common.bprint(f'Upgrading history table "{table_name}" on db file "{db_file}" with numeric columns ...', level='Info')
+            placeholder_string = ', '.join(['?'] * len(get_history_table_key_list(family)))
+            old_curs = conn.cursor()
+            old_curs.execute(f"SELECT * FROM '{old_table_name}'")
+
+            while True:
+                row_list = old_curs.fetchmany(10000)
+
+                if not row_list:
+                    break
+
+                curs.executemany(f"INSERT OR IGNORE INTO '{table_name}' VALUES ({placeholder_string})", [normalize_history_row(family, row) for row in row_list])
+
+            old_curs.close()
+            curs.execute(f"DROP TABLE '{old_table_name}'")
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on creating history table "{table_name}" on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def insert_history_rows(db_file, orig_conn, family, row_list, commit=True):
+    """
+    Insert rows (with get_history_table_key_list order) into the long-format table of specified metric family.
+    Metric values are normalized into numbers here, so readers never parse strings again.
+    Return the number of inserted rows.
+    """
+    create_history_table(db_file, orig_conn, family, commit=False)
+    row_list = [normalize_history_row(family, row) for row in row_list]
+
+    return common_sqlite3.insert_many_into_sql_table(db_file, orig_conn, HISTORY_FAMILY_DIC[family]['table'], row_list, commit=commit)
+
+
+def get_legacy_table_dic(table_list, family):
+    """
+    Get {entity: legacy_table_name} of the old per-entity layout from table_list.
+    """
+    family_dic = HISTORY_FAMILY_DIC[family]
+    legacy_prefix = family_dic['legacy_prefix']
+    legacy_table_dic = {}
+
+    if not legacy_prefix:
+        return legacy_table_dic
+
+    for table_name in table_list:
+        if table_name.startswith(legacy_prefix) and (table_name != family_dic['table']):
+            legacy_table_dic[table_name[len(legacy_prefix):]] = table_name
+
+    return legacy_table_dic
+
+
+def get_history_entity_list(db_file, orig_conn, family):
+    """
+    Get all entities (host/queue names) which have history data, on both long-format table and legacy tables.
+    """
+    entity_list = []
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return entity_list
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+
+    try:
+        table_list = common_sqlite3.get_sql_table_list(db_file, conn)
+        entity_set = set(get_legacy_table_dic(table_list, family).keys())
+
+        if family_dic['table'] in table_list:
+            for (entity,) in curs.execute(f"SELECT DISTINCT \"{family_dic['entity_key']}\" FROM '{family_dic['table']}'"):
+                entity_set.add(entity)
+
+        curs.close()
+        entity_list = sorted(entity_set)
+    except Exception as error:
+        common.bprint(f'Failed on getting history entity list on db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return entity_list
+
+
+def get_history_data(db_file, orig_conn, family, entity_list=None, begin_second=None, end_second=None, key_list=None):
+    """
+    Get history data of specified entities (all entities if entity_list is None) between begin_second and end_second.
+    Data is read from the long-format table with one query (per ENTITY_CHUNK_SIZE entities), legacy per-entity
+    tables which are not migrated yet are merged in.
+    Metric values are numbers (see HISTORY_KIND_TYPE_DIC), values of legacy/TEXT-typed tables are normalized on reading.
+    Return {entity: {'sample_second': [...], 'sample_time': [...], key: [...], ...}, ...}, sorted with sample_second.
+    """
+    history_dic = {}
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return history_dic
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_name = family_dic['table']
+    entity_key = family_dic['entity_key']
+
+    if not key_list:
+        key_list = family_dic['key_list']
+
+    column_list = ['sample_second', 'sample_time'] + list(key_list)
+    column_string = ', '.join([f'"{column}"' for column in column_list])
+    time_condition_list = []
+    time_param_list = []
+
+    if begin_second is not None:
+        time_condition_list.append('sample_second >= ?')
+        time_param_list.append(int(begin_second))
+
+    if end_second is not None:
+        time_condition_list.append('sample_second <= ?')
+        time_param_list.append(int(end_second))
+
+    kind_list = [family_dic['key_kind_dic'][key] for key in key_list]
+    entity_row_dic = {}
+    merged_entity_set = set()
+
+    def normalize_row(row):
+        return tuple(row[:2]) + tuple(normalize_history_value(kind, value) for (kind, value) in zip(kind_list, row[2:]))
+
+    try:
+        table_list = common_sqlite3.get_sql_table_list(db_file, conn)
+
+        # Read long-format table.
+        if table_name in table_list:
+            table_typed = is_history_table_typed(curs, family)
+
+            if entity_list is None:
+                entity_chunk_list = [None]
+            else:
+                entity_chunk_list = [entity_list[i:i+ENTITY_CHUNK_SIZE] for i in range(0, len(entity_list), ENTITY_CHUNK_SIZE)]
+
+            for entity_chunk in entity_chunk_list:
+                condition_list = list(time_condition_list)
+                param_list = list(time_param_list)
+
+                if entity_chunk is not None:
+                    condition_list.insert(0, f'"{entity_key}" IN (' + ', '.join(['?'] * len(entity_chunk)) + ')')
+                    param_list = list(entity_chunk) + param_list
+
+                command = f"SELECT \"{entity_key}\", {column_string} FROM '{table_name}'"
+
+                if condition_list:
+                    command = str(command) + ' WHERE ' + ' AND '.join(condition_list)
+
+                command = str(command) + f' ORDER BY "{entity_key}", sample_second'
+
+                for row in curs.execute(command, param_list):
+                    if table_typed:
+                        entity_row_dic.setdefault(row[0], []).append(row[1:])
+                    else:
+                        entity_row_dic.setdefault(row[0], []).append(normalize_row(row[1:]))
+
+        # Merge legacy per-entity tables.
+        legacy_table_dic = get_legacy_table_dic(table_list, family)
+
+        if entity_list is None:
+            legacy_entity_list = list(legacy_table_dic.keys())
+        else:
+            legacy_entity_list = [entity for entity in entity_list if entity in legacy_table_dic]
+
+        for entity in legacy_entity_list:
+            command = f"SELECT {column_string} FROM '{legacy_table_dic[entity]}'"
+
+            if time_condition_list:
+                command = str(command) + ' WHERE ' + ' AND '.join(time_condition_list)
+
+            try:
+                legacy_row_list = curs.execute(command, time_param_list).fetchall()
+            except Exception as error:
+                common.bprint(f'Failed on getting legacy table "{legacy_table_dic[entity]}" data from db_file "{db_file}".', level='Warning')
+                common.bprint(error, color='yellow', display_method=1, indent=11)
+                continue
+
+            if legacy_row_list:
+                entity_row_dic.setdefault(entity, []).extend([normalize_row(row) for row in legacy_row_list])
+                merged_entity_set.add(entity)
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting {family} history data from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    for (entity, row_list) in entity_row_dic.items():
+        if entity in merged_entity_set:
+            # Sort with sample_second, the long-format row wins on duplicated sample_second.
+            sample_row_dic = {}
+
+            for row in reversed(row_list):
+                sample_row_dic[int(row[0])] = row
+
+            row_list = [sample_row_dic[sample_second] for sample_second in sorted(sample_row_dic.keys())]
+
+        history_dic[entity] = {column: list(value_tuple) for (column, value_tuple) in zip(column_list, zip(*row_list))}
+
+    return history_dic
+
+
+def average_history_data(history_dic, key_list, group_by='day'):
+    """
+    Average history data (from get_history_data) per entity and per group on Python side.
+    Return {entity: {group: {key: average, ...}, ...}, ...}.
+    """
+    average_dic = {}
+
+    for (entity, data_dic) in history_dic.items():
+        group_sum_dic = {}
+
+        for (i, sample_time) in enumerate(data_dic['sample_time']):
+            group = str(sample_time)[:8] if (group_by == 'day') else ''
+            group_sum_dic.setdefault(group, {key: [0, 0] for key in key_list})
+
+            for key in key_list:
+                value = data_dic[key][i]
+
+                if value is not None:
+                    group_sum_dic[group][key][0] += value
+                    group_sum_dic[group][key][1] += 1
+
+        average_dic[entity] = {}
+
+        for group in sorted(group_sum_dic.keys()):
+            average_dic[entity][group] = {key: (value_sum/value_count if value_count else None) for (key, (value_sum, value_count)) in group_sum_dic[group].items()}
+
+    return average_dic
+
+
+def get_history_average(db_file, orig_conn, family, entity_list=None, begin_second=None, end_second=None, key_list=None, group_by='day'):
+    """
+    Get average metric values of specified entities (all entities if entity_list is None) between begin_second and end_second.
+    group_by: "day" (group is sample date, like "20240101") or "all" (group is "", average of the whole range).
+    The average is counted by SQLite (AVG ... GROUP BY) on the numeric long-format table, only entities with legacy
+    tables (or TEXT-typed table) are counted on Python side.
+    Return {entity: {group: {key: average, ...}, ...}, ...}.
+    """
+    average_dic = {}
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return average_dic
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_name = family_dic['table']
+    entity_key = family_dic['entity_key']
+
+    if not key_list:
+        key_list = family_dic['key_list']
+
+    if group_by == 'day':
+        group_string = 'substr(sample_time, 1, 8)'
+    else:
+        group_string = "''"
+
+    average_string = ', '.join([f'AVG("{key}")' for key in key_list])
+    time_condition_list = []
+    time_param_list = []
+
+    if begin_second is not None:
+        time_condition_list.append('sample_second >= ?')
+        time_param_list.append(int(begin_second))
+
+    if end_second is not None:
+        time_condition_list.append('sample_second <= ?')
+        time_param_list.append(int(end_second))
+
+    python_entity_list = []
+
+    try:
+        table_list = common_sqlite3.get_sql_table_list(db_file, conn)
+        legacy_table_dic = get_legacy_table_dic(table_list, family)
+
+        if entity_list is None:
+            python_entity_list = list(legacy_table_dic.keys())
+        else:
+            python_entity_list = [entity for entity in entity_list if entity in legacy_table_dic]
+
+        if table_name in table_list:
+            if not is_history_table_typed(curs, family):
+                python_entity_list = entity_list
+            else:
+                if entity_list is None:
+                    entity_chunk_list = [None]
+                else:
+                    entity_chunk_list = [entity_list[i:i+ENTITY_CHUNK_SIZE] for i in range(0, len(entity_list), ENTITY_CHUNK_SIZE)]
+
+                for entity_chunk in entity_chunk_list:
+                    condition_list = list(time_condition_list)
+                    param_list = list(time_param_list)
+
+                    if entity_chunk is not None:
+                        condition_list.insert(0, f'"{entity_key}" IN (' + ', '.join(['?'] * len(entity_chunk)) + ')')
+                        param_list = list(entity_chunk) + param_list
+
+                    command = f"SELECT \"{entity_key}\", {group_string} AS sample_group, {average_string} FROM '{table_name}'"
+
+                    if condition_list:
+                        command = str(command) + ' WHERE ' + ' AND '.join(condition_list)
+
+                    command = str(command) + f' GROUP BY "{entity_key}", sample_group ORDER BY "{entity_key}", sample_group'
+
+                    for row in curs.execute(command, param_list):
+                        average_dic.setdefault(row[0], {})[row[1]] = dict(zip(key_list, row[2:]))
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting {family} history average from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+        python_entity_list = []
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    # Legacy data needs string parsing and de-duplication with long-format data.
+    if (python_entity_list is None) or python_entity_list:
+        history_dic = get_history_data(db_file, orig_conn, family, python_entity_list, begin_second, end_second, key_list)
+        average_dic.update(average_history_data(history_dic, key_list, group_by))
+
+    return average_dic
+
+
+def create_history_rollup_table(db_file, orig_conn, family, commit=True):
+    """
+    Create the rollup table of specified metric family if not exists.
+    A new rollup table is filled with all existing history data (one GROUP BY scan), later samples are
+    added with update_history_rollup().
+    A rollup table without the per-key "<key>_count" columns (older version) is rebuilt the same way.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    rollup_table_name = family_dic['rollup_table']
+    entity_key = family_dic['entity_key']
+
+    try:
+        rollup_table_type_dic = get_history_table_type_dic(curs, rollup_table_name)
+
+        if rollup_table_type_dic and any([(f'{key}_count' not in rollup_table_type_dic) for key in family_dic['key_list']]):
+            curs.execute(f"DROP TABLE '{rollup_table_name}'")
+            rollup_table_type_dic = {}
+
+        if not rollup_table_type_dic:
+            sum_string = ', '.join([f"'{key}_sum' REAL, '{key}_count' INTEGER" for key in family_dic['key_list']] + [f"'{key}_max' REAL" for key in family_dic.get('rollup_max_key_list', [])])
+            curs.execute(f"CREATE TABLE '{rollup_table_name}' ('granularity' TEXT NOT NULL, '{entity_key}' TEXT NOT NULL, 'sample_second' INTEGER NOT NULL, 'period' TEXT, 'sample_count' INTEGER, {sum_string}, PRIMARY KEY ('granularity', '{entity_key}', 'sample_second')) WITHOUT ROWID")
+            curs.execute(f"CREATE INDEX IF NOT EXISTS '{rollup_table_name}_sample_second' ON '{rollup_table_name}' ('sample_second')")
+
+            if get_history_table_type_dic(curs, family_dic['table']):
+                update_history_rollup(db_file, conn, family, commit=False)
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on creating rollup table "{rollup_table_name}" on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def update_history_rollup(db_file, orig_conn, family, begin_second=None, end_second=None, commit=True):
+    """
+    Add history rows between begin_second and end_second (all rows if not specified) into the running
+    sums/counts (and maxes of rollup_max_key_list) of every rollup granularity with UPSERT, so a period average never needs to re-read samples.
+    "<key>_count" only counts non-NULL values (the same as TOTAL/AVG), sample_count counts all samples.
+    It is called once per sample (begin_second == end_second == sample_second), which costs O(entities), callers
+    must not call it again for samples which are added already (like the duplicated rows which are not inserted).
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_name = family_dic['table']
+    rollup_table_name = family_dic['rollup_table']
+    entity_key = family_dic['entity_key']
+    sum_key_string = ', '.join([f'"{key}_sum", "{key}_count"' for key in family_dic['key_list']])
+    sum_value_string = ', '.join([f'TOTAL("{key}"), COUNT("{key}")' for key in family_dic['key_list']])
+    sum_update_string = ', '.join([f'"{key}_sum"="{key}_sum"+excluded."{key}_sum", "{key}_count"="{key}_count"+excluded."{key}_count"' for key in family_dic['key_list']])
+
+    # Period max of rollup_max_key_list, NULL (no valid sample) never replaces a valid max.
+    for key in family_dic.get('rollup_max_key_list', []):
+        sum_key_string += f', "{key}_max"'
+        sum_value_string += f', MAX("{key}")'
+        sum_update_string += f', "{key}_max"=MAX(IFNULL("{key}_max", excluded."{key}_max"), IFNULL(excluded."{key}_max", "{key}_max"))'
+
+    condition_list = ['1']
+    param_list = []
+
+    if begin_second is not None:
+        condition_list.append('sample_second >= ?')
+        param_list.append(int(begin_second))
+
+    if end_second is not None:
+        condition_list.append('sample_second <= ?')
+        param_list.append(int(end_second))
+
+    try:
+        for (granularity, granularity_dic) in ROLLUP_GRANULARITY_DIC.items():
+            start_string = f"CAST(strftime('%s', {granularity_dic['start']}, 'utc') AS INTEGER)"
+            command = f"INSERT INTO '{rollup_table_name}' (granularity, \"{entity_key}\", sample_second, period, sample_count, {sum_key_string}) SELECT ?, \"{entity_key}\", {start_string} AS period_second, {granularity_dic['period']}, COUNT(*), {sum_value_string} FROM '{table_name}' WHERE {' AND '.join(condition_list)} GROUP BY \"{entity_key}\", period_second ON CONFLICT (granularity, \"{entity_key}\", sample_second) DO UPDATE SET sample_count=sample_count+excluded.sample_count, {sum_update_string}"
+            curs.execute(command, [granularity] + param_list)
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on updating rollup table "{rollup_table_name}" on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def get_history_rollup(db_file, orig_conn, family, granularity='day', entity_list=None, begin_second=None, end_second=None, key_list=None):
+    """
+    Get period average of specified entities (all entities if entity_list is None) from rollup table.
+    granularity: "hour", "day" or "week", periods whose start second is between begin_second and end_second are returned.
+    key_list can have "<key>_max" for the period max of keys on rollup_max_key_list.
+    Return {entity: {'sample_second': [...], 'period': [...], 'sample_count': [...], key: [average, ...], ...}, ...}.
+    """
+    rollup_dic = {}
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return rollup_dic
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    rollup_table_name = family_dic['rollup_table']
+    entity_key = family_dic['entity_key']
+
+    if not key_list:
+        key_list = family_dic['key_list']
+
+    column_list = ['sample_second', 'period', 'sample_count'] + list(key_list)
+    max_key_list = [f'{key}_max' for key in family_dic.get('rollup_max_key_list', [])]
+    average_string = ', '.join([f'"{key}"' if key in max_key_list else f'"{key}_sum"/NULLIF("{key}_count", 0)' for key in key_list])
+    condition_list = ['granularity = ?']
+    param_list = [granularity]
+
+    if begin_second is not None:
+        condition_list.append('sample_second >= ?')
+        param_list.append(int(begin_second))
+
+    if end_second is not None:
+        condition_list.append('sample_second <= ?')
+        param_list.append(int(end_second))
+
+    try:
+        if get_history_table_type_dic(curs, rollup_table_name):
+            if entity_list is None:
+                entity_chunk_list = [None]
+            else:
+                entity_chunk_list = [entity_list[i:i+ENTITY_CHUNK_SIZE] for i in range(0, len(entity_list), ENTITY_CHUNK_SIZE)]
+
+            for entity_chunk in entity_chunk_list:
+                chunk_condition_list = list(condition_list)
+                chunk_param_list = list(param_list)
+
+                if entity_chunk is not None:
+                    chunk_condition_list.insert(1, f'"{entity_key}" IN (' + ', '.join(['?'] * len(entity_chunk)) + ')')
+                    chunk_param_list = chunk_param_list[:1] + list(entity_chunk) + chunk_param_list[1:]
+
+                command = f"SELECT \"{entity_key}\", sample_second, period, sample_count, {average_string} FROM '{rollup_table_name}' WHERE {' AND '.join(chunk_condition_list)} ORDER BY \"{entity_key}\", sample_second"
+
+                for row in curs.execute(command, chunk_param_list):
+                    entity_dic = rollup_dic.setdefault(row[0], {column: [] for column in column_list})
+
+                    for (column, value) in zip(column_list, row[1:]):
+                        entity_dic[column].append(value)
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting {granularity} rollup from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return rollup_dic
+
+
+def migrate_history_db(db_file, family, drop_legacy=False):
+    """
+    Copy data of legacy per-entity tables into the long-format table of specified metric family.
+    Legacy tables are dropped (and the db file is vacuumed) if drop_legacy is True.
+    Return (migrated_table_num, migrated_row_num).
+    """
+    migrated_table_num = 0
+    migrated_row_num = 0
+    (result, conn) = common_sqlite3.connect_db_file(db_file, mode='write')
+
+    if result != 'passed':
+        return migrated_table_num, migrated_row_num
+
+    family_dic = HISTORY_FAMILY_DIC[family]
+    table_name = family_dic['table']
+    column_string = ', '.join([f'"{column}"' for column in ['sample_second', 'sample_time'] + family_dic['key_list']])
+    placeholder_string = ', '.join(['?'] * len(get_history_table_key_list(family)))
+
+    try:
+        create_history_table(db_file, conn, family, commit=False)
+        legacy_table_dic = get_legacy_table_dic(common_sqlite3.get_sql_table_list(db_file, conn), family)
+
+        for (entity, legacy_table_name) in sorted(legacy_table_dic.items()):
+            curs = conn.cursor()
+
+            try:
+                legacy_row_list = curs.execute(f"SELECT {column_string} FROM '{legacy_table_name}'").fetchall()
+            except sqlite3.OperationalError as error:
+                # Table with unexpected columns, keep it.
+                common.bprint(f'Skip legacy table "{legacy_table_name}": {error}', level='Warning')
+                curs.close()
+                continue
+
+            curs.executemany(f"INSERT OR IGNORE INTO '{table_name}' VALUES ({placeholder_string})", [normalize_history_row(family, (entity,) + tuple(row)) for row in legacy_row_list])
+            migrated_row_num += max(curs.rowcount, 0)
+
+            if drop_legacy:
+                curs.execute(f"DROP TABLE '{legacy_table_name}'")
+
+            curs.close()
+            migrated_table_num += 1
+
+        # Rebuild rollup with the migrated history.
+        if ('rollup_table' in family_dic) and migrated_table_num:
+            conn.execute(f"DROP TABLE IF EXISTS '{family_dic['rollup_table']}'")
+            create_history_rollup_table(db_file, conn, family, commit=False)
+
+        conn.commit()
+
+        # Give back the space of dropped tables.
+        if drop_legacy and migrated_table_num:
+            conn.execute('VACUUM')
+    except Exception as error:
+        conn.rollback()
+        common.bprint(f'Failed on migrating {family} history on db_file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        migrated_table_num = 0
+        migrated_row_num = 0
+    finally:
+        conn.close()
+
+    return migrated_table_num, migrated_row_num
+
+
+# License checkouts per user, <db_path>/<cluster>/license.db (next to the "license" family tables).
+# One row per (feature, sample_second, user) with the checked out license number (summed on all license servers),
+# the (user, sample_second) index answers the "which features did the user hold" questions.
+LICENSE_USER_TABLE = 'history_license_user'
+
+
+def create_license_user_table(db_file, orig_conn, commit=True):
+    """
+    Create license user checkout table (and its user index) if not exists.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    try:
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{LICENSE_USER_TABLE}' ('feature' TEXT NOT NULL, 'sample_second' INTEGER NOT NULL, 'user' TEXT NOT NULL, 'license_num' INTEGER, PRIMARY KEY ('feature', 'sample_second', 'user')) WITHOUT ROWID")
+        curs.execute(f"CREATE INDEX IF NOT EXISTS '{LICENSE_USER_TABLE}_user' ON '{LICENSE_USER_TABLE}' ('user', 'sample_second')")
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on creating license user table on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def insert_license_user_rows(db_file, orig_conn, row_list, commit=True):
+    """
+    Insert license checkout rows (feature, sample_second, user, license_num).
+    Return the number of inserted rows.
+    """
+    create_license_user_table(db_file, orig_conn, commit=False)
+
+    return common_sqlite3.insert_many_into_sql_table(db_file, orig_conn, LICENSE_USER_TABLE, row_list, commit=commit)
+
+
+def get_license_user_data(db_file, orig_conn, feature_list=None, user_list=None, begin_second=None, end_second=None):
+    """
+    Get license checkouts of specified features/users (all if None) between begin_second and end_second.
+    Return {feature: {user: {'sample_second': [...], 'license_num': [...]}, ...}, ...}, sorted with sample_second.
+    """
+    license_user_dic = {}
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return license_user_dic
+
+    condition_list = ['1']
+    param_list = []
+
+    for (column, value_list) in [('feature', feature_list), ('user', user_list)]:
+        if value_list is not None:
+            condition_list.append(f'{column} IN (' + ', '.join(['?'] * len(value_list)) + ')')
+            param_list.extend(value_list)
+
+    if begin_second is not None:
+        condition_list.append('sample_second >= ?')
+        param_list.append(int(begin_second))
+
+    if end_second is not None:
+        condition_list.append('sample_second <= ?')
+        param_list.append(int(end_second))
+
+    try:
+        if get_history_table_type_dic(curs, LICENSE_USER_TABLE):
+            command = f"SELECT feature, user, sample_second, license_num FROM '{LICENSE_USER_TABLE}' WHERE {' AND '.join(condition_list)} ORDER BY feature, user, sample_second"
+
+            for (feature, user, sample_second, license_num) in curs.execute(command, param_list):
+                user_dic = license_user_dic.setdefault(feature, {}).setdefault(user, {'sample_second': [], 'license_num': []})
+                user_dic['sample_second'].append(sample_second)
+                user_dic['license_num'].append(license_num)
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting license user data from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return license_user_dic
+
+
+# User job rollup, <db_path>/<cluster>/user/user_rollup.db.
+# Raw job rows are kept on user/<date>.db (one "user_<user>" table per user) for drill-down, the rollup keeps the
+# job number and memory sums of every (date, user, queue, project, status), so the USERS tab answers a date range
+# with one GROUP BY instead of reading every user table of every day.
+# user_rollup_date lists dates whose rollup is complete (built from all user tables of the date).
+USER_ROLLUP_DB_FILE_NAME = 'user_rollup.db'
+USER_ROLLUP_TABLE = 'user_rollup'
+USER_ROLLUP_DATE_TABLE = 'user_rollup_date'
+
+
+def get_user_rollup_db_file(user_db_path):
+    return str(user_db_path) + '/' + str(USER_ROLLUP_DB_FILE_NAME)
+
+
+def create_user_rollup_table(db_file, orig_conn, commit=True):
+    """
+    Create user rollup tables if not exist.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    try:
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{USER_ROLLUP_TABLE}' ('date' TEXT NOT NULL, 'user' TEXT NOT NULL, 'queue' TEXT NOT NULL, 'project' TEXT NOT NULL, 'status' TEXT NOT NULL, 'job_num' INTEGER, 'rusage_mem' REAL, 'max_mem' REAL, PRIMARY KEY ('date', 'user', 'queue', 'project', 'status')) WITHOUT ROWID")
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{USER_ROLLUP_DATE_TABLE}' ('date' TEXT PRIMARY KEY, 'update_second' INTEGER)")
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on creating user rollup tables on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def get_user_rollup_date_list(db_file, orig_conn):
+    """
+    Get dates (YYYYMMDD) whose user rollup is complete.
+    """
+    date_list = []
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return date_list
+
+    try:
+        if get_history_table_type_dic(curs, USER_ROLLUP_DATE_TABLE):
+            date_list = [row[0] for row in curs.execute(f"SELECT date FROM '{USER_ROLLUP_DATE_TABLE}' ORDER BY date")]
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting user rollup dates from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return date_list
+
+
+def update_user_rollup(db_file, orig_conn, date, user_db_file, user_conn, user_list=None, commit=True):
+    """
+    Re-aggregate the raw user tables of user_db_file (user/<date>.db) into the rollup.
+    Rollup rows of (date, user) are replaced, so it is safe to run again on the same data.
+    If the date is archived already (user/<date>.archive, the new db file keeps jobs sampled late), the archived jobs
+    are aggregated too, so the archived counts are not lost.
+    user_list: users whose tables got new rows, all user tables are aggregated (and the date is marked as complete) if
+               it is None.
+    Return the number of aggregated users.
+    """
+    user_table_num = 0
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return user_table_num
+
+    key_list = ['job', 'queue', 'project', 'status', 'rusage_mem', 'max_mem']
+    rollup_command = "SELECT IFNULL(queue, ''), IFNULL(project, ''), IFNULL(status, ''), COUNT(*), TOTAL(CAST(rusage_mem AS REAL)), TOTAL(CAST(max_mem AS REAL)) FROM {} GROUP BY 1, 2, 3"
+
+    try:
+        create_user_rollup_table(db_file, conn, commit=False)
+        user_table_list = [table_name for table_name in common_sqlite3.get_sql_table_list(user_db_file, user_conn) if table_name.startswith('user_')]
+        user_table_set = set(user_table_list)
+        user_archive_file = common_archive.get_archive_file(user_db_file)
+        archive_user_row_dic = {}
+
+        # Broken archive raises here, the rollup is kept as it is.
+        if os.path.exists(user_archive_file):
+            for row in common_archive.ArchiveFile(user_archive_file).iter_rows(['user', ] + key_list):
+                archive_user_row_dic.setdefault(row[0], []).append(tuple(row[1:]))
+
+        if user_list is None:
+            user_list = [user_table_name[len('user_'):] for user_table_name in user_table_list] + [user for user in archive_user_row_dic if ('user_' + str(user)) not in user_table_set]
+            complete = True
+        else:
+            user_list = [user for user in user_list if (('user_' + str(user)) in user_table_set) or (user in archive_user_row_dic)]
+            complete = False
+
+        user_curs = user_conn.cursor()
+
+        if archive_user_row_dic:
+            curs.execute("CREATE TEMP TABLE IF NOT EXISTS 'user_rollup_job' ('job', 'queue', 'project', 'status', 'rusage_mem', 'max_mem')")
+
+        for user in user_list:
+            user = str(user)
+            user_table_name = 'user_' + user
+
+            if user in archive_user_row_dic:
+                # Rows of user/<date>.db replace the archived rows of the same job.
+                job_row_list = user_curs.execute('SELECT ' + ', '.join([f'"{key}"' for key in key_list]) + f" FROM '{user_table_name}'").fetchall() if user_table_name in user_table_set else []
+                job_set = {row[0] for row in job_row_list}
+                job_row_list.extend([row for row in archive_user_row_dic[user] if row[0] not in job_set])
+                curs.execute("DELETE FROM temp.'user_rollup_job'")
+                curs.executemany("INSERT INTO temp.'user_rollup_job' VALUES (?, ?, ?, ?, ?, ?)", job_row_list)
+                row_list = curs.execute(rollup_command.format("temp.'user_rollup_job'")).fetchall()
+            else:
+                row_list = user_curs.execute(rollup_command.format(f"'{user_table_name}'")).fetchall()
+
+            curs.execute(f"DELETE FROM '{USER_ROLLUP_TABLE}' WHERE date = ? AND user = ?", (str(date), user))
+            curs.executemany(f"INSERT INTO '{USER_ROLLUP_TABLE}' VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(str(date), user) + tuple(row) for row in row_list])
+            user_table_num += 1
+
+        user_curs.close()
+
+        if archive_user_row_dic:
+            curs.execute("DROP TABLE IF EXISTS temp.'user_rollup_job'")
+
+        if complete:
+            curs.execute(f"INSERT OR REPLACE INTO '{USER_ROLLUP_DATE_TABLE}' VALUES (?, ?)", (str(date), int(time.time())))
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        conn.rollback()
+        common.bprint(f'Failed on updating user rollup of {date} on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        user_table_num = 0
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+    return user_table_num
+
+
+def delete_user_rollup(db_file, orig_conn, before_date, commit=True):
+    """
+    Delete rollup of the dates before before_date (YYYYMMDD), it follows the expired user/<date>.db files.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    try:
+        if get_history_table_type_dic(curs, USER_ROLLUP_DATE_TABLE):
+            curs.execute(f"DELETE FROM '{USER_ROLLUP_TABLE}' WHERE date < ?", (str(before_date),))
+            curs.execute(f"DELETE FROM '{USER_ROLLUP_DATE_TABLE}' WHERE date < ?", (str(before_date),))
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on deleting expired user rollup on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def get_user_rollup(db_file, orig_conn, date_list, status_list=None, queue_list=None, project_list=None, user_list=None):
+    """
+    Sum user jobs of specified dates with one GROUP BY on the rollup.
+    Status/queue/project filters only apply to the sums, so every user who has jobs on the dates is returned (with 0
+    if no job matches), which is the same as reading the raw user tables.
+    Return {user: {'job_num': ..., 'done_num': ..., 'exit_num': ..., 'rusage_mem': ..., 'max_mem': ...}, ...}.
+    """
+    user_dic = {}
+
+    if not date_list:
+        return user_dic
+
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return user_dic
+
+    filter_list = []
+    filter_param_list = []
+
+    for (column, value_list) in [('status', status_list), ('queue', queue_list), ('project', project_list)]:
+        if value_list:
+            filter_list.append(f'{column} IN (' + ', '.join(['?'] * len(value_list)) + ')')
+            filter_param_list.extend(value_list)
+
+    filter_string = ' AND '.join(filter_list) if filter_list else '1'
+    sum_string = f"TOTAL(CASE WHEN {filter_string} THEN job_num END), TOTAL(CASE WHEN {filter_string} AND status = 'DONE' THEN job_num END), TOTAL(CASE WHEN {filter_string} AND status = 'EXIT' THEN job_num END), TOTAL(CASE WHEN {filter_string} THEN rusage_mem END), TOTAL(CASE WHEN {filter_string} THEN max_mem END)"
+    sum_param_list = filter_param_list * 5
+    condition_list = ['date IN (' + ', '.join(['?'] * len(date_list)) + ')']
+    condition_param_list = list(date_list)
+
+    if user_list:
+        condition_list.append('user IN (' + ', '.join(['?'] * len(user_list)) + ')')
+        condition_param_list.extend(user_list)
+
+    try:
+        if get_history_table_type_dic(curs, USER_ROLLUP_TABLE):
+            command = f"SELECT user, {sum_string} FROM '{USER_ROLLUP_TABLE}' WHERE {' AND '.join(condition_list)} GROUP BY user"
+
+            for row in curs.execute(command, sum_param_list + condition_param_list):
+                user_dic[row[0]] = {'job_num': int(row[1]), 'done_num': int(row[2]), 'exit_num': int(row[3]), 'rusage_mem': row[4], 'max_mem': row[5]}
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting user rollup from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return user_dic
+
+
+def archive_user_db(user_db_path, date, key_list=('job', 'status', 'queue', 'project', 'rusage_mem', 'max_mem')):
+    """
+    Pack the raw user tables of user/<date>.db into user/<date>.archive (one "user" column plus the user table columns,
+    keyed by job id), and remove user/<date>.db.
+    The date is rolled up first, so the USERS tab reads the archived dates from the rollup.
+    Return (db file size, archive file size), (0, 0) if it is not archived.
+    """
+    user_db_file = str(user_db_path) + '/' + str(date) + '.db'
+    user_archive_file = common_archive.get_archive_file(user_db_file)
+    column_list = ['user', ] + list(key_list)
+    row_list = []
+    (result, conn) = common_sqlite3.connect_db_file(user_db_file)
+
+    if result != 'passed':
+        return 0, 0
+
+    try:
+        user_rollup_db_file = get_user_rollup_db_file(user_db_path)
+        user_rollup_date_list = get_user_rollup_date_list(user_rollup_db_file, '') if os.path.exists(user_rollup_db_file) else []
+
+        # Not archive the date if it cannot be rolled up (failed, or no user table to roll up).
+        # A date which is archived already is rolled up again from the archive and the jobs sampled late.
+        if ((str(date) not in user_rollup_date_list) or os.path.exists(user_archive_file)) and (not update_user_rollup(user_rollup_db_file, '', date, user_db_file, conn)):
+            return 0, 0
+
+        for table_name in common_sqlite3.get_sql_table_list(user_db_file, conn):
+            if table_name.startswith('user_'):
+                user = table_name[len('user_'):]
+                command = 'SELECT ' + ', '.join([f'"{key}"' for key in key_list]) + f" FROM '{table_name}'"
+                row_list.extend([(user, ) + tuple(row) for row in conn.execute(command)])
+
+        # Jobs finished on an archived date (sampled late) are merged with the existing archive.
+        if os.path.exists(user_archive_file):
+            archive = common_archive.ArchiveFile(user_archive_file)
+            user_job_set = {(row[0], row[1]) for row in row_list}
+            row_list.extend([row for row in archive.iter_rows(column_list) if (row[0], row[1]) not in user_job_set])
+    except Exception as error:
+        common.bprint(f'Failed on reading user database file "{user_db_file}" for archive.', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        return 0, 0
+    finally:
+        conn.close()
+
+    try:
+        archive_size = common_archive.write_archive(user_archive_file, column_list, row_list, key_column='job', meta_dic={'date': str(date), 'source': os.path.basename(user_db_file)})
+        db_size = os.path.getsize(user_db_file)
+        os.remove(user_db_file)
+    except Exception as error:
+        common.bprint(f'Failed on archiving user database file "{user_db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        return 0, 0
+
+    return db_size, archive_size
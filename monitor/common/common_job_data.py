@@ -0,0 +1,231 @@
+import os
+import sys
+import numpy as np
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common_archive
+
+# Running job mem/idle_factor samples on job_data/<range>.db.
+# job_series (current) : one row per job per hour, sample seconds are uint16 offsets (deltas) from hour_second, mem (MB)
+#                        and idle_factor are float32 arrays (NaN for missing values), all packed as BLOBs.
+# job_data (legacy)    : one row per job per sample with TEXT values, it is still read until the rows expire.
+JOB_SERIES_TABLE = 'job_series'
+JOB_SERIES_HOUR_SECONDS = 3600
+LEGACY_JOB_DATA_TABLE = 'job_data'
+JOB_DATA_BATCH_SIZE = 500
+
+# Columns of job_data/<range>.archive (the legacy row layout, one row per sample).
+JOB_DATA_ARCHIVE_COLUMN_LIST = ['job_id', 'sample_second', 'sample_time', 'mem', 'idle_factor']
+
+
+def switch_float_array(value_list):
+    """
+    Switch values (numbers, or strings of legacy rows/archives) into a float32 array, invalid values are NaN.
+    """
+    value_array = np.full(len(value_list), np.nan, dtype=np.float32)
+
+    for (i, value) in enumerate(value_list):
+        try:
+            value_array[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+
+    return value_array
+
+
+def switch_string_list(value_array):
+    """
+    Switch float32 values into the shortest strings (legacy TEXT values), NaN is ''.
+    """
+    return ['' if value == 'nan' else value for value in value_array.astype(str).tolist()]
+
+
+def get_table_list(conn):
+    return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+
+
+def create_job_series_table(conn):
+    conn.execute(f"CREATE TABLE IF NOT EXISTS '{JOB_SERIES_TABLE}' ('job_id' TEXT NOT NULL, 'hour_second' INTEGER NOT NULL, 'sample_seconds' BLOB, 'mem' BLOB, 'idle_factor' BLOB, PRIMARY KEY ('job_id', 'hour_second')) WITHOUT ROWID")
+
+
+def append_job_series(conn, sample_second, job_value_dic):
+    """
+    Append one sample of running jobs ({job_id: (mem, idle_factor)}) into job_series (without commit).
+    Existing series of the same hour are extended, a sample second which is already saved is ignored.
+    """
+    hour_second = int(sample_second) - int(sample_second) % JOB_SERIES_HOUR_SECONDS
+    offset = np.array([int(sample_second) - hour_second], dtype=np.uint16)
+    job_list = list(job_value_dic.keys())
+
+    for i in range(0, len(job_list), JOB_DATA_BATCH_SIZE):
+        job_value_list = [job_value_dic[job] for job in job_list[i:i+JOB_DATA_BATCH_SIZE]]
+        job_chunk = [str(job) for job in job_list[i:i+JOB_DATA_BATCH_SIZE]]
+        command = f"SELECT job_id, sample_seconds, mem, idle_factor FROM '{JOB_SERIES_TABLE}' WHERE hour_second = ? AND job_id IN (" + ', '.join(['?'] * len(job_chunk)) + ')'
+        series_dic = {row[0]: row[1:] for row in conn.execute(command, [hour_second] + job_chunk)}
+        value_array = switch_float_array([value for job_value in job_value_list for value in job_value]).reshape(-1, 2)
+        row_list = []
+
+        for (j, job) in enumerate(job_chunk):
+            (sample_seconds, mem, idle_factor) = series_dic.get(job, (b'', b'', b''))
+
+            if sample_seconds and (np.frombuffer(sample_seconds, dtype=np.uint16)[-1] == offset[0]):
+                continue
+
+            row_list.append((job, hour_second, sample_seconds + offset.tobytes(), mem + value_array[j, 0:1].tobytes(), idle_factor + value_array[j, 1:2].tobytes()))
+
+        conn.executemany(f"INSERT OR REPLACE INTO '{JOB_SERIES_TABLE}' VALUES (?, ?, ?, ?, ?)", row_list)
+
+
+def get_job_last_second_dic(conn, job_list):
+    """
+    Get {job_id: last sample second (hour end for job_series)} of jobs on job_series and legacy job_data.
+    """
+    last_second_dic = {}
+    table_list = get_table_list(conn)
+
+    for i in range(0, len(job_list), JOB_DATA_BATCH_SIZE):
+        job_chunk = [str(job) for job in job_list[i:i+JOB_DATA_BATCH_SIZE]]
+        job_condition = 'job_id IN (' + ', '.join(['?'] * len(job_chunk)) + ')'
+        command_list = []
+
+        if JOB_SERIES_TABLE in table_list:
+            command_list.append(f"SELECT job_id, MAX(hour_second) + {JOB_SERIES_HOUR_SECONDS - 1} FROM '{JOB_SERIES_TABLE}' WHERE {job_condition} GROUP BY job_id")
+
+        if LEGACY_JOB_DATA_TABLE in table_list:
+            command_list.append(f"SELECT job_id, MAX(sample_second) FROM '{LEGACY_JOB_DATA_TABLE}' WHERE {job_condition} GROUP BY job_id")
+
+        for command in command_list:
+            for (job, last_second) in conn.execute(command, job_chunk):
+                last_second_dic[job] = max(last_second_dic.get(job, last_second), last_second)
+
+    return last_second_dic
+
+
+def delete_job_data(conn, job_list):
+    """
+    Delete samples of jobs on job_series and legacy job_data (without commit).
+    """
+    table_list = [table for table in [JOB_SERIES_TABLE, LEGACY_JOB_DATA_TABLE] if table in get_table_list(conn)]
+
+    for i in range(0, len(job_list), JOB_DATA_BATCH_SIZE):
+        job_chunk = [str(job) for job in job_list[i:i+JOB_DATA_BATCH_SIZE]]
+
+        for table in table_list:
+            conn.execute(f"DELETE FROM '{table}' WHERE job_id IN (" + ', '.join(['?'] * len(job_chunk)) + ')', job_chunk)
+
+
+def count_job_data(conn):
+    """
+    Get row number of job_series and legacy job_data.
+    """
+    table_list = get_table_list(conn)
+
+    return sum([conn.execute(f"SELECT COUNT(*) FROM '{table}'").fetchone()[0] for table in [JOB_SERIES_TABLE, LEGACY_JOB_DATA_TABLE] if table in table_list])
+
+
+def delete_expired_job_data(conn, expire_second):
+    """
+    Delete samples before expire_second (whole hours of job_series) without commit.
+    Return (deleted row number, remaining row number).
+    """
+    deleted = 0
+    table_list = get_table_list(conn)
+
+    if JOB_SERIES_TABLE in table_list:
+        deleted += conn.execute(f"DELETE FROM '{JOB_SERIES_TABLE}' WHERE hour_second + {JOB_SERIES_HOUR_SECONDS} <= ?", (int(expire_second),)).rowcount
+
+    if LEGACY_JOB_DATA_TABLE in table_list:
+        deleted += conn.execute(f"DELETE FROM '{LEGACY_JOB_DATA_TABLE}' WHERE sample_second < ?", (int(expire_second),)).rowcount
+
+    return deleted, count_job_data(conn)
+
+
+def decode_job_series_row_list(row_list):
+    """
+    Decode job_series rows ((hour_second, sample_seconds, mem, idle_factor), ...) into
+    (sample_second int64 array, mem float32 array, idle_factor float32 array).
+    """
+    second_list = [np.zeros(0, dtype=np.int64)]
+    mem_list = [np.zeros(0, dtype=np.float32)]
+    idle_factor_list = [np.zeros(0, dtype=np.float32)]
+
+    for (hour_second, sample_seconds, mem, idle_factor) in row_list:
+        second_list.append(int(hour_second) + np.frombuffer(sample_seconds, dtype=np.uint16).astype(np.int64))
+        mem_list.append(np.frombuffer(mem, dtype=np.float32))
+        idle_factor_list.append(np.frombuffer(idle_factor, dtype=np.float32))
+
+    return np.concatenate(second_list), np.concatenate(mem_list), np.concatenate(idle_factor_list)
+
+
+def sort_job_series(sample_second, mem, idle_factor):
+    """
+    Sort series with sample second, the first one wins on duplicated seconds.
+    """
+    (sample_second, index) = np.unique(sample_second, return_index=True)
+
+    return sample_second, mem[index], idle_factor[index]
+
+
+def get_job_series(conn, job):
+    """
+    Get (sample_second, mem, idle_factor) numpy arrays of job on job_series and legacy job_data, sorted by sample second.
+    """
+    table_list = get_table_list(conn)
+    (sample_second, mem, idle_factor) = decode_job_series_row_list(conn.execute(f"SELECT hour_second, sample_seconds, mem, idle_factor FROM '{JOB_SERIES_TABLE}' WHERE job_id = ?", (str(job),)).fetchall() if JOB_SERIES_TABLE in table_list else [])
+
+    if LEGACY_JOB_DATA_TABLE in table_list:
+        row_list = conn.execute(f"SELECT sample_second, mem, idle_factor FROM '{LEGACY_JOB_DATA_TABLE}' WHERE job_id = ?", (str(job),)).fetchall()
+
+        if row_list:
+            sample_second = np.concatenate([sample_second, np.array([int(row[0]) for row in row_list], dtype=np.int64)])
+            mem = np.concatenate([mem, switch_float_array([row[1] for row in row_list])])
+            idle_factor = np.concatenate([idle_factor, switch_float_array([row[2] for row in row_list])])
+
+    return sort_job_series(sample_second, mem, idle_factor)
+
+
+def get_job_archive_series(archive_file, job):
+    """
+    Get (sample_second, mem, idle_factor) numpy arrays of job on job_data/<range>.archive, sorted by sample second.
+    """
+    job_key = common_archive.get_archive_key(job)
+    row_list = [row for row in common_archive.read_archive_rows(archive_file, ['job_id', 'sample_second', 'mem', 'idle_factor'], begin_key=job_key, end_key=job_key) if row[0] == str(job)]
+
+    return sort_job_series(np.array([int(row[1]) for row in row_list], dtype=np.int64), switch_float_array([row[2] for row in row_list]), switch_float_array([row[3] for row in row_list]))
+
+
+def get_aged_job_data_row_list(conn, archive_second):
+    """
+    Get (job_list, archive row list) of jobs whose last sample is before archive_second, archive rows are in
+    JOB_DATA_ARCHIVE_COLUMN_LIST layout (one row per sample, TEXT values).
+    """
+    table_list = get_table_list(conn)
+    command_list = []
+
+    if JOB_SERIES_TABLE in table_list:
+        command_list.append(f"SELECT job_id, MAX(hour_second) + {JOB_SERIES_HOUR_SECONDS - 1} AS last_second FROM '{JOB_SERIES_TABLE}' GROUP BY job_id")
+
+    if LEGACY_JOB_DATA_TABLE in table_list:
+        command_list.append(f"SELECT job_id, MAX(sample_second) AS last_second FROM '{LEGACY_JOB_DATA_TABLE}' GROUP BY job_id")
+
+    if not command_list:
+        return [], []
+
+    job_list = [row[0] for row in conn.execute('SELECT job_id FROM (' + ' UNION ALL '.join(command_list) + ') GROUP BY job_id HAVING MAX(last_second) < ?', (int(archive_second),))]
+    row_list = []
+
+    for i in range(0, len(job_list), JOB_DATA_BATCH_SIZE):
+        job_chunk = job_list[i:i+JOB_DATA_BATCH_SIZE]
+        job_condition = 'job_id IN (' + ', '.join(['?'] * len(job_chunk)) + ')'
+
+        if JOB_SERIES_TABLE in table_list:
+            for (job, hour_second, sample_seconds, mem, idle_factor) in conn.execute(f"SELECT job_id, hour_second, sample_seconds, mem, idle_factor FROM '{JOB_SERIES_TABLE}' WHERE {job_condition}", job_chunk):
+                (sample_second_array, mem_array, idle_factor_array) = decode_job_series_row_list([(hour_second, sample_seconds, mem, idle_factor)])
+                row_list.extend([(job, sample_second, '', mem_value, idle_factor_value) for (sample_second, mem_value, idle_factor_value) in zip(sample_second_array.tolist(), switch_string_list(mem_array), switch_string_list(idle_factor_array))])
+
+        if LEGACY_JOB_DATA_TABLE in table_list:
+            row_list.extend(conn.execute(f"SELECT {', '.join(JOB_DATA_ARCHIVE_COLUMN_LIST)} FROM '{LEGACY_JOB_DATA_TABLE}' WHERE {job_condition}", job_chunk).fetchall())
+
+    return job_list, row_list
@@ -0,0 +1,663 @@
+import os
+import re
+import sys
+import time
+import functools
+import collections
+import concurrent.futures
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common
+from common import common_archive
+from common import common_sqlite3
+
+# Finished jobs are saved on job/<date>.db (table "job", one row per job, date is the finished date), aged dates can
+# be packed into job/<date>.archive (see common_archive and archive_job_db()), readers here handle both.
+# job/job_index.db keeps job id -> date of all saved jobs (a job id can be on several dates after it is recycled), so
+# a job id lookup opens only the dates which have it.
+# job_index_date lists dates whose jobs are all indexed, dates out of it are searched directly.
+JOB_DATE_DB_COMPILE = re.compile(r'^(\d{8})\.(db|archive)$')
+JOB_INDEX_DB_FILE_NAME = 'job_index.db'
+JOB_INDEX_TABLE = 'job_index'
+JOB_INDEX_DATE_TABLE = 'job_index_date'
+
+# Keep the number of bound values of one query under the SQLITE_MAX_VARIABLE_NUMBER limit.
+JOB_INDEX_CHUNK_SIZE = 500
+
+# Schema version of job/<date>.db (PRAGMA user_version), older files are upgraded with upgrade_job_db().
+# 1: indexes on JOB_INDEX_KEY_LIST, and table job_summary with the numeric fields of every job (JOB_SUMMARY_KEY_LIST),
+#    so filters and numeric scans don't read the wide text rows of table job.
+JOB_DB_VERSION = 1
+JOB_INDEX_KEY_LIST = ['user', 'queue', 'status', 'project', 'finished_time']
+JOB_SUMMARY_TABLE = 'job_summary'
+JOB_SUMMARY_KEY_LIST = ['job', 'finished_second', 'max_mem_mb', 'rusage_mem_mb', 'cpu_time_s', 'runtime_s']
+
+# Columns of table job which job_summary is generated from, see gen_job_summary_row().
+JOB_SUMMARY_SOURCE_KEY_LIST = ['job', 'started_time', 'finished_time', 'cpu_time', 'max_mem', 'rusage_mem']
+
+JOB_MONTH_DIC = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+# Rows sampled by ANALYZE per index, it keeps planner statistics cheap on big job tables.
+JOB_ANALYSIS_LIMIT = 1000
+
+
+def switch_job_number(value):
+    """
+    Switch job number string (like max_mem "1024.0", cpu_time "36.5") into float, or None if it is invalid.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=4096)
+def get_job_hour_second(year, month, day, hour):
+    """
+    Get start second of the local hour, it is cached because a job db only has jobs of a few days.
+    """
+    return int(time.mktime((year, month, day, hour, 0, 0, 0, 0, -1)))
+
+
+def get_job_time_second(job_time, date):
+    """
+    Switch bjobs -UF time ("%a %b %d %H:%M:%S", without year) of a job finished on date (YYYYMMDD) into seconds.
+    The year of date is used, or the year before if the time is later than date (like a job started last December).
+    Return None if job_time is invalid.
+    """
+    job_time_list = str(job_time).split()
+
+    if (len(job_time_list) != 4) or (job_time_list[1] not in JOB_MONTH_DIC):
+        return None
+
+    try:
+        (hour, minute, second) = [int(item) for item in job_time_list[3].split(':')]
+        month = JOB_MONTH_DIC[job_time_list[1]]
+        day = int(job_time_list[2])
+        year = int(date[:4])
+
+        if '%02d%02d' % (month, day) > str(date)[4:8]:
+            year -= 1
+
+        return get_job_hour_second(year, month, day, hour) + minute*60 + second
+    except (ValueError, OverflowError):
+        return None
+
+
+def gen_job_summary_row(date, job, started_time, finished_time, cpu_time, max_mem, rusage_mem):
+    """
+    Generate job_summary row (JOB_SUMMARY_KEY_LIST) from the text fields of table job.
+    """
+    started_second = get_job_time_second(started_time, date)
+    finished_second = get_job_time_second(finished_time, date)
+    runtime_second = None
+
+    if (started_second is not None) and (finished_second is not None):
+        runtime_second = max(0, finished_second - started_second)
+
+    return (str(job), finished_second, switch_job_number(max_mem), switch_job_number(rusage_mem), switch_job_number(cpu_time), runtime_second)
+
+
+def get_job_db_file(job_db_path, date):
+    """
+    Get job/<date>.db, or job/<date>.archive if the date is archived.
+    """
+    job_db_file = str(job_db_path) + '/' + str(date) + '.db'
+    job_archive_file = common_archive.get_archive_file(job_db_file)
+
+    if (not os.path.exists(job_db_file)) and os.path.exists(job_archive_file):
+        return job_archive_file
+
+    return job_db_file
+
+
+def get_job_index_db_file(job_db_path):
+    return str(job_db_path) + '/' + str(JOB_INDEX_DB_FILE_NAME)
+
+
+def get_job_db_date_list(job_db_path, begin_date='', end_date=''):
+    """
+    Get dates (YYYYMMDD) of job/<date>.db (or job/<date>.archive) between begin_date and end_date (both are included),
+    newest first.
+    """
+    date_list = []
+
+    if not os.path.isdir(job_db_path):
+        return date_list
+
+    for file_name in os.listdir(job_db_path):
+        my_match = JOB_DATE_DB_COMPILE.match(file_name)
+
+        if my_match:
+            date = my_match.group(1)
+
+            if (not begin_date or (date >= str(begin_date))) and (not end_date or (date <= str(end_date))):
+                date_list.append(date)
+
+    date_list = sorted(set(date_list), reverse=True)
+
+    return date_list
+
+
+def create_job_index_table(db_file, orig_conn, commit=True):
+    """
+    Create job index tables if not exist.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    try:
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{JOB_INDEX_TABLE}' ('job' TEXT NOT NULL, 'date' TEXT NOT NULL, PRIMARY KEY ('job', 'date')) WITHOUT ROWID")
+        curs.execute(f"CREATE TABLE IF NOT EXISTS '{JOB_INDEX_DATE_TABLE}' ('date' TEXT PRIMARY KEY, 'update_second' INTEGER)")
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on creating job index tables on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def get_job_index_date_list(db_file, orig_conn):
+    """
+    Get dates (YYYYMMDD) whose jobs are all indexed.
+    """
+    date_list = []
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn)
+
+    if result == 'failed':
+        return date_list
+
+    try:
+        if JOB_INDEX_DATE_TABLE in common_sqlite3.get_sql_table_list(db_file, conn):
+            date_list = [row[0] for row in curs.execute(f"SELECT date FROM '{JOB_INDEX_DATE_TABLE}' ORDER BY date")]
+
+        curs.close()
+    except Exception as error:
+        common.bprint(f'Failed on getting job index dates from db_file "{db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        if orig_conn == '':
+            conn.close()
+
+    return date_list
+
+
+def update_job_index(db_file, orig_conn, date, job_db_file, job_conn, job_list=None, complete=False, commit=True):
+    """
+    Add job id -> date of job_db_file (job/<date>.db) into job index.
+    job_list: new saved jobs, all jobs of job_db_file are indexed (and the date is marked as complete) if it is None.
+    complete: job_list is all jobs of the date (like the jobs of job/<date>.archive), mark the date as complete too.
+    Return the number of indexed jobs, -1 if it fails.
+    """
+    job_num = 0
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return -1
+
+    try:
+        create_job_index_table(db_file, conn, commit=False)
+
+        if job_list is None:
+            complete = True
+            job_list = [row[0] for row in job_conn.execute("SELECT job FROM 'job'")]
+
+        curs.executemany(f"INSERT OR IGNORE INTO '{JOB_INDEX_TABLE}' VALUES (?, ?)", [(str(job), str(date)) for job in job_list])
+        job_num = len(job_list)
+
+        if complete:
+            curs.execute(f"INSERT OR REPLACE INTO '{JOB_INDEX_DATE_TABLE}' VALUES (?, ?)", (str(date), int(time.time())))
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        conn.rollback()
+        common.bprint(f'Failed on updating job index of {date} on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        job_num = -1
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+    return job_num
+
+
+def reset_job_index_date(db_file, orig_conn, date, commit=True):
+    """
+    Mark date as not completely indexed, so its jobs are searched on job/<date>.db directly and the whole date is
+    indexed again by the next update.
+    Return True if it is reset.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return False
+
+    reset = False
+
+    try:
+        if JOB_INDEX_DATE_TABLE in common_sqlite3.get_sql_table_list(db_file, conn):
+            curs.execute(f"DELETE FROM '{JOB_INDEX_DATE_TABLE}' WHERE date = ?", (str(date),))
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+
+        reset = True
+    except Exception as error:
+        common.bprint(f'Failed on resetting job index of {date} on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+    return reset
+
+
+def delete_job_index(db_file, orig_conn, before_date, commit=True):
+    """
+    Delete job index of the dates before before_date (YYYYMMDD), it follows the expired job/<date>.db files.
+    """
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return
+
+    try:
+        if JOB_INDEX_DATE_TABLE in common_sqlite3.get_sql_table_list(db_file, conn):
+            curs.execute(f"DELETE FROM '{JOB_INDEX_TABLE}' WHERE date < ?", (str(before_date),))
+            curs.execute(f"DELETE FROM '{JOB_INDEX_DATE_TABLE}' WHERE date < ?", (str(before_date),))
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on deleting expired job index on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+
+def get_job_db_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def insert_job_summary_rows(conn, date, row_list):
+    """
+    Insert job_summary rows (if not exist) of table job rows, row is values of JOB_SUMMARY_SOURCE_KEY_LIST.
+    """
+    conn.executemany(f"INSERT OR IGNORE INTO '{JOB_SUMMARY_TABLE}' VALUES (" + ', '.join(['?'] * len(JOB_SUMMARY_KEY_LIST)) + ')', [gen_job_summary_row(date, *row) for row in row_list])
+
+
+def analyze_job_db(conn):
+    """
+    Refresh planner statistics (sqlite_stat1) of job/<date>.db, so low-selectivity indexes (like status) are not
+    preferred over a scan.
+    """
+    conn.execute(f'PRAGMA analysis_limit={JOB_ANALYSIS_LIMIT}')
+    conn.execute('ANALYZE')
+
+
+def upgrade_job_db(db_file, orig_conn, date, commit=True):
+    """
+    Upgrade job/<date>.db to JOB_DB_VERSION: create indexes and job_summary (filled with the existing jobs).
+    Return True if the file is upgraded.
+    """
+    upgraded = False
+    (result, conn, curs) = common_sqlite3.connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return upgraded
+
+    try:
+        if get_job_db_version(conn) < JOB_DB_VERSION:
+            for key in JOB_INDEX_KEY_LIST:
+                curs.execute(f"CREATE INDEX IF NOT EXISTS 'job_{key}' ON 'job' (\"{key}\")")
+
+            curs.execute(f"CREATE TABLE IF NOT EXISTS '{JOB_SUMMARY_TABLE}' ('job' TEXT PRIMARY KEY, 'finished_second' INTEGER, 'max_mem_mb' REAL, 'rusage_mem_mb' REAL, 'cpu_time_s' REAL, 'runtime_s' INTEGER) WITHOUT ROWID")
+            curs.execute(f"CREATE INDEX IF NOT EXISTS '{JOB_SUMMARY_TABLE}_finished_second' ON '{JOB_SUMMARY_TABLE}' ('finished_second')")
+            curs.execute(f"CREATE INDEX IF NOT EXISTS '{JOB_SUMMARY_TABLE}_max_mem_mb' ON '{JOB_SUMMARY_TABLE}' ('max_mem_mb')")
+            insert_job_summary_rows(conn, date, curs.execute('SELECT ' + ', '.join([f'"{key}"' for key in JOB_SUMMARY_SOURCE_KEY_LIST]) + " FROM 'job'").fetchall())
+            analyze_job_db(conn)
+            curs.execute(f'PRAGMA user_version={JOB_DB_VERSION}')
+            upgraded = True
+
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        conn.rollback()
+        common.bprint(f'Failed on upgrading job database file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        upgraded = False
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+    return upgraded
+
+
+def archive_job_db(job_db_path, date):
+    """
+    Pack job/<date>.db into job/<date>.archive (job columns and job_summary columns, keyed by job id and
+    finished_second), and remove job/<date>.db.
+    The date is indexed on job index (and job db is upgraded for job_summary) first, so job lookups still find it.
+    Return (db file size, archive file size), (0, 0) if it is not archived.
+    """
+    job_db_file = str(job_db_path) + '/' + str(date) + '.db'
+    job_archive_file = common_archive.get_archive_file(job_db_file)
+    (result, conn) = common_sqlite3.connect_db_file(job_db_file, mode='write')
+
+    if result != 'passed':
+        return 0, 0
+
+    try:
+        upgrade_job_db(job_db_file, conn, date)
+        job_index_db_file = get_job_index_db_file(job_db_path)
+
+        job_index_date_list = get_job_index_date_list(job_index_db_file, '') if os.path.exists(job_index_db_file) else []
+
+        # Not archive the date if it cannot be indexed.
+        if (str(date) not in job_index_date_list) and (update_job_index(job_index_db_file, '', date, job_db_file, conn) < 0):
+            return 0, 0
+
+        job_key_list = [row[1] for row in conn.execute("PRAGMA table_info('job')")]
+        summary_key_list = JOB_SUMMARY_KEY_LIST[1:]
+        column_list = job_key_list + [key for key in summary_key_list if key not in job_key_list]
+        command = 'SELECT ' + ', '.join([f'j."{key}"' for key in job_key_list] + [f's."{key}"' for key in summary_key_list if key not in job_key_list])
+        command = str(command) + f" FROM 'job' j LEFT JOIN '{JOB_SUMMARY_TABLE}' s ON j.job = s.job"
+        row_list = conn.execute(command).fetchall()
+
+        # Jobs finished on an archived date (sampled late) are merged with the existing archive.
+        if os.path.exists(job_archive_file):
+            archive = common_archive.ArchiveFile(job_archive_file)
+            job_set = {row[0] for row in row_list}
+
+            for row in archive.iter_rows():
+                row_dic = dict(zip(archive.column_list, row))
+
+                if row_dic['job'] not in job_set:
+                    row_list.append(tuple(row_dic.get(key, '') for key in column_list))
+    except Exception as error:
+        common.bprint(f'Failed on reading job database file "{job_db_file}" for archive.', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        return 0, 0
+    finally:
+        conn.close()
+
+    try:
+        archive_size = common_archive.write_archive(job_archive_file, column_list, row_list, key_column='job', time_column='finished_second', meta_dic={'date': str(date), 'source': os.path.basename(job_db_file)})
+        db_size = os.path.getsize(job_db_file)
+        os.remove(job_db_file)
+    except Exception as error:
+        common.bprint(f'Failed on archiving job database file "{job_db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+        return 0, 0
+
+    return db_size, archive_size
+
+
+def get_job_date_list(job_db_path, job_list, begin_date='', end_date=''):
+    """
+    Get dates (newest first) of job/<date>.db which may have the jobs, with job index.
+    Dates which are not fully indexed are always returned.
+    """
+    date_list = get_job_db_date_list(job_db_path, begin_date, end_date)
+    job_index_db_file = get_job_index_db_file(job_db_path)
+
+    if (not date_list) or (not os.path.exists(job_index_db_file)):
+        return date_list
+
+    (result, conn) = common_sqlite3.connect_db_file(job_index_db_file)
+
+    if result != 'passed':
+        return date_list
+
+    index_date_set = set(get_job_index_date_list(job_index_db_file, conn))
+    job_date_set = set()
+
+    try:
+        for i in range(0, len(job_list), JOB_INDEX_CHUNK_SIZE):
+            job_chunk = [str(job) for job in job_list[i:i+JOB_INDEX_CHUNK_SIZE]]
+            command = f"SELECT DISTINCT date FROM '{JOB_INDEX_TABLE}' WHERE job IN (" + ', '.join(['?'] * len(job_chunk)) + ')'
+            job_date_set.update([row[0] for row in conn.execute(command, job_chunk)])
+    except Exception as error:
+        common.bprint(f'Failed on searching job index on db file "{job_index_db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+        index_date_set = set()
+    finally:
+        conn.close()
+
+    return [date for date in date_list if (date in job_date_set) or (date not in index_date_set)]
+
+
+def gen_job_filter(job='', user='', queue='', status='', project='', exit_code='', min_max_mem=None, max_max_mem=None, summary=False):
+    """
+    Generate WHERE condition and bound parameters of job filters.
+    job/user/queue/status/project/exit_code: a string or a list of strings, empty means no filter.
+    min_max_mem/max_max_mem: max_mem (MB) thresholds, None means no filter.
+    summary: max_mem thresholds (without other filters) are checked on the indexed job_summary.max_mem_mb
+             (JOB_DB_VERSION >= 1) instead of casting every max_mem text.
+    """
+    condition_list = []
+    param_list = []
+
+    for (key, value) in [('job', job), ('user', user), ('queue', queue), ('status', status), ('project', project), ('exit_code', exit_code)]:
+        if isinstance(value, (list, tuple, set)):
+            value_list = [str(item) for item in value if str(item)]
+        else:
+            value_list = [str(value)] if str(value) else []
+
+        if len(value_list) == 1:
+            condition_list.append(f'"{key}" = ?')
+            param_list.append(value_list[0])
+        elif value_list:
+            condition_list.append(f'"{key}" IN (' + ', '.join(['?'] * len(value_list)) + ')')
+            param_list.extend(value_list)
+
+    # With other filters, the rows picked by their indexes are cheaper to check than a job_summary subquery.
+    summary = summary and (not condition_list)
+    mem_condition_list = []
+
+    if min_max_mem is not None:
+        mem_condition_list.append('max_mem_mb >= ?' if summary else "max_mem != '' AND CAST(max_mem AS REAL) >= ?")
+        param_list.append(float(min_max_mem))
+
+    if max_max_mem is not None:
+        mem_condition_list.append('max_mem_mb <= ?' if summary else "max_mem != '' AND CAST(max_mem AS REAL) <= ?")
+        param_list.append(float(max_max_mem))
+
+    if mem_condition_list and summary:
+        condition_list.append(f"job IN (SELECT job FROM '{JOB_SUMMARY_TABLE}' WHERE " + ' AND '.join(mem_condition_list) + ')')
+    else:
+        condition_list.extend(mem_condition_list)
+
+    return ' AND '.join(condition_list), param_list
+
+
+def gen_job_row_filter(job='', user='', queue='', status='', project='', exit_code='', min_max_mem=None, max_max_mem=None):
+    """
+    Python version of gen_job_filter for archived rows, return (key list to read, function to check a row dict).
+    """
+    value_dic = {}
+
+    for (key, value) in [('job', job), ('user', user), ('queue', queue), ('status', status), ('project', project), ('exit_code', exit_code)]:
+        if isinstance(value, (list, tuple, set)):
+            value_set = {str(item) for item in value if str(item)}
+        else:
+            value_set = {str(value)} if str(value) else set()
+
+        if value_set:
+            value_dic[key] = value_set
+
+    key_list = list(value_dic.keys())
+
+    if (min_max_mem is not None) or (max_max_mem is not None):
+        key_list.append('max_mem')
+
+    def check_row(row_dic):
+        for (key, value_set) in value_dic.items():
+            if str(row_dic[key]) not in value_set:
+                return False
+
+        if 'max_mem' in key_list:
+            max_mem = switch_job_number(row_dic['max_mem'])
+
+            if (max_mem is None) or ((min_max_mem is not None) and (max_mem < float(min_max_mem))) or ((max_max_mem is not None) and (max_mem > float(max_max_mem))):
+                return False
+
+        return True
+
+    return key_list, check_row
+
+
+def query_job_archive(job_archive_file, key_list, filter_dic, limit=0):
+    """
+    Get rows (tuples of key_list values) of job/<date>.archive with job filters (see gen_job_filter), job filter only
+    decompresses the blocks whose job id range has the jobs.
+    """
+    row_list = []
+    (filter_key_list, check_row) = gen_job_row_filter(**filter_dic)
+    read_key_list = list(dict.fromkeys(list(key_list) + filter_key_list))
+    (begin_key, end_key) = (None, None)
+    job = filter_dic.get('job', '')
+    job_key_list = [common_archive.get_archive_key(item) for item in (job if isinstance(job, (list, tuple, set)) else [job]) if str(item)]
+
+    if job_key_list and (None not in job_key_list):
+        (begin_key, end_key) = (min(job_key_list), max(job_key_list))
+
+    try:
+        archive = common_archive.ArchiveFile(job_archive_file)
+
+        if not archive.is_overlapped(begin_key, end_key):
+            return row_list
+
+        for row in archive.iter_rows(read_key_list, begin_key, end_key):
+            row_dic = dict(zip(read_key_list, row))
+
+            if check_row(row_dic):
+                row_list.append(tuple(row_dic[key] for key in key_list))
+
+                if limit and (len(row_list) >= limit):
+                    break
+    except Exception as error:
+        common.bprint(f'Failed on querying job archive file "{job_archive_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+
+    return row_list
+
+
+def query_job_db(job_db_file, key_list, filter_dic, limit=0):
+    """
+    Get rows (tuples of key_list values) of job_db_file with job filters (see gen_job_filter), it is run on query
+    threads, so it opens its own connection.
+    job/<date>.archive files are read with query_job_archive.
+    """
+    row_list = []
+
+    if str(job_db_file).endswith(common_archive.ARCHIVE_SUFFIX):
+        return query_job_archive(job_db_file, key_list, filter_dic, limit)
+
+    (result, conn) = common_sqlite3.connect_db_file(job_db_file)
+
+    if result != 'passed':
+        return row_list
+
+    try:
+        (condition, param_list) = gen_job_filter(summary=(get_job_db_version(conn) >= 1), **filter_dic)
+        command = 'SELECT ' + ', '.join([f'"{key}"' for key in key_list]) + " FROM 'job'"
+
+        if condition:
+            command = str(command) + ' WHERE ' + str(condition)
+
+        if limit:
+            command = str(command) + ' LIMIT ' + str(int(limit))
+
+        row_list = conn.execute(command, param_list).fetchall()
+    except Exception as error:
+        common.bprint(f'Failed on querying job database file "{job_db_file}".', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+    finally:
+        conn.close()
+
+    return row_list
+
+
+def query_job_date(job_db_path, date, key_list, filter_dic, limit=0):
+    """
+    Get rows of job/<date>.db and job/<date>.archive (the ones which exist) with job filters.
+    """
+    row_list = []
+    job_db_file = str(job_db_path) + '/' + str(date) + '.db'
+
+    for date_file in [job_db_file, common_archive.get_archive_file(job_db_file)]:
+        if os.path.exists(date_file) and ((not limit) or (len(row_list) < limit)):
+            row_list.extend(query_job_db(date_file, key_list, filter_dic, (limit - len(row_list)) if limit else 0))
+
+    return row_list
+
+
+def iter_job_history(job_db_path, key_list, begin_date='', end_date='', limit=0, max_workers=4, **filter_dic):
+    """
+    Query finished jobs of job/<date>.db (and job/<date>.archive) files between begin_date and end_date (all dates if
+    not specified), filters (see gen_job_filter) are pushed into SQL (or checked on archived rows).
+    Dates are queried on max_workers threads (at most 2*max_workers dates ahead) and rows are yielded newest date
+    first as (date, row) as soon as the date is done, so the caller can stop early, and limit stops the query after
+    limit rows.
+    With job filter, only the dates which have the job on job index are queried.
+    """
+    job = filter_dic.get('job', '')
+
+    if job:
+        date_list = get_job_date_list(job_db_path, list(job) if isinstance(job, (list, tuple, set)) else [job], begin_date, end_date)
+    else:
+        date_list = get_job_db_date_list(job_db_path, begin_date, end_date)
+
+    if not date_list:
+        return
+
+    date_iter = iter(date_list)
+    future_queue = collections.deque()
+    row_num = 0
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+
+    def submit_date():
+        date = next(date_iter, None)
+
+        if date is not None:
+            future_queue.append((date, executor.submit(query_job_date, job_db_path, date, key_list, filter_dic, limit)))
+
+    try:
+        for i in range(2*max(1, int(max_workers))):
+            submit_date()
+
+        while future_queue:
+            (date, future) = future_queue.popleft()
+            row_list = future.result()
+            submit_date()
+
+            for row in row_list:
+                yield date, row
+                row_num += 1
+
+                if limit and (row_num >= limit):
+                    return
+    finally:
+        for (date, future) in future_queue:
+            future.cancel()
+
+        executor.shutdown(wait=False)
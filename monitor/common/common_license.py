@@ -2,25 +2,90 @@ import os
 import re
 import sys
 import time
+import bisect
+import signal
+import asyncio
 import datetime
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
+from common import common_lsf
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 
+# Shared lmstat output cache (one file per lmstat command, so per license server), see set_license_cache().
+LICENSE_CACHE_DIC = {'cache_dir': '', 'ttl': 0}
+
+
+def get_license_cache_dir():
+    """
+    Get the per-user lmstat output cache directory, it is shared by bmonitor, show_license_feature_usage and the AI tools.
+    """
+    return os.path.join(common.get_user_tmp_dir(), 'license_cache')
+
+
+def set_license_cache(cache_dir, ttl=120):
+    """
+    Save lmstat output into cache_dir, and read it back (instead of running lmstat) when it is fresher than ttl seconds.
+    ttl 0 disables the cache.
+    cache_dir and its parent directory (the per-user directory on tmp) must be owned by current user, otherwise other
+    users could replace the cached lmstat output, the cache is disabled then.
+    """
+    LICENSE_CACHE_DIC['cache_dir'] = ''
+    LICENSE_CACHE_DIC['ttl'] = ttl
+
+    if cache_dir and (ttl > 0):
+        try:
+            for directory in [os.path.dirname(os.path.abspath(cache_dir)), cache_dir]:
+                if not common.create_private_dir(directory):
+                    common.bprint(f'License cache directory "{directory}" is not a directory owned by current user, license cache is disabled.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+                    return
+
+            LICENSE_CACHE_DIC['cache_dir'] = cache_dir
+        except OSError as error:
+            common.bprint(f'Failed on creating license cache directory "{cache_dir}", {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
+
+def read_license_cache(lmstat_command):
+    """
+    Get cached lmstat output (bytes) of lmstat_command if the cache is enabled and fresh, or return None.
+    """
+    if LICENSE_CACHE_DIC['cache_dir']:
+        cache_file = common_lsf.get_command_cache_file(LICENSE_CACHE_DIC['cache_dir'], lmstat_command)
+
+        try:
+            if time.time() - os.path.getmtime(cache_file) <= LICENSE_CACHE_DIC['ttl']:
+                with open(cache_file, 'rb') as CF:
+                    return CF.read()
+        except OSError:
+            pass
+
+    return None
+
+
+def save_license_cache(lmstat_command, stdout):
+    """
+    Save lmstat output of lmstat_command into the cache if it is enabled.
+    """
+    if LICENSE_CACHE_DIC['cache_dir']:
+        try:
+            common_lsf.save_command_cache(LICENSE_CACHE_DIC['cache_dir'], lmstat_command, stdout)
+        except OSError as error:
+            common.bprint(f'Failed on saving license cache, {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+
 
 class GetLicenseInfo():
     """
     Get license information with tool "lmstat".
     Save it into a dictory and return.
     """
-    def __init__(self, specified_servers=[], excluded_servers=[], specified_feature='', lmstat_path='lmstat', bsub_command='bsub -q normal -Is'):
+    def __init__(self, specified_servers=[], excluded_servers=[], specified_feature='', lmstat_path='lmstat', bsub_command='bsub -q normal -Is', timeout=60):
         self.specified_feature = specified_feature
         self.lmstat_path = lmstat_path
         self.bsub_command = bsub_command
         self.specified_servers = specified_servers
+        self.timeout = timeout
+        self.timeout_server_list = []
 
         if specified_servers or excluded_servers:
             server_list = os.environ['LM_LICENSE_FILE'].split(':')
@@ -35,17 +100,20 @@ class GetLicenseInfo():
 
             os.environ['LM_LICENSE_FILE'] = ':'.join(server_list)
 
-    def get_lmstat_command(self, specified_server=''):
+    def get_lmstat_command(self, specified_server='', specified_feature=None):
         """
         Get reasonable lmstat command, it is used to get license usage information.
         """
+        if specified_feature is None:
+            specified_feature = self.specified_feature
+
         lmstat_command = str(self.lmstat_path) + ' -a -i'
 
         if specified_server:
             lmstat_command = str(lmstat_command) + ' -c ' + str(specified_server)
 
-        if self.specified_feature:
-            lmstat_command = str(lmstat_command) + ' ' + str(self.specified_feature)
+        if specified_feature:
+            lmstat_command = str(lmstat_command) + ' ' + str(specified_feature)
 
         if self.bsub_command:
             lmstat_command = str(self.bsub_command) + ' "' + str(lmstat_command) + '"'
@@ -81,28 +149,104 @@ class GetLicenseInfo():
                                        },
                       }
         """
-        # Get lmstat output message.
+        license_server_list = ['']
+
         if 'LM_LICENSE_FILE' in os.environ:
-            stdout_list = []
-            lm_license_file_list = os.environ['LM_LICENSE_FILE'].split(':')
+            license_server_list = list(dict.fromkeys([license_server for license_server in os.environ['LM_LICENSE_FILE'].split(':') if license_server]))
 
-            with ProcessPoolExecutor(max_workers=min(len(lm_license_file_list), 16)) as executor:
-                job_list = []
+        server_license_dic = asyncio.run(self.collect_license_info(license_server_list))
+        license_dic = {}
 
-                for lm_license_file in lm_license_file_list:
-                    if lm_license_file:
-                        lmstat_command = self.get_lmstat_command(specified_server=lm_license_file)
-                        job_list.append(executor.submit(common.run_command, lmstat_command))
+        # Merge license servers with LM_LICENSE_FILE order.
+        for license_server in license_server_list:
+            for (parsed_license_server, parsed_license_server_dic) in server_license_dic.get(license_server, {}).items():
+                license_dic.setdefault(parsed_license_server, parsed_license_server_dic)
 
-                for job in as_completed(job_list):
-                    (return_code, stdout, stderr) = job.result()
+        return license_dic
 
-                    if isinstance(stdout, bytes):
-                        stdout_list.extend(str(stdout, 'unicode_escape').split('\n'))
-        else:
-            lmstat_command = self.get_lmstat_command()
-            (return_code, stdout, stderr) = common.run_command(lmstat_command)
-            stdout_list = str(stdout, 'unicode_escape').split('\n')
+    async def run_lmstat_command(self, license_server):
+        """
+        Run lmstat for one license server with self.timeout deadline (the whole process group is killed on timeout).
+        Return (license_server, stdout bytes), stdout is None on timeout.
+        """
+        lmstat_command = self.get_lmstat_command(specified_server=license_server)
+        process = await asyncio.create_subprocess_shell(lmstat_command, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True)
+
+        try:
+            (stdout, stderr) = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+            await process.wait()
+            return license_server, None
+
+        if process.returncode == 0:
+            save_license_cache(lmstat_command, stdout)
+
+        return license_server, stdout
+
+    async def collect_license_info(self, license_server_list):
+        """
+        Get {license_server: license_dic of the server}, fresh cached lmstat output is used first, other license servers
+        run lmstat concurrently and are parsed as soon as they complete.
+        A license server which exceeds self.timeout seconds gets status "TIMEOUT" and is saved on self.timeout_server_list.
+        """
+        server_license_dic = {}
+        task_list = []
+
+        for license_server in license_server_list:
+            stdout = read_license_cache(self.get_lmstat_command(specified_server=license_server))
+
+            if stdout is not None:
+                server_license_dic[license_server] = self.parse_lmstat_output(stdout)
+                continue
+
+            # A fresh cache of all features also covers the specified feature.
+            if self.specified_feature:
+                stdout = read_license_cache(self.get_lmstat_command(specified_server=license_server, specified_feature=''))
+
+                if stdout is not None:
+                    server_license_dic[license_server] = self.restrict_feature(self.parse_lmstat_output(stdout), self.specified_feature)
+                    continue
+
+            task_list.append(self.run_lmstat_command(license_server))
+
+        for task in asyncio.as_completed(task_list):
+            (license_server, stdout) = await task
+
+            if stdout is None:
+                common.bprint(f'lmstat on license server "{license_server}" timed out after {self.timeout} seconds.', date_format='%Y-%m-%d %H:%M:%S', level='Warning')
+                self.timeout_server_list.append(license_server)
+
+                if license_server:
+                    server_license_dic[license_server] = {license_server: {'license_files': '',
+                                                                           'license_server_status': 'TIMEOUT',
+                                                                           'license_server_version': '',
+                                                                           'vendor_daemon': {}}}
+            else:
+                server_license_dic[license_server] = self.parse_lmstat_output(stdout)
+
+        return server_license_dic
+
+    def restrict_feature(self, license_dic, feature):
+        """
+        Keep only the specified feature (usage and expires) on license_dic.
+        """
+        for license_server in license_dic.keys():
+            for vendor_dic in license_dic[license_server]['vendor_daemon'].values():
+                vendor_dic['feature'] = {feature: vendor_dic['feature'][feature]} if feature in vendor_dic['feature'] else {}
+                vendor_dic['expires'] = {feature: vendor_dic['expires'][feature]} if feature in vendor_dic['expires'] else {}
+
+        return license_dic
+
+    def parse_lmstat_output(self, stdout):
+        """
+        Parse lmstat output (bytes) of one license server into license_dic (see get_license_info).
+        """
+        stdout_list = stdout.decode('utf-8', errors='replace').split('\n')
 
         # Parse lmstat output message.
         license_dic = {}
@@ -503,6 +647,373 @@ class FilterLicenseDic():
         return filtered_license_dic
 
 
+class LicenseSnapshot():
+    """
+    Flat and indexed license_dic (see GetLicenseInfo.get_license_info) for repeated filtering, run() gives the same
+    result as FilterLicenseDic.run().
+    * vendor rows : (license_server, vendor_daemon) of every vendor daemon.
+    * feature rows: (vendor row, feature) of every feature.
+    * usage rows  : (feature row, index on in_use_info) of every checkout.
+    Server/vendor/feature names and checkout attributes (user/execute_host/submit_host ...) are inverted indexes
+    {value: row set}, distinct values are kept on a lowercase search table for fuzzy search, so every filter is
+    index lookups and row set intersections, and the nested license_dic is only built once for the result.
+    """
+    def __init__(self, license_dic, fuzzy_mode=True):
+        self.license_dic = license_dic
+        self.fuzzy_mode = fuzzy_mode
+        self.vendor_row_list = []
+        self.vendor_dic_list = []
+        self.feature_row_list = []
+        self.feature_dic_list = []
+        self.usage_row_list = []
+        self.server_vendor_row_dic = {}
+        self.vendor_feature_row_dic = {}
+        self.feature_usage_row_dic = {}
+
+        # {'server'/'vendor': {name: vendor row set}, 'feature': {name: feature row set}}.
+        self.index_dic = {'server': {}, 'vendor': {}, 'feature': {}}
+        # {usage_attribute: {value: usage row set}}, built on first use.
+        self.usage_index_dic = {}
+        # {key: [(lowercase value, value), ...]}, built on first use.
+        self.search_table_dic = {}
+        # Feature rows whose in_use is "0".
+        self.not_used_feature_row_set = set()
+
+        for (license_server, server_dic) in license_dic.items():
+            self.server_vendor_row_dic[license_server] = []
+
+            for (vendor_daemon, vendor_dic) in server_dic['vendor_daemon'].items():
+                vendor_row = len(self.vendor_row_list)
+                self.vendor_row_list.append((license_server, vendor_daemon))
+                self.vendor_dic_list.append(vendor_dic)
+                self.server_vendor_row_dic[license_server].append(vendor_row)
+                self.vendor_feature_row_dic[vendor_row] = []
+                self.index_dic['server'].setdefault(license_server, set()).add(vendor_row)
+                self.index_dic['vendor'].setdefault(vendor_daemon, set()).add(vendor_row)
+
+                for (feature, feature_dic) in vendor_dic['feature'].items():
+                    feature_row = len(self.feature_row_list)
+                    self.feature_row_list.append((vendor_row, feature))
+                    self.feature_dic_list.append(feature_dic)
+                    self.vendor_feature_row_dic[vendor_row].append(feature_row)
+                    self.index_dic['feature'].setdefault(feature, set()).add(feature_row)
+                    usage_row = len(self.usage_row_list)
+                    self.usage_row_list.extend([(feature_row, i) for i in range(len(feature_dic['in_use_info']))])
+                    self.feature_usage_row_dic[feature_row] = range(usage_row, len(self.usage_row_list))
+
+                    if feature_dic['in_use'] == '0':
+                        self.not_used_feature_row_set.add(feature_row)
+
+    def get_usage_index(self, usage_attribute):
+        """
+        Get (and build) inverted index {value: usage row set} of specified checkout attribute.
+        """
+        if usage_attribute not in self.usage_index_dic:
+            usage_index = {}
+
+            for (feature_row, feature_dic) in enumerate(self.feature_dic_list):
+                for (usage_row, usage_dic) in zip(self.feature_usage_row_dic[feature_row], feature_dic['in_use_info']):
+                    usage_index.setdefault(usage_dic[usage_attribute], set()).add(usage_row)
+
+            self.usage_index_dic[usage_attribute] = usage_index
+
+        return self.usage_index_dic[usage_attribute]
+
+    def search_value(self, key, value_index, pattern_list):
+        """
+        Get values of value_index (an inverted index) which contain any pattern, case-insensitive.
+        """
+        if key not in self.search_table_dic:
+            self.search_table_dic[key] = [(value.lower(), value) for value in value_index.keys()]
+
+        lower_pattern_list = [pattern.lower() for pattern in pattern_list]
+
+        return [value for (lower_value, value) in self.search_table_dic[key] if any([pattern in lower_value for pattern in lower_pattern_list])]
+
+    def select_row(self, key, value_index, value_list, candidate_row_set):
+        """
+        Select rows of candidate_row_set with exact values ("ALL" for all), or fuzzy values if there is no exact match.
+        """
+        if 'ALL' in value_list:
+            return set(candidate_row_set)
+
+        row_set = set().union(*[value_index[value] for value in value_list if value in value_index]) & candidate_row_set
+
+        if (not row_set) and self.fuzzy_mode:
+            row_set = set().union(*[value_index[value] for value in self.search_value(key, value_index, value_list)]) & candidate_row_set
+
+        return row_set
+
+    def run(self, server_list=[], vendor_list=[], feature_list=[], submit_host_list=[], execute_host_list=[], user_list=[], show_mode='ALL'):
+        """
+        Filter the snapshot, get a new license_dic (with the same format and filter semantics as FilterLicenseDic.run).
+        """
+        if not any([server_list, vendor_list, feature_list, submit_host_list, execute_host_list, user_list, (show_mode != 'ALL')]):
+            return self.license_dic
+
+        server_set = set(self.license_dic.keys())
+        vendor_row_set = set(range(len(self.vendor_row_list)))
+        feature_row_set = set(range(len(self.feature_row_list)))
+        usage_row_set = None
+        expires_feature_row_set = None
+        show_expires_dic = None
+
+        # Servers/vendors without matched features are only dropped after feature/usage/show_mode filters.
+        prune_mark = False
+
+        if server_list:
+            if 'ALL' not in server_list:
+                server_set &= set(server_list)
+                vendor_row_set = set().union(*[self.index_dic['server'].get(server, set()) for server in server_set])
+
+        if vendor_list:
+            if 'ALL' not in vendor_list:
+                vendor_row_set &= set().union(*[self.index_dic['vendor'][vendor] for vendor in vendor_list if vendor in self.index_dic['vendor']])
+
+            server_set = {self.vendor_row_list[vendor_row][0] for vendor_row in vendor_row_set}
+
+        feature_row_set = {feature_row for vendor_row in vendor_row_set for feature_row in self.vendor_feature_row_dic[vendor_row]}
+
+        if feature_list:
+            feature_row_set = self.select_row('feature', self.index_dic['feature'], feature_list, feature_row_set)
+            expires_feature_row_set = feature_row_set
+            prune_mark = True
+
+        for (usage_attribute, value_list) in [('submit_host', submit_host_list), ('execute_host', execute_host_list), ('user', user_list)]:
+            if value_list:
+                if usage_row_set is None:
+                    usage_row_set = {usage_row for feature_row in feature_row_set for usage_row in self.feature_usage_row_dic[feature_row]}
+
+                usage_row_set = self.select_row(usage_attribute, self.get_usage_index(usage_attribute), value_list, usage_row_set)
+                feature_row_set = {self.usage_row_list[usage_row][0] for usage_row in usage_row_set}
+                prune_mark = True
+
+        if show_mode != 'ALL':
+            show_expires_dic = {}
+            expire_mark_dic = {}
+
+            if show_mode == 'IN_USE':
+                feature_row_set -= self.not_used_feature_row_set
+            elif show_mode == 'NOT_USED':
+                feature_row_set &= self.not_used_feature_row_set
+
+            for feature_row in feature_row_set:
+                (vendor_row, feature) = self.feature_row_list[feature_row]
+                feature_expire_dic_list = self.vendor_dic_list[vendor_row]['expires'].get(feature, [])
+                expire_dic_list = []
+
+                if show_mode in ['IN_USE', 'NOT_USED']:
+                    expire_dic_list = list(feature_expire_dic_list)
+                elif show_mode in ['Expired', 'Nearly_Expired', 'Unexpired']:
+                    for expire_dic in feature_expire_dic_list:
+                        if expire_dic['expires'] not in expire_mark_dic:
+                            expire_mark_dic[expire_dic['expires']] = check_expire_date(expire_dic['expires'])
+
+                        expire_mark = expire_mark_dic[expire_dic['expires']]
+
+                        if (show_mode == 'Expired') and (expire_mark == -1):
+                            expire_dic_list.append(expire_dic)
+                        elif (show_mode == 'Nearly_Expired') and ((expire_mark != -1) and (expire_mark != 0)):
+                            expire_dic_list.append(expire_dic)
+                        elif (show_mode == 'Unexpired') and (expire_mark == 0):
+                            expire_dic_list.append(expire_dic)
+
+                    if not expire_dic_list:
+                        continue
+
+                show_expires_dic[feature_row] = expire_dic_list
+
+            feature_row_set = set(show_expires_dic.keys())
+            prune_mark = True
+
+        return self.gen_license_dic(server_set, vendor_row_set, feature_row_set, usage_row_set, expires_feature_row_set, show_expires_dic, prune_mark)
+
+    def gen_license_dic(self, server_set, vendor_row_set, feature_row_set, usage_row_set, expires_feature_row_set, show_expires_dic, prune_mark):
+        """
+        Build the nested license_dic of selected rows.
+        usage_row_set          : None for all checkouts of selected features.
+        expires_feature_row_set: None for all expires of selected vendors, or expires of these features.
+        show_expires_dic       : None, or {feature_row: expire_dic_list} which replaces the expires.
+        """
+        feature_usage_row_dic = {}
+
+        if usage_row_set is not None:
+            for usage_row in sorted(usage_row_set):
+                feature_usage_row_dic.setdefault(self.usage_row_list[usage_row][0], []).append(usage_row)
+
+        new_license_dic = {}
+
+        for (license_server, server_dic) in self.license_dic.items():
+            if license_server not in server_set:
+                continue
+
+            new_server_dic = {'license_files': server_dic['license_files'],
+                              'license_server_status': server_dic['license_server_status'],
+                              'license_server_version': server_dic['license_server_version'],
+                              'vendor_daemon': {}}
+
+            for vendor_row in self.server_vendor_row_dic[license_server]:
+                if vendor_row not in vendor_row_set:
+                    continue
+
+                vendor_dic = self.vendor_dic_list[vendor_row]
+                selected_feature_row_list = [feature_row for feature_row in self.vendor_feature_row_dic[vendor_row] if feature_row in feature_row_set]
+
+                if prune_mark and (not selected_feature_row_list):
+                    continue
+
+                # Vendor daemon is not changed by server/vendor filters.
+                if (not prune_mark) and (usage_row_set is None) and (expires_feature_row_set is None) and (show_expires_dic is None):
+                    new_server_dic['vendor_daemon'][self.vendor_row_list[vendor_row][1]] = vendor_dic
+                    continue
+
+                new_vendor_dic = {'vendor_daemon_status': vendor_dic['vendor_daemon_status'],
+                                  'vendor_daemon_version': vendor_dic['vendor_daemon_version'],
+                                  'feature': {},
+                                  'expires': vendor_dic['expires']}
+
+                for feature_row in selected_feature_row_list:
+                    feature = self.feature_row_list[feature_row][1]
+                    feature_dic = vendor_dic['feature'][feature]
+
+                    if usage_row_set is not None:
+                        index_list = [self.usage_row_list[usage_row][1] for usage_row in feature_usage_row_dic[feature_row]]
+                        feature_dic = {'issued': feature_dic['issued'],
+                                       'in_use': feature_dic['in_use'],
+                                       'in_use_info_string': [feature_dic['in_use_info_string'][i] for i in index_list],
+                                       'in_use_info': [feature_dic['in_use_info'][i] for i in index_list]}
+
+                    new_vendor_dic['feature'][feature] = feature_dic
+
+                if show_expires_dic is not None:
+                    new_vendor_dic['expires'] = {self.feature_row_list[feature_row][1]: show_expires_dic[feature_row] for feature_row in selected_feature_row_list}
+                elif expires_feature_row_set is not None:
+                    new_vendor_dic['expires'] = {self.feature_row_list[feature_row][1]: vendor_dic['expires'][self.feature_row_list[feature_row][1]] for feature_row in self.vendor_feature_row_dic[vendor_row] if (feature_row in expires_feature_row_set) and (self.feature_row_list[feature_row][1] in vendor_dic['expires'])}
+
+                new_server_dic['vendor_daemon'][self.vendor_row_list[vendor_row][1]] = new_vendor_dic
+
+            if prune_mark and (not new_server_dic['vendor_daemon']):
+                continue
+
+            new_license_dic[license_server] = new_server_dic
+
+        return new_license_dic
+
+
+class LicenseJobIndex():
+    """
+    Correlate license checkouts (in_use_info items of license_dic) with the LSF jobs of one bjobs snapshot
+    (see common_lsf.get_bjobs_info).
+    The owning job has the same user, runs on the checkout execute_host, is submitted from the checkout submit_host
+    (if lmstat shows it) and is submitted before the checkout start time.
+    Jobs are indexed as {(user, execute_host): sorted submit seconds}, so every checkout is resolved with a binary search.
+    """
+    # bjobs SUBMIT_TIME like "Oct 26 17:43" and lmstat start time like "Thu 5/14 9:00", groups are month/day/hour/minute.
+    submit_time_compile = re.compile(r'^\s*([A-Z][a-z]{2})\s+(\d+)\s+(\d+):(\d+)\s*$')
+    start_time_compile = re.compile(r'^\s*\S+\s+(\d+)/(\d+)\s+(\d+):(\d+)\s*$')
+    month_dic = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+    def __init__(self, job_dic, compare_second=''):
+        self.compare_second = int(compare_second) if compare_second else int(time.time())
+        self.compare_year = datetime.date.fromtimestamp(self.compare_second).year
+        # {(user, execute_host): [(submit_second, jobid, from_host), ...]}, sorted by submit_second.
+        self.job_index_dic = {}
+        # {(user, execute_host): [submit_second, ...]}, the bisect keys of self.job_index_dic.
+        self.submit_second_index_dic = {}
+        self.second_cache_dic = {}
+
+        for (i, jobid) in enumerate(job_dic.get('JOBID', [])):
+            submit_second = self.get_second(job_dic['SUBMIT_TIME'][i], self.submit_time_compile)
+
+            if submit_second is None:
+                continue
+
+            for execute_host in self.get_execute_host_list(job_dic['EXEC_HOST'][i]):
+                self.job_index_dic.setdefault((job_dic['USER'][i], execute_host), []).append((submit_second, jobid, job_dic['FROM_HOST'][i]))
+
+        for (key, job_list) in self.job_index_dic.items():
+            job_list.sort(key=lambda job: job[0])
+            self.submit_second_index_dic[key] = [job[0] for job in job_list]
+
+    def get_execute_host_list(self, exec_host):
+        """
+        Get host names (and short host names) of bjobs EXEC_HOST, like "2*cmp01:cmp02.example.com".
+        """
+        execute_host_list = []
+
+        for execute_host in exec_host.split(':'):
+            # Remove slot number, like "2*cmp01".
+            execute_host = execute_host.strip().rpartition('*')[2]
+
+            if execute_host and (execute_host not in execute_host_list):
+                execute_host_list.append(execute_host)
+
+                short_execute_host = execute_host.split('.')[0]
+
+                if short_execute_host not in execute_host_list:
+                    execute_host_list.append(short_execute_host)
+
+        return execute_host_list
+
+    def get_second(self, time_string, time_compile):
+        """
+        Switch time string without year (bjobs SUBMIT_TIME or lmstat start time) into seconds, the latest year which is
+        not after self.compare_second is used. Return None for invalid (or "N/A"/"RESERVATION") time string.
+        """
+        if time_string not in self.second_cache_dic:
+            second = None
+            my_match = time_compile.match(time_string)
+
+            if my_match and (my_match.group(1) in self.month_dic or my_match.group(1).isdigit()):
+                month = self.month_dic[my_match.group(1)] if my_match.group(1) in self.month_dic else int(my_match.group(1))
+                for year in [self.compare_year, self.compare_year - 1]:
+                    second = int(time.mktime((year, month, int(my_match.group(2)), int(my_match.group(3)), int(my_match.group(4)), 0, 0, 0, -1)))
+
+                    if second <= self.compare_second:
+                        break
+
+            self.second_cache_dic[time_string] = second
+
+        return self.second_cache_dic[time_string]
+
+    def get_job_list(self, usage_dic):
+        """
+        Get jobids of the candidate owning jobs of a checkout (usage_dic on in_use_info), the latest submitted job first.
+        """
+        start_second = self.get_second(usage_dic.get('start_time', ''), self.start_time_compile)
+        jobid_list = []
+
+        if start_second is None:
+            return jobid_list
+
+        for execute_host in [usage_dic.get('execute_host', ''), usage_dic.get('execute_host', '').split('.')[0]]:
+            key = (usage_dic.get('user', ''), execute_host)
+
+            if key in self.job_index_dic:
+                submit_host = usage_dic.get('submit_host', 'N/A')
+
+                for (submit_second, jobid, from_host) in reversed(self.job_index_dic[key][:bisect.bisect_right(self.submit_second_index_dic[key], start_second)]):
+                    if (submit_host == 'N/A') or (submit_host == from_host):
+                        jobid_list.append(jobid)
+
+                break
+
+        return jobid_list
+
+    def get_job(self, usage_dic):
+        """
+        Get the owning job of a checkout, "" for no job and "*" for more than one candidate jobs.
+        """
+        jobid_list = self.get_job_list(usage_dic)
+
+        if len(jobid_list) == 0:
+            return ''
+        elif len(jobid_list) == 1:
+            return jobid_list[0]
+        else:
+            return '*'
+
+
 def switch_start_time(start_time, compare_second='', format=''):
     """
     Switch start_time format from "%a %m/%d %H:%M" to specified format (or start_second by default).
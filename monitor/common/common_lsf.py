@@ -1,7 +1,9 @@
 import os
 import re
 import sys
+import stat
 import time
+import hashlib
 import datetime
 
 if 'LSFMONITOR_INSTALL_PATH' in os.environ:
@@ -9,6 +11,130 @@ if 'LSFMONITOR_INSTALL_PATH' in os.environ:
 
 from common import common
 
+# Field of lsb.acct record, it is a quoted string or a number.
+LSB_ACCT_FIELD_COMPILE = re.compile(r'"((?:[^"]|"")*)"|(\S+)')
+
+# Shared LSF command output cache (written by tools/lsf_cache), see set_command_cache().
+COMMAND_CACHE_DIC = {'cache_dir': '', 'ttl': 0, 'owner_uid_list': [0, ]}
+
+
+def set_command_cache(cache_dir, ttl=60, db_path=''):
+    """
+    Read LSF command output from cache_dir (kept current by tools/lsf_cache) when it is fresher than ttl seconds,
+    otherwise the command is run directly. ttl 0 disables the cache.
+    cache_dir is under the world-writable db_path, so cache_dir and the cache files are only trusted if they are owned by
+    the owner of db_path (or root) and are not group/world writable.
+    """
+    COMMAND_CACHE_DIC['cache_dir'] = cache_dir
+    COMMAND_CACHE_DIC['ttl'] = ttl
+    COMMAND_CACHE_DIC['owner_uid_list'] = [0, ]
+
+    if db_path:
+        try:
+            COMMAND_CACHE_DIC['owner_uid_list'].append(os.stat(db_path).st_uid)
+        except OSError:
+            pass
+
+
+def is_trusted_cache_path(path, owner_uid_list, is_dir=False):
+    """
+    Check path is a real directory/file (not a symlink) owned by owner_uid_list, and not group/world writable.
+    Return the lstat result of path if it is trusted, or None.
+    """
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return None
+
+    if is_dir and (not stat.S_ISDIR(path_stat.st_mode)):
+        return None
+    elif (not is_dir) and (not stat.S_ISREG(path_stat.st_mode)):
+        return None
+    elif (path_stat.st_uid not in owner_uid_list) or (path_stat.st_mode & 0o022):
+        return None
+
+    return path_stat
+
+
+def get_command_cache_file(cache_dir, command):
+    """
+    Get cache file path of LSF command, the blanks of command are not significant.
+    """
+    command = ' '.join(command.split())
+    command_name = re.sub(r'[^\w.-]+', '_', command)[:64]
+    command_hash = hashlib.md5(command.encode('utf-8')).hexdigest()[:12]
+
+    return str(cache_dir) + '/' + str(command_name) + '.' + str(command_hash) + '.out'
+
+
+def get_fresh_command_cache_file(command):
+    """
+    Get cache file of LSF command if the cache is enabled, trusted and fresh, or return ''.
+    """
+    if COMMAND_CACHE_DIC['cache_dir'] and (COMMAND_CACHE_DIC['ttl'] > 0):
+        cache_file = get_command_cache_file(COMMAND_CACHE_DIC['cache_dir'], command)
+
+        if is_trusted_cache_path(COMMAND_CACHE_DIC['cache_dir'], COMMAND_CACHE_DIC['owner_uid_list'], is_dir=True):
+            cache_file_stat = is_trusted_cache_path(cache_file, COMMAND_CACHE_DIC['owner_uid_list'])
+
+            if cache_file_stat and (time.time() - cache_file_stat.st_mtime <= COMMAND_CACHE_DIC['ttl']):
+                return cache_file
+
+    return ''
+
+
+def save_command_cache(cache_dir, command, stdout):
+    """
+    Save LSF command output into cache_dir, the cache file is replaced atomically so readers never see a partial one.
+    """
+    cache_file = get_command_cache_file(cache_dir, command)
+    tmp_cache_file = str(cache_file) + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tmp_cache_file, 'wb') as CF:
+        CF.write(stdout)
+
+    os.chmod(tmp_cache_file, 0o644)
+    os.replace(tmp_cache_file, cache_file)
+
+    return cache_file
+
+
+def run_lsf_command(command):
+    """
+    Same as common.run_command(command), but read the shared command cache first.
+    """
+    cache_file = get_fresh_command_cache_file(command)
+
+    if cache_file:
+        try:
+            with open(cache_file, 'rb') as CF:
+                return 0, CF.read(), b''
+        except OSError:
+            pass
+
+    return common.run_command(command)
+
+
+def run_lsf_command_for_lines(command):
+    """
+    Same as common.run_command_for_lines(command), but read the shared command cache first.
+    """
+    cache_file = get_fresh_command_cache_file(command)
+
+    if cache_file:
+        try:
+            CF = open(cache_file, 'rb')
+        except OSError:
+            CF = None
+
+        if CF:
+            with CF:
+                yield from CF
+
+            return
+
+    yield from common.run_command_for_lines(command)
+
 
 def get_command_dict(command):
     """
@@ -17,7 +143,7 @@ def get_command_dict(command):
     """
     my_dic = {}
     key_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
     i = -1
 
     for line in str(stdout, 'utf-8').split('\n'):
@@ -55,6 +181,103 @@ def get_command_dict(command):
     return my_dic
 
 
+def switch_command_number(value, kind='int'):
+    """
+    Switch command output value into number with specified kind.
+    int    : "12" -> 12
+    float  : "12.5" -> 12.5
+    percent: "37%" -> 37.0
+    mem    : "12.3G" -> 12595.2 (MB, unit M/G/T)
+    Return None for invalid value (like "-", "N/A").
+    """
+    value = str(value)
+
+    if kind == 'int':
+        if value.isdigit():
+            return int(value)
+    elif kind == 'float':
+        if re.match(r'^\d+(\.\d+)?$', value):
+            return float(value)
+    elif kind == 'percent':
+        if re.match(r'^\d+(\.\d+)?%$', value):
+            return float(value[:-1])
+    elif kind == 'mem':
+        mem_match = re.match(r'^(\d+(\.\d+)?)([MGT])$', value)
+
+        if mem_match:
+            mem = float(mem_match.group(1))
+
+            if mem_match.group(3) == 'G':
+                mem = mem*1024
+            elif mem_match.group(3) == 'T':
+                mem = mem*1024*1024
+
+            return mem
+
+    return None
+
+
+class CommandTable(dict):
+    """
+    get_command_dict() result ({title: [value, ...], ...}, it is still a dict), with:
+    row_index_dic: {index_key value (like host name): row index}, the first row wins on duplicated names.
+    number_dic   : {title: [number or None, ...]}, numeric columns parsed once with switch_command_number().
+    So the samplers can join bhosts/lshosts/lsload/bqueues information in O(n) instead of list scans.
+    """
+    def __init__(self, command_dic=None, index_key='', number_key_dic=None):
+        super().__init__(command_dic or {})
+        self.index_key = index_key
+        self.row_index_dic = {}
+        self.number_dic = {}
+
+        if index_key in self:
+            for (i, name) in enumerate(self[index_key]):
+                self.row_index_dic.setdefault(name, i)
+
+        for (key, kind) in (number_key_dic or {}).items():
+            if key in self:
+                self.number_dic[key] = [switch_command_number(value, kind) for value in self[key]]
+
+    def get_row_index(self, name):
+        """
+        Get row index of specified name, return -1 if it is not found.
+        """
+        return self.row_index_dic.get(name, -1)
+
+    def get_value(self, name, key, default=''):
+        """
+        Get original (string) value of specified name and key.
+        """
+        i = self.row_index_dic.get(name, -1)
+
+        if (i < 0) or (key not in self):
+            return default
+
+        return self[key][i]
+
+    def get_number(self, name, key, default=None):
+        """
+        Get pre-parsed number of specified name and key, return default for unknown name or invalid value.
+        """
+        i = self.row_index_dic.get(name, -1)
+
+        if (i < 0) or (key not in self.number_dic):
+            return default
+
+        value = self.number_dic[key][i]
+
+        if value is None:
+            return default
+
+        return value
+
+    def get_number_sum(self, key):
+        """
+        Sum of all valid numbers of specified key.
+        """
+        return sum([value for value in self.number_dic.get(key, []) if value is not None])
+
+
 def get_bqueues_info(command='bqueues -w'):
     """
     Get bqueues info with command "bqueues".
@@ -63,7 +286,7 @@ def get_bqueues_info(command='bqueues -w'):
     normal           30  Open:Active       -    -    -    -     2     0     2     0    0     0
     ====
     """
-    bqueues_dic = get_command_dict(command)
+    bqueues_dic = CommandTable(get_command_dict(command), 'QUEUE_NAME', {'NJOBS': 'int', 'PEND': 'int', 'RUN': 'int', 'SUSP': 'int'})
     return bqueues_dic
 
 
@@ -75,7 +298,7 @@ def get_bhosts_info(command='bhosts -w'):
     cmp01              ok              -       4    2        2    0      0        0
     ====
     """
-    bhosts_dic = get_command_dict(command)
+    bhosts_dic = CommandTable(get_command_dict(command), 'HOST_NAME', {'MAX': 'int', 'NJOBS': 'int', 'RUN': 'int', 'SSUSP': 'int', 'USUSP': 'int'})
     return bhosts_dic
 
 
@@ -89,7 +312,7 @@ def get_bjobs_info(command='bjobs -u all -w'):
     """
     bjobs_dic = {}
     key_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
     i = -1
 
     for line in str(stdout, 'utf-8').split('\n'):
@@ -139,7 +362,7 @@ def get_bhosts_load_info(command='bhosts -l'):
     load_info_mark = False
     hostname = ''
     head_list = []
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -194,7 +417,7 @@ def get_lshosts_info(command='lshosts -w'):
     cmp01                         X86_64     Intel_Platinum  15.0     4     1.7_g   1.9_g   Yes    (mg)
     ====
     """
-    lshosts_dic = get_command_dict(command)
+    lshosts_dic = CommandTable(get_command_dict(command), 'HOST_NAME', {'ncpus': 'int', 'maxmem': 'mem'})
     return lshosts_dic
 
 
@@ -206,7 +429,7 @@ def get_lsload_info(command='lsload -l'):
     cmp01                 ok      0.7    0.3  0.2    5%    0.0   1     0    7391_m  1.9_g  931_m
     ====
     """
-    lsload_dic = get_command_dict(command)
+    lsload_dic = CommandTable(get_command_dict(command), 'HOST_NAME', {'ut': 'percent', 'mem': 'mem'})
     return lsload_dic
 
 
@@ -230,7 +453,7 @@ def get_lsid_info(command='lsid'):
     tool_version = ''
     cluster = ''
     master = ''
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -256,22 +479,20 @@ def get_lsid_info(command='lsid'):
     return tool, tool_version, cluster, master
 
 
-def get_bjobs_uf_info(command='bjobs -u all -UF', get_lsid_info_command='lsid'):
+def get_bjobs_uf_info(command='bjobs -u all -UF', get_lsid_info_command='lsid', tool='', lsf_unit_for_limits=''):
     """
     Get job information with command "bjobs".
+    tool/lsf_unit_for_limits can be specified by caller (if known) to avoid repeated "lsid"/"badmin showconf" calls.
     """
-    (tool, tool_version, cluster, master) = get_lsid_info(get_lsid_info_command)
     my_dic = {}
 
-    if (tool == 'LSF') or (tool == 'volclava'):
-        my_dic = get_lsf_bjobs_uf_info(command)
-    elif tool == 'openlava':
-        my_dic = get_openlava_bjobs_uf_info(command)
+    for (job, job_dic) in iter_bjobs_uf_info(command, get_lsid_info_command, tool=tool, lsf_unit_for_limits=lsf_unit_for_limits):
+        my_dic[job] = job_dic
 
     return my_dic
 
 
-def get_lsf_bjobs_uf_info(command='bjobs -u all -UF', get_lsf_unit_for_limits_command='badmin showconf mbd all'):
+def get_lsf_bjobs_uf_info(command='bjobs -u all -UF', get_lsf_unit_for_limits_command='badmin showconf mbd all', lsf_unit_for_limits=''):
     """
     Get job info with command "bjobs".
     ====
@@ -329,8 +550,11 @@ def get_lsf_bjobs_uf_info(command='bjobs -u all -UF', get_lsf_unit_for_limits_co
     job = ''
     run_limit_mark = False
     pending_mark = False
-    lsf_unit_for_limits = get_lsf_unit_for_limits(get_lsf_unit_for_limits_command)
-    (return_code, stdout, stderr) = common.run_command(command)
+
+    if not lsf_unit_for_limits:
+        lsf_unit_for_limits = get_lsf_unit_for_limits(get_lsf_unit_for_limits_command)
+
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in stdout.decode('utf-8', 'ignore').split('\n'):
         line = line.strip()
@@ -570,7 +794,7 @@ def get_lsf_bjobs_uf_info(command='bjobs -u all -UF', get_lsf_unit_for_limits_co
     return my_dic
 
 
-def get_openlava_bjobs_uf_info(command='bjobs -u all -UF'):
+def get_openlava_bjobs_uf_info(command='bjobs -u all -UF', lsf_unit_for_limits=''):
     """
     Get job info with command "bjobs".
     ====
@@ -624,8 +848,11 @@ def get_openlava_bjobs_uf_info(command='bjobs -u all -UF'):
     my_dic = {}
     job = ''
     pending_mark = False
-    lsf_unit_for_limits = get_lsf_unit_for_limits()
-    (return_code, stdout, stderr) = common.run_command(command)
+
+    if not lsf_unit_for_limits:
+        lsf_unit_for_limits = get_lsf_unit_for_limits()
+
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -845,6 +1072,380 @@ def get_openlava_bjobs_uf_info(command='bjobs -u all -UF'):
     return my_dic
 
 
+# Compiled patterns for the line-dispatched "bjobs -UF" parser (parse_bjobs_uf_lines).
+# Every pattern is only tried on the lines which have the matching leading token.
+BJOBS_UF_WEEKDAY_LIST = ('Mon ', 'Tue ', 'Wed ', 'Thu ', 'Fri ', 'Sat ', 'Sun ')
+BJOBS_UF_COMPILE_DIC = {'job': re.compile(r'Job <([0-9]+(\[[0-9]+\])?)>'),
+                        'job_name': re.compile(r'Job Name <([^>]+)>'),
+                        'user': re.compile(r'User <([^>]+)>'),
+                        'project': re.compile(r'Project <([^>]+)>'),
+                        'status': re.compile(r'Status <([A-Z]+)'),
+                        'queue': re.compile(r'Queue <([^>]+)>'),
+                        'command': re.compile(r'Command <(.+?\S)>'),
+                        'job_description': re.compile(r'Job Description <([^>]+)>'),
+                        'cwd': re.compile(r'CWD <([^>]+)>'),
+                        'lsf_processors_requested': re.compile(r'.* (\d+) Task\(s\)'),
+                        'openlava_processors_requested': re.compile(r'.* ([1-9][0-9]*) Processors Requested'),
+                        'requested_resources': re.compile(r'Requested Resources <([^>]+)>'),
+                        'span_hosts': re.compile(r'Requested Resources <.*span\[hosts=([1-9][0-9]*).*>'),
+                        'rusage_mem': re.compile(r'Requested Resources <.*rusage\s*\[.*mem=([1-9][0-9]*).*>'),
+                        'specified_hosts': re.compile(r'Specified Hosts <([^>]+)>'),
+                        'lsf_started_on': re.compile(r'(\[\d+\] )?([sS]tarted|[dD]ispatched) \d+ Task\(s\) on Host\(s\) (.+?), Allocated (\d+) Slot\(s\) on Host\(s\)'),
+                        'openlava_started_on': re.compile(r'([sS]tarted|[dD]ispatched) on ([0-9]+ Hosts/Processors )?([^;,]+)'),
+                        'cpu_time': re.compile(r'The CPU time used is (\d+(\.\d+)?) seconds'),
+                        'idle_factor': re.compile(r'IDLE_FACTOR\(cputime/runtime\):\s*(\d+(\.\d+)?);'),
+                        'mem': re.compile(r'[\.\;]\s+MEM:\s*(\d+(\.\d+)?)\s*([KMGT]bytes)'),
+                        'swap': re.compile(r'SWAP:\s*(\d+(\.\d+)?)\s*([KMGT]bytes)'),
+                        'pids': re.compile(r'PIDs:\s+(.+?);'),
+                        'exit_code': re.compile(r'Exited with exit code (\d+)\.'),
+                        'lsf_term_signal': re.compile(r'.*(TERM_.+?): (.+?\.)'),
+                        'openlava_term_signal': re.compile(r'.*TERM_OWNER: (.+?\.)'),
+                        'max_mem': re.compile(r'MAX MEM: (\d+(\.\d+)?) ([KMGT]bytes);\s*AVG MEM: (\d+(\.\d+)?) ([KMGT]bytes)'),
+                        'effective_rusage_mem': re.compile(r'Effective:.*rusage\s*\[.*mem=([1-9][0-9]*)')}
+
+
+def switch_mem_unit(mem, unit):
+    """
+    Switch mem value with unit "Kbytes/Mbytes/Gbytes/Tbytes" or "KB/MB/GB/TB" into "MB".
+    Return the original mem value if the unit is unknown.
+    """
+    if unit in ['Kbytes', 'KB']:
+        return round(float(mem)/1024, 1)
+    elif unit in ['Mbytes', 'MB']:
+        return round(float(mem), 1)
+    elif unit in ['Gbytes', 'GB']:
+        return round(float(mem)*1024, 1)
+    elif unit in ['Tbytes', 'TB']:
+        return round(float(mem)*1024*1024, 1)
+
+    return mem
+
+
+def init_bjobs_uf_job_dic(job):
+    """
+    Get the initial job dict for "bjobs -UF" parsers.
+    """
+    return {'job_info': '',
+            'job_id': job,
+            'job_name': '',
+            'job_description': '',
+            'user': '',
+            'project': '',
+            'status': '',
+            'interactive_mode': 'False',
+            'queue': '',
+            'command': '',
+            'submitted_from': '',
+            'submitted_time': '',
+            'cwd': '',
+            'processors_requested': '1',
+            'requested_resources': '',
+            'span_hosts': '',
+            'rusage_mem': '',
+            'specified_hosts': '',
+            'started_on': '',
+            'started_time': '',
+            'finished_time': '',
+            'exit_code': '',
+            'term_signal': '',
+            'cpu_time': '',
+            'idle_factor': '',
+            'mem': '',
+            'swap': '',
+            'run_limit': [],
+            'pids': [],
+            'max_mem': '',
+            'avg_mem': '',
+            'pending_reasons': []}
+
+
+def parse_bjobs_uf_lines(line_iter, tool='LSF', lsf_unit_for_limits='MB'):
+    """
+    Parse "bjobs -UF" output lines (str, from any iterable) into job records.
+    Every line is dispatched on its leading token ("Job <", "<time>: Submitted from", "MAX MEM", ...), so only
+    the patterns for that kind of line are tried.
+    It is a generator, yield (job, job_dic) once the record of a job is complete, job_dic is the same as
+    get_lsf_bjobs_uf_info()/get_openlava_bjobs_uf_info().
+    """
+    compile_dic = BJOBS_UF_COMPILE_DIC
+    openlava_mode = (tool == 'openlava')
+    job = ''
+    job_dic = None
+    job_info_list = []
+    run_limit_mark = False
+    pending_mark = False
+    end_with_newline = True
+
+    for line in line_iter:
+        end_with_newline = line.endswith('\n')
+        line = line.strip()
+
+        if line:
+            handled = True
+
+            if line.startswith('Job <') and compile_dic['job'].match(line):
+                if job and line.startswith('Job <' + str(job) + '> is not found'):
+                    continue
+
+                if job_dic is not None:
+                    job_dic['job_info'] = '\n'.join(job_info_list)
+                    yield job, job_dic
+
+                job = compile_dic['job'].match(line).group(1)
+                job_dic = init_bjobs_uf_job_dic(job)
+                job_info_list = []
+
+                for key in ['job_name', 'job_description', 'user', 'project', 'status', 'queue', 'command']:
+                    my_match = compile_dic[key].search(line)
+
+                    if my_match:
+                        job_dic[key] = my_match.group(1)
+
+                if 'Interactive pseudo-terminal shell mode' in line:
+                    job_dic['interactive_mode'] = 'True'
+            elif job_dic is None:
+                handled = False
+            elif line.startswith(BJOBS_UF_WEEKDAY_LIST) and (': ' in line):
+                # Event line, "<time>: <event>".
+                (event_time, event) = line.split(': ', 1)
+
+                if event.startswith('Submitted from host <'):
+                    job_dic['submitted_time'] = event_time
+                    job_dic['submitted_from'] = event[21:event.find('>', 21)]
+
+                    for key in ['cwd', 'requested_resources', 'span_hosts', 'specified_hosts']:
+                        my_match = compile_dic[key].search(event)
+
+                        if my_match:
+                            job_dic[key] = my_match.group(1)
+
+                    if openlava_mode:
+                        my_match = compile_dic['openlava_processors_requested'].match(event)
+                    else:
+                        my_match = compile_dic['lsf_processors_requested'].match(event)
+
+                    if my_match:
+                        job_dic['processors_requested'] = my_match.group(1)
+
+                    my_match = compile_dic['rusage_mem'].search(event)
+
+                    if my_match:
+                        job_dic['rusage_mem'] = switch_mem_unit(my_match.group(1), lsf_unit_for_limits)
+                elif event.startswith('Resource usage collected'):
+                    for key in ['cpu_time', 'idle_factor']:
+                        my_match = compile_dic[key].search(event)
+
+                        if my_match:
+                            job_dic[key] = my_match.group(1)
+
+                    if not job_dic['mem']:
+                        my_match = compile_dic['mem'].search(event)
+
+                        if my_match:
+                            job_dic['mem'] = switch_mem_unit(my_match.group(1), my_match.group(3))
+
+                    my_match = compile_dic['swap'].search(event)
+
+                    if my_match:
+                        job_dic['swap'] = switch_mem_unit(my_match.group(1), my_match.group(3))
+
+                    pids_list = compile_dic['pids'].findall(event)
+
+                    if pids_list:
+                        job_dic['pids'] = ' '.join(pids_list).split()
+                elif event.startswith(('Done successfully', 'Exited', 'Termination request issued')):
+                    job_dic['finished_time'] = event_time
+                    my_match = compile_dic['exit_code'].search(event)
+
+                    if my_match:
+                        job_dic['exit_code'] = my_match.group(1)
+                else:
+                    if openlava_mode:
+                        my_match = compile_dic['openlava_started_on'].match(event)
+                    else:
+                        my_match = compile_dic['lsf_started_on'].match(event)
+
+                    if my_match:
+                        job_dic['started_time'] = event_time
+                        started_host = my_match.group(3)
+                        started_host = re.sub(r'[<>]', '', started_host)
+                        started_host = re.sub(r'\d+\*', '', started_host)
+                        job_dic['started_on'] = started_host
+                    elif 'TERM_' in event:
+                        if openlava_mode:
+                            my_match = compile_dic['openlava_term_signal'].match(line)
+                        else:
+                            my_match = compile_dic['lsf_term_signal'].match(line)
+
+                        if my_match:
+                            job_dic['term_signal'] = my_match.group(1)
+                        else:
+                            handled = False
+                    else:
+                        handled = False
+            elif line.startswith('MAX MEM:'):
+                my_match = compile_dic['max_mem'].match(line)
+
+                if my_match:
+                    job_dic['max_mem'] = switch_mem_unit(my_match.group(1), my_match.group(3))
+                    job_dic['avg_mem'] = switch_mem_unit(my_match.group(4), my_match.group(6))
+                else:
+                    handled = False
+            elif line.startswith('Effective:') and (not openlava_mode) and (not job_dic['rusage_mem']):
+                my_match = compile_dic['effective_rusage_mem'].match(line)
+
+                if my_match:
+                    job_dic['rusage_mem'] = switch_mem_unit(my_match.group(1), lsf_unit_for_limits)
+                else:
+                    handled = False
+            elif 'TERM_' in line:
+                if openlava_mode:
+                    my_match = compile_dic['openlava_term_signal'].match(line)
+                else:
+                    my_match = compile_dic['lsf_term_signal'].match(line)
+
+                if my_match:
+                    job_dic['term_signal'] = my_match.group(1)
+                else:
+                    handled = False
+            else:
+                handled = False
+
+            # Multi-line sections, "RUNLIMIT" and "PENDING REASONS:" values are on the next line.
+            if (not handled) and (job_dic is not None):
+                if run_limit_mark:
+                    job_dic['run_limit'].append(line)
+                    run_limit_mark = False
+
+                if pending_mark:
+                    job_dic['pending_reasons'].append(line)
+                    pending_mark = False
+
+                if (not openlava_mode) and line.startswith('RUNLIMIT'):
+                    run_limit_mark = True
+
+                if line.startswith('PENDING REASONS:'):
+                    pending_mark = True
+
+        if job_dic is not None:
+            job_info_list.append(line)
+
+    if job_dic is not None:
+        # Keep the same job_info with get_lsf_bjobs_uf_info(), which splits stdout by "\n".
+        if end_with_newline:
+            job_info_list.append('')
+
+        job_dic['job_info'] = '\n'.join(job_info_list)
+        yield job, job_dic
+
+
+def iter_bjobs_uf_info(command='bjobs -u all -UF', get_lsid_info_command='lsid', tool='', lsf_unit_for_limits=''):
+    """
+    Streaming version of get_bjobs_uf_info().
+    Read the bjobs stdout pipe incrementally and yield (job, job_dic) one by one, so memory stays flat and
+    parsing overlaps with mbatchd output.
+    """
+    if not tool:
+        (tool, tool_version, cluster, master) = get_lsid_info(get_lsid_info_command)
+
+    if tool not in ['LSF', 'volclava', 'openlava']:
+        return
+
+    if not lsf_unit_for_limits:
+        lsf_unit_for_limits = get_lsf_unit_for_limits()
+
+    line_iter = (line.decode('utf-8', 'ignore') for line in run_lsf_command_for_lines(command))
+
+    yield from parse_bjobs_uf_lines(line_iter, tool=tool, lsf_unit_for_limits=lsf_unit_for_limits)
+
+
+def split_lsb_acct_line(line):
+    """
+    Split one lsb.acct record line into fields, string fields are quoted with '"' and '""' is an escaped '"'.
+    """
+    field_list = []
+
+    for (quoted_field, field) in LSB_ACCT_FIELD_COMPILE.findall(line):
+        if field:
+            field_list.append(field)
+        else:
+            field_list.append(quoted_field.replace('""', '"'))
+
+    return field_list
+
+
+def parse_lsb_acct_line(line, lsf_unit_for_limits='MB'):
+    """
+    Parse one "JOB_FINISH" record of LSF accounting file lsb.acct.
+    Return (job, job_dic, finished_second), job_dic has the same keys as get_bjobs_uf_info() (keys which are not on
+    lsb.acct keep the initial value), return None for other records or broken lines.
+    ====
+    "JOB_FINISH" "10.1" 1760680810 1000 1001 33554450 1 1760677207 0 0 1760677209 "user8" "long" "span[hosts=1] rusage[mem=100]" "" "" "login0" "$HOME/work/0" ...
+    ====
+    """
+    if not line.startswith('"JOB_FINISH"'):
+        return None
+
+    try:
+        field_list = split_lsb_acct_line(line)
+        finished_second = int(field_list[2])
+        job = field_list[3]
+        num_asked_hosts = int(field_list[22])
+        i = 23 + num_asked_hosts
+        num_ex_hosts = int(field_list[i])
+        ex_host_list = field_list[i+1:i+1+num_ex_hosts]
+        i += 1 + num_ex_hosts
+
+        # jStatus, hostFactor, jobName, command, 19 lsfRusage fields, mailUser, projectName, exitStatus,
+        # maxNumProcessors, loginShell, timeEvent, idx, maxRMem, maxRSwap ...
+        job_status = int(field_list[i])
+        (job_name, command) = (field_list[i+2], field_list[i+3])
+        cpu_time = float(field_list[i+4]) + float(field_list[i+5])
+        (project, exit_status, job_index) = (field_list[i+24], int(field_list[i+25]), int(field_list[i+29]))
+        (max_mem, max_swap) = (int(field_list[i+30]), int(field_list[i+31]))
+    except (IndexError, ValueError):
+        return None
+
+    if job_index > 0:
+        job = f'{job}[{job_index}]'
+
+    job_dic = init_bjobs_uf_job_dic(job)
+    job_dic['job_name'] = job_name
+    job_dic['user'] = field_list[11]
+    job_dic['project'] = project
+    job_dic['status'] = 'DONE' if (job_status == 64) else 'EXIT'
+    job_dic['queue'] = field_list[12]
+    job_dic['command'] = command
+    job_dic['submitted_from'] = field_list[16]
+    job_dic['submitted_time'] = time.strftime('%a %b %d %H:%M:%S', time.localtime(int(field_list[7])))
+    job_dic['cwd'] = field_list[17]
+    job_dic['processors_requested'] = field_list[6]
+    job_dic['requested_resources'] = field_list[13]
+    job_dic['started_on'] = ' '.join(dict.fromkeys(ex_host_list))
+    job_dic['finished_time'] = time.strftime('%a %b %d %H:%M:%S', time.localtime(finished_second))
+    job_dic['cpu_time'] = str(round(cpu_time, 2))
+
+    if int(field_list[10]) > 0:
+        job_dic['started_time'] = time.strftime('%a %b %d %H:%M:%S', time.localtime(int(field_list[10])))
+
+    if job_dic['status'] == 'EXIT':
+        job_dic['exit_code'] = str(exit_status >> 8)
+
+    # Switch rusage_mem (with LSF_UNIT_FOR_LIMITS) and maxRMem/maxRSwap (KB) into "MB".
+    my_match = re.search(r'rusage\s*\[.*mem=([1-9][0-9]*)', job_dic['requested_resources'])
+
+    if my_match:
+        job_dic['rusage_mem'] = switch_mem_unit(my_match.group(1), lsf_unit_for_limits)
+
+    if max_mem > 0:
+        job_dic['max_mem'] = switch_mem_unit(max_mem, 'KB')
+
+    if max_swap > 0:
+        job_dic['swap'] = switch_mem_unit(max_swap, 'KB')
+
+    return job, job_dic, finished_second
+
+
 def get_host_list(command='bhosts -w'):
     """
     Get host list with command "bhosts".
@@ -887,7 +1488,7 @@ def get_bmgroup_info(command='bmgroup -w -r'):
     group_name_compile = re.compile(r'^\s*GROUP_NAME\s+HOSTS.*$')
     line_compile = re.compile(r'\s*(\S+)\s+(.+?)\s*(\(.*\))?\s*$')
     mark = False
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -904,17 +1505,20 @@ def get_bmgroup_info(command='bmgroup -w -r'):
     return bmgroup_dic
 
 
-def get_queue_host_info(command='bqueues -l', get_hosts_list_command='bhosts -w', get_bmgroup_info_command='bmgroup -w -r'):
+def get_queue_host_info(command='bqueues -l', get_hosts_list_command='bhosts -w', get_bmgroup_info_command='bmgroup -w -r', bmgroup_dic=None, host_list=None):
     """
     Get host info of specified queues with command "bqueues/bmgroup".
+    bmgroup_dic (get_bmgroup_info result) and host_list (get_host_list result) can be specified if they are collected already.
     """
     queue_host_dic = {}
     queue_compile = re.compile(r'^QUEUE:\s*(\S+)\s*$')
     hosts_compile = re.compile(r'^HOSTS:\s*(.*?)\s*$')
     hosts_all_compile = re.compile(r'\ball\b')
     queue = ''
-    (return_code, stdout, stderr) = common.run_command(command)
-    bmgroup_dic = get_bmgroup_info(get_bmgroup_info_command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
+
+    if bmgroup_dic is None:
+        bmgroup_dic = get_bmgroup_info(get_bmgroup_info_command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -930,7 +1534,7 @@ def get_queue_host_info(command='bqueues -l', get_hosts_list_command='bhosts -w'
 
             if hosts_all_compile.search(hosts_string):
                 common.bprint(f'Queue "{queue}" is not well configured, all of the hosts are on the same queue.', level='Warning')
-                queue_host_dic[queue] = get_host_list(get_hosts_list_command)
+                queue_host_dic[queue] = list(host_list) if (host_list is not None) else get_host_list(get_hosts_list_command)
             else:
                 queue_host_dic.setdefault(queue, [])
                 hosts_list = hosts_string.split()
@@ -938,22 +1542,22 @@ def get_queue_host_info(command='bqueues -l', get_hosts_list_command='bhosts -w'
                 for hosts in hosts_list:
                     if re.match(r'\S+/', hosts):
                         host_group_name = re.sub(r'/$', '', hosts)
-                        host_list = []
+                        group_host_list = []
 
                         if host_group_name in bmgroup_dic.keys():
-                            host_list = bmgroup_dic[host_group_name]
+                            group_host_list = bmgroup_dic[host_group_name]
 
-                        if host_list:
-                            queue_host_dic[queue].extend(host_list)
+                        if group_host_list:
+                            queue_host_dic[queue].extend(group_host_list)
                     elif re.match(r'^(\S+)\+\d+$', hosts):
                         my_match = re.match(r'^(\S+)\+\d+$', hosts)
                         host = my_match.group(1)
 
                         if host in bmgroup_dic.keys():
-                            host_list = bmgroup_dic[host]
+                            group_host_list = bmgroup_dic[host]
 
-                            if host_list:
-                                queue_host_dic[queue].extend(host_list)
+                            if group_host_list:
+                                queue_host_dic[queue].extend(group_host_list)
                         else:
                             queue_host_dic[queue].append(host)
                     else:
@@ -992,7 +1596,7 @@ def get_lsf_unit_for_limits(command='badmin showconf mbd all'):
                 'KB': 'KB', 'MB': 'MB', 'GB': 'GB', 'TB': 'TB'}
 
     # Try badmin command (works in LSF).
-    (return_code, stdout, stderr) = common.run_command(command)
+    (return_code, stdout, stderr) = run_lsf_command(command)
 
     for line in str(stdout, 'utf-8').split('\n'):
         line = line.strip()
@@ -1037,34 +1641,46 @@ def get_lsf_unit_for_limits(command='badmin showconf mbd all'):
         return 'KB'
 
 
-def switch_bjobs_uf_time(bjobs_uf_time, format=''):
+def get_bjobs_uf_time_second(bjobs_uf_time):
     """
-    Switch bjobs_uf_time from "%Y %b %d %H:%M:%S" into specified format.
+    Switch bjobs_uf_time ("%a %b %d %H:%M:%S", without year) into seconds, the latest past year is used.
+    Return None if bjobs_uf_time is invalid.
     """
-    new_bjobs_uf_time = bjobs_uf_time
+    if (not bjobs_uf_time) or (bjobs_uf_time == 'N/A'):
+        return None
+
+    # Switch bjobs_uf_time to start_seconds.
+    current_year = datetime.date.today().year
+    bjobs_uf_time_list = bjobs_uf_time.split()
 
-    if bjobs_uf_time and (bjobs_uf_time != 'N/A'):
-        # Switch bjobs_uf_time to start_seconds.
-        current_year = datetime.date.today().year
-        bjobs_uf_time_list = bjobs_uf_time.split()
+    current_seconds = time.time()
 
-        current_seconds = time.time()
+    try:
+        bjobs_uf_time_with_year = str(current_year) + ' ' + str(bjobs_uf_time_list[1]) + ' ' + str(bjobs_uf_time_list[2]) + ' ' + str(bjobs_uf_time_list[3])
+        start_seconds = time.mktime(time.strptime(bjobs_uf_time_with_year, '%Y %b %d %H:%M:%S'))
+    except Exception:
+        return None
+
+    if int(start_seconds) > int(current_seconds):
+        current_year = int(datetime.date.today().year) - 1
         bjobs_uf_time_with_year = str(current_year) + ' ' + str(bjobs_uf_time_list[1]) + ' ' + str(bjobs_uf_time_list[2]) + ' ' + str(bjobs_uf_time_list[3])
 
         try:
             start_seconds = time.mktime(time.strptime(bjobs_uf_time_with_year, '%Y %b %d %H:%M:%S'))
         except Exception:
-            return new_bjobs_uf_time
+            return None
+
+    return int(start_seconds)
 
-        if int(start_seconds) > int(current_seconds):
-            current_year = int(datetime.date.today().year) - 1
-            bjobs_uf_time_with_year = str(current_year) + ' ' + str(bjobs_uf_time_list[1]) + ' ' + str(bjobs_uf_time_list[2]) + ' ' + str(bjobs_uf_time_list[3])
 
-            try:
-                start_seconds = time.mktime(time.strptime(bjobs_uf_time_with_year, '%Y %b %d %H:%M:%S'))
-            except Exception:
-                return new_bjobs_uf_time
+def switch_bjobs_uf_time(bjobs_uf_time, format=''):
+    """
+    Switch bjobs_uf_time from "%Y %b %d %H:%M:%S" into specified format.
+    """
+    new_bjobs_uf_time = bjobs_uf_time
+    start_seconds = get_bjobs_uf_time_second(bjobs_uf_time)
 
+    if start_seconds is not None:
         # Switch start_seconds to expected time format.
         new_bjobs_uf_time = time.strftime(format, time.localtime(start_seconds))
 
@@ -0,0 +1,121 @@
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import numpy as np
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+# Packed RAG chunk store (<prefix>_chunks.pack), written by tools/rag_builder next to <prefix>_chunks.json.
+# File layout: RAG_PACK_MAGIC, chunk number and metadata number (8 bytes each, little-endian unsigned), chunk offsets
+# and metadata offsets (number + 1 uint64 each, relative to the start of their data), chunk texts (utf-8) and metadata
+# (one json per chunk).
+# * The file is memory-mapped read-only, so opening it is constant-time and the pages are shared by all processes
+#   (bmonitor sessions, bsample --analysis) on a host.
+# * Chunk texts and metadata are decoded only when they are fetched by id.
+# * Writers replace the file atomically, readers which already mapped it keep reading the old one.
+RAG_PACK_MAGIC = b'LSFMRAG1'
+RAG_PACK_SUFFIX = '.pack'
+RAG_PACK_HEADER_SIZE = len(RAG_PACK_MAGIC) + 16
+
+
+def get_rag_pack_file(chunks_file):
+    """
+    Get pack file of chunks json file, like db/ai/rag_chunks.json -> db/ai/rag_chunks.pack.
+    """
+    return re.sub(r'\.json$', '', str(chunks_file)) + RAG_PACK_SUFFIX
+
+
+def pack_value_list(value_list):
+    """
+    Get (uint64 offset array, data bytes) of encoded values.
+    """
+    offset_array = np.zeros(len(value_list) + 1, dtype='<u8')
+    offset_array[1:] = np.cumsum([len(value) for value in value_list], dtype=np.uint64)
+
+    return offset_array, b''.join(value_list)
+
+
+def write_rag_pack(pack_file, chunk_list, metadata_list=[]):
+    """
+    Write chunks (and metadata, it is dropped if the number is different from chunks) into pack_file atomically.
+    """
+    if len(metadata_list) != len(chunk_list):
+        metadata_list = []
+
+    (chunk_offset_array, chunk_data) = pack_value_list([str(chunk).encode('utf-8', errors='replace') for chunk in chunk_list])
+    (metadata_offset_array, metadata_data) = pack_value_list([json.dumps(metadata, ensure_ascii=False).encode('utf-8') for metadata in metadata_list])
+    tmp_pack_file = str(pack_file) + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tmp_pack_file, 'wb') as PF:
+        PF.write(RAG_PACK_MAGIC)
+        PF.write(struct.pack('<QQ', len(chunk_list), len(metadata_list)))
+        PF.write(chunk_offset_array.tobytes())
+        PF.write(metadata_offset_array.tobytes())
+        PF.write(chunk_data)
+        PF.write(metadata_data)
+
+    os.chmod(tmp_pack_file, 0o644)
+    os.replace(tmp_pack_file, pack_file)
+
+
+class RagPackSequence():
+    """
+    Read-only sequence of values on a memory-mapped pack, value i is decoded from data[offset[i]:offset[i+1]].
+    It works as the chunk list/metadata list of load_ai_documents (len/index/iterate).
+    """
+    def __init__(self, buffer, offset_array, data_start, decode_function):
+        self.buffer = buffer
+        self.offset_array = offset_array
+        self.data_start = data_start
+        self.decode_function = decode_function
+
+    def __len__(self):
+        return len(self.offset_array) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = int(index)
+
+        if index < 0:
+            index += len(self)
+
+        if (index < 0) or (index >= len(self)):
+            raise IndexError('RAG pack index out of range')
+
+        return self.decode_function(self.buffer[self.data_start + int(self.offset_array[index]):self.data_start + int(self.offset_array[index + 1])])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class RagChunkStore():
+    """
+    Memory-mapped RAG chunk store on pack_file (see write_rag_pack), self.chunks and self.metadata are RagPackSequence.
+    """
+    def __init__(self, pack_file):
+        self.pack_file = pack_file
+
+        with open(pack_file, 'rb') as PF:
+            self.buffer = mmap.mmap(PF.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[:len(RAG_PACK_MAGIC)] != RAG_PACK_MAGIC:
+            raise ValueError(f'"{pack_file}" is not a RAG pack file.')
+
+        (chunk_num, metadata_num) = struct.unpack_from('<QQ', self.buffer, len(RAG_PACK_MAGIC))
+        chunk_offset_array = np.frombuffer(self.buffer, dtype='<u8', count=chunk_num + 1, offset=RAG_PACK_HEADER_SIZE)
+        metadata_offset_array = np.frombuffer(self.buffer, dtype='<u8', count=metadata_num + 1, offset=RAG_PACK_HEADER_SIZE + 8 * (chunk_num + 1))
+        chunk_data_start = RAG_PACK_HEADER_SIZE + 8 * (chunk_num + metadata_num + 2)
+        metadata_data_start = chunk_data_start + int(chunk_offset_array[-1])
+
+        if metadata_data_start + int(metadata_offset_array[-1]) != len(self.buffer):
+            raise ValueError(f'"{pack_file}" is truncated or corrupted.')
+
+        self.chunks = RagPackSequence(self.buffer, chunk_offset_array, chunk_data_start, lambda data: data.decode('utf-8', errors='replace'))
+        self.metadata = RagPackSequence(self.buffer, metadata_offset_array, metadata_data_start, json.loads)
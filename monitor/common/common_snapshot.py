@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import time
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+from common import common
+from common import common_lsf
+
+# Column order of the per-day job database (job/<date>.db), it is also the record order of BjobsUfSnapshot.
+BJOBS_UF_KEY_LIST = ['job', 'job_name', 'job_description', 'user', 'project', 'status', 'interactive_mode', 'queue', 'command', 'submitted_from', 'submitted_time', 'cwd', 'processors_requested', 'requested_resources', 'span_hosts', 'rusage_mem', 'specified_hosts', 'started_on', 'started_time', 'finished_time', 'exit_code', 'term_signal', 'cpu_time', 'idle_factor', 'mem', 'swap', 'run_limit', 'pids', 'max_mem', 'avg_mem', 'pending_reasons', 'job_info']
+
+# Keys which are lists on get_bjobs_uf_info() result, they are saved as space-joined strings.
+BJOBS_UF_LIST_KEY_LIST = ['run_limit', 'pids', 'pending_reasons']
+
+# Jobs finished in this window (seconds) before the high-water mark are still checked with job id, because a job can
+# be reported by bjobs/lsb.acct a little later than the jobs which finished after it.
+FINISHED_JOB_MARK_WINDOW = 600
+
+
+class FinishedJobMark:
+    """
+    Per-cluster high-water mark of the finished jobs which are saved by a sampler (job/user).
+    It records the latest finished time, the jobs finished in FINISHED_JOB_MARK_WINDOW before it, and the lsb.acct
+    (inode, byte offset) which has been read, so every sampling only handles the jobs finished after last sampling.
+    """
+    def __init__(self, mark_file):
+        self.mark_file = mark_file
+        self.finished_second = 0
+        self.job_second_dic = {}
+        self.lsb_acct_inode = None
+        self.lsb_acct_offset = 0
+        self.load()
+
+    def load(self):
+        """
+        Load the mark from mark_file, start from scratch if it is missing or broken.
+        """
+        if not os.path.exists(self.mark_file):
+            return
+
+        try:
+            with open(self.mark_file, 'r') as MF:
+                mark_dic = json.load(MF)
+
+            self.finished_second = int(mark_dic.get('finished_second', 0))
+            self.job_second_dic = {str(job): int(second) for (job, second) in mark_dic.get('job_second_dic', {}).items()}
+            self.lsb_acct_inode = mark_dic.get('lsb_acct_inode', None)
+            self.lsb_acct_offset = int(mark_dic.get('lsb_acct_offset', 0))
+        except Exception as error:
+            common.bprint(f'Failed on loading finished job mark "{self.mark_file}", ignore it: {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+
+    def get_begin_second(self):
+        """
+        Jobs finished before (or on) begin_second are saved already.
+        """
+        return max(self.finished_second - FINISHED_JOB_MARK_WINDOW, 0)
+
+    def is_new(self, job, finished_second):
+        """
+        Check whether the job is not saved yet.
+        """
+        if finished_second is None:
+            return job not in self.job_second_dic
+
+        return (finished_second > self.get_begin_second()) and (job not in self.job_second_dic)
+
+    def update(self, finished_job_snapshot):
+        """
+        Move the mark with the jobs of finished_job_snapshot (after they are saved).
+        """
+        for (i, row) in enumerate(finished_job_snapshot.row_list):
+            finished_second = finished_job_snapshot.finished_second_list[i]
+
+            if finished_second is not None:
+                self.job_second_dic[finished_job_snapshot.get_value(row, 'job')] = finished_second
+                self.finished_second = max(self.finished_second, finished_second)
+
+        if finished_job_snapshot.lsb_acct_offset is not None:
+            self.lsb_acct_inode = finished_job_snapshot.lsb_acct_inode
+            self.lsb_acct_offset = finished_job_snapshot.lsb_acct_offset
+
+        begin_second = self.get_begin_second()
+        self.job_second_dic = {job: second for (job, second) in self.job_second_dic.items() if second > begin_second}
+
+    def save(self):
+        """
+        Save the mark into mark_file (write a temporary file and rename it, so the mark is never half-written).
+        """
+        mark_dic = {'finished_second': self.finished_second,
+                    'job_second_dic': self.job_second_dic,
+                    'lsb_acct_inode': self.lsb_acct_inode,
+                    'lsb_acct_offset': self.lsb_acct_offset}
+        tmp_mark_file = str(self.mark_file) + '.' + str(os.getpid())
+
+        try:
+            with open(tmp_mark_file, 'w') as MF:
+                json.dump(mark_dic, MF)
+
+            os.replace(tmp_mark_file, self.mark_file)
+        except Exception as error:
+            common.bprint(f'Failed on saving finished job mark "{self.mark_file}": {error}', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+
+
+class BjobsUfSnapshot:
+    """
+    Parse-once snapshot of "bjobs -UF" output.
+    One snapshot is collected per sampling cycle and shared by every sampler which needs it (job/user).
+    Every job is saved as one tuple (with BJOBS_UF_KEY_LIST order) instead of a dict, and the finished
+    date of every job is counted only once.
+    Jobs finished before (or on) begin_second are skipped.
+    """
+    def __init__(self, command='bjobs -u all -d -UF', tool='', lsf_unit_for_limits='', begin_second=0):
+        self.command = command
+        self.tool = tool
+        self.lsf_unit_for_limits = lsf_unit_for_limits
+        self.begin_second = begin_second
+        self.key_list = BJOBS_UF_KEY_LIST
+        self.key_index_dic = {key: i for (i, key) in enumerate(self.key_list)}
+        self.row_list = []
+        self.finished_date_list = []
+        self.finished_second_list = []
+        self.skipped_job_num = 0
+        self.lsb_acct_inode = None
+        self.lsb_acct_offset = None
+        self.collected = False
+        self.collect_seconds = 0.0
+
+    def collect(self):
+        """
+        Run bjobs command (only once) and save the job records.
+        bjobs output is parsed as a stream (common_lsf.iter_bjobs_uf_info), every job is switched into a record (or
+        skipped if it is finished before begin_second) as soon as it is parsed, so the whole bjobs dict is never built.
+        """
+        if self.collected:
+            return
+
+        start_second = time.time()
+        job_set = set()
+
+        for (job, job_dic) in common_lsf.iter_bjobs_uf_info(self.command, tool=self.tool, lsf_unit_for_limits=self.lsf_unit_for_limits):
+            # Same as get_bjobs_uf_info(), a job is saved once.
+            if job in job_set:
+                continue
+
+            job_set.add(job)
+            self.add_job(job, job_dic, common_lsf.get_bjobs_uf_time_second(job_dic['finished_time']))
+
+        self.collected = True
+        self.collect_seconds = time.time() - start_second
+
+    def add_job(self, job, job_dic, finished_second=None):
+        """
+        Switch job_dic (from get_bjobs_uf_info) into a record tuple and save it.
+        """
+        if (finished_second is not None) and (finished_second <= self.begin_second):
+            self.skipped_job_num += 1
+            return
+
+        value_list = []
+
+        for key in self.key_list:
+            if key == 'job':
+                value_list.append(job)
+            elif key in BJOBS_UF_LIST_KEY_LIST:
+                value_list.append(' '.join(job_dic[key]))
+            else:
+                value_list.append(job_dic[key])
+
+        self.row_list.append(tuple(value_list))
+        self.finished_second_list.append(finished_second)
+
+        if finished_second is None:
+            self.finished_date_list.append(job_dic['finished_time'])
+        else:
+            self.finished_date_list.append(time.strftime('%Y%m%d', time.localtime(finished_second)))
+
+    def __len__(self):
+        return len(self.row_list)
+
+    def get_value(self, row, key):
+        """
+        Get specified key value from a record tuple.
+        """
+        return row[self.key_index_dic[key]]
+
+    def get_date_row_dic(self, finished_job_mark=None):
+        """
+        Re-organize records with finished_date, only the new jobs are returned if finished_job_mark is specified.
+        Return {finished_date: [row, ...], ...}.
+        """
+        date_row_dic = {}
+
+        for (i, row) in enumerate(self.row_list):
+            if finished_job_mark and (not finished_job_mark.is_new(self.get_value(row, 'job'), self.finished_second_list[i])):
+                continue
+
+            date_row_dic.setdefault(self.finished_date_list[i], []).append(row)
+
+        return date_row_dic
+
+
+class LsbAcctSnapshot(BjobsUfSnapshot):
+    """
+    Finished job snapshot which is read from LSF accounting file lsb.acct instead of "bjobs -d".
+    lsb.acct is read from the specified (inode, byte offset), only the new records are parsed. If lsb.acct was
+    switched (inode changed), the rest of the old file (lsb.acct.1) is read first, then the new file from the head.
+    """
+    def __init__(self, lsb_acct_file, lsf_unit_for_limits='', begin_second=0, lsb_acct_inode=None, lsb_acct_offset=0):
+        super().__init__(command=lsb_acct_file, lsf_unit_for_limits=lsf_unit_for_limits, begin_second=begin_second)
+        self.lsb_acct_file = lsb_acct_file
+        self.begin_lsb_acct_inode = lsb_acct_inode
+        self.begin_lsb_acct_offset = lsb_acct_offset
+
+    def read_lsb_acct_file(self, lsb_acct_file, offset):
+        """
+        Parse the complete records of lsb_acct_file from offset, return the offset after the last complete record.
+        """
+        with open(lsb_acct_file, 'rb') as AF:
+            AF.seek(offset)
+
+            for line in AF:
+                # The last record may be on writing, read it next time.
+                if not line.endswith(b'\n'):
+                    break
+
+                offset += len(line)
+                job_info = common_lsf.parse_lsb_acct_line(line.decode('utf-8', 'ignore'), lsf_unit_for_limits=self.lsf_unit_for_limits)
+
+                if job_info:
+                    self.add_job(*job_info)
+
+        return offset
+
+    def collect(self):
+        """
+        Read the new records of lsb.acct (only once).
+        """
+        if self.collected:
+            return
+
+        start_second = time.time()
+
+        if not os.path.exists(self.lsb_acct_file):
+            common.bprint(f'{self.lsb_acct_file}: No such lsb.acct file.', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+        else:
+            lsb_acct_stat = os.stat(self.lsb_acct_file)
+            offset = self.begin_lsb_acct_offset
+
+            if self.begin_lsb_acct_inode != lsb_acct_stat.st_ino:
+                old_lsb_acct_file = str(self.lsb_acct_file) + '.1'
+
+                if (self.begin_lsb_acct_inode is not None) and os.path.exists(old_lsb_acct_file) and (os.stat(old_lsb_acct_file).st_ino == self.begin_lsb_acct_inode):
+                    self.read_lsb_acct_file(old_lsb_acct_file, offset)
+
+                offset = 0
+            elif offset > lsb_acct_stat.st_size:
+                offset = 0
+
+            self.lsb_acct_inode = lsb_acct_stat.st_ino
+            self.lsb_acct_offset = self.read_lsb_acct_file(self.lsb_acct_file, offset)
+
+        self.collected = True
+        self.collect_seconds = time.time() - start_second
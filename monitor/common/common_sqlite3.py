@@ -344,6 +344,62 @@ def insert_into_sql_table(db_file, orig_conn, table_name, value_string, commit=T
             conn.close()
 
 
+def insert_many_into_sql_table(db_file, orig_conn, table_name, row_list, commit=True, replace=False):
+    """
+    Insert rows (tuple or list, with table key order) into sql table with executemany and bound parameters.
+    All rows are written on one transaction, existing rows (same primary key) are ignored (or replaced if replace is True).
+    Return the number of inserted rows.
+    """
+    inserted_num = 0
+
+    if not row_list:
+        return inserted_num
+
+    (result, conn, curs) = connect_preprocess(db_file, orig_conn, mode='write')
+
+    if (result == 'failed') or (result == 'locked'):
+        return inserted_num
+
+    try:
+        placeholder_string = ', '.join(['?'] * len(row_list[0]))
+        conflict_string = 'REPLACE' if replace else 'IGNORE'
+        command = "INSERT OR " + str(conflict_string) + " INTO '" + str(table_name) + "' VALUES (" + str(placeholder_string) + ")"
+        curs.executemany(command, row_list)
+        inserted_num = curs.rowcount
+        curs.close()
+
+        if commit:
+            conn.commit()
+    except Exception as error:
+        common.bprint(f'Failed on inserting rows into table "{table_name}" on db file "{db_file}".', level='Error')
+        common.bprint(error, color='red', display_method=1, indent=9)
+    finally:
+        if commit and orig_conn == '':
+            conn.close()
+
+    return inserted_num
+
+
+def tune_sql_connection(conn, journal_mode='', synchronous='NORMAL', cache_size=-65536):
+    """
+    Tune connection for bulk write with PRAGMAs.
+    journal_mode: "WAL" or "" (keep current journal mode, the default rollback journal is safe on NFS).
+                  WAL leaves no -journal file, so connect_db_file() cannot detect busy databases on WAL mode.
+    synchronous:  "NORMAL" is safe for sampled data and much faster than "FULL".
+    cache_size:   Negative value means KiB, default is 64MB.
+    """
+    try:
+        if journal_mode:
+            conn.execute('PRAGMA journal_mode=' + str(journal_mode))
+
+        conn.execute('PRAGMA synchronous=' + str(synchronous))
+        conn.execute('PRAGMA cache_size=' + str(cache_size))
+        conn.execute('PRAGMA temp_store=MEMORY')
+    except Exception as error:
+        common.bprint('Failed on tuning database connection.', level='Warning')
+        common.bprint(error, color='yellow', display_method=1, indent=11)
+
+
 def update_sql_table_data(db_file, orig_conn, table_name, set_condition='', where_condition='', commit=True):
     """
     Update sql table with set_condition on where_condition.
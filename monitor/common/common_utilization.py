@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import numpy as np
+
+if 'LSFMONITOR_INSTALL_PATH' in os.environ:
+    sys.path.append(str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+
+# Utilization metrics, the last axis of UtilizationArray.value.
+UTILIZATION_KEY_LIST = ['slot', 'cpu', 'mem']
+
+
+def switch_value_array(value_list):
+    """
+    Switch metric values (numbers, None, or strings of legacy tables) into a float array, invalid values are 0.
+    """
+    try:
+        value_array = np.array(value_list, dtype=np.float64)
+    except (TypeError, ValueError):
+        value_array = np.zeros(len(value_list), dtype=np.float64)
+
+        for (i, value) in enumerate(value_list):
+            try:
+                value_array[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+
+    return np.nan_to_num(value_array, nan=0.0)
+
+
+class UtilizationArray():
+    """
+    Utilization samples of one cluster on flat numpy arrays.
+    host_index: index on self.host_list of every sample.
+    bucket    : index on self.bucket_second of every sample.
+    value     : (sample_num, 3) float array of slot/cpu/mem, invalid values are 0 and values are clipped to 100.
+    Time buckets are sample seconds for detail data, or sample dates (bucket second is 12:00 of the day) for day
+    average data.
+    """
+    def __init__(self, host_data_dic, time_column='sample_second'):
+        self.host_list = list(host_data_dic.keys())
+        self.host_index_dic = {host: i for (i, host) in enumerate(self.host_list)}
+        host_index_list = [np.zeros(0, dtype=np.int64)]
+        time_list = [np.zeros(0, dtype=np.int64)]
+        value_list = [np.zeros((0, len(UTILIZATION_KEY_LIST)), dtype=np.float64)]
+
+        for (i, host) in enumerate(self.host_list):
+            data_dic = host_data_dic[host]
+            sample_num = len(data_dic[time_column])
+
+            if sample_num:
+                host_index_list.append(np.full(sample_num, i, dtype=np.int64))
+                time_list.append(np.array([int(sample_time) for sample_time in data_dic[time_column]], dtype=np.int64))
+                value_list.append(np.column_stack([switch_value_array(data_dic[key]) for key in UTILIZATION_KEY_LIST]))
+
+        self.host_index = np.concatenate(host_index_list)
+        self.value = np.minimum(np.concatenate(value_list), 100)
+
+        # Time bucketing, np.unique sorts the sample times and gives the bucket of every sample.
+        (bucket_time, self.bucket) = np.unique(np.concatenate(time_list), return_inverse=True)
+        self.bucket = self.bucket.reshape(-1)
+
+        if time_column == 'sample_second':
+            self.bucket_second = bucket_time
+        else:
+            self.bucket_second = np.array([int(time.mktime(time.strptime(f'{date} 12:00:00', '%Y%m%d %H:%M:%S'))) for date in bucket_time.tolist()], dtype=np.int64)
+
+        self.sample_second = self.bucket_second[self.bucket]
+
+    def has_sample(self, begin_second=None, end_second=None):
+        """
+        Check whether there is any sample (between begin_second and end_second).
+        """
+        sample_mask = np.ones(len(self.sample_second), dtype=bool)
+
+        if begin_second is not None:
+            sample_mask &= (self.sample_second >= begin_second)
+
+        if end_second is not None:
+            sample_mask &= (self.sample_second <= end_second)
+
+        return bool(sample_mask.any())
+
+    def get_group_average(self, group_host_list, begin_second, end_second):
+        """
+        Average the samples (between begin_second and end_second) of every host group (like queues of one queue-host
+        mapping slice) per time bucket.
+        Host membership is a (group_num, host_num) boolean matrix, every sample is expanded to the (group, bucket) pairs
+        of its host and summed with np.bincount, so there is no Python loop on samples.
+        Return (average, count), (group_num, bucket_num, 3) float array and (group_num, bucket_num) int array.
+        """
+        group_num = len(group_host_list)
+        host_num = len(self.host_list)
+        bucket_num = len(self.bucket_second)
+        member_matrix = np.zeros((group_num, host_num), dtype=bool)
+
+        for (i, host_list) in enumerate(group_host_list):
+            member_matrix[i, [self.host_index_dic[host] for host in host_list if host in self.host_index_dic]] = True
+
+        sample_mask = (self.sample_second >= begin_second) & (self.sample_second <= end_second)
+        host_index = self.host_index[sample_mask]
+        bucket = self.bucket[sample_mask]
+        value = self.value[sample_mask]
+
+        # (host, group) pairs sorted with host, and the pair range of every host.
+        (pair_host, pair_group) = np.nonzero(member_matrix.T)
+        host_pair_count = np.bincount(pair_host, minlength=host_num)
+        host_pair_begin = np.cumsum(host_pair_count) - host_pair_count
+
+        # Expand samples to (sample, group) pairs.
+        repeat = host_pair_count[host_index]
+        pair_sample = np.repeat(np.arange(len(host_index)), repeat)
+        pair_offset = np.arange(len(pair_sample)) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+        pair_key = pair_group[np.repeat(host_pair_begin[host_index], repeat) + pair_offset] * bucket_num + bucket[pair_sample]
+
+        count = np.bincount(pair_key, minlength=group_num*bucket_num).reshape(group_num, bucket_num)
+        average = np.zeros((group_num, bucket_num, len(UTILIZATION_KEY_LIST)), dtype=np.float64)
+
+        for i in range(len(UTILIZATION_KEY_LIST)):
+            value_sum = np.bincount(pair_key, weights=value[pair_sample, i], minlength=group_num*bucket_num).reshape(group_num, bucket_num)
+            np.divide(value_sum, count, out=average[:, :, i], where=(count > 0))
+
+        return average, count
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+################################
+# File Name   : lsf_cache.py
+# Description : Keep the shared LSF command output cache (<db_path>/<cluster>/lsf_cache) current, bmonitor reads
+#               bhosts/lsload/bqueues/bmgroup/bjobs output from it instead of querying mbatchd by every user.
+################################
+import os
+import sys
+import time
+import argparse
+import concurrent.futures
+
+sys.path.insert(0, str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+from common import common
+from common import common_lsf
+
+from common import common_config
+
+config = common_config.load_config()
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+# LSF commands run by bmonitor (with the default arguments of common_lsf functions).
+DEFAULT_LSF_CACHE_COMMAND_LIST = ['lsid', 'badmin showconf mbd all', 'bhosts -w', 'bhosts -l', 'lsload -l', 'lshosts -w', 'bqueues -w', 'bqueues -l', 'bmgroup -w -r', 'busers all', 'bjobs -UF -u all -r']
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-c", "--commands",
+                        nargs='+',
+                        default=getattr(config, 'lsf_cache_commands', DEFAULT_LSF_CACHE_COMMAND_LIST),
+                        help='Specify the cached LSF commands, default is config "lsf_cache_commands".')
+    parser.add_argument("-i", "--interval",
+                        type=int,
+                        default=getattr(config, 'lsf_cache_interval', 30),
+                        help='Specify refresh interval (seconds), default is config "lsf_cache_interval" (30).')
+    parser.add_argument("-o", "--once",
+                        action='store_true',
+                        default=False,
+                        help='Refresh the cache once and exit.')
+
+    args = parser.parse_args()
+
+    if args.interval <= 0:
+        common.bprint(f'Invalid interval "{args.interval}", it must be a positive integer.', level='Error')
+        sys.exit(1)
+
+    return args.commands, args.interval, args.once
+
+
+def get_cache_dir():
+    """
+    Get (and create) the cache directory <db_path>/<cluster>/lsf_cache, it is the same one bmonitor reads.
+    Exit if it is not trusted by bmonitor (see common_lsf.set_command_cache).
+    """
+    (tool, tool_version, cluster, master) = common_lsf.get_lsid_info()
+
+    if not tool:
+        common.bprint('Not find any LSF/Volclava/Openlava environment!', level='Error')
+        sys.exit(1)
+
+    cluster_db_path = str(config.db_path) + '/' + str(cluster) if cluster else str(config.db_path) + '/lsfMonitor'
+    cache_dir = str(cluster_db_path) + '/lsf_cache'
+
+    common.create_dir(config.db_path, 0o1777)
+    common.create_dir(cluster_db_path, 0o1777)
+    common.create_dir(cache_dir, 0o755)
+
+    # bmonitor only reads the cache if it is owned by the db_path owner (or root) and not writable by others.
+    owner_uid_list = [0, os.stat(config.db_path).st_uid]
+
+    if os.getuid() not in owner_uid_list:
+        common.bprint(f'lsf_cache must be run by the owner of "{config.db_path}" or root, otherwise bmonitor does not trust the cache.', level='Error')
+        sys.exit(1)
+
+    if not common_lsf.is_trusted_cache_path(cache_dir, owner_uid_list, is_dir=True):
+        common.bprint(f'Cache directory "{cache_dir}" is not owned by the owner of "{config.db_path}" (or root), or it is writable by others.', level='Error')
+        sys.exit(1)
+
+    return cache_dir
+
+
+def refresh_lsf_cache(cache_dir, command_list):
+    """
+    Run the LSF commands in parallel (at most config.sample_command_max_workers) and save their output.
+    Failed commands are not saved, so bmonitor falls back to run them directly after the ttl.
+    """
+    max_workers = max(1, int(getattr(config, 'sample_command_max_workers', 4)))
+    start_second = time.time()
+    fail_num = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_dic = {executor.submit(common.run_command, command): command for command in command_list}
+
+        for future in concurrent.futures.as_completed(future_dic):
+            command = future_dic[future]
+            (return_code, stdout, stderr) = future.result()
+
+            if return_code == 0:
+                common_lsf.save_command_cache(cache_dir, command, stdout)
+            else:
+                fail_num += 1
+                common.bprint(f'Failed on running "{command}", cache is not updated.', date_format='%Y-%m-%d %H:%M:%S', level='Warning', indent=4)
+                common.bprint(str(stderr, 'utf-8', 'ignore').strip(), color='yellow', display_method=1, indent=4)
+
+    common.bprint(f'Refreshed {len(command_list)-fail_num}/{len(command_list)} LSF commands in {round(time.time()-start_second, 1)} seconds.', date_format='%Y-%m-%d %H:%M:%S')
+
+
+################
+# Main Process #
+################
+def main():
+    (command_list, interval, once) = read_args()
+    cache_dir = get_cache_dir()
+    common.bprint(f'CACHE_DIR : {cache_dir}')
+
+    while True:
+        start_second = time.time()
+        refresh_lsf_cache(cache_dir, command_list)
+
+        if once:
+            break
+
+        time.sleep(max(0, interval - (time.time() - start_second)))
+
+
+if __name__ == '__main__':
+    main()
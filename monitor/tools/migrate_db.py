@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import sys
+import argparse
+
+sys.path.insert(0, str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
+from common import common
+from common import common_archive
+from common import common_history
+from common import common_job_history
+from common import common_sqlite3
+
+from common import common_config
+
+config = common_config.load_config()
+
+os.environ['PYTHONUNBUFFERED'] = '1'
+
+
+def read_args():
+    """
+    Read in arguments.
+    """
+    parser = argparse.ArgumentParser()
+
+    # Only the families which had a legacy per-entity layout can be migrated.
+    family_list = [family for (family, family_dic) in common_history.HISTORY_FAMILY_DIC.items() if family_dic['legacy_prefix']]
+
+    parser.add_argument("-d", "--db_path",
+                        default='',
+                        help='Specify the sampling database directory, default is "<config.db_path>/monitor", the cluster name is accepted too.')
+    parser.add_argument("-f", "--families",
+                        nargs='+',
+                        default=family_list,
+                        choices=family_list,
+                        help='Specify the database families to migrate, default is all of them.')
+    parser.add_argument("--drop_legacy",
+                        action='store_true',
+                        default=False,
+                        help='Drop the legacy per-host/per-queue tables after migration.')
+    parser.add_argument("-u", "--user_rollup",
+                        action='store_true',
+                        default=False,
+                        help='Rebuild the user job rollup (user/user_rollup.db) from all user/<date>.db files.')
+    parser.add_argument("-j", "--job_index",
+                        action='store_true',
+                        default=False,
+                        help='Upgrade all job/<date>.db files (indexes and job_summary table), and build the job id index (job/job_index.db) from them.')
+
+    args = parser.parse_args()
+
+    if not args.db_path:
+        args.db_path = str(config.db_path) + '/monitor'
+    elif not re.match('^/.*$', args.db_path) and not os.path.isdir(args.db_path):
+        args.db_path = str(config.db_path) + '/' + str(args.db_path)
+
+    if not os.path.isdir(args.db_path):
+        common.bprint(f'{args.db_path}: No such database directory.', level='Error')
+        sys.exit(1)
+
+    return args.db_path, args.families, args.drop_legacy, args.user_rollup, args.job_index
+
+
+def migrate_db(db_path, family_list, drop_legacy):
+    """
+    Migrate legacy per-entity tables (load_<host>, queue_<queue>, ...) into long-format history tables.
+    """
+    common.bprint(f'DB_PATH : {db_path}')
+
+    for family in family_list:
+        db_file = common_history.get_history_db_file(db_path, family)
+
+        if not os.path.exists(db_file):
+            common.bprint(f'{db_file}: No such database file, skip.', level='Warning')
+            continue
+
+        common.bprint(f'>>> Migrating "{db_file}" ...')
+        (migrated_table_num, migrated_row_num) = common_history.migrate_history_db(db_file, family, drop_legacy)
+        common.bprint(f'Migrated {migrated_row_num} rows from {migrated_table_num} legacy tables into "{common_history.HISTORY_FAMILY_DIC[family]["table"]}".', indent=4)
+
+
+def build_user_rollup(db_path):
+    """
+    Rebuild the user job rollup of every user/<date>.db, sampled before the rollup is introduced.
+    """
+    user_db_path = str(db_path) + '/user'
+
+    if not os.path.isdir(user_db_path):
+        common.bprint(f'{user_db_path}: No such database directory, skip.', level='Warning')
+        return
+
+    user_rollup_db_file = common_history.get_user_rollup_db_file(user_db_path)
+    common.bprint(f'>>> Building user rollup "{user_rollup_db_file}" ...')
+    date_num = 0
+    user_table_num = 0
+
+    for db_file_name in sorted(os.listdir(user_db_path)):
+        if not re.match(r'^\d{8}\.db$', db_file_name):
+            continue
+
+        user_db_file = str(user_db_path) + '/' + str(db_file_name)
+        (result, user_db_conn) = common_sqlite3.connect_db_file(user_db_file)
+
+        if result != 'passed':
+            common.bprint(f'Failed on connecting user database file "{user_db_file}", skip.', level='Warning', indent=4)
+            continue
+
+        user_table_num += common_history.update_user_rollup(user_rollup_db_file, '', db_file_name[:8], user_db_file, user_db_conn)
+        user_db_conn.close()
+        date_num += 1
+
+    common.bprint(f'Rolled up {user_table_num} user tables of {date_num} dates.', indent=4)
+
+
+def build_job_index(db_path):
+    """
+    Upgrade every job/<date>.db to the latest schema and index job id -> date of it, they are sampled before the
+    job index is introduced.
+    """
+    job_db_path = str(db_path) + '/job'
+
+    if not os.path.isdir(job_db_path):
+        common.bprint(f'{job_db_path}: No such database directory, skip.', level='Warning')
+        return
+
+    job_index_db_file = common_job_history.get_job_index_db_file(job_db_path)
+    common.bprint(f'>>> Building job index "{job_index_db_file}" ...')
+    job_index_date_list = common_job_history.get_job_index_date_list(job_index_db_file, '') if os.path.exists(job_index_db_file) else []
+    date_num = 0
+    job_num = 0
+    upgrade_num = 0
+
+    for date in sorted(common_job_history.get_job_db_date_list(job_db_path)):
+        job_db_file = common_job_history.get_job_db_file(job_db_path, date)
+
+        # Archived dates are indexed before they are archived, index the jobs of the archive if it is missing.
+        if job_db_file.endswith(common_archive.ARCHIVE_SUFFIX):
+            if str(date) not in job_index_date_list:
+                job_list = [row[0] for row in common_archive.read_archive_rows(job_db_file, ['job', ])]
+
+                if job_list:
+                    job_num += max(0, common_job_history.update_job_index(job_index_db_file, '', date, job_db_file, None, job_list=job_list, complete=True))
+                    date_num += 1
+
+            continue
+
+        (result, job_db_conn) = common_sqlite3.connect_db_file(job_db_file, mode='write')
+
+        if result != 'passed':
+            common.bprint(f'Failed on connecting job database file "{job_db_file}", skip.', level='Warning', indent=4)
+            continue
+
+        if common_job_history.upgrade_job_db(job_db_file, job_db_conn, date):
+            upgrade_num += 1
+
+        job_num += max(0, common_job_history.update_job_index(job_index_db_file, '', date, job_db_file, job_db_conn))
+        job_db_conn.close()
+        date_num += 1
+
+    common.bprint(f'Upgraded {upgrade_num} job database files, indexed {job_num} jobs of {date_num} dates.', indent=4)
+
+
+################
+# Main Process #
+################
+def main():
+    (db_path, family_list, drop_legacy, user_rollup, job_index) = read_args()
+    migrate_db(db_path, family_list, drop_legacy)
+
+    if user_rollup:
+        build_user_rollup(db_path)
+
+    if job_index:
+        build_job_index(db_path)
+
+
+if __name__ == '__main__':
+    main()
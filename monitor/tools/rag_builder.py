@@ -16,6 +16,7 @@ import numpy as np
 
 sys.path.insert(0, str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
+from common import common_rag
 
 from common import common_config
 
@@ -44,6 +45,10 @@ def read_args():
                         nargs='+',
                         default=[],
                         help='Delete documents from the RAG database (match by filename substring).')
+    parser.add_argument('--pack',
+                        action='store_true',
+                        default=False,
+                        help='Only (re)generate the memory-mapped chunk store (<prefix>_chunks.pack) from existing json files.')
     parser.add_argument('--rebuild',
                         action='store_true',
                         default=False,
@@ -86,8 +91,8 @@ def read_args():
 
     args = parser.parse_args()
 
-    if not args.input_files and not args.list and not args.delete:
-        parser.error('one of -i/--input_files, -l/--list, or -d/--delete is required.')
+    if not args.input_files and not args.list and not args.delete and not args.pack:
+        parser.error('one of -i/--input_files, -l/--list, -d/--delete, or --pack is required.')
 
     return args
 
@@ -105,6 +110,7 @@ class RagBuilder():
         self.output_dir = args.output_dir if args.output_dir else os.path.join(os.environ.get('LSFMONITOR_INSTALL_PATH', '.'), 'db', 'ai')
         prefix = args.prefix
         self.chunks_file = os.path.join(self.output_dir, f'{prefix}_chunks.json')
+        self.pack_file = common_rag.get_rag_pack_file(self.chunks_file)
         self.faiss_file = os.path.join(self.output_dir, f'{prefix}_faiss.index')
         self.metadata_file = os.path.join(self.output_dir, f'{prefix}_metadata.json')
         self.embeddings_file = os.path.join(self.output_dir, f'{prefix}_embeddings.npy')
@@ -566,7 +572,10 @@ class RagBuilder():
 
         common.bprint(f'  Saved {self.chunks_file} ({len(chunks)} chunks)')
 
-        faiss.write_index(faiss_index, self.faiss_file)
+        # Replace the index atomically, bmonitor/bsample may have it memory-mapped.
+        tmp_faiss_file = str(self.faiss_file) + '.' + str(os.getpid()) + '.tmp'
+        faiss.write_index(faiss_index, tmp_faiss_file)
+        os.replace(tmp_faiss_file, self.faiss_file)
         common.bprint(f'  Saved {self.faiss_file}')
 
         with open(self.metadata_file, 'w') as f:
@@ -577,6 +586,32 @@ class RagBuilder():
         np.save(self.embeddings_file, embeddings)
         common.bprint(f'  Saved {self.embeddings_file}')
 
+        # The pack is written last, so it is never older than the json files.
+        common_rag.write_rag_pack(self.pack_file, chunks, metadata)
+        common.bprint(f'  Saved {self.pack_file}')
+
+    def save_pack(self):
+        """Generate the memory-mapped chunk store from existing chunks/metadata json files."""
+        if not os.path.exists(self.chunks_file):
+            common.bprint(f'No chunks file found: {self.chunks_file}', level='Error')
+            return
+
+        try:
+            with open(self.chunks_file, 'r', errors='replace') as f:
+                chunks = json.load(f)
+
+            metadata = []
+
+            if os.path.exists(self.metadata_file):
+                with open(self.metadata_file, 'r', errors='replace') as f:
+                    metadata = json.load(f)
+        except Exception as error:
+            common.bprint(f'Failed to load RAG json files: {error}', level='Error')
+            return
+
+        common_rag.write_rag_pack(self.pack_file, chunks, metadata)
+        common.bprint(f'Saved {self.pack_file} ({len(chunks)} chunks)')
+
     def list_sources(self):
         """List all documents indexed in the RAG database."""
         if not os.path.exists(self.metadata_file):
@@ -809,6 +844,8 @@ def main():
 
     if args.list:
         rag_builder.list_sources()
+    elif args.pack:
+        rag_builder.save_pack()
     elif args.delete:
         rag_builder.delete_sources(args.delete)
     else:
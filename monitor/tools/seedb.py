@@ -7,6 +7,7 @@ import argparse
 sys.path.insert(0, str(os.environ['LSFMONITOR_INSTALL_PATH']) + '/monitor')
 from common import common
 from common import common_sqlite3
+from common import common_archive
 
 from common import common_config
 
@@ -23,7 +24,7 @@ def read_args():
 
     parser.add_argument("-d", "--database",
                         required=True,
-                        help='Required argument, specify the datebase file.')
+                        help='Required argument, specify the datebase file (or the compressed .archive file).')
     parser.add_argument("-t", "--tables",
                         nargs='+',
                         default=[],
@@ -32,6 +33,10 @@ def read_args():
                         nargs='+',
                         default=[],
                         help='Specify the table keys you want to review, make sure the table keys exist.')
+    parser.add_argument("-w", "--where",
+                        nargs='+',
+                        default=[],
+                        help='Specify "key=value" filters (AND), like "user=liyanqing status=EXIT", indexed keys are searched without a table scan.')
     parser.add_argument("-n", "--number",
                         type=int,
                         default=0,
@@ -52,7 +57,17 @@ def read_args():
             common.bprint(f'{args.database}: No such database file.', level='Error')
             sys.exit(1)
 
-    return args.database, args.tables, args.keys, args.number
+    where_dic = {}
+
+    for where in args.where:
+        if not re.match(r'^\S+?=.*$', where):
+            common.bprint(f'{where}: Invalid filter, it must be "key=value".', level='Error')
+            sys.exit(1)
+
+        (key, value) = where.split('=', 1)
+        where_dic[key] = value
+
+    return args.database, args.tables, args.keys, where_dic, args.number
 
 
 def get_length(input_list):
@@ -70,10 +85,53 @@ def get_length(input_list):
     return length
 
 
-def seedb(db_file, table_list, key_list, number):
+def get_archive_data_dic(db_file, key_list, where_dic, number):
+    """
+    Get {key: value_list} of archive file rows like common_sqlite3.get_sql_table_data, with "key=value" filters.
+    """
+    archive = common_archive.ArchiveFile(db_file)
+    key_list = [key for key in key_list if key in archive.column_list] if key_list else archive.column_list
+    data_dic = {key: [] for key in key_list}
+    read_key_list = list(dict.fromkeys(key_list + list(where_dic.keys())))
+
+    if [key for key in where_dic.keys() if key not in archive.column_list]:
+        return data_dic
+
+    row_num = 0
+
+    for row in archive.iter_rows(read_key_list):
+        row_dic = dict(zip(read_key_list, row))
+
+        if [key for (key, value) in where_dic.items() if str(row_dic[key]) != value]:
+            continue
+
+        for key in key_list:
+            data_dic[key].append(row_dic[key])
+
+        row_num += 1
+
+        if number and (row_num >= number):
+            break
+
+    return data_dic
+
+
+def seedb(db_file, table_list, key_list, where_dic, number):
     common.bprint(f'DB_FILE : {db_file}')
 
-    if len(table_list) == 0:
+    # Archive file has one table, show its columns if table is not specified.
+    if db_file.endswith(common_archive.ARCHIVE_SUFFIX) and (len(table_list) == 0):
+        archive = common_archive.ArchiveFile(db_file)
+        common.bprint(f'ROWS    : {archive.row_num}')
+        common.bprint('COLUMNS :')
+        common.bprint('========')
+
+        for column in archive.column_list:
+            common.bprint(column)
+
+        common.bprint('========')
+        common.bprint('Use "-t archive" to review the rows.')
+    elif len(table_list) == 0:
         table_list = common_sqlite3.get_sql_table_list(db_file, '')
 
         common.bprint('TABLES  :')
@@ -90,10 +148,17 @@ def seedb(db_file, table_list, key_list, number):
 
             select_condition = ''
 
+            if where_dic:
+                select_condition = 'WHERE ' + ' AND '.join([f'"{key}" = ?' for key in where_dic.keys()])
+
             if number > 0:
-                select_condition = 'limit ' + str(number)
+                select_condition = str(select_condition) + ' limit ' + str(number)
+
+            if db_file.endswith(common_archive.ARCHIVE_SUFFIX):
+                data_dic = get_archive_data_dic(db_file, key_list, where_dic, number)
+            else:
+                data_dic = common_sqlite3.get_sql_table_data(db_file, '', table, key_list, select_condition.strip(), select_params=list(where_dic.values()))
 
-            data_dic = common_sqlite3.get_sql_table_data(db_file, '', table, key_list, select_condition)
             display_key_list = list(data_dic.keys())
 
             if len(display_key_list) == 0:
@@ -132,8 +197,8 @@ def seedb(db_file, table_list, key_list, number):
 # Main Process #
 ################
 def main():
-    (db_file, table_list, key_list, number) = read_args()
-    seedb(db_file, table_list, key_list, number)
+    (db_file, table_list, key_list, where_dic, number) = read_args()
+    seedb(db_file, table_list, key_list, where_dic, number)
 
 
 if __name__ == '__main__':
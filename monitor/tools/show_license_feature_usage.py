@@ -1,9 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
-import re
 import sys
-import time
-import datetime
 import argparse
 
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QFrame, QGridLayout, QTableWidget, QTableWidgetItem, QHeaderView
@@ -66,15 +63,16 @@ class ShowLicenseFreatureUsage(QMainWindow):
         my_show_message = ShowMessage('Info', 'Checking LSF job info ...')
         my_show_message.start()
 
-        self.job_dic = common_lsf.get_bjobs_info()
+        self.license_job_index = common_license.LicenseJobIndex(common_lsf.get_bjobs_info())
 
         my_show_message.terminate()
 
         self.init_ui()
 
     def get_license_feature_usage(self):
-        # Get self.license_dic.
-        my_get_license_info = common_license.GetLicenseInfo(specified_servers=[self.server, ], specified_feature=self.feature, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command)
+        # Get self.license_dic, fresh lmstat output of bmonitor is reused.
+        common_license.set_license_cache(common_license.get_license_cache_dir(), getattr(config, 'license_cache_ttl', 120))
+        my_get_license_info = common_license.GetLicenseInfo(specified_servers=[self.server, ], specified_feature=self.feature, lmstat_path=config.lmstat_path, bsub_command=config.lmstat_bsub_command, timeout=getattr(config, 'lmstat_timeout', 60))
         license_dic = my_get_license_info.get_license_info()
         license_feature_usage_dic_list = []
 
@@ -118,58 +116,6 @@ class ShowLicenseFreatureUsage(QMainWindow):
 
         self.gen_main_table()
 
-    def switch_bjobs_submit_time(self, submit_time, compare_second='', format=''):
-        """
-        Switch submit_time format from "%a %m/%d %H:%M" to specified format (or start_second by default).
-        """
-        new_submit_time = submit_time
-
-        if submit_time and (submit_time != 'N/A') and (submit_time != 'RESERVATION'):
-            # Switch submit_time to start_second.
-            current_year = datetime.date.today().year
-            submit_time_with_year = str(current_year) + ' ' + str(submit_time)
-            submit_time_with_year = re.sub('  ', ' ', submit_time_with_year)
-
-            try:
-                start_second = time.mktime(time.strptime(submit_time_with_year, '%Y %b %d %H:%M'))
-            except Exception:
-                common.bprint(f'*Warning*: Variable "submit_time_with_year", value is "{submit_time_with_year}", not follow the time format "%Y %b %d %H:%M".')
-                return new_submit_time
-
-            if not compare_second:
-                compare_second = time.time()
-
-            if int(start_second) > int(compare_second):
-                current_year = int(datetime.date.today().year) - 1
-                submit_time_with_year = str(current_year) + ' ' + str(submit_time)
-                start_second = time.mktime(time.strptime(submit_time_with_year, '%Y %b %d %H:%M'))
-
-            # Switch start_second to expected time format.
-            if format:
-                new_submit_time = time.strftime(format, time.localtime(start_second))
-            else:
-                new_submit_time = start_second
-
-        return new_submit_time
-
-    def get_job_info(self, user, submit_host, execute_host, start_time):
-        jobid_list = []
-
-        for (i, jobid) in enumerate(self.job_dic['JOBID']):
-            if (user == self.job_dic['USER'][i]) and ((submit_host == self.job_dic['FROM_HOST'][i]) or (submit_host == 'N/A')) and re.search(execute_host, self.job_dic['EXEC_HOST'][i]):
-                license_start_time = common_license.switch_start_time(start_time)
-                job_submit_time = self.switch_bjobs_submit_time(self.job_dic['SUBMIT_TIME'][i])
-
-                if int(license_start_time) >= int(job_submit_time):
-                    jobid_list.append(jobid)
-
-        if len(jobid_list) == 0:
-            return ''
-        elif len(jobid_list) == 1:
-            return jobid_list[0]
-        elif len(jobid_list) > 1:
-            return '*'
-
     def gen_main_table(self):
         self.main_table.setShowGrid(True)
         self.main_table.setColumnCount(0)
@@ -203,7 +149,7 @@ class ShowLicenseFreatureUsage(QMainWindow):
                 self.main_table.setItem(row, column, item)
 
             # Set "JOB" info.
-            jobid = self.get_job_info(license_feature_usage_dic['user'], license_feature_usage_dic['submit_host'], license_feature_usage_dic['execute_host'], license_feature_usage_dic['start_time'])
+            jobid = self.license_job_index.get_job(license_feature_usage_dic)
             item = QTableWidgetItem()
             item.setText(jobid)
             self.main_table.setItem(row, 6, item)